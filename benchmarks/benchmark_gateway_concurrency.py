@@ -0,0 +1,83 @@
+"""
+Stress benchmark of the gateway used from many threads
+
+Compares a default gateway with a thread-safe one (pool of scheduler proxies and py4j
+connections) on parallel status checks, result fetches and submissions.
+
+The server and the credentials are read from the PROACTIVE_URL, PROACTIVE_USERNAME and
+PROACTIVE_PASSWORD environment variables (or a .env file).
+
+    python benchmarks/benchmark_gateway_concurrency.py --threads 16 --calls 400 --submissions 32
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from proactive import ProActiveGateway
+
+
+def create_gateway(thread_safe, pool_size):
+    gateway = ProActiveGateway(os.getenv('PROACTIVE_URL'), thread_safe=thread_safe, pool_size=pool_size)
+    gateway.connect(os.getenv('PROACTIVE_USERNAME'), os.getenv('PROACTIVE_PASSWORD'))
+    assert gateway.isConnected(), "Failed to connect to the ProActive server!"
+    return gateway
+
+
+def submit_sample_job(gateway, name):
+    task = gateway.createPythonTask('sample_task')
+    task.setTaskImplementation('result = 42')
+    job = gateway.createJob(name)
+    job.addTask(task)
+    return gateway.submitJob(job)
+
+
+def run(label, threads, count, function):
+    latencies = []
+
+    def timed(index):
+        start = time.perf_counter()
+        function(index)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print("{:<28} {:>6} calls {:>8.2f} s {:>9.1f} calls/s   p50 {:>7.1f} ms   p95 {:>7.1f} ms".format(
+        label, count, elapsed, count / elapsed,
+        statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95) - 1] * 1000))
+
+
+def benchmark(thread_safe, args):
+    print("== thread_safe={} ({} threads) ==".format(thread_safe, args.threads))
+    gateway = create_gateway(thread_safe, args.pool_size)
+    try:
+        job_id = submit_sample_job(gateway, 'concurrency_benchmark_reference')
+        gateway.waitForJob(job_id, 120000)
+        run('getJobStatus', args.threads, args.calls, lambda _: gateway.getJobStatus(job_id))
+        run('isJobFinished', args.threads, args.calls, lambda _: gateway.isJobFinished(job_id))
+        run('getJobResultMap', args.threads, args.calls, lambda _: gateway.getJobResultMap(job_id))
+        submitted = []
+        run('submitJob', args.threads, args.submissions,
+            lambda index: submitted.append(submit_sample_job(gateway, 'concurrency_benchmark_{}'.format(index))))
+        for submitted_job_id in submitted:
+            gateway.killJob(submitted_job_id)
+    finally:
+        gateway.close()
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16, help="Number of caller threads")
+    parser.add_argument('--calls', type=int, default=400, help="Number of status and result calls per operation")
+    parser.add_argument('--submissions', type=int, default=32, help="Number of submitted jobs")
+    parser.add_argument('--pool-size', type=int, default=None, help="Pool size of the thread-safe gateway")
+    args = parser.parse_args()
+    benchmark(False, args)
+    benchmark(True, args)
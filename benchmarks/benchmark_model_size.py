@@ -0,0 +1,97 @@
+"""
+Memory and time benchmark of large job models
+
+Builds a job of one split task, many generated Python tasks depending on it and one merge
+task depending on all of them, like a replicated or generated workflow. Then looks the
+tasks up by name and removes them from the merge task and the job. With --variants, also
+clones the job into variants overriding a variable and the implementation of the merge task.
+
+No server is needed.
+
+    python benchmarks/benchmark_model_size.py --tasks 100000
+    python benchmarks/benchmark_model_size.py --tasks 1000 --variants 10000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from proactive.model.ProactiveJob import ProactiveJob
+from proactive.model.ProactiveTask import ProactivePythonTask
+
+
+def build_job(count):
+    job = ProactiveJob('benchmark_model_size')
+    split = ProactivePythonTask('split')
+    split.setTaskImplementation('result = 0')
+    job.addTask(split)
+    merge = ProactivePythonTask('merge')
+    merge.setTaskImplementation('result = len(results)')
+    for index in range(count):
+        task = ProactivePythonTask('task_' + str(index))
+        task.setTaskImplementation('result = ' + str(index))
+        task.addDependency(split)
+        merge.addDependency(task)
+        job.addTask(task)
+    job.addTask(merge)
+    return job, merge
+
+
+def build_variants(template, count):
+    variants = []
+    for index in range(count):
+        variant = template.clone('variant_' + str(index))
+        variant.addVariable('SEED', str(index))
+        variant.getTaskForUpdate('merge').setTaskImplementation('result = ' + str(index))
+        variants.append(variant)
+    return variants
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    value = function()
+    print("{:<32} {:>9.1f} ms".format(label, (time.perf_counter() - start) * 1000))
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=100000, help='Number of generated tasks')
+    parser.add_argument('--variants', type=int, default=0, help='Number of cloned variants of the job')
+    args = parser.parse_args()
+
+    job, merge = timed("build {} tasks".format(args.tasks), lambda: build_job(args.tasks))
+
+    # Measured on a second build, since tracing the allocations slows them down
+    gc.collect()
+    tracemalloc.start()
+    traced = build_job(args.tasks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+    print("{:<32} {:>9.1f} MiB (peak {:.1f} MiB, {:.0f} bytes/task)".format(
+        "model memory", current / 2 ** 20, peak / 2 ** 20, current / args.tasks))
+
+    if args.variants:
+        timed("clone {} variants".format(args.variants), lambda: build_variants(job, args.variants))
+        gc.collect()
+        tracemalloc.start()
+        traced = build_variants(job, args.variants)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del traced
+        print("{:<32} {:>9.1f} MiB ({:.0f} bytes/variant)".format(
+            "variants memory", current / 2 ** 20, current / args.variants))
+        # The tasks of the template are now shared with the variants, so frozen
+        merge = job.getTaskForUpdate('merge')
+
+    names = ['task_' + str(index) for index in range(0, args.tasks, 7)]
+    timed("look up {} tasks by name".format(len(names)), lambda: [job.getTask(name) for name in names])
+    tasks = job.getTasks()[1:-1]
+    timed("remove {} dependencies".format(len(tasks)), lambda: [merge.removeDependency(task) for task in tasks])
+    timed("remove {} tasks".format(len(tasks)), lambda: [job.removeTask(task) for task in tasks])
+    assert len(job.getTasks()) == 2 and not merge.hasDependencies()
+
+
+if __name__ == '__main__':
+    main()
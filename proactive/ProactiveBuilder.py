@@ -1,5 +1,3 @@
-from py4j.java_collections import MapConverter
-
 from .model.ProactiveTask import *
 import logging
 import logging.config
@@ -88,11 +86,20 @@ class ProactiveTaskBuilder(ProactiveBuilder):
         self.task_error_policy = self.proactive_factory.create_task_error_policy(_task_error_policy)
         return self.task_error_policy
 
+    def __create_url_implementation__(self, implementation_url):
+        # When enabled, catalog scripts are inlined from the catalog cache instead of being referenced by URL
+        catalog_cache = self.proactive_factory.catalog_cache
+        if catalog_cache is not None and catalog_cache.inline_scripts:
+            implementation = catalog_cache.get_url(implementation_url)
+            if implementation is not None:
+                return implementation
+        return self.proactive_factory.getRuntimeGateway().jvm.java.net.URL(implementation_url)
+
     def __create_script__(self):
         assert self.proactive_task_model.getScriptLanguage() is not None
         task_implementation = ''
         if self.proactive_task_model.getTaskImplementationFromURL() is not None:
-            task_implementation = self.proactive_factory.getRuntimeGateway().jvm.java.net.URL(self.proactive_task_model.getTaskImplementationFromURL())
+            task_implementation = self.__create_url_implementation__(self.proactive_task_model.getTaskImplementationFromURL())
         else:
             task_implementation = self.proactive_task_model.getTaskImplementation()
         self.script = self.proactive_factory.create_simple_script(
@@ -150,7 +157,7 @@ class ProactiveTaskBuilder(ProactiveBuilder):
     def __create_fork_environment__(self, fork_environment):
         fork_implementation = ''
         if fork_environment.getImplementationFromURL() is not None:
-            fork_implementation = self.proactive_factory.getRuntimeGateway().jvm.java.net.URL(fork_environment.getImplementationFromURL())
+            fork_implementation = self.__create_url_implementation__(fork_environment.getImplementationFromURL())
         else:
             fork_implementation = fork_environment.getImplementation()
         simple_script = self.proactive_factory.create_simple_script(
@@ -172,7 +179,7 @@ class ProactiveTaskBuilder(ProactiveBuilder):
     def __create_pre_script__(self, pre_script):
         pre_script_implementation = ''
         if pre_script.getImplementationFromURL() is not None:
-            pre_script_implementation = self.proactive_factory.getRuntimeGateway().jvm.java.net.URL(pre_script.getImplementationFromURL())
+            pre_script_implementation = self.__create_url_implementation__(pre_script.getImplementationFromURL())
         else:
             pre_script_implementation = pre_script.getImplementation()
         simple_script = self.proactive_factory.create_simple_script(
@@ -184,7 +191,7 @@ class ProactiveTaskBuilder(ProactiveBuilder):
     def __create_post_script__(self, post_script):
         post_script_implementation = ''
         if post_script.getImplementationFromURL() is not None:
-            post_script_implementation = self.proactive_factory.getRuntimeGateway().jvm.java.net.URL(post_script.getImplementationFromURL())
+            post_script_implementation = self.__create_url_implementation__(post_script.getImplementationFromURL())
         else:
             post_script_implementation = post_script.getImplementation()
         simple_script = self.proactive_factory.create_simple_script(
@@ -252,20 +259,13 @@ class ProactiveTaskBuilder(ProactiveBuilder):
                 self.__create_post_script__(self.proactive_task_model.getPostScript())
             )
 
+        converter = self.proactive_factory.get_converter()
         if self.proactive_task_model.hasVariables():
             self.logger.debug('Adding variables')
-            variables = {}
-            for key, value in self.proactive_task_model.getVariables().items():
-                task_var = self.proactive_factory.create_task_variable()
-                task_var.setName(key)
-                task_var.setValue(value)
-                variables[key] = task_var
-            javamap = MapConverter().convert(variables, self.proactive_factory.getRuntimeGateway()._gateway_client)
-            self.script_task.setVariables(javamap)
+            self.script_task.setVariables(converter.to_task_variables(self.proactive_task_model.getVariables()))
 
         self.logger.debug('Adding the generic information')
-        for key, value in self.proactive_task_model.getGenericInformation().items():
-            self.script_task.addGenericInformation(key, value)
+        converter.merge_generic_information(self.script_task, self.proactive_task_model.getGenericInformation())
 
         InputAccessMode = self.proactive_factory.get_input_access_mode()
         transferFromInputSpace = InputAccessMode.getAccessMode("transferFromInputSpace")
@@ -367,8 +367,19 @@ class ProactiveJobBuilder(ProactiveBuilder):
         """
         Create the Proactive java job
 
+        With a job build cache (see ProactiveJobBuildCache), a model built before and unchanged
+        since is not built again.
+
         :return: self
         """
+        build_cache = self.proactive_factory.job_build_cache
+        if build_cache is not None:
+            self.proactive_job = build_cache.get_job(self.proactive_job_model, self.__create_job__)
+        else:
+            self.proactive_job = self.__create_job__()
+        return self
+
+    def __create_job__(self):
         self.logger.debug('Building the job')
         self.proactive_job = self.proactive_factory.create_job()
         self.proactive_job.setName(self.proactive_job_model.getJobName())
@@ -383,20 +394,13 @@ class ProactiveJobBuilder(ProactiveBuilder):
             # proactive_task_list.append(proactive_task)
             proactive_task_map[proactive_task_model.getTaskName()] = [proactive_task_model, proactive_task]
 
+        converter = self.proactive_factory.get_converter()
         if self.proactive_job_model.hasVariables():
             self.logger.debug('Adding variables')
-            variables = {}
-            for key, value in self.proactive_job_model.getVariables().items():
-                task_var = self.proactive_factory.create_job_variable()
-                task_var.setName(key)
-                task_var.setValue(value)
-                variables[key] = task_var
-            javamap = MapConverter().convert(variables, self.proactive_factory.getRuntimeGateway()._gateway_client)
-            self.proactive_job.setVariables(javamap)
+            self.proactive_job.setVariables(converter.to_job_variables(self.proactive_job_model.getVariables()))
 
         self.logger.debug('Adding the generic information')
-        for key, value in self.proactive_job_model.getGenericInformation().items():
-            self.proactive_job.addGenericInformation(key, value)
+        converter.merge_generic_information(self.proactive_job, self.proactive_job_model.getGenericInformation())
 
         self.logger.debug('Adding dependencies to the tasks')
         # for proactive_task in proactive_task_list:
@@ -414,7 +418,7 @@ class ProactiveJobBuilder(ProactiveBuilder):
         # if self.proactive_job_model.getOutputFolder() is not None:
         #     self.proactive_job.setOutputSpace(self.proactive_job_model.getOutputFolder())
 
-        return self
+        return self.proactive_job
 
     def toString(self):
         if self.getProactiveJob() is not None:
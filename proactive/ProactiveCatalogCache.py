@@ -0,0 +1,294 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('ProactiveCatalogCache')
+
+_CATALOG_URL = re.compile(r'^(?P<base>.+?)/+catalog/buckets/(?P<bucket>[^/]+)/resources/(?P<name>[^/?#]+)/raw/?$')
+
+
+class _Entry:
+    __slots__ = ('content', 'etag', 'commit_time', 'validated_at', 'size')
+
+    def __init__(self, content, etag=None, commit_time=None, validated_at=0.0):
+        self.content = content
+        self.etag = etag
+        self.commit_time = commit_time
+        self.validated_at = validated_at
+        self.size = len(content.encode('utf-8'))
+
+
+class ProactiveCatalogCache:
+    """
+    Client-side cache of catalog object contents, in memory and optionally on disk.
+
+    A cached object is revalidated before being served: with an If-None-Match request
+    when the catalog sent an ETag (answered by an empty 304 when unchanged), else by
+    comparing the commit time of the object metadata. Within ``revalidate_after``
+    seconds of the last validation, it is served without any request. The catalog
+    requests of the cache do not check the session first: ProactiveRestApi does it once
+    per object, before calling the cache.
+
+    The memory and the disk directory are each bounded to ``max_size`` bytes, evicting
+    the least recently used objects.
+
+    The jobs built from models keep referencing their catalog scripts by URL, so that the
+    scheduler reads their latest revision. With ``inline_scripts``, the task builder
+    instead inlines the cached content of this server's catalog scripts in the jobs,
+    which saves a download per script and per task at each execution, but freezes
+    the script revision at build time.
+
+    - rest_api (ProactiveRestApi)
+    - cache_dir (str): A directory where the objects are also stored, to survive restarts (may be set later)
+    - max_size (int): Maximum total size of the cached contents, in bytes
+    - revalidate_after (float): Seconds during which a validated object is served as is (0 to revalidate it each time)
+    - max_workers (int): Concurrent downloads of prefetch_bucket()
+    - inline_scripts (bool): Whether the task builder inlines the catalog scripts (may be set later)
+    """
+
+    def __init__(self, rest_api, cache_dir=None, max_size=64 * 1024 * 1024, revalidate_after=5, max_workers=8,
+                 inline_scripts=False):
+        self.rest_api = rest_api
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        self.max_workers = max_workers
+        self.inline_scripts = inline_scripts
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    # Memory
+
+    def _remember(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            if entry.size > self.max_size:
+                return
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    # Disk
+
+    def _path(self, key):
+        digest = hashlib.sha1("{}/{}".format(*key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path + '.json', 'r') as meta_file:
+                meta = json.load(meta_file)
+            with open(path + '.data', 'r', encoding='utf-8') as data_file:
+                content = data_file.read()
+        except (OSError, ValueError):
+            return None
+        os.utime(path + '.data')
+        return _Entry(content, meta.get('etag'), meta.get('commit_time'))
+
+    def _store(self, key, entry):
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.data.tmp', 'w', encoding='utf-8') as data_file:
+                data_file.write(entry.content)
+            os.replace(path + '.data.tmp', path + '.data')
+            with open(path + '.json', 'w') as meta_file:
+                json.dump({'bucket': key[0], 'name': key[1], 'etag': entry.etag, 'commit_time': entry.commit_time}, meta_file)
+            self._trim_disk()
+        except OSError as e:
+            logger.warning(f"Failed to store {key[0]}/{key[1]} in {self.cache_dir}: {e}")
+
+    def _trim_disk(self):
+        files = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.data'):
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+                files.append((stat.st_mtime, stat.st_size, file_name[:-len('.data')]))
+        total = sum(size for _, size, _ in files)
+        for _, size, base_name in sorted(files):
+            if total <= self.max_size:
+                break
+            for suffix in ('.data', '.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, base_name + suffix))
+                except OSError:
+                    pass
+            total -= size
+
+    def _unstore(self, bucket_name=None, object_name=None):
+        if self.cache_dir is None:
+            return
+        if object_name is not None:
+            paths = [self._path((bucket_name, object_name))]
+        else:
+            try:
+                file_names = os.listdir(self.cache_dir)
+            except OSError:
+                return
+            paths = []
+            for file_name in file_names:
+                if not file_name.endswith('.json'):
+                    continue
+                path = os.path.join(self.cache_dir, file_name[:-len('.json')])
+                if bucket_name is not None:
+                    try:
+                        with open(path + '.json', 'r') as meta_file:
+                            if json.load(meta_file).get('bucket') != bucket_name:
+                                continue
+                    except (OSError, ValueError):
+                        continue
+                paths.append(path)
+        for path in paths:
+            for suffix in ('.data', '.json'):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+
+    # Catalog
+
+    def _commit_time(self, bucket_name, object_name):
+        metadata = self.rest_api.get_object_metadata_from_catalog(bucket_name, object_name, check_connection=False)
+        if not metadata:
+            return None
+        return metadata.get('commit_time_raw') or metadata.get('commit_time')
+
+    def _download(self, key, commit_time=None):
+        status_code, content, etag = self.rest_api.fetch_object_from_catalog(*key, check_connection=False)
+        if content is None:
+            logger.warning(f"Failed to fetch {key[0]}/{key[1]} from the catalog (HTTP {status_code})")
+            return None
+        if commit_time is None and not etag:
+            commit_time = self._commit_time(*key)
+        entry = _Entry(content, etag, commit_time, time.monotonic())
+        self._remember(key, entry)
+        self._store(key, entry)
+        return entry
+
+    def _revalidate(self, key, entry):
+        """Return the entry if it is still the latest version, else None."""
+        if entry.etag:
+            status_code, content, etag = self.rest_api.fetch_object_from_catalog(*key, etag=entry.etag, check_connection=False)
+            if status_code == 304:
+                return entry
+            if content is not None:
+                fresh = _Entry(content, etag, None, time.monotonic())
+                self._remember(key, fresh)
+                self._store(key, fresh)
+                return fresh
+            return None
+        if entry.commit_time is not None and self._commit_time(*key) == entry.commit_time:
+            return entry
+        return None
+
+    def get(self, bucket_name, object_name):
+        """
+        Get the content of a catalog object
+
+        :param bucket_name: The bucket name
+        :param object_name: The object name
+        :return: The object content, or None if it cannot be fetched
+        """
+        key = (bucket_name, object_name)
+        entry = self._lookup(key)
+        if entry is not None:
+            now = time.monotonic()
+            if self.revalidate_after and now - entry.validated_at < self.revalidate_after:
+                self.hits += 1
+                return entry.content
+            self.revalidations += 1
+            valid = self._revalidate(key, entry)
+            if valid is not None:
+                valid.validated_at = now
+                self.hits += 1
+                return valid.content
+        self.misses += 1
+        entry = self._download(key)
+        return None if entry is None else entry.content
+
+    def get_url(self, url, base_url=None):
+        """
+        Get the content of a catalog object from its raw URL
+        (e.g. https://server:8443/catalog/buckets/scripts/resources/fork_env_ai/raw)
+
+        :param url: The object URL
+        :param base_url: The server URL. Defaults to the one of the REST API: URLs of other servers are not resolved
+        :return: The object content, or None if the URL is not a catalog URL or cannot be fetched
+        """
+        if base_url is None and self.rest_api.base_url:
+            base_url = re.sub(r'/rest/?$', '', self.rest_api.base_url)
+        match = _CATALOG_URL.match(url)
+        if match is None or (base_url is not None and match.group('base').rstrip('/') != base_url.rstrip('/')):
+            return None
+        return self.get(match.group('bucket'), match.group('name'))
+
+    def prefetch_bucket(self, bucket_name, kind=None):
+        """
+        Download in parallel the objects of a bucket that are not cached at their latest revision
+
+        :param bucket_name: The bucket name
+        :param kind: If set, only the objects of this kind (e.g. 'Script/task') are prefetched
+        :return: The number of downloaded objects
+        """
+        to_download = []
+        for metadata in self.rest_api.list_objects_from_catalog(bucket_name):
+            if kind is not None and not str(metadata.get('kind', '')).startswith(kind):
+                continue
+            key = (bucket_name, metadata.get('name'))
+            commit_time = metadata.get('commit_time_raw') or metadata.get('commit_time')
+            entry = self._lookup(key)
+            if entry is not None and commit_time is not None and entry.commit_time == commit_time:
+                continue
+            to_download.append((key, commit_time))
+        if not to_download:
+            return 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='catalog-prefetch') as executor:
+            downloaded = list(executor.map(lambda item: self._download(*item), to_download))
+        count = sum(1 for entry in downloaded if entry is not None)
+        logger.debug(f"Prefetched {count} object(s) of the bucket {bucket_name}")
+        return count
+
+    def invalidate(self, bucket_name=None, object_name=None):
+        """Drop cached objects, in memory and on disk: one object, a whole bucket, or everything."""
+        with self._lock:
+            for key in list(self._entries):
+                if bucket_name is None or (key[0] == bucket_name and object_name in (None, key[1])):
+                    self._size -= self._entries.pop(key).size
+            self._unstore(bucket_name, None if bucket_name is None else object_name)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
@@ -0,0 +1,176 @@
+import json
+import logging
+
+from py4j.java_collections import MapConverter, SetConverter
+
+logger = logging.getLogger('ProactiveConverter')
+
+
+class ProactiveConverter:
+    """
+    Converts Python collections to Java ones in a constant number of py4j calls.
+
+    py4j's MapConverter and SetConverter issue one call per element. Here the
+    collection is encoded to JSON and decoded by a Jackson ObjectMapper on the Java
+    side, so a map of hundreds of job variables costs a single call. Merges into an
+    existing job or task are done on the Java side as well (copy, merge, set), the
+    existing variables keeping their model and description.
+
+    When Jackson is not available, the py4j converters are used instead.
+
+    - proactive_factory (ProactiveFactory)
+    """
+
+    def __init__(self, proactive_factory):
+        self.proactive_factory = proactive_factory
+        self.runtime_gateway = proactive_factory.getRuntimeGateway()
+        self._object_mapper = None
+        self._object_mapper_created = False
+        self._merging_object_mapper = None
+        self._java_types = {}
+
+    @property
+    def object_mapper(self):
+        if not self._object_mapper_created:
+            self._object_mapper = self.proactive_factory.create_object_mapper()
+            self._object_mapper_created = True
+            if self._object_mapper is None:
+                logger.info("Jackson is not available, falling back to the py4j collection converters and to field by field record conversion")
+        return self._object_mapper
+
+    def _java_class(self, class_name):
+        java_class = self._java_types.get(class_name)
+        if java_class is None:
+            java_class = self.runtime_gateway.jvm.java.lang.Class.forName(class_name)
+            self._java_types[class_name] = java_class
+        return java_class
+
+    def _variables_type(self, variable_class_name):
+        key = ('map', variable_class_name)
+        java_type = self._java_types.get(key)
+        if java_type is None:
+            java_type = self.object_mapper.getTypeFactory().constructMapType(
+                self._java_class('java.util.LinkedHashMap'),
+                self._java_class('java.lang.String'),
+                self._java_class(variable_class_name)
+            )
+            self._java_types[key] = java_type
+        return java_type
+
+    @staticmethod
+    def _to_string(value):
+        return value if value is None or isinstance(value, str) else str(value)
+
+    def to_java_map(self, python_dict):
+        """
+        Convert a dict of strings to a java.util.LinkedHashMap
+
+        :param python_dict: A dict whose keys and values are strings (other values are converted with str)
+        :return: A LinkedHashMap object
+        """
+        python_dict = {key: self._to_string(value) for key, value in (python_dict or {}).items()}
+        if self.object_mapper is None:
+            return MapConverter().convert(python_dict, self.runtime_gateway._gateway_client)
+        return self.object_mapper.readValue(json.dumps(python_dict), self._java_class('java.util.LinkedHashMap'))
+
+    def to_java_set(self, python_list):
+        """
+        Convert a list of strings to a java.util.LinkedHashSet
+
+        :param python_list: A list of strings
+        :return: A LinkedHashSet object
+        """
+        python_list = [self._to_string(value) for value in (python_list or [])]
+        if self.object_mapper is None:
+            return SetConverter().convert(python_list, self.runtime_gateway._gateway_client)
+        return self.object_mapper.readValue(json.dumps(python_list), self._java_class('java.util.LinkedHashSet'))
+
+    def _to_java_variables(self, variables, variable_class_name, create_variable):
+        if self.object_mapper is None:
+            java_variables = {}
+            for key, value in variables.items():
+                variable = create_variable()
+                variable.setName(key)
+                variable.setValue(self._to_string(value))
+                java_variables[key] = variable
+            return MapConverter().convert(java_variables, self.runtime_gateway._gateway_client)
+        content = json.dumps({key: {"name": key, "value": self._to_string(value)} for key, value in variables.items()})
+        return self.object_mapper.readValue(content, self._variables_type(variable_class_name))
+
+    def to_job_variables(self, variables):
+        """
+        Convert a dict of variable values to a Map<String, JobVariable>
+
+        :param variables: A dict mapping variable names to values
+        :return: A LinkedHashMap of JobVariable objects
+        """
+        return self._to_java_variables(variables or {}, 'org.ow2.proactive.scheduler.common.job.JobVariable',
+                                       self.proactive_factory.create_job_variable)
+
+    def to_task_variables(self, variables):
+        """
+        Convert a dict of variable values to a Map<String, TaskVariable>
+
+        :param variables: A dict mapping variable names to values
+        :return: A LinkedHashMap of TaskVariable objects
+        """
+        return self._to_java_variables(variables or {}, 'org.ow2.proactive.scheduler.common.task.TaskVariable',
+                                       self.proactive_factory.create_task_variable)
+
+    def _merge_variables(self, job_or_task, variables, variable_class_name, create_variable):
+        if not variables:
+            return
+        merged = self.runtime_gateway.jvm.java.util.LinkedHashMap(job_or_task.getVariables())
+        if self.object_mapper is None:
+            for key, value in variables.items():
+                variable = merged.get(key)
+                if variable is None:
+                    variable = create_variable()
+                    variable.setName(key)
+                    merged.put(key, variable)
+                variable.setValue(self._to_string(value))
+        else:
+            if self._merging_object_mapper is None:
+                # Merging deserializes the JSON into the existing variables instead of replacing them
+                self._merging_object_mapper = self.object_mapper.copy()
+                self._merging_object_mapper.setDefaultMergeable(True)
+            content = json.dumps({key: {"name": key, "value": self._to_string(value)} for key, value in variables.items()})
+            self._merging_object_mapper.readerForUpdating(merged).forType(
+                self._variables_type(variable_class_name)).readValue(content)
+        job_or_task.setVariables(merged)
+
+    def merge_job_variables(self, job, variables):
+        """
+        Set the values of variables of a Java job on the Java side
+
+        The existing variables keep their model, description and other attributes, only
+        their value is updated. The unknown variables are added.
+
+        :param job: A Java job
+        :param variables: A dict mapping variable names to values
+        """
+        self._merge_variables(job, variables, 'org.ow2.proactive.scheduler.common.job.JobVariable',
+                              self.proactive_factory.create_job_variable)
+
+    def merge_task_variables(self, task, variables):
+        """
+        Set the values of variables of a Java task on the Java side, as merge_job_variables()
+
+        :param task: A Java task
+        :param variables: A dict mapping variable names to values
+        """
+        self._merge_variables(task, variables, 'org.ow2.proactive.scheduler.common.task.TaskVariable',
+                              self.proactive_factory.create_task_variable)
+
+    def merge_generic_information(self, job_or_task, generic_information):
+        """
+        Add or replace generic information of a Java job or task on the Java side
+
+        :param job_or_task: A Java job or task
+        :param generic_information: A dict mapping generic information names to values
+        """
+        if not generic_information:
+            return
+        merged = self.runtime_gateway.jvm.java.util.LinkedHashMap(job_or_task.getGenericInformation())
+        merged.putAll(self.to_java_map(generic_information))
+        job_or_task.setGenericInformation(merged)
@@ -1,3 +1,7 @@
+from py4j.protocol import Py4JError
+
+from .ProactiveConverter import ProactiveConverter
+
 
 
 class ProactiveFactory:
@@ -12,6 +16,9 @@ class ProactiveFactory:
         :param runtime_gateway: A valid java runtime gateway
         """
         self.setRuntimeGateway(runtime_gateway)
+        self.converter = None
+        self.catalog_cache = None
+        self.job_build_cache = None
 
     def setRuntimeGateway(self, runtime_gateway=None):
         """
@@ -197,6 +204,16 @@ class ProactiveFactory:
         return self.runtime_gateway.jvm.org.ow2.proactive.scheduler.common.job.factories.StaxJobFactory(True) # handleGlobalVariables=True
 
 
+    def clone_job(self, job):
+        """
+        Deep copy a ProActive job on the Java side
+        https://commons.apache.org/proper/commons-lang/apidocs/org/apache/commons/lang3/SerializationUtils.html
+
+        :param job: A serializable Job object (e.g. a TaskFlowJob)
+        :return: An independent copy of the job
+        """
+        return self.runtime_gateway.jvm.org.apache.commons.lang3.SerializationUtils.clone(job)
+
     def create_task_error_policy(self, task_error_policy):
         """
         Create a ProActive task error policy.
@@ -204,4 +221,33 @@ class ProactiveFactory:
         :param policy: The error policy type ('continueJobExecution' or 'cancelJob').
         :return: A OnTaskError object.
         """
-        return self.runtime_gateway.jvm.org.ow2.proactive.scheduler.common.task.OnTaskError.getInstance(task_error_policy)
\ No newline at end of file
+        return self.runtime_gateway.jvm.org.ow2.proactive.scheduler.common.task.OnTaskError.getInstance(task_error_policy)
+
+    def create_object_mapper(self):
+        """
+        Create a Jackson ObjectMapper serializing the scheduler objects to JSON
+        https://fasterxml.github.io/jackson-databind/javadoc/2.9/com/fasterxml/jackson/databind/ObjectMapper.html
+
+        Fields are serialized along with the getters, so that ids (e.g. JobIdImpl.id) are included.
+
+        :return: An ObjectMapper object, or None if Jackson is not available in the classpath
+        """
+        jvm = self.runtime_gateway.jvm
+        try:
+            object_mapper = jvm.com.fasterxml.jackson.databind.ObjectMapper()
+            object_mapper.configure(jvm.com.fasterxml.jackson.databind.SerializationFeature.FAIL_ON_EMPTY_BEANS, False)
+            object_mapper.setVisibility(jvm.com.fasterxml.jackson.annotation.PropertyAccessor.FIELD,
+                                        getattr(jvm.com.fasterxml.jackson.annotation, 'JsonAutoDetect$Visibility').ANY)
+            return object_mapper
+        except Py4JError:
+            return None
+
+    def get_converter(self):
+        """
+        Get the shared Python to Java collection converter
+
+        :return: A ProactiveConverter object
+        """
+        if self.converter is None:
+            self.converter = ProactiveConverter(self)
+        return self.converter
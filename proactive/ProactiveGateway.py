@@ -4,8 +4,10 @@ import getpass
 import time
 import tempfile
 
+from concurrent.futures import ThreadPoolExecutor
+
 from py4j.java_gateway import JavaGateway
-from py4j.java_collections import MapConverter, SetConverter
+from py4j.protocol import Py4JError, Py4JJavaError
 
 import logging
 # Configure the logging
@@ -15,6 +17,13 @@ logger = logging.getLogger('ProactiveGateway')
 from .ProactiveRestApi import *
 from .ProactiveFactory import *
 from .ProactiveBuilder import *
+from .ProactiveJobIndex import ProactiveJobIndex
+from .ProactiveWorkflowCache import ProactiveWorkflowCache
+from .ProactiveCatalogCache import ProactiveCatalogCache
+from .ProactiveJobBuildCache import ProactiveJobBuildCache
+from .ProactiveSweep import ProactiveSweep
+from .ProactiveSchedulerClientPool import ProactiveSchedulerClientPool, warm_up_py4j_connections
+from .ProactiveGatewayDescriptor import ProactiveGatewayDescriptor
 
 from .model.ProactiveForkEnv import *
 from .model.ProactiveFlowScript import *
@@ -22,8 +31,12 @@ from .model.ProactiveFlowBlock import *
 from .model.ProactiveFlowActionType import *
 from .model.ProactiveTask import *
 from .model.ProactiveJob import *
+from .model.ProactiveJobInfo import *
+from .model.ProactiveTaskInfo import *
+from .model.ProactiveSweepRow import *
 
 from .monitoring.ProactiveNodeMBeanClient import ProactiveNodeMBeanClient, TimeRange, CPUMetric, MemoryMetric
+from .monitoring.ProactiveTopologyCache import ProactiveTopologyCache
 
 from .bucket.ProactiveBucketFactory import *
 
@@ -40,7 +53,8 @@ class ProActiveGateway:
     See also https://try.activeeon.com/doc/rest/
     """
 
-    def __init__(self, base_url, debug=False, javaopts=[], log4j_props_file=None, log4py_props_file=None):
+    def __init__(self, base_url, debug=False, javaopts=[], log4j_props_file=None, log4py_props_file=None, thread_safe=False, pool_size=None,
+                 job_build_cache_size=0):
         """
         Initializes a new instance of the ProActiveGateway class.
         Args:
@@ -49,6 +63,14 @@ class ProActiveGateway:
             javaopts (list, optional): Additional options for the Java virtual machine. Defaults to []
             log4j_props_file (str, optional): Path to the log4j properties file. Defaults to None
             log4py_props_file (str, optional): Path to the log4py properties file. Defaults to None
+            thread_safe (bool, optional): Enables the thread-safe mode, where the gateway can be used from many
+                threads at once: the scheduler calls are spread over a pool of scheduler proxies and of py4j
+                connections. Defaults to False
+            pool_size (int, optional): Number of scheduler proxies and py4j connections of the thread-safe mode.
+                Defaults to 4
+            job_build_cache_size (int, optional): Number of Java jobs kept by the job build cache, which reuses the
+                Java job built for an unchanged job model (see ProactiveJobBuildCache). The models must then only be
+                modified with their setters. Defaults to 0, no cache
         Returns:
             None
         """
@@ -61,6 +83,10 @@ class ProActiveGateway:
         self.redirect_stderr = None
         self.debug = debug
         self.log4py_props_file = log4py_props_file
+        self.thread_safe = thread_safe
+        self.pool_size = (pool_size or 4) if thread_safe else 1
+        # Result caches and task keys of the jobs submitted with a result cache, by job ID
+        self.memoized_jobs = {}
 
         if self.debug:
             if log4j_props_file:
@@ -100,9 +126,25 @@ class ProActiveGateway:
         self.proactive_flow_block = ProactiveFlowBlock()
         self.proactive_flow_action_type = ProactiveFlowActionType()
 
-        self.proactive_scheduler_client = self.proactive_factory.create_smart_proxy()
+        if self.thread_safe:
+            warm_up_py4j_connections(self.runtime_gateway, self.pool_size)
+            self.proactive_scheduler_client = ProactiveSchedulerClientPool(self.proactive_factory, self.pool_size)
+            self.logger.debug('Thread-safe mode enabled with a pool of {} scheduler proxies'.format(self.pool_size))
+        else:
+            self.proactive_scheduler_client = self.proactive_factory.create_smart_proxy()
         self.proactive_rest_api = ProactiveRestApi()
         self.proactive_monitoring_client = ProactiveNodeMBeanClient(self)
+        self.proactive_topology_cache = ProactiveTopologyCache(self.proactive_monitoring_client, self.proactive_rest_api)
+        self.proactive_monitoring_client.topology_cache = self.proactive_topology_cache
+        self.proactive_rest_api.topology_cache = self.proactive_topology_cache
+        self.proactive_workflow_cache = ProactiveWorkflowCache(self)
+        self.proactive_catalog_cache = ProactiveCatalogCache(self.proactive_rest_api)
+        self.proactive_rest_api.catalog_cache = self.proactive_catalog_cache
+        self.proactive_factory.catalog_cache = self.proactive_catalog_cache
+        self.proactive_job_build_cache = None
+        if job_build_cache_size > 0:
+            self.proactive_job_build_cache = ProactiveJobBuildCache(self.proactive_factory, job_build_cache_size)
+            self.proactive_factory.job_build_cache = self.proactive_job_build_cache
 
     def connect(self, username=None, password=None, credentials_path=None, insecure=True):
         """
@@ -134,6 +176,7 @@ class ProActiveGateway:
         try:
             self.proactive_scheduler_client.init(connection_info)
             self.proactive_rest_api.init(connection_info)
+            self.proactive_topology_cache.invalidate()
             self.logger.debug('Connected on ' + self.base_url)
         except Exception as e:
             self.logger.error('Failed to connect to ProActive server: {}'.format(str(e)))
@@ -156,6 +199,7 @@ class ProActiveGateway:
         self.logger.debug('Disconnecting from the ProActive server')
         self.proactive_scheduler_client.disconnect()
         self.proactive_rest_api.disconnect()
+        self.proactive_topology_cache.invalidate()
         self.logger.debug('Disconnected.')
 
     def reconnect(self):
@@ -165,6 +209,7 @@ class ProActiveGateway:
         self.logger.debug('Reconnecting to the ProActive server')
         self.proactive_scheduler_client.reconnect()
         self.proactive_rest_api.reconnect()
+        self.proactive_topology_cache.invalidate()
         self.logger.debug('Reconnected')
 
     def getSession(self):
@@ -177,6 +222,35 @@ class ProActiveGateway:
         """
         return self.proactive_scheduler_client.getSession()
 
+    def isThreadSafe(self):
+        """
+        Checks if the gateway can be used from many threads at once
+        Args:
+            None
+        Returns:
+            bool: True if the gateway was created with thread_safe=True
+        """
+        return self.thread_safe
+
+    def getGatewayDescriptor(self):
+        """
+        Get a picklable descriptor of this gateway, to use its session from other processes
+        (e.g. multiprocessing or ProcessPoolExecutor workers) without logging in again
+        Args:
+            None
+        Returns:
+            ProactiveGatewayDescriptor: The server URL, the session ID and the debug option
+        Raises:
+            ConnectionError: If the gateway is not connected
+        """
+        session_id = self.proactive_rest_api.session_id
+        if session_id is None:
+            raise ConnectionError('The gateway is not connected')
+        return ProactiveGatewayDescriptor(self.base_url, session_id, self.debug)
+
+    def __reduce__(self):
+        raise TypeError('A ProActiveGateway cannot be pickled, pass getGatewayDescriptor() to other processes instead')
+
     def getBaseURL(self):
         """
         Get the base URL of the ProActive server
@@ -211,9 +285,24 @@ class ProActiveGateway:
     def getProactiveRestApi(self):
         return self.proactive_rest_api
 
+    def getProactiveFactory(self):
+        return self.proactive_factory
+
+    def getProactiveWorkflowCache(self):
+        return self.proactive_workflow_cache
+
+    def getProactiveCatalogCache(self):
+        return self.proactive_catalog_cache
+
+    def getProactiveJobBuildCache(self):
+        return self.proactive_job_build_cache
+
     def getProactiveMonitoringClient(self):
         return self.proactive_monitoring_client
 
+    def getProactiveTopologyCache(self):
+        return self.proactive_topology_cache
+
     def getRuntimeGateway(self):
         return self.runtime_gateway
 
@@ -235,8 +324,9 @@ class ProActiveGateway:
             ValueError: If bucket or workflow name is invalid
             RuntimeError: If submission fails
         """
-        workflow_variables_java_map = MapConverter().convert(workflow_variables, self.runtime_gateway._gateway_client)
-        workflow_generic_info_java_map = MapConverter().convert(workflow_generic_info, self.runtime_gateway._gateway_client)
+        converter = self.proactive_factory.get_converter()
+        workflow_variables_java_map = converter.to_java_map(workflow_variables)
+        workflow_generic_info_java_map = converter.to_java_map(workflow_generic_info)
         self.logger.debug('Submitting from catalog the job \'' + bucket_name + '/' + workflow_name + '\'')
         return self.proactive_scheduler_client.submitFromCatalog(self.base_url + "/catalog", bucket_name, workflow_name, workflow_variables_java_map, workflow_generic_info_java_map).longValue()
 
@@ -256,11 +346,11 @@ class ProActiveGateway:
             SubmissionClosedException: If job submission is not possible (e.g. scheduler is stopped)
             JobCreationException: If there was an error creating the job
         """
-        workflow_variables_java_map = MapConverter().convert(workflow_variables, self.runtime_gateway._gateway_client)
+        workflow_variables_java_map = self.proactive_factory.get_converter().to_java_map(workflow_variables)
         self.logger.debug('Submitting from file the job \'' + workflow_xml_file_path + '\'')
         return self.proactive_scheduler_client.submit(self.runtime_gateway.jvm.java.io.File(workflow_xml_file_path), workflow_variables_java_map).longValue()
 
-    def submitCustomWorkflowFromFile(self, workflow_xml_file_path, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, bucket_name=None, label=None, workflow_tags=None):
+    def submitCustomWorkflowFromFile(self, workflow_xml_file_path, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, bucket_name=None, label=None, workflow_tags=None, use_cache=True):
         """
         Submits a customized workflow from an XML file to the scheduler with additional configuration options.
         Args:
@@ -273,6 +363,7 @@ class ProActiveGateway:
             bucket_name (str, optional): Name of the bucket to associate with the job. Defaults to None
             label (str, optional): Label to assign to the job. Defaults to None
             workflow_tags (list, optional): List of tags to associate with the workflow. Defaults to None
+            use_cache (bool, optional): If True, reuses the parsed workflow while the file is unchanged. Defaults to True
         Returns:
             int: ID of the submitted job
         Raises:
@@ -282,8 +373,15 @@ class ProActiveGateway:
             JobCreationException: If there was an error creating the job
         """
         self.logger.info('Creating a proactive job from the XML file \'' + workflow_xml_file_path + '\'')
-        StaxJobFactory = self.proactive_factory.create_stax_job_factory()
-        Job = StaxJobFactory.createJob(workflow_xml_file_path)
+        if use_cache:
+            Job = self.proactive_workflow_cache.get_file_workflow(workflow_xml_file_path)
+        else:
+            Job = self.proactive_factory.create_stax_job_factory().createJob(workflow_xml_file_path)
+        self._customizeJob(Job, workflow_variables, workflow_generic_info, job_name, job_description, project_name, bucket_name, label, workflow_tags)
+        self.logger.info('Submitting the job ' + Job.getName())
+        return self.proactive_scheduler_client.submit(Job).longValue()
+
+    def _customizeJob(self, Job, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, bucket_name=None, label=None, workflow_tags=None):
         if job_name:
             Job.setName(job_name)
         if job_description:
@@ -294,33 +392,43 @@ class ProActiveGateway:
             Job.setBucketName(bucket_name)
         if label:
             Job.setLabel(label)
+        converter = self.proactive_factory.get_converter()
         if isinstance(workflow_variables, dict):
             self.logger.debug('Adding variables')
-            job_variables = {}
-            for key, value in workflow_variables.items():
-                JobVariable = self.proactive_factory.create_job_variable()
-                JobVariable.setName(key)
-                JobVariable.setValue(value)
-                job_variables[key] = JobVariable
-            variables_java_map = MapConverter().convert(job_variables, self.runtime_gateway._gateway_client)
-            current_variables_java_map = Job.getVariables()
-            current_variables_python_dict = convert_java_map_to_python_dict(current_variables_java_map)
-            new_variables_python_dict = convert_java_map_to_python_dict(variables_java_map)
-            merged_variables_python_dict = {**current_variables_python_dict, **new_variables_python_dict}
-            merged_variables_java_map = MapConverter().convert(merged_variables_python_dict, self.runtime_gateway._gateway_client)
-            Job.setVariables(merged_variables_java_map)
+            converter.merge_job_variables(Job, workflow_variables)
         if isinstance(workflow_generic_info, dict):
             self.logger.debug('Adding the generic information')
-            for key, value in workflow_generic_info.items():
-                Job.addGenericInformation(key, value)
+            converter.merge_generic_information(Job, workflow_generic_info)
         if isinstance(workflow_tags, list):
             self.logger.debug('Adding tags')
-            workflow_tags_java_set = SetConverter().convert(workflow_tags, self.runtime_gateway._gateway_client)
-            Job.setWorkflowTags(workflow_tags_java_set)
-        self.logger.info('Submitting the job ' + Job.getName())
-        return self.proactive_scheduler_client.submit(Job).longValue()
+            Job.setWorkflowTags(converter.to_java_set(workflow_tags))
 
-    def submitCustomWorkflowFromCatalog(self, bucket_name, workflow_name, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, workflow_tags=None, local_file_path=None):
+    def _getWorkflowXmlFromCatalog(self, bucket_name, workflow_name):
+        object_str = self.getProactiveRestApi().get_object_from_catalog(bucket_name, workflow_name)
+        PA_CATALOG_REST_URL = self.base_url + "/catalog"
+        self.logger.debug("PA_CATALOG_REST_URL: " + PA_CATALOG_REST_URL)
+        return object_str.replace('${PA_CATALOG_REST_URL}', PA_CATALOG_REST_URL)
+
+    def _parseWorkflowXml(self, object_str):
+        StaxJobFactory = self.proactive_factory.create_stax_job_factory()
+        # Parse the XML from an in-memory stream on the JVM side, without a disk round trip
+        try:
+            workflow_stream = self.runtime_gateway.jvm.java.io.ByteArrayInputStream(object_str.encode('utf-8'))
+            return StaxJobFactory.createJob(workflow_stream, None, None, None, None, None)
+        except Py4JJavaError:
+            # The workflow itself is invalid: parsing it from a file would fail the same way
+            raise
+        except Py4JError as e:
+            self.logger.debug('In-memory workflow parsing is not supported, using a temporary file: {}'.format(e))
+        # Create a temporary file that will be deleted automatically
+        with tempfile.NamedTemporaryFile() as temp_file:
+            temp_file.write(object_str.encode('utf-8'))
+            temp_file.flush()
+            temp_file_path = os.path.abspath(temp_file.name)
+            self.logger.info('Temporary file created and will be deleted: {}'.format(temp_file_path))
+            return StaxJobFactory.createJob(temp_file_path)
+
+    def submitCustomWorkflowFromCatalog(self, bucket_name, workflow_name, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, workflow_tags=None, local_file_path=None, use_cache=True):
         """
         Submits a customized workflow from the ProActive catalog with additional configuration options.
         This method allows for more granular control over the workflow submission process by providing
@@ -347,6 +455,8 @@ class ProActiveGateway:
             local_file_path (str, optional): Path where a local copy of the workflow XML file
                 should be saved. If provided, creates a copy of the workflow file at this location.
                 Defaults to None.
+            use_cache (bool, optional): If True, reuses the parsed workflow while its catalog revision
+                is unchanged, skipping the download and the XML parse. Defaults to True.
         Returns:
             int: Job ID of the submitted workflow if successful, None if submission fails.
         Raises:
@@ -364,62 +474,50 @@ class ProActiveGateway:
             - All variables and generic info values must be strings or be convertible to strings.
         """
         try:
-            object_str = self.getProactiveRestApi().get_object_from_catalog(bucket_name, workflow_name)
-            PA_CATALOG_REST_URL = self.base_url + "/catalog"
-            self.logger.debug("PA_CATALOG_REST_URL: " + PA_CATALOG_REST_URL)
-            object_str = object_str.replace('${PA_CATALOG_REST_URL}', PA_CATALOG_REST_URL)
-            # Create a temporary file that will be deleted automatically
-            with tempfile.NamedTemporaryFile() as temp_file:
-                # Write some data to the file
-                temp_file.write(object_str.encode('utf-8'))
-                # Get the absolute path of the temporary file
-                temp_file_path = os.path.abspath(temp_file.name)
-                # The file will be deleted when closed
-                self.logger.info('Temporary file created and will be deleted: {}'.format(temp_file_path))
-                # Copy the content to a new file
-                if local_file_path:
-                    # local_copy_path = os.path.join(os.getcwd(), 'workflow.xml')
-                    with open(local_file_path, 'wb') as local_copy_file:
-                        temp_file.seek(0)
-                        local_copy_file.write(temp_file.read())
-                    self.logger.info('Local copy of the temporary file created: {}'.format(local_file_path))
-                StaxJobFactory = self.proactive_factory.create_stax_job_factory()
-                Job = StaxJobFactory.createJob(temp_file_path)
-                if job_name:
-                    Job.setName(job_name)
-                if job_description:
-                    Job.setDescription(job_description)
-                if project_name:
-                    Job.setProjectName(project_name)
-                if isinstance(workflow_variables, dict):
-                    self.logger.debug('Adding variables')
-                    job_variables = {}
-                    for key, value in workflow_variables.items():
-                        JobVariable = self.proactive_factory.create_job_variable()
-                        JobVariable.setName(key)
-                        JobVariable.setValue(value)
-                        job_variables[key] = JobVariable
-                    variables_java_map = MapConverter().convert(job_variables, self.runtime_gateway._gateway_client)
-                    current_variables_java_map = Job.getVariables()
-                    current_variables_python_dict = convert_java_map_to_python_dict(current_variables_java_map)
-                    new_variables_python_dict = convert_java_map_to_python_dict(variables_java_map)
-                    merged_variables_python_dict = {**current_variables_python_dict, **new_variables_python_dict}
-                    merged_variables_java_map = MapConverter().convert(merged_variables_python_dict, self.runtime_gateway._gateway_client)
-                    Job.setVariables(merged_variables_java_map)
-                if isinstance(workflow_generic_info, dict):
-                    self.logger.debug('Adding the generic information')
-                    for key, value in workflow_generic_info.items():
-                        Job.addGenericInformation(key, value)
-                if isinstance(workflow_tags, list):
-                    self.logger.debug('Adding tags')
-                    workflow_tags_java_set = SetConverter().convert(workflow_tags, self.runtime_gateway._gateway_client)
-                    Job.setWorkflowTags(workflow_tags_java_set)
-                self.logger.info('Submitting the job ' + Job.getName())
-                return self.proactive_scheduler_client.submit(Job).longValue()
+            if use_cache:
+                Job, object_str = self.proactive_workflow_cache.get_catalog_workflow(bucket_name, workflow_name)
+            else:
+                object_str = self._getWorkflowXmlFromCatalog(bucket_name, workflow_name)
+                Job = self._parseWorkflowXml(object_str)
+            if local_file_path:
+                with open(local_file_path, 'wb') as local_copy_file:
+                    local_copy_file.write(object_str.encode('utf-8'))
+                self.logger.info('Local copy of the workflow created: {}'.format(local_file_path))
+            self._customizeJob(Job, workflow_variables, workflow_generic_info, job_name, job_description, project_name, workflow_tags=workflow_tags)
+            self.logger.info('Submitting the job ' + Job.getName())
+            return self.proactive_scheduler_client.submit(Job).longValue()
         except Exception as e:
             self.logger.error("Error occurred while submitting the custom workflow from catalog", exc_info=True)
             return None
 
+    def submitSweep(self, template, variable_sets, max_in_flight=8, pack=False, job_name=None, project_name=None, workflow_generic_info=None, workflow_tags=None):
+        """
+        Submits the same workflow once per variable set (parametric sweep).
+        The template is fetched and parsed once, each variable set is applied to a copy of it,
+        and the copies are submitted concurrently.
+        Args:
+            template: The workflow to submit: a workflow XML file path, a (bucket_name, workflow_name)
+                catalog tuple, a job model or a Java job
+            variable_sets (list): List of dicts mapping variable names to values, one per submission
+            max_in_flight (int, optional): Maximum number of concurrent submissions. Defaults to 8
+            pack (bool, optional): If True and all the variable sets define the same variables, submits
+                a single job replicating the workflow once per variable set. The replicas get their variable
+                set at run time, so a workflow where the scheduler resolves a swept variable from the job
+                variables (e.g. ${VARIABLE} in a selection script, a fork environment, generic information or
+                a variable) is still submitted once per variable set. Defaults to False
+            job_name (str, optional): Job name, formatted with the variable set index and its
+                variables (e.g. 'train_{index}_{learning_rate}'). Defaults to None
+            project_name (str, optional): Name of the project the jobs belong to. Defaults to None
+            workflow_generic_info (dict, optional): Generic information added to the jobs. Defaults to None
+            workflow_tags (list, optional): List of tags added to the jobs. Defaults to None
+        Returns:
+            list: One ProactiveSweepRow per variable set, in order, with the job ID or the submission error
+        Raises:
+            ValueError: If the template is not supported
+        """
+        self.logger.info('Submitting a sweep of {} variable set(s)'.format(len(variable_sets)))
+        return ProactiveSweep(self, template, max_in_flight).submit(variable_sets, pack, job_name, project_name, workflow_generic_info, workflow_tags)
+
     def submitWorkflowFromURL(self, workflow_url_spec, workflow_variables={}):
         """
         Submits a workflow to the ProActive scheduler from a URL location.
@@ -450,7 +548,7 @@ class ProActiveGateway:
             - The method converts the workflow variables to a Java map internally
             - The returned job ID can be used with other methods like getJobStatus() or waitForJob()
         """
-        workflow_variables_java_map = MapConverter().convert(workflow_variables, self.runtime_gateway._gateway_client)
+        workflow_variables_java_map = self.proactive_factory.get_converter().to_java_map(workflow_variables)
         self.logger.debug('Submitting from URL the job \'' + workflow_url_spec + '\'')
         return self.proactive_scheduler_client.submit(self.runtime_gateway.jvm.java.net.URL(workflow_url_spec), workflow_variables_java_map).longValue()
 
@@ -638,12 +736,15 @@ class ProActiveGateway:
         self.logger.info('Building the job ' + job_model.getJobName())
         return ProactiveJobBuilder(self.proactive_factory, job_model, self.debug, self.log4py_props_file).create().display(debug).getProactiveJob()
 
-    def submitJob(self, job_model, debug=False):
+    def submitJob(self, job_model, debug=False, result_cache=None):
         """
         Submits a job to the ProActive Scheduler.
         Args:
             job_model: The job model to be submitted
             debug (bool, optional): If True, prints the job configuration for debugging. Defaults to False
+            result_cache (ProactiveResultCache, optional): If provided, the unchanged tasks reuse their cached
+                results instead of running again. Call cacheJobResults() once the job is finished to cache its
+                task results. Defaults to None
         Returns:
             int: ID of the submitted job
         Raises:
@@ -652,11 +753,13 @@ class ProActiveGateway:
             SubmissionClosedException: If job submission is not possible (e.g. scheduler is stopped)
             JobCreationException: If there was an error creating the job
         """
-        proactive_job = self.buildJob(job_model, debug)
+        submitted_model, keys = self._memoizeJob(job_model, result_cache, '.', None)
+        proactive_job = self.buildJob(submitted_model, debug)
         self.logger.info('Submitting the job ' + job_model.getJobName())
-        return self.proactive_scheduler_client.submit(proactive_job).longValue()
+        job_id = self.proactive_scheduler_client.submit(proactive_job).longValue()
+        return self._trackMemoizedJob(job_id, job_model, result_cache, keys, None)
 
-    def submitJobWithInputsAndOutputsPaths(self, job_model, input_folder_path='.', output_folder_path='.', debug=False):
+    def submitJobWithInputsAndOutputsPaths(self, job_model, input_folder_path='.', output_folder_path='.', debug=False, result_cache=None):
         """
         Submits a job to the ProActive Scheduler with specified input and output paths.
         Args:
@@ -664,6 +767,9 @@ class ProActiveGateway:
             input_folder_path (str, optional): Path to the directory containing input files. Defaults to '.'
             output_folder_path (str, optional): Path to the local directory which will contain output files. Defaults to '.'
             debug (bool, optional): If True, prints the job configuration for debugging. Defaults to False
+            result_cache (ProactiveResultCache, optional): If provided, the unchanged tasks reuse their cached
+                results and output files instead of running again. Call cacheJobResults() once the job is
+                finished to cache its task results. Defaults to None
         Returns:
             int: ID of the submitted job
         Raises:
@@ -672,15 +778,45 @@ class ProActiveGateway:
             SubmissionClosedException: If job submission is not possible (e.g. scheduler is stopped)
             JobCreationException: If there was an error creating the job
         """
-        proactive_job = self.buildJob(job_model, debug)
+        submitted_model, keys = self._memoizeJob(job_model, result_cache, input_folder_path, output_folder_path)
+        proactive_job = self.buildJob(submitted_model, debug)
         self.logger.info('Submitting the job ' + job_model.getJobName())
-        return self.proactive_scheduler_client.submit(
+        job_id = self.proactive_scheduler_client.submit(
             proactive_job,
             input_folder_path,
             output_folder_path,
             False,
             True
         ).longValue()
+        return self._trackMemoizedJob(job_id, job_model, result_cache, keys, output_folder_path)
+
+    def _memoizeJob(self, job_model, result_cache, input_folder_path, output_folder_path):
+        if result_cache is None:
+            return job_model, None
+        memoized_model, keys, cached = result_cache.memoize(job_model, input_folder_path, output_folder_path or '.')
+        # The cached tasks are already in the cache
+        return memoized_model, {name: key for name, key in keys.items() if name not in cached}
+
+    def _trackMemoizedJob(self, job_id, job_model, result_cache, keys, output_folder_path):
+        if result_cache is not None:
+            self.memoized_jobs[job_id] = (result_cache, job_model, keys, output_folder_path)
+        return job_id
+
+    def cacheJobResults(self, job_id, timeout=60000):
+        """
+        Caches the task results of a job submitted with a result cache, waiting for the job to finish.
+        Args:
+            job_id (int): The ID of the job
+            timeout (int, optional): The timeout in milliseconds for waiting for each task. Defaults to 60000
+        Returns:
+            int: The number of cached task results, 0 if the job was not submitted with a result cache
+        """
+        memoized_job = self.memoized_jobs.pop(int(job_id), None)
+        if memoized_job is None:
+            return 0
+        result_cache, job_model, keys, output_folder_path = memoized_job
+        self.waitForJob(job_id, timeout)
+        return result_cache.store_job_results(self, job_id, job_model, keys, output_folder_path, timeout)
 
     def createForkEnvironment(self, language=None):
         """
@@ -854,6 +990,30 @@ class ProActiveGateway:
         """
         return self.proactive_scheduler_client.getJobInfo(str(job_id))
 
+    def _getObjectMapper(self):
+        return self.proactive_factory.get_converter().object_mapper
+
+    def getJobRecord(self, job_id):
+        """
+        Retrieves information about a specific job as a read-only Python record.
+        Args:
+            job_id (str): ID of the job to get information for
+        Returns:
+            ProactiveJobInfo: Information about the specified job
+        """
+        return ProactiveJobInfo.from_java_list([self.getJobInfo(job_id)], self._getObjectMapper())[0]
+
+    def getTaskRecords(self, job_id):
+        """
+        Retrieves the state of all the tasks of a job as read-only Python records.
+        The task states are converted in a single Java call.
+        Args:
+            job_id (str): ID of the job
+        Returns:
+            list[ProactiveTaskInfo]: The state of each task of the job
+        """
+        return ProactiveTaskInfo.from_java_list(self.getJobState(job_id).getTasks(), self._getObjectMapper())
+
     def waitForJob(self, job_id, timeout=60000):
         """
         Waits for a job to finish execution within the specified timeout.
@@ -863,7 +1023,7 @@ class ProActiveGateway:
         Returns:
             JobInfo: Information about the completed job
         Raises:
-            TimeoutException: If the timeout is reached before job completion
+            TimeoutException: If the timeout is reached before job completion (TimeoutError in thread-safe mode)
             RuntimeError: If waiting for the job fails
         """
         return self.proactive_scheduler_client.waitForJob(str(job_id), timeout)
@@ -894,7 +1054,7 @@ class ProActiveGateway:
                 # Wait before checking again
                 time.sleep(time_to_check)
 
-    def getAllJobs(self, max_number_of_jobs=1000, my_jobs_only=False, pending=False, running=True, finished=False, withIssuesOnly=False, child_jobs=True, job_name=None, project_name=None, user_name=None, tenant=None, parent_id=None):
+    def getAllJobs(self, max_number_of_jobs=1000, my_jobs_only=False, pending=False, running=True, finished=False, withIssuesOnly=False, child_jobs=True, job_name=None, project_name=None, user_name=None, tenant=None, parent_id=None, as_records=False):
         """
         Retrieves a list of jobs from the ProActive scheduler based on the specified filters.
         Args:
@@ -910,15 +1070,112 @@ class ProActiveGateway:
             user_name (str, optional): Filters jobs by the submitting user's name. Defaults to None
             tenant (str, optional): Filters jobs by tenant. Defaults to None
             parent_id (str, optional): Filters jobs by parent job ID. Defaults to None
+            as_records (bool, optional): If True, returns read-only ProactiveJobInfo records converted in a single Java call. Defaults to False
         Returns:
             list: A list of jobs matching the specified filters
         Raises:
             RuntimeError: If retrieving jobs fails
         """
-        job_filter_criteria = self.runtime_gateway.jvm.org.ow2.proactive.scheduler.common.JobFilterCriteriaBuilder().myJobsOnly(my_jobs_only).pending(pending).running(running).finished(finished).withIssuesOnly(withIssuesOnly).childJobs(child_jobs).jobName(job_name).projectName(project_name).userName(user_name).tenant(tenant).parentId(parent_id).build()
+        job_filter_criteria = self._buildJobFilterCriteria(my_jobs_only, pending, running, finished, withIssuesOnly, child_jobs, job_name, project_name, user_name, tenant, parent_id)
         jobs_page = self.proactive_scheduler_client.getJobs(0, max_number_of_jobs, job_filter_criteria, None)
+        if as_records:
+            return ProactiveJobInfo.from_java_list(jobs_page.getList(), self._getObjectMapper())
         return jobs_page.getList()
 
+    def _buildJobFilterCriteria(self, my_jobs_only=False, pending=False, running=True, finished=False, withIssuesOnly=False, child_jobs=True, job_name=None, project_name=None, user_name=None, tenant=None, parent_id=None):
+        return self.runtime_gateway.jvm.org.ow2.proactive.scheduler.common.JobFilterCriteriaBuilder().myJobsOnly(my_jobs_only).pending(pending).running(running).finished(finished).withIssuesOnly(withIssuesOnly).childJobs(child_jobs).jobName(job_name).projectName(project_name).userName(user_name).tenant(tenant).parentId(parent_id).build()
+
+    def _buildJobSortParameters(self, descending=False, sort_by='ID'):
+        jvm = self.runtime_gateway.jvm
+        order = jvm.org.ow2.proactive.db.SortOrder.DESC if descending else jvm.org.ow2.proactive.db.SortOrder.ASC
+        job_sort_parameter = jvm.org.ow2.proactive.scheduler.common.JobSortParameter
+        sort_parameters = jvm.java.util.ArrayList()
+        sort_parameters.add(jvm.org.ow2.proactive.db.SortParameter(getattr(job_sort_parameter, sort_by), order))
+        if sort_by != 'ID':
+            # Ties are broken by ID, so that the pages of equal keys do not overlap
+            sort_parameters.add(jvm.org.ow2.proactive.db.SortParameter(job_sort_parameter.ID, order))
+        return sort_parameters
+
+    def _fetchJobInfoPage(self, offset, limit, job_filter_criteria, sort_parameters):
+        jobs_page = self.proactive_scheduler_client.getJobs(offset, limit, job_filter_criteria, sort_parameters)
+        return ProactiveJobInfo.from_java_list(jobs_page.getList(), self._getObjectMapper())
+
+    def iterJobs(self, page_size=500, limit=None, descending=False, prefetch=True, sort_by='ID', **filters):
+        """
+        Iterates over the jobs matching the specified filters, one page at a time.
+
+        Jobs are fetched by pages of page_size jobs sorted by sort_by, and converted to read-only
+        ProactiveJobInfo records. While a page is consumed, the next one is fetched in the
+        background, so at most two pages are held in memory whatever the number of matching jobs.
+        Jobs submitted or removed while iterating may shift the pages: a job is never yielded
+        twice, but a removed job can make the iteration skip another one.
+        When sorted by another key than the ID, a job updated while iterating can be yielded twice.
+        Args:
+            page_size (int, optional): The number of jobs fetched per request. Defaults to 500
+            limit (int, optional): The maximum number of jobs to yield. Defaults to None (all jobs)
+            descending (bool, optional): If True, iterates from the most recent job. Defaults to False
+            prefetch (bool, optional): If True, fetches the next page in the background. Defaults to True
+            sort_by (str, optional): The JobSortParameter the jobs are sorted by, e.g. 'LAST_UPDATED_TIME'.
+                Defaults to 'ID'
+            **filters: The filters of getAllJobs (my_jobs_only, pending, running, finished, withIssuesOnly,
+                child_jobs, job_name, project_name, user_name, tenant, parent_id)
+        Returns:
+            generator: The ProactiveJobInfo records of the matching jobs
+        Raises:
+            ValueError: If page_size is not strictly positive
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be strictly positive")
+        job_filter_criteria = self._buildJobFilterCriteria(**filters)
+        sort_parameters = self._buildJobSortParameters(descending, sort_by)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='iter-jobs') if prefetch else None
+        last_id = None
+        yielded = 0
+        offset = 0
+        try:
+            pending_page = None
+            while limit is None or yielded < limit:
+                if pending_page is not None:
+                    page = pending_page.result()
+                else:
+                    page = self._fetchJobInfoPage(offset, page_size, job_filter_criteria, sort_parameters)
+                offset += page_size
+                more = len(page) == page_size
+                pending_page = None
+                if more and executor is not None:
+                    pending_page = executor.submit(self._fetchJobInfoPage, offset, page_size, job_filter_criteria, sort_parameters)
+                for job_info in page:
+                    if sort_by == 'ID':
+                        job_id = int(job_info.job_id)
+                        # Submissions or removals shift the offsets: skip jobs already yielded
+                        if last_id is not None and (job_id >= last_id if descending else job_id <= last_id):
+                            continue
+                        last_id = job_id
+                    yield job_info
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+                if not more:
+                    return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def createJobIndex(self, path=None, page_size=500, sync=True):
+        """
+        Creates a local index of the scheduler jobs, answering filtered queries from memory.
+        Args:
+            path (str, optional): Path of an SQLite file persisting the index between runs. Defaults to None
+            page_size (int, optional): The number of jobs fetched per scheduler request. Defaults to 500
+            sync (bool, optional): If True, synchronizes the index before returning it. Defaults to True
+        Returns:
+            ProactiveJobIndex: The job index, to be refreshed by calling its sync() method
+        """
+        job_index = ProactiveJobIndex(self, path, page_size)
+        if sync:
+            job_index.sync()
+        return job_index
+
     @staticmethod
     def __decode__(value):
         return value.decode('ascii')
@@ -1168,6 +1425,20 @@ class ProActiveGateway:
         """
         return self.proactive_scheduler_client.waitForJob(str(job_id), timeout).getPreciousResults().get(task_name).value()
 
+    def getJobPropagatedVariables(self, job_id):
+        """
+        Retrieves the variables propagated by the tasks of a finished job.
+        Args:
+            job_id (int): The ID of the job
+        Returns:
+            dict: The variables propagated by each task, by task name, or None if the job result cannot be retrieved
+        """
+        job_result = self.proactive_rest_api.get_job_result(job_id)
+        if job_result is None:
+            return None
+        return {task_name: dict(task_result.get('propagatedVariables') or {})
+                for task_name, task_result in (job_result.get('allResults') or {}).items()}
+
     def printJobOutput(self, job_id, timeout=60000):
         """
         Retrieves and formats the output logs from all tasks in a job.
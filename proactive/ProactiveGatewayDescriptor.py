@@ -0,0 +1,85 @@
+import logging
+import threading
+
+from .ProactiveRestApi import ProactiveRestApi
+
+logger = logging.getLogger('ProactiveGatewayDescriptor')
+
+# REST sessions already rebuilt in this process, by (REST URL, session ID)
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class ProactiveGatewayDescriptor:
+    """
+    A picklable description of a connected gateway
+
+    A ProActiveGateway owns a JVM and live sockets and cannot be sent to other processes.
+    Its descriptor only holds the server URL, the session ID and a few options, so it can
+    be passed to multiprocessing or ProcessPoolExecutor workers. A worker rebuilds from it
+    a lightweight REST session, without JVM and without logging in again:
+
+        descriptor = gateway.getGatewayDescriptor()
+
+        def work(descriptor, data):
+            rest_api = descriptor.connect()
+            return rest_api.submit_workflow_xml(preprocess(data))
+
+        with ProcessPoolExecutor() as executor:
+            job_ids = list(executor.map(work, repeat(descriptor), dataset))
+
+    The session stays valid as long as the gateway that created it is connected. A rebuilt
+    session rejected by the server is dropped, and connect() raises until a new descriptor
+    is made from a reconnected gateway.
+
+    - base_url (str): The base URL of the ProActive server
+    - session_id (str): The session ID to reuse
+    - debug (bool): Enables debug mode of the rebuilt sessions
+    """
+
+    __slots__ = ('base_url', 'session_id', 'debug')
+
+    def __init__(self, base_url, session_id, debug=False):
+        self.base_url = base_url
+        self.session_id = session_id
+        self.debug = debug
+
+    def __getstate__(self):
+        return {'base_url': self.base_url, 'session_id': self.session_id, 'debug': self.debug}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return "ProactiveGatewayDescriptor(base_url={!r})".format(self.base_url)
+
+    def getBaseURL(self):
+        return self.base_url
+
+    def getSession(self):
+        return self.session_id
+
+    def connect(self):
+        """
+        Rebuild a REST session reusing the session ID, once per process
+
+        :return: A connected ProactiveRestApi
+        :raise ConnectionError: If the session is no longer valid
+        """
+        base_url = self.base_url.rstrip('/')
+        key = (base_url if base_url.endswith('/rest') else base_url + "/rest", self.session_id)
+        with _sessions_lock:
+            rest_api = _sessions.get(key)
+            if rest_api is not None:
+                # ProactiveRestApi.connected() drops the sessions rejected by the server
+                if rest_api.session_id == self.session_id:
+                    return rest_api
+                del _sessions[key]
+            rest_api = ProactiveRestApi()
+            rest_api.set_enable_debug(self.debug)
+            if not rest_api.use_session(*key):
+                raise ConnectionError('The session of {} is no longer valid, the gateway may be disconnected'.format(self.base_url))
+            _sessions[key] = rest_api
+        logger.debug(f"Reusing the session of {self.base_url}")
+        return rest_api
@@ -0,0 +1,102 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from py4j.protocol import Py4JError
+
+logger = logging.getLogger('ProactiveJobBuildCache')
+
+
+class ProactiveJobBuildCache:
+    """
+    LRU cache of the Java jobs built from job models, keyed by model fingerprint.
+
+    Building a TaskFlowJob from a model takes many JVM calls per task. When an unchanged
+    model is built again (a retry loop, a periodic resubmission), the builder gets a
+    Java-side deep copy of the job built the first time instead, in a single call.
+
+    The fingerprint hashes what the builder reads from the model (see
+    ProactiveJob.getFingerprint()). The models with a script implemented by a URL are
+    not cached, since the script content is read when the job is built.
+
+    The cache is opt-in (see the job_build_cache_size parameter of ProActiveGateway): as the
+    fingerprints are kept between the setter calls, it only sees the changes made with the
+    setters of the models, not the attributes assigned directly.
+
+    - proactive_factory (ProactiveFactory)
+    - max_size (int): The maximum number of Java jobs kept
+    """
+
+    def __init__(self, proactive_factory, max_size=32):
+        self.proactive_factory = proactive_factory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cacheable(job_model):
+        for task in job_model.getTasks():
+            if task.getTaskImplementationFromURL() is not None:
+                return False
+            for script in (task.getForkEnvironment(), task.getPreScript(), task.getPostScript()):
+                if script is not None and script.getImplementationFromURL() is not None:
+                    return False
+        return True
+
+    def _get(self, fingerprint):
+        with self._lock:
+            template = self._jobs.get(fingerprint)
+            if template is not None:
+                self._jobs.move_to_end(fingerprint)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return template
+
+    def _put(self, fingerprint, template):
+        with self._lock:
+            self._jobs[fingerprint] = template
+            self._jobs.move_to_end(fingerprint)
+            while len(self._jobs) > self.max_size:
+                self._jobs.popitem(last=False)
+
+    def get_job(self, job_model, build):
+        """
+        Get the Java job of a model, built only if no unchanged version of it was built before
+
+        :param job_model: A valid job model
+        :param build: A function building the Java job of the model
+        :return: A Java job that can be customized and submitted
+        """
+        if self.max_size <= 0 or not self._cacheable(job_model):
+            return build()
+        fingerprint = job_model.getFingerprint()
+        template = self._get(fingerprint)
+        if template is not None:
+            try:
+                return self.proactive_factory.clone_job(template)
+            except Py4JError as e:
+                logger.warning(f"Failed to clone the cached job {job_model.getJobName()}, building it again: {e}")
+                self.invalidate(fingerprint)
+                return build()
+        job = build()
+        try:
+            self._put(fingerprint, self.proactive_factory.clone_job(job))
+        except Py4JError as e:
+            logger.warning(f"Failed to cache the job {job_model.getJobName()}: {e}")
+        return job
+
+    def invalidate(self, fingerprint=None):
+        """
+        Drop a cached Java job, by model fingerprint, or all of them
+        """
+        with self._lock:
+            if fingerprint is None:
+                self._jobs.clear()
+            else:
+                self._jobs.pop(fingerprint, None)
+
+    def __len__(self):
+        return len(self._jobs)
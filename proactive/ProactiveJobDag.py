@@ -0,0 +1,168 @@
+import heapq
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger('ProactiveJobDag')
+
+
+class ProactiveJobDag:
+    """
+    The validated task graph of a decorator-defined job
+
+    Compiled from the task definitions registered by @task (see decorators):
+
+    - every depends_on name must be a registered task, and task names must be unique
+    - the dependencies must not form a cycle (Kahn's algorithm)
+    - tasks are ordered topologically, ties keeping the registration order, so that the
+      dependencies of a task are always built before it
+    - loop and replicate blocks are paired like parentheses: an end closes the innermost
+      open start of the same kind, so a job may hold many (nested) blocks
+    - each @branch.condition() task opens a branch, completed by the next if, else and
+      continuation tasks
+
+    The structure of a job rarely changes between calls, so compiled graphs are cached by
+    structural key (see compile()).
+    """
+
+    __slots__ = ('order', 'tasks', 'index', 'dependencies', 'loops', 'replicates', 'branches', 'has_data_transfer', 'key')
+
+    def __init__(self, order, task_defs, dependencies, loops, replicates, branches, has_data_transfer, key=None):
+        self.order = order
+        self.tasks = [task_defs[position] for position in order]
+        self.index = {task_def['Name']: position for position, task_def in enumerate(self.tasks)}
+        self.dependencies = dependencies
+        self.loops = loops
+        self.replicates = replicates
+        self.branches = branches
+        self.has_data_transfer = has_data_transfer
+        self.key = key
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __repr__(self):
+        return "ProactiveJobDag(tasks={}, loops={}, replicates={}, branches={})".format(
+            [task_def['Name'] for task_def in self.tasks], len(self.loops), len(self.replicates), len(self.branches))
+
+    @staticmethod
+    def structure_key(task_defs):
+        """The part of the task definitions the compiled graph depends on, as a hashable tuple."""
+        return tuple(
+            (
+                task_def['Name'],
+                tuple(task_def.get('DependsOn') or ()),
+                bool(task_def.get('InputFiles') or task_def.get('OutputFiles')),
+                bool(task_def.get('IsLoopStart')), bool(task_def.get('IsLoopEnd')), task_def.get('LoopCriteria'),
+                bool(task_def.get('IsReplicateStart')), bool(task_def.get('IsReplicateEnd')), task_def.get('ReplicateCriteria'),
+                bool(task_def.get('IsConditionTask')), bool(task_def.get('IsIfBranch')),
+                bool(task_def.get('IsElseBranch')), bool(task_def.get('IsContinuationTask')),
+            )
+            for task_def in task_defs
+        )
+
+    @classmethod
+    def compile(cls, task_defs, cache=None, cache_size=8):
+        """
+        Compile registered task definitions into a graph
+
+        :param task_defs: The task definitions, in registration order
+        :param cache: An OrderedDict of compiled graphs, by structural key (e.g. one per decorated function)
+        :param cache_size: The maximum number of graphs kept in the cache
+        :return: A ProactiveJobDag, whose tasks are the given definitions in topological order
+        :raise ValueError: If a dependency is unknown, a name is duplicated, the dependencies form
+            a cycle, or a loop, replicate or branch block is incomplete
+        """
+        key = cls.structure_key(task_defs)
+        if cache is not None:
+            compiled = cache.get(key)
+            if compiled is not None:
+                cache.move_to_end(key)
+                # Same structure: reuse the order and the blocks, with the definitions of this call
+                return cls(compiled.order, task_defs, compiled.dependencies, compiled.loops, compiled.replicates,
+                           compiled.branches, compiled.has_data_transfer, key)
+
+        positions = {}
+        dependents = [[] for _ in task_defs]
+        in_degrees = [0] * len(task_defs)
+        dependencies = {}
+        loop_starts, replicate_starts = [], []
+        loops, replicates, branches = [], [], []
+        open_branch = None
+        has_data_transfer = False
+
+        for position, task_def in enumerate(task_defs):
+            name = task_def['Name']
+            if name in positions:
+                raise ValueError("The task name '{}' is used twice in the job".format(name))
+            positions[name] = position
+            has_data_transfer = has_data_transfer or bool(task_def.get('InputFiles') or task_def.get('OutputFiles'))
+
+            if task_def.get('IsLoopStart'):
+                loop_starts.append(name)
+            if task_def.get('IsLoopEnd'):
+                if not loop_starts:
+                    raise ValueError("The loop end task '{}' has no loop start task before it".format(name))
+                loops.append((loop_starts.pop(), name, task_def.get('LoopCriteria')))
+            if task_def.get('IsReplicateStart'):
+                replicate_starts.append((name, task_def.get('ReplicateCriteria')))
+            if task_def.get('IsReplicateEnd'):
+                if not replicate_starts:
+                    raise ValueError("The replicate end task '{}' has no replicate start task before it".format(name))
+                start, criteria = replicate_starts.pop()
+                replicates.append((start, name, criteria))
+
+            if task_def.get('IsConditionTask'):
+                if open_branch is not None:
+                    raise ValueError("The branch of the condition task '{}' is incomplete".format(open_branch[0]))
+                open_branch = [name, None, None, None]
+            else:
+                for role, flag in enumerate(('IsIfBranch', 'IsElseBranch', 'IsContinuationTask'), start=1):
+                    if task_def.get(flag):
+                        if open_branch is None or open_branch[role] is not None:
+                            raise ValueError("The branch task '{}' has no condition task before it".format(name))
+                        open_branch[role] = name
+                        break
+                if open_branch is not None and all(open_branch):
+                    branches.append(tuple(open_branch))
+                    open_branch = None
+
+        if loop_starts:
+            raise ValueError("The loop start task '{}' has no loop end task".format(loop_starts[-1]))
+        if replicate_starts:
+            raise ValueError("The replicate start task '{}' has no replicate end task".format(replicate_starts[-1][0]))
+        if open_branch is not None:
+            raise ValueError("The branch of the condition task '{}' is incomplete".format(open_branch[0]))
+
+        for position, task_def in enumerate(task_defs):
+            names = tuple(OrderedDict.fromkeys(task_def.get('DependsOn') or ()))
+            for dependency_name in names:
+                dependency_position = positions.get(dependency_name)
+                if dependency_position is None:
+                    raise ValueError("The task '{}' depends on the unknown task '{}'".format(task_def['Name'], dependency_name))
+                dependents[dependency_position].append(position)
+                in_degrees[position] += 1
+            dependencies[task_def['Name']] = names
+
+        # Kahn's algorithm, the ready task registered first is taken first
+        ready = [position for position, in_degree in enumerate(in_degrees) if in_degree == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            position = heapq.heappop(ready)
+            order.append(position)
+            for dependent in dependents[position]:
+                in_degrees[dependent] -= 1
+                if in_degrees[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) < len(task_defs):
+            cycle = [task_defs[position]['Name'] for position, in_degree in enumerate(in_degrees) if in_degree > 0]
+            raise ValueError("The task dependencies form a cycle between: {}".format(', '.join(cycle)))
+
+        compiled = cls(tuple(order), task_defs, dependencies, tuple(loops), tuple(replicates), tuple(branches),
+                       has_data_transfer, key)
+        if cache is not None:
+            cache[key] = compiled
+            while len(cache) > cache_size:
+                cache.popitem(last=False)
+            logger.debug(f"Compiled the job graph of {len(task_defs)} task(s)")
+        return compiled
@@ -0,0 +1,140 @@
+import logging
+import time
+
+logger = logging.getLogger('ProactiveJobHandle')
+
+
+class ProactiveJobHandle:
+    """
+    Handle of a submitted job, to await its result without blocking at submission
+
+    Results and outputs are fetched once, then kept by the handle.
+
+    - gateway (ProActiveGateway): A gateway that stays connected while the handle is used
+    - job_id (int): The job ID
+    - job_name (str): The job name
+    - poll_interval (float): Seconds between two status checks while waiting
+    - cache_results (bool): The job was submitted with a result cache: its task results are cached
+      (see ProActiveGateway.cacheJobResults()) as soon as the handle sees it finished
+    """
+
+    def __init__(self, gateway, job_id, job_name=None, poll_interval=1.0, cache_results=False):
+        self.gateway = gateway
+        self.job_id = job_id
+        self.job_name = job_name
+        self.poll_interval = poll_interval
+        self.cache_results = cache_results
+        self._finished = False
+        self._result = None
+        self._output = None
+
+    def __repr__(self):
+        return "ProactiveJobHandle(job_id={}, job_name={!r})".format(self.job_id, self.job_name)
+
+    def getJobId(self):
+        return self.job_id
+
+    def getJobName(self):
+        return self.job_name
+
+    def status(self):
+        """Return the current status of the job (e.g. 'Pending', 'Running', 'Finished')."""
+        return self.gateway.getJobStatus(self.job_id)
+
+    def done(self):
+        """Return True if the job is finished, without waiting."""
+        if not self._finished:
+            self._finished = bool(self.gateway.isJobFinished(str(self.job_id)))
+            if self._finished and self.cache_results:
+                self._cache_results()
+        return self._finished
+
+    def _cache_results(self):
+        try:
+            self.gateway.cacheJobResults(self.job_id)
+        except Exception as e:
+            logger.warning(f"Failed to cache the task results of the job {self.job_id}: {e}")
+
+    def wait(self, timeout=None):
+        """
+        Wait for the job to finish
+
+        :param timeout: Maximum seconds to wait, None waits forever
+        :return: True if the job is finished
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval if deadline is None else max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+        return True
+
+    def _wait_or_raise(self, timeout):
+        if not self.wait(timeout):
+            raise TimeoutError("The job {} is not finished after {} seconds".format(self.job_id, timeout))
+
+    def result(self, timeout=None):
+        """
+        Wait for the job to finish and return its result map
+
+        :param timeout: Maximum seconds to wait, None waits forever
+        :return: The result map of the job, by task name
+        :raise TimeoutError: If the job is not finished within the timeout
+        """
+        if self._result is None:
+            self._wait_or_raise(timeout)
+            self._result = self.gateway.getJobResultMap(self.job_id)
+        return self._result
+
+    def output(self, timeout=None):
+        """
+        Wait for the job to finish and return its full log output
+
+        :param timeout: Maximum seconds to wait, None waits forever
+        :return: The job output
+        :raise TimeoutError: If the job is not finished within the timeout
+        """
+        if self._output is None:
+            self._wait_or_raise(timeout)
+            self._output = self.gateway.getJobOutput(self.job_id)
+        return self._output
+
+    def cancel(self):
+        """
+        Kill the job if it is not finished
+
+        :return: True if the job was killed
+        """
+        if self.done():
+            return False
+        return bool(self.gateway.killJob(self.job_id))
+
+
+def gather(*handles, timeout=None, poll_interval=1.0, outputs=False):
+    """
+    Wait for several jobs at once and return their results (or outputs), in order
+
+    The pending jobs are checked in a single loop, so that waiting for many jobs costs
+    one status check per pending job and per poll interval.
+
+    :param handles: Job handles (a single list of handles is accepted too)
+    :param timeout: Maximum seconds to wait for all the jobs, None waits forever
+    :param poll_interval: Seconds between two rounds of status checks
+    :param outputs: If True, return the job outputs instead of the result maps
+    :return: A list with the result map (or output) of each job
+    :raise TimeoutError: If some jobs are not finished within the timeout
+    """
+    if len(handles) == 1 and isinstance(handles[0], (list, tuple)):
+        handles = handles[0]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = list(handles)
+    while True:
+        pending = [handle for handle in pending if not handle.done()]
+        if not pending:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("{} job(s) not finished after {} seconds: {}".format(
+                len(pending), timeout, ', '.join(str(handle.job_id) for handle in pending)))
+        logger.debug(f"Waiting for {len(pending)} job(s)")
+        time.sleep(poll_interval if deadline is None else max(0.0, min(poll_interval, deadline - time.monotonic())))
+    return [handle.output() if outputs else handle.result() for handle in handles]
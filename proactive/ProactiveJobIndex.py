@@ -0,0 +1,311 @@
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+
+from py4j.protocol import Py4JError, Py4JJavaError
+
+from .model.ProactiveJobInfo import ProactiveJobInfo
+
+logger = logging.getLogger('ProactiveJobIndex')
+
+_INTEGER_FIELDS = {
+    'parent_id', 'submitted_time', 'start_time', 'finished_time', 'last_updated_time', 'total_tasks',
+    'pending_tasks', 'running_tasks', 'finished_tasks', 'failed_tasks', 'faulty_tasks', 'in_error_tasks',
+}
+_EQUALITY_INDEXES = ('status', 'owner', 'project_name', 'parent_id')
+
+# Batches of at least this many jobs are indexed by sorting the ordered indexes once
+_BULK_SIZE = 64
+
+
+class ProactiveJobIndex:
+    """
+    Local index of the scheduler jobs, kept up to date by delta synchronizations.
+
+    Filtered queries (status, owner, project, name prefix, parent job, submission time
+    range) are answered from memory using secondary indexes. A sync() only transfers
+    what changed since the previous one: the jobs are walked by descending last update
+    time, down to the most recent update already indexed, so that a sync costs
+    O(changes) scheduler calls.
+
+    If the scheduler cannot sort the jobs by last update time, a sync walks instead:
+
+    - the jobs submitted since the most recent indexed job (walked by descending ID)
+    - the jobs still pending or running, of which only the ones whose last update
+      time changed are re-indexed
+    - the jobs that left the pending/running set, fetched one by one
+
+    Jobs removed from the scheduler are only dropped by a resync() (or, in the second
+    mode, when they are removed before they finish).
+
+    Args:
+        gateway (ProActiveGateway): A connected gateway
+        path (str, optional): Path of an SQLite file persisting the index between runs.
+            Defaults to None (memory only)
+        page_size (int, optional): The number of jobs fetched per scheduler request. Defaults to 500
+    """
+
+    def __init__(self, gateway, path=None, page_size=500):
+        self.gateway = gateway
+        self.path = path
+        self.page_size = page_size
+        self.last_sync_time = None
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._sort_by_update = True
+        self._db = None
+        self._reset()
+        if path is not None:
+            self._open(path)
+
+    # Storage
+
+    def _open(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        columns = ", ".join(
+            "{} {}".format(field, "INTEGER" if field in _INTEGER_FIELDS else "TEXT")
+            for field in ProactiveJobInfo.FIELDS if field != 'job_id'
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS jobs (job_id INTEGER PRIMARY KEY, {})".format(columns))
+        self._db.commit()
+        fields = ", ".join(ProactiveJobInfo.FIELDS)
+        self._add_all([ProactiveJobInfo(str(row[0]), *row[1:]) for row in self._db.execute("SELECT {} FROM jobs".format(fields))])
+        logger.debug(f"Loaded {len(self._jobs)} jobs from {path}")
+
+    def _persist(self, upserted, removed):
+        if self._db is None or not (upserted or removed):
+            return
+        placeholders = ", ".join("?" * len(ProactiveJobInfo.FIELDS))
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO jobs ({}) VALUES ({})".format(", ".join(ProactiveJobInfo.FIELDS), placeholders),
+                [(int(job.job_id),) + tuple(getattr(job, field) for field in ProactiveJobInfo.FIELDS[1:]) for job in upserted]
+            )
+            self._db.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in removed])
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # Indexes
+
+    def _reset(self):
+        self._jobs = {}
+        self._active = set()
+        self._max_id = 0
+        self._updated_until = None
+        self._indexes = {field: {} for field in _EQUALITY_INDEXES}
+        self._names = []
+        self._submitted = []
+
+    @staticmethod
+    def _ordered_keys(job, job_id):
+        return (job.job_name or '', job_id), (job.submitted_time or 0, job_id)
+
+    def _add(self, job, ordered=True):
+        job_id = int(job.job_id)
+        self._max_id = max(self._max_id, job_id)
+        if job.last_updated_time is not None and (self._updated_until is None or job.last_updated_time > self._updated_until):
+            self._updated_until = job.last_updated_time
+        if job_id in self._jobs:
+            self._remove(job_id, ordered)
+        self._jobs[job_id] = job
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(job, field), set()).add(job_id)
+        name_key, submitted_key = self._ordered_keys(job, job_id)
+        if ordered:
+            bisect.insort(self._names, name_key)
+            bisect.insort(self._submitted, submitted_key)
+        else:
+            self._names.append(name_key)
+            self._submitted.append(submitted_key)
+        if job.isFinished():
+            self._active.discard(job_id)
+        else:
+            self._active.add(job_id)
+
+    def _add_all(self, jobs):
+        # A job listed twice is indexed once, with its last version
+        jobs = list({int(job.job_id): job for job in jobs}.values())
+        if len(jobs) < _BULK_SIZE:
+            for job in jobs:
+                self._add(job)
+            return
+        # Appending then sorting once avoids the O(n) list insertion of every bisect.insort
+        replaced = [self._jobs[int(job.job_id)] for job in jobs if int(job.job_id) in self._jobs]
+        if replaced:
+            stale_names, stale_submitted = (set(keys) for keys in zip(
+                *(self._ordered_keys(job, int(job.job_id)) for job in replaced)))
+            self._names = [key for key in self._names if key not in stale_names]
+            self._submitted = [key for key in self._submitted if key not in stale_submitted]
+        for job in jobs:
+            self._add(job, ordered=False)
+        self._names.sort()
+        self._submitted.sort()
+
+    def _remove(self, job_id, ordered=True):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        for field, index in self._indexes.items():
+            ids = index.get(getattr(job, field))
+            if ids is not None:
+                ids.discard(job_id)
+                if not ids:
+                    del index[getattr(job, field)]
+        if ordered:
+            for entries, key in zip((self._names, self._submitted), self._ordered_keys(job, job_id)):
+                position = bisect.bisect_left(entries, key)
+                if position < len(entries) and entries[position] == key:
+                    del entries[position]
+        self._active.discard(job_id)
+
+    # Synchronization
+
+    def sync(self):
+        """
+        Bring the index up to date with the scheduler.
+
+        Returns:
+            dict: The number of 'new', 'updated' and 'removed' jobs
+        """
+        with self._sync_lock:
+            # Only sync() and resync() modify the index, under the sync lock: it can be read without the index
+            # lock here, and the scheduler is queried without holding it, so queries keep being served
+            upserted = removed = None
+            if self._sort_by_update and self._updated_until is not None:
+                try:
+                    upserted, removed = self._walk_updated_jobs(self._updated_until), []
+                except Py4JJavaError:
+                    raise
+                except Py4JError as e:
+                    logger.warning(f"The jobs cannot be sorted by last update time, walking the active jobs instead: {e}")
+                    self._sort_by_update = False
+            if upserted is None:
+                upserted, removed = self._walk_new_and_active_jobs()
+            new = sum(1 for job in upserted if int(job.job_id) not in self._jobs)
+
+            with self._lock:
+                self._add_all(upserted)
+                for job_id in removed:
+                    self._remove(job_id)
+                self._persist(upserted, removed)
+                self.last_sync_time = time.time()
+            updated = len(upserted) - new
+            logger.debug(f"Synced {new} new, {updated} updated and {len(removed)} removed jobs")
+            return {'new': new, 'updated': updated, 'removed': len(removed)}
+
+    def _walk_updated_jobs(self, updated_since):
+        jobs = {}
+        for job in self.gateway.iterJobs(page_size=self.page_size, descending=True, sort_by='LAST_UPDATED_TIME',
+                                         pending=True, running=True, finished=True, child_jobs=True):
+            if job.last_updated_time is None:
+                continue
+            if job.last_updated_time < updated_since:
+                break
+            job_id = int(job.job_id)
+            indexed = self._jobs.get(job_id)
+            # The first occurrence of a job shifted by a concurrent update is its most recent version
+            if job_id not in jobs and (indexed is None or indexed.last_updated_time != job.last_updated_time):
+                jobs[job_id] = job
+        return list(jobs.values())
+
+    def _walk_new_and_active_jobs(self):
+        max_known_id = self._max_id
+        active = {job_id: self._jobs[job_id].last_updated_time for job_id in self._active}
+        upserted = []
+        for job in self.gateway.iterJobs(page_size=self.page_size, descending=True, pending=True, running=True,
+                                         finished=True, child_jobs=True):
+            if int(job.job_id) <= max_known_id:
+                break
+            upserted.append(job)
+
+        removed = []
+        still_active = set()
+        for job in self.gateway.iterJobs(page_size=self.page_size, pending=True, running=True, finished=False,
+                                         child_jobs=True):
+            job_id = int(job.job_id)
+            if job_id > max_known_id:
+                continue
+            still_active.add(job_id)
+            if active.get(job_id) != job.last_updated_time:
+                upserted.append(job)
+
+        for job_id in active.keys() - still_active:
+            try:
+                job = self.gateway.getJobRecord(job_id)
+            except Py4JJavaError as e:
+                if 'UnknownJobException' not in str(e.java_exception.getClass().getName()):
+                    raise
+                removed.append(job_id)
+                continue
+            upserted.append(job)
+        return upserted, removed
+
+    def resync(self):
+        """Drop the index and rebuild it from the whole scheduler job list."""
+        with self._sync_lock, self._lock:
+            removed = list(self._jobs)
+            self._reset()
+            self._persist([], removed)
+        return self.sync()
+
+    # Queries
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(int(job_id))
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, job_id):
+        return int(job_id) in self._jobs
+
+    def query(self, status=None, owner=None, project_name=None, parent_id=None, name_prefix=None,
+              submitted_after=None, submitted_before=None, limit=None, descending=False):
+        """
+        Find the indexed jobs matching every given filter.
+
+        Args:
+            status (str or list, optional): Job status(es), e.g. 'RUNNING' or ['PENDING', 'RUNNING']
+            owner (str, optional): The job owner
+            project_name (str, optional): The project name
+            parent_id (int, optional): The parent job ID
+            name_prefix (str, optional): A prefix of the job name
+            submitted_after (int, optional): Minimum submission time, in epoch milliseconds
+            submitted_before (int, optional): Maximum submission time (exclusive), in epoch milliseconds
+            limit (int, optional): The maximum number of jobs to return
+            descending (bool, optional): If True, the most recent jobs come first. Defaults to False
+        Returns:
+            list[ProactiveJobInfo]: The matching jobs, sorted by job ID
+        """
+        with self._lock:
+            candidates = []
+            if status is not None:
+                statuses = [status] if isinstance(status, str) else status
+                candidates.append(set().union(*(self._indexes['status'].get(value, ()) for value in statuses)))
+            for field, value in (('owner', owner), ('project_name', project_name), ('parent_id', parent_id)):
+                if value is not None:
+                    candidates.append(self._indexes[field].get(value, set()))
+            if name_prefix is not None:
+                start = bisect.bisect_left(self._names, (name_prefix,))
+                end = bisect.bisect_left(self._names, (name_prefix + '\U0010ffff',))
+                candidates.append({job_id for _, job_id in self._names[start:end]})
+            if submitted_after is not None or submitted_before is not None:
+                start = 0 if submitted_after is None else bisect.bisect_left(self._submitted, (submitted_after,))
+                end = len(self._submitted) if submitted_before is None else bisect.bisect_left(self._submitted, (submitted_before,))
+                candidates.append({job_id for _, job_id in self._submitted[start:end]})
+
+            if candidates:
+                candidates.sort(key=len)
+                job_ids = set(candidates[0]).intersection(*candidates[1:])
+            else:
+                job_ids = self._jobs.keys()
+            job_ids = sorted(job_ids, reverse=descending)
+            if limit is not None:
+                job_ids = job_ids[:limit]
+            return [self._jobs[job_id] for job_id in job_ids]
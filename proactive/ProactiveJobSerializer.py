@@ -0,0 +1,240 @@
+import json
+import os
+
+from .model.ProactiveFlowScript import ProactiveFlowScript
+from .model.ProactiveForkEnv import ProactiveForkEnv
+from .model.ProactiveJob import ProactiveJob
+from .model.ProactiveScript import ProactivePreScript, ProactivePostScript
+from .model.ProactiveSelectionScript import ProactiveSelectionScript
+from .model.ProactiveTask import ProactiveTask, ProactivePythonTask
+
+# The scripts of a task, by task attribute, with their class and the attributes they add to a script
+_SCRIPTS = {
+    'fork_environment': (ProactiveForkEnv, ('java_home',)),
+    'selection_script': (ProactiveSelectionScript, ('is_dynamic',)),
+    'pre_script': (ProactivePreScript, ()),
+    'post_script': (ProactivePostScript, ()),
+    'flow_script': (ProactiveFlowScript, ('proactive_action_type', 'target', 'targetElse', 'targetContinuation')),
+}
+
+# The task attributes stored as they are, when they differ from the ones of a new task
+_TASK_FIELDS = ('task_implementation', 'task_implementation_url', 'description', 'flow_block', 'precious_result',
+                'task_error_policy')
+
+_TASK_TYPES = {'task': ProactiveTask, 'python': ProactivePythonTask}
+
+# New tasks of each type, to leave out the attributes a serialized task does not change
+_DEFAULT_TASKS = {'task': ProactiveTask(), 'python': ProactivePythonTask()}
+
+
+class ProactiveJobSerializer:
+    """
+    Serializes job models to JSON or msgpack, without the JVM
+
+    The serialized form is a dict following a versioned schema:
+
+    - schema (str): 'proactive-job'
+    - version (int): SCHEMA_VERSION, a reader refuses the versions it does not know
+    - name, variables, generic_information, input_folder, output_folder: The job attributes
+    - tasks (list): One dict per task, in job order, with its type ('task' or 'python'), name,
+      script language and default Python, its variables, generic information, input and output
+      files, its scripts (fork_environment, selection_script, pre_script, post_script and
+      flow_script, each a dict of its language, implementation and specific attributes), the
+      attributes listed in _TASK_FIELDS, and its dependencies as indexes in the task list
+
+    The task attributes equal to the ones of a new task are left out, so that the serialized
+    jobs stay compact. msgpack is optional: install it (pip install msgpack) to use the binary form.
+    """
+
+    SCHEMA = 'proactive-job'
+    SCHEMA_VERSION = 1
+    FORMATS = ('json', 'msgpack')
+
+    def to_dict(self, job_model):
+        """
+        Convert a job model to its serialized form
+
+        :param job_model: A job model
+        :return: A dict of JSON types
+        """
+        tasks = job_model.getTasks()
+        indexes = {id(task): index for index, task in enumerate(tasks)}
+        return {
+            'schema': self.SCHEMA,
+            'version': self.SCHEMA_VERSION,
+            'name': job_model.getJobName(),
+            'variables': dict(job_model.getVariables()),
+            'generic_information': dict(job_model.getGenericInformation()),
+            'input_folder': job_model.getInputFolder(),
+            'output_folder': job_model.getOutputFolder(),
+            'tasks': [self._taskToDict(task, indexes) for task in tasks],
+        }
+
+    def _taskToDict(self, task, indexes):
+        task_type = 'python' if isinstance(task, ProactivePythonTask) else 'task'
+        if type(task) is not _TASK_TYPES[task_type]:
+            raise ValueError("Cannot serialize the task {} of type {}".format(task, type(task).__name__))
+        default = _DEFAULT_TASKS[task_type]
+        data = {'type': task_type, 'name': task.getTaskName()}
+        if task.default_python != default.default_python:
+            data['default_python'] = task.default_python
+        if task.getScriptLanguage() != default.getScriptLanguage():
+            data['language'] = task.getScriptLanguage()
+        for field in _TASK_FIELDS:
+            value = getattr(task, field)
+            if value != getattr(default, field):
+                data[field] = value
+        if task.getVariables():
+            data['variables'] = dict(task.getVariables())
+        if task.getGenericInformation() != default.getGenericInformation():
+            data['generic_information'] = dict(task.getGenericInformation())
+        if task.getInputFiles():
+            data['input_files'] = list(task.getInputFiles())
+        if task.getOutputFiles():
+            data['output_files'] = list(task.getOutputFiles())
+        for field in _SCRIPTS:
+            script = getattr(task, field)
+            if script is not None:
+                data[field] = self._scriptToDict(script, field)
+        if task.hasDependencies():
+            try:
+                data['dependencies'] = [indexes[id(dependency)] for dependency in task.getDependencies()]
+            except KeyError:
+                raise ValueError("The task {} depends on a task which is not in the job".format(task))
+        return data
+
+    @staticmethod
+    def _scriptToDict(script, field):
+        script_class, attributes = _SCRIPTS[field]
+        if not isinstance(script, script_class):
+            raise ValueError("Cannot serialize the {} of type {}".format(field, type(script).__name__))
+        data = {'language': script.getScriptLanguage(), 'implementation': script.getImplementation()}
+        if script.getImplementationFromURL() is not None:
+            data['implementation_url'] = script.getImplementationFromURL()
+        for attribute in attributes:
+            data[attribute] = getattr(script, attribute)
+        return data
+
+    def from_dict(self, data):
+        """
+        Convert a serialized form back to a job model
+
+        :param data: A dict returned by to_dict()
+        :return: A new job model
+        """
+        if not isinstance(data, dict) or data.get('schema') != self.SCHEMA:
+            raise ValueError("Not a serialized ProActive job")
+        if data.get('version') != self.SCHEMA_VERSION:
+            raise ValueError("Unsupported serialized job version: {} (supported: {})".format(
+                data.get('version'), self.SCHEMA_VERSION))
+        job_model = ProactiveJob(data['name'])
+        for key, value in data.get('variables', {}).items():
+            job_model.addVariable(key, value)
+        for key, value in data.get('generic_information', {}).items():
+            job_model.addGenericInformation(key, value)
+        job_model.setInputFolder(data.get('input_folder'))
+        job_model.setOutputFolder(data.get('output_folder'))
+        tasks = [self._taskFromDict(task_data) for task_data in data.get('tasks', [])]
+        for task, task_data in zip(tasks, data.get('tasks', [])):
+            for index in task_data.get('dependencies', ()):
+                task.addDependency(tasks[index])
+            job_model.addTask(task)
+        return job_model
+
+    def _taskFromDict(self, data):
+        if data.get('type') not in _TASK_TYPES:
+            raise ValueError("Unknown serialized task type: {}".format(data.get('type')))
+        if data['type'] == 'python':
+            task = ProactivePythonTask(data['name'], data.get('default_python', 'python3'))
+        else:
+            task = ProactiveTask(None, data['name'])
+            if 'default_python' in data:
+                task.default_python = data['default_python']
+        if 'language' in data:
+            task.setScriptLanguage(data['language'])
+        for field in _TASK_FIELDS:
+            if field in data:
+                setattr(task, field, data[field])
+        for key, value in data.get('variables', {}).items():
+            task.addVariable(key, value)
+        if 'generic_information' in data:
+            task.clearGenericInformation()
+            for key, value in data['generic_information'].items():
+                task.addGenericInformation(key, value)
+        for input_file in data.get('input_files', ()):
+            task.addInputFile(input_file)
+        for output_file in data.get('output_files', ()):
+            task.addOutputFile(output_file)
+        for field, (script_class, attributes) in _SCRIPTS.items():
+            script_data = data.get(field)
+            if script_data is not None:
+                script = script_class(script_data['language'])
+                script.implementation = script_data.get('implementation', '')
+                script.implementation_url = script_data.get('implementation_url')
+                for attribute in attributes:
+                    if attribute in script_data:
+                        setattr(script, attribute, script_data[attribute])
+                setattr(task, field, script)
+        return task
+
+    def dumps(self, job_model, format='json'):
+        """
+        Serialize a job model
+
+        :param job_model: A job model
+        :param format: 'json' (compact text) or 'msgpack' (binary, needs the msgpack package)
+        :return: A str for JSON, bytes for msgpack
+        """
+        data = self.to_dict(job_model)
+        if format == 'json':
+            return json.dumps(data, separators=(',', ':'))
+        if format == 'msgpack':
+            return _msgpack().packb(data, use_bin_type=True)
+        raise ValueError("Unknown serialization format: {} (supported: {})".format(format, ', '.join(self.FORMATS)))
+
+    def loads(self, serialized_job):
+        """
+        Deserialize a job model, from JSON if given a str and from msgpack if given bytes
+
+        :param serialized_job: The output of dumps()
+        :return: A new job model
+        """
+        if isinstance(serialized_job, str):
+            return self.from_dict(json.loads(serialized_job))
+        if serialized_job[:1] == b'{':
+            return self.from_dict(json.loads(serialized_job.decode('utf-8')))
+        return self.from_dict(_msgpack().unpackb(serialized_job, raw=False, strict_map_key=False))
+
+    def save(self, job_model, path, format=None):
+        """
+        Save a job model to a file
+
+        :param job_model: A job model
+        :param path: The file path, written atomically
+        :param format: 'json' or 'msgpack', by default 'msgpack' if the path ends with .msgpack, else 'json'
+        """
+        if format is None:
+            format = 'msgpack' if path.endswith('.msgpack') else 'json'
+        serialized_job = self.dumps(job_model, format)
+        staging = path + '.tmp'
+        with open(staging, 'wb') as job_file:
+            job_file.write(serialized_job.encode('utf-8') if isinstance(serialized_job, str) else serialized_job)
+        os.replace(staging, path)
+
+    def load(self, path):
+        """
+        Load a job model saved by save()
+
+        :param path: The file path
+        :return: A new job model
+        """
+        with open(path, 'rb') as job_file:
+            return self.loads(job_file.read())
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("The msgpack format needs the msgpack package: pip install msgpack")
+    return msgpack
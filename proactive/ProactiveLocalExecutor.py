@@ -0,0 +1,755 @@
+import concurrent.futures
+import glob
+import io
+import itertools
+import logging
+import os
+import pickle
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+from .model.ProactiveFlowBlock import ProactiveFlowBlock
+from .model.ProactiveFlowScript import ProactiveFlowScript
+from .model.ProactiveFlowActionType import ProactiveFlowActionType
+from .model.ProactiveJob import ProactiveJob
+from .model.ProactiveScript import ProactivePreScript, ProactivePostScript
+from .model.ProactiveScriptLanguage import ProactiveScriptLanguage
+from .model.ProactiveTask import ProactiveTask, ProactivePythonTask
+
+logger = logging.getLogger('ProactiveLocalExecutor')
+
+_PYTHON_LANGUAGES = ('cpython', 'python')
+_SHELL_LANGUAGES = {'bash': 'bash', 'shell': 'sh'}
+
+# Task states, as displayed by the scheduler
+_PENDING, _RUNNING, _FINISHED, _FAULTY, _SKIPPED, _ABORTED = 'Pending', 'Running', 'Finished', 'Faulty', 'Skipped', 'Aborted'
+_DONE_STATES = (_FINISHED, _FAULTY, _SKIPPED)
+
+
+class _VariablesMap(dict):
+    """The variables (or resultMap) of a task, with the put() of the scheduler script bindings."""
+
+    def put(self, key, value):
+        self[key] = value
+
+
+class _TaskResult:
+    """The result of a parent task, as found in the results list of a task."""
+
+    def __init__(self, task_name, value, raised=False):
+        self.task_name = task_name
+        self._value = value
+        self.raised = raised
+
+    def value(self):
+        return self._value
+
+    def getTaskName(self):
+        return self.task_name
+
+    def isRaised(self):
+        return self.raised
+
+    def __str__(self):
+        return str(self._value)
+
+    def __repr__(self):
+        return "TaskResult(task_name={!r}, value={!r})".format(self.task_name, self._value)
+
+
+def _picklable(value):
+    """Return the value if it can be sent back from a worker process, its repr otherwise."""
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return repr(value)
+
+
+def _transfer(source_folder, destination_folder, patterns):
+    """Copy the files matching the given patterns (relative to source_folder), keeping their relative paths."""
+    for pattern in patterns:
+        for source in glob.glob(os.path.join(source_folder, pattern), recursive=True):
+            if not os.path.isfile(source):
+                continue
+            destination = os.path.join(destination_folder, os.path.relpath(source, source_folder))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copy2(source, destination)
+
+
+def _run_script(language, implementation, bindings, output):
+    """Run a script with the bindings of the scheduler, and return its result."""
+    language = (language or '').lower()
+    if language in _PYTHON_LANGUAGES:
+        exec(compile(implementation, '<' + str(bindings['variables'].get('PA_TASK_NAME')) + '>', 'exec'), bindings)
+        return bindings.get('result')
+    if language in _SHELL_LANGUAGES:
+        environment = dict(os.environ)
+        environment.update(('variables_' + str(name), str(value)) for name, value in bindings['variables'].items())
+        completed = subprocess.run([_SHELL_LANGUAGES[language], '-c', implementation], env=environment,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        output.write(completed.stdout)
+        if completed.returncode != 0:
+            raise RuntimeError("The {} script exited with code {}".format(language, completed.returncode))
+        return completed.returncode
+    raise ValueError("The {} scripts cannot run locally, only Python, Bash and Shell scripts can".format(language))
+
+
+def _run_flow_script(language, implementation, action, bindings):
+    """
+    Evaluate a flow script and return its decision (runs, loop or branch)
+
+    Flow scripts are one-line assignments most of the time, so those written in another
+    language than Python (e.g. "runs = 4" in JavaScript) are evaluated as Python code too.
+    """
+    flow_bindings = dict(bindings, true=True, false=False, null=None)
+    try:
+        exec(compile(implementation, '<flow script>', 'exec'), flow_bindings)
+    except SyntaxError:
+        if (language or '').lower() in _PYTHON_LANGUAGES:
+            raise
+        raise ValueError("The {} flow script cannot run locally, it is not valid Python code".format(language))
+    decision = {'replicate': 'runs', 'loop': 'loop', 'if': 'branch'}[action]
+    if decision not in flow_bindings:
+        raise ValueError("The {} flow script does not set the '{}' variable".format(action, decision))
+    return flow_bindings[decision]
+
+
+def _run_task(spec):
+    """
+    Run a task in a worker process, in its own local space
+
+    The input files are copied from the input folder to the local space before the task, and
+    the output files from the local space to the output folder after it, like the transfers
+    from and to the input and output spaces of the scheduler.
+    """
+    output = io.StringIO()
+    variables = _VariablesMap(spec['variables'])
+    result_map = _VariablesMap()
+    bindings = {
+        '__name__': '__main__',
+        'variables': variables,
+        'resultMap': result_map,
+        'results': [_TaskResult(*parent_result) for parent_result in spec['results']],
+        'result': None,
+    }
+    decision, error = None, None
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='proactive-local-') as localspace:
+        bindings['localspace'] = localspace
+        try:
+            _transfer(spec['input_folder'], localspace, spec['input_files'])
+            os.chdir(localspace)
+            with redirect_stdout(output), redirect_stderr(output):
+                if spec['pre_script']:
+                    _run_script(*spec['pre_script'], bindings, output)
+                bindings['result'] = _run_script(spec['language'], spec['implementation'], bindings, output)
+                if spec['post_script']:
+                    _run_script(*spec['post_script'], bindings, output)
+                if spec['flow_script']:
+                    decision = _run_flow_script(*spec['flow_script'], bindings)
+            _transfer(localspace, spec['output_folder'], spec['output_files'])
+        except Exception:
+            error = traceback.format_exc()
+            output.write(error)
+        finally:
+            os.chdir(working_directory)
+    return {
+        'result': _picklable(bindings.get('result')),
+        'variables': {name: _picklable(value) for name, value in variables.items()},
+        'result_map': {name: _picklable(value) for name, value in result_map.items()},
+        'output': output.getvalue(),
+        'decision': _picklable(decision),
+        'error': error,
+    }
+
+
+def _instance_name(task_name, iteration, replication):
+    """Name of a task instance, suffixed like the scheduler does for the loop iterations and the replicas."""
+    return task_name + ('#' + str(iteration) if iteration else '') + ('*' + str(replication) if replication else '')
+
+
+class _TaskRun:
+    """One run of a task: each replica and each loop iteration of a task is a run."""
+
+    __slots__ = ('task', 'name', 'iteration', 'replication', 'dependencies', 'state',
+                 'result', 'variables', 'output', 'error')
+
+    def __init__(self, task, iteration=0, replication=0):
+        self.task = task
+        self.name = _instance_name(task.getTaskName(), iteration, replication)
+        self.iteration = iteration
+        self.replication = replication
+        self.dependencies = []
+        self.state = _PENDING
+        self.result = None
+        self.variables = {}
+        self.output = ''
+        self.error = None
+
+    def clone(self, iteration, replication):
+        return _TaskRun(self.task, iteration, replication)
+
+
+class _LocalJob:
+    """The state of a job submitted to the local executor."""
+
+    def __init__(self, job_id, job_model, input_folder, output_folder):
+        self.job_id = job_id
+        self.job_name = job_model.getJobName()
+        self.variables = dict(job_model.getVariables())
+        self.input_folder = os.path.abspath(input_folder)
+        self.output_folder = os.path.abspath(output_folder)
+        self.status = 'Pending'
+        self.runs = []
+        self.result_map = {}
+        self.killed = False
+        self.result_cache = None
+        self.task_keys = {}
+        self.cached_results = 0
+        self.finished = threading.Event()
+        self.condition = threading.Condition()
+
+
+class ProactiveLocalExecutor:
+    """
+    Runs job models on the client machine, to iterate on a workflow without submitting it
+
+    The executor has the job creation, submission, result and output methods of the gateway,
+    so a job model (or a decorated job, see job(local=True)) runs unchanged on either of them.
+    It honours the task dependencies, the replicate, loop and branch flow scripts, the job and
+    task variables (with the variables propagated by the parent tasks), the pre and post scripts
+    and the input and output files. Independent tasks run in parallel on a process pool.
+
+    Python, Bash and Shell tasks are supported. Python scripts see the bindings of the scheduler:
+    variables, results, resultMap, result and localspace.
+
+    - max_workers (int): The number of worker processes, the number of CPUs by default
+    - mp_context: The multiprocessing context of the worker processes
+    """
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.proactive_script_language = ProactiveScriptLanguage()
+        self.proactive_flow_block = ProactiveFlowBlock()
+        self.proactive_flow_action_type = ProactiveFlowActionType()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_value):
+        self.close()
+
+    def _getPool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+            return self._pool
+
+    def isConnected(self):
+        return True
+
+    def close(self):
+        """Wait for the running jobs and stop the worker processes."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            for local_job in list(self._jobs.values()):
+                local_job.finished.wait()
+            pool.shutdown()
+
+    def disconnect(self):
+        self.close()
+
+    def getProactiveScriptLanguage(self):
+        return self.proactive_script_language
+
+    def getProactiveFlowBlockType(self):
+        return self.proactive_flow_block
+
+    def createJob(self, job_name=''):
+        return ProactiveJob(job_name)
+
+    def createTask(self, language=None, task_name=''):
+        if language == self.proactive_script_language.python():
+            return self.createPythonTask(task_name)
+        return ProactiveTask(language, task_name) if self.proactive_script_language.is_language_supported(language) else None
+
+    def createPythonTask(self, task_name='', default_python='python3'):
+        return ProactivePythonTask(task_name, default_python)
+
+    def createPreScript(self, language=None):
+        return ProactivePreScript(language) if self.proactive_script_language.is_language_supported(language) else None
+
+    def createPostScript(self, language=None):
+        return ProactivePostScript(language) if self.proactive_script_language.is_language_supported(language) else None
+
+    def _createFlowScript(self, action_type, script_implementation, script_language, target=None, target_else=None, target_continuation=None):
+        flow_script = ProactiveFlowScript(script_language)
+        flow_script.setActionType(action_type)
+        flow_script.setImplementation(script_implementation)
+        flow_script.setActionTarget(target)
+        flow_script.setActionTargetElse(target_else)
+        flow_script.setActionTargetContinuation(target_continuation)
+        return flow_script
+
+    def createReplicateFlowScript(self, script_implementation, script_language="javascript"):
+        return self._createFlowScript(self.proactive_flow_action_type.replicate(), script_implementation, script_language)
+
+    def createLoopFlowScript(self, script_implementation, target, script_language="javascript"):
+        return self._createFlowScript(self.proactive_flow_action_type.loop(), script_implementation, script_language, target)
+
+    def createBranchFlowScript(self, script_implementation, target_if, target_else, target_continuation, script_language="javascript"):
+        return self._createFlowScript(self.proactive_flow_action_type.branch(), script_implementation, script_language,
+                                      target_if, target_else, target_continuation)
+
+    def submitJob(self, job_model, debug=False, result_cache=None):
+        """
+        Run a job model locally, without waiting for it
+
+        :param job_model: A valid job model
+        :param debug: Unused, for compatibility with the gateway
+        :param result_cache: A ProactiveResultCache, to reuse the results of the unchanged tasks and
+            cache the results of the others
+        :return: The local ID of the job
+        :raise ValueError: If a task depends on a task which is not in the job
+        """
+        return self.submitJobWithInputsAndOutputsPaths(job_model, debug=debug, result_cache=result_cache)
+
+    def submitJobWithInputsAndOutputsPaths(self, job_model, input_folder_path='.', output_folder_path='.', debug=False, result_cache=None):
+        """
+        Run a job model locally, without waiting for it
+
+        :param job_model: A valid job model
+        :param input_folder_path: The folder the input files of the tasks are copied from
+        :param output_folder_path: The folder the output files of the tasks are copied to
+        :param debug: Unused, for compatibility with the gateway
+        :param result_cache: A ProactiveResultCache, to reuse the results of the unchanged tasks and
+            cache the results of the others
+        :return: The local ID of the job
+        :raise ValueError: If a task depends on a task which is not in the job
+        """
+        local_job = _LocalJob(next(self._job_ids), job_model, input_folder_path, output_folder_path)
+        local_job.runs = self._createRuns(job_model.getTasks())
+        if result_cache is not None:
+            local_job.result_cache = result_cache
+            local_job.task_keys = result_cache.task_keys(job_model, local_job.input_folder)
+        self._jobs[local_job.job_id] = local_job
+        logger.info('Running the job ' + str(local_job.job_name) + ' locally with ID ' + str(local_job.job_id))
+        threading.Thread(target=self._runJob, args=(local_job,), name='proactive-local-job-' + str(local_job.job_id),
+                         daemon=True).start()
+        return local_job.job_id
+
+    @staticmethod
+    def _createRuns(tasks):
+        """Create the first run of each task, with its dependencies and the implicit ones of the branches."""
+        runs = {id(task): _TaskRun(task) for task in tasks}
+        by_name = {task.getTaskName(): runs[id(task)] for task in tasks}
+        for task in tasks:
+            for dependency in task.getDependencies():
+                if id(dependency) not in runs:
+                    raise ValueError("The task '{}' depends on the task '{}', which is not in the job".format(
+                        task.getTaskName(), dependency.getTaskName()))
+                runs[id(task)].dependencies.append(runs[id(dependency)])
+
+        children = {id(task): [] for task in tasks}
+        for task in tasks:
+            for dependency in task.getDependencies():
+                children[id(dependency)].append(task)
+
+        # The targets of a branch start after its condition task, and the continuation after both targets
+        for task in tasks:
+            flow_script = task.getFlowScript()
+            if flow_script is None or not flow_script.isBranchFlowScript():
+                continue
+            condition_run = runs[id(task)]
+            target_runs = [by_name.get(name) for name in (flow_script.getActionTarget(), flow_script.getActionTargetElse())]
+            continuation_run = by_name.get(flow_script.getActionTargetContinuation())
+            if None in target_runs:
+                raise ValueError("The branch of the task '{}' targets a task which is not in the job".format(task.getTaskName()))
+            for target_run in target_runs:
+                if condition_run not in target_run.dependencies:
+                    target_run.dependencies.append(condition_run)
+                if continuation_run is not None:
+                    end_run = runs[id(_blockEnd(target_run.task, children))]
+                    if end_run not in continuation_run.dependencies:
+                        continuation_run.dependencies.append(end_run)
+        return list(runs.values())
+
+    def _runJob(self, local_job):
+        pool = self._getPool()
+        futures = {}
+        stopped = False
+        local_job.status = 'Running'
+        try:
+            while not (local_job.killed or stopped):
+                self._dispatch(local_job, pool, futures)
+                if not futures:
+                    break
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stopped = self._complete(local_job, futures.pop(future), future) or stopped
+            for future in futures:
+                future.cancel()
+            with local_job.condition:
+                for run in local_job.runs:
+                    if run.state in (_PENDING, _RUNNING):
+                        run.state = _ABORTED
+                local_job.status = 'Killed' if local_job.killed else 'Canceled' if stopped else 'Finished'
+        except Exception:
+            logger.exception('The local job ' + str(local_job.job_id) + ' failed')
+            local_job.status = 'Failed'
+        finally:
+            local_job.finished.set()
+            with local_job.condition:
+                local_job.condition.notify_all()
+
+    def _dispatch(self, local_job, pool, futures):
+        """Skip or submit the pending runs whose dependencies are done, until none changes."""
+        with local_job.condition:
+            changed = True
+            while changed:
+                changed = False
+                for run in local_job.runs:
+                    if run.state != _PENDING or any(dependency.state not in _DONE_STATES for dependency in run.dependencies):
+                        continue
+                    changed = True
+                    # The runs after a skipped branch or an empty replication are skipped too
+                    if run.dependencies and all(dependency.state == _SKIPPED for dependency in run.dependencies):
+                        run.state = _SKIPPED
+                        continue
+                    if self._restoreCachedRun(local_job, run):
+                        continue
+                    run.state = _RUNNING
+                    futures[pool.submit(_run_task, self._taskSpec(local_job, run))] = run
+
+    @staticmethod
+    def _runKey(local_job, run):
+        # Only the first run of a task is memoized, the tasks of flow blocks are not memoizable anyway
+        if local_job.result_cache is None or run.iteration or run.replication:
+            return None
+        return local_job.task_keys.get(run.name)
+
+    def _restoreCachedRun(self, local_job, run):
+        """Finish a run with its cached result, if any. Return True if the run was cached."""
+        key = self._runKey(local_job, run)
+        entry = local_job.result_cache.get(key) if key else None
+        if entry is None:
+            return False
+        local_job.result_cache.restore_files(key, entry, local_job.output_folder)
+        run.result, run.output, run.variables = entry['result'], entry['output'], entry['variables']
+        run.state = _FINISHED
+        logger.debug('Reusing the cached result of the task ' + run.name + ' of the local job ' + str(local_job.job_id))
+        return True
+
+    def _taskSpec(self, local_job, run):
+        task = run.task
+        variables = dict(local_job.variables)
+        parents = [dependency for dependency in run.dependencies if dependency.state in (_FINISHED, _FAULTY)]
+        for parent in parents:
+            variables.update(parent.variables)
+        variables.update(task.getVariables())
+        variables.update({
+            'PA_JOB_ID': str(local_job.job_id),
+            'PA_JOB_NAME': local_job.job_name,
+            'PA_TASK_NAME': run.name,
+            'PA_TASK_ITERATION': run.iteration,
+            'PA_TASK_REPLICATION': run.replication,
+        })
+        pre_script, post_script, flow_script = task.getPreScript(), task.getPostScript(), task.getFlowScript()
+        return {
+            'language': task.getScriptLanguage(),
+            'implementation': task.getTaskImplementation(),
+            'pre_script': (pre_script.getScriptLanguage(), pre_script.getImplementation()) if pre_script else None,
+            'post_script': (post_script.getScriptLanguage(), post_script.getImplementation()) if post_script else None,
+            'flow_script': (flow_script.getScriptLanguage(), flow_script.getImplementation(), flow_script.getActionType()) if flow_script else None,
+            'variables': variables,
+            'results': [(parent.name, parent.result, parent.state == _FAULTY) for parent in parents],
+            'input_folder': local_job.input_folder,
+            'output_folder': local_job.output_folder,
+            'input_files': list(task.getInputFiles()),
+            'output_files': list(task.getOutputFiles()),
+        }
+
+    def _complete(self, local_job, run, future):
+        """Record the outcome of a run and apply its flow script. Return True if the job must stop."""
+        try:
+            outcome = future.result()
+        except Exception:
+            outcome = {'result': None, 'variables': {}, 'result_map': {}, 'output': '', 'decision': None,
+                       'error': traceback.format_exc()}
+        with local_job.condition:
+            run.result, run.output, run.error = outcome['result'], outcome['output'], outcome['error']
+            run.variables = outcome['variables']
+            local_job.result_map.update(outcome['result_map'])
+            run.state = _FAULTY if run.error else _FINISHED
+            if run.error is None and run.task.getFlowScript() is not None:
+                try:
+                    self._applyFlow(local_job, run, outcome['decision'])
+                except ValueError as e:
+                    run.state, run.error = _FAULTY, str(e)
+                    run.output += str(e)
+            local_job.condition.notify_all()
+        key = self._runKey(local_job, run)
+        if key and run.state == _FINISHED:
+            local_job.result_cache.put(key, run.result, run.output, run.variables, local_job.output_folder, run.task.getOutputFiles())
+            local_job.cached_results += 1
+        if run.state == _FAULTY:
+            logger.debug('The task ' + run.name + ' of the local job ' + str(local_job.job_id) + ' is faulty')
+            return run.task.getTaskErrorPolicy() != 'continueJobExecution'
+        return False
+
+    def _applyFlow(self, local_job, run, decision):
+        flow_script = run.task.getFlowScript()
+        if flow_script.isReplicateFlowScript():
+            self._replicate(local_job, run, int(decision))
+        elif flow_script.isLoopFlowScript():
+            if decision:
+                self._loop(local_job, run, flow_script.getActionTarget())
+        elif flow_script.isBranchFlowScript():
+            if decision not in ('if', 'else'):
+                raise ValueError("The branch flow script of the task '{}' must set branch to 'if' or 'else', not {!r}".format(run.name, decision))
+            skipped_target = flow_script.getActionTargetElse() if decision == 'if' else flow_script.getActionTarget()
+            for dependent in _dependents(local_job.runs, run):
+                if dependent.task.getTaskName() == skipped_target and dependent.state == _PENDING:
+                    dependent.state = _SKIPPED
+
+    def _replicate(self, local_job, run, runs_count):
+        """Replicate the blocks following the run (the replicated block), runs_count times in total."""
+        children = _taskChildren(local_job.runs)
+        region_tasks = set()
+        for child in children.get(id(run.task), ()):
+            region_tasks.update(id(task) for task in _blockTasks(child, children))
+        region = _reachable(local_job.runs, run, lambda candidate: id(candidate.task) in region_tasks)
+        if runs_count < 1:
+            for region_run in region:
+                region_run.state = _SKIPPED
+            return
+        for replication in range(1, runs_count):
+            clones = {region_run: region_run.clone(region_run.iteration, replication) for region_run in region}
+            self._insertClones(local_job, clones)
+            # The tasks after the replicated block merge all the replicas
+            for other in local_job.runs:
+                if other not in clones and other not in clones.values():
+                    other.dependencies.extend(clones[dependency] for dependency in list(other.dependencies) if dependency in clones)
+
+    def _loop(self, local_job, end_run, target_name):
+        """Run the loop block ending with end_run once more, the new iteration starting after end_run."""
+        ancestors = _ancestors(end_run)
+        start_run = next((ancestor for ancestor in ancestors if ancestor.task.getTaskName() == target_name), None)
+        if start_run is None:
+            raise ValueError("The loop of the task '{}' targets '{}', which is not before it".format(end_run.name, target_name))
+        region = [start_run] + _reachable(local_job.runs, start_run, lambda candidate: candidate in ancestors)
+        clones = {region_run: region_run.clone(end_run.iteration + 1, region_run.replication) for region_run in region}
+        self._insertClones(local_job, clones)
+        clones[start_run].dependencies = [end_run]
+        for other in local_job.runs:
+            if other not in clones.values() and end_run in other.dependencies and other not in region:
+                other.dependencies = [clones[end_run] if dependency is end_run else dependency for dependency in other.dependencies]
+
+    @staticmethod
+    def _insertClones(local_job, clones):
+        for original, clone in clones.items():
+            clone.dependencies = [clones.get(dependency, dependency) for dependency in original.dependencies]
+        local_job.runs.extend(clones.values())
+
+    def _getJob(self, job_id):
+        local_job = self._jobs.get(int(job_id))
+        if local_job is None:
+            raise ValueError("Unknown local job " + str(job_id))
+        return local_job
+
+    def _waitJob(self, job_id, timeout):
+        """Wait for a job, the timeout being in milliseconds (a negative timeout waits forever)."""
+        local_job = self._getJob(job_id)
+        if not local_job.finished.wait(None if timeout is None or timeout < 0 else timeout / 1000.0):
+            raise TimeoutError("The local job {} is not finished after {} ms".format(job_id, timeout))
+        return local_job
+
+    def _getRun(self, local_job, task_name):
+        for run in local_job.runs:
+            if run.name == task_name:
+                return run
+        raise ValueError("Unknown task '{}' in the local job {}".format(task_name, local_job.job_id))
+
+    def _waitTask(self, job_id, task_name, timeout):
+        local_job = self._getJob(job_id)
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout / 1000.0
+        with local_job.condition:
+            while True:
+                run = self._getRun(local_job, task_name)
+                if run.state in _DONE_STATES + (_ABORTED,):
+                    return run
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("The task {} of the local job {} is not finished after {} ms".format(task_name, job_id, timeout))
+                local_job.condition.wait(remaining)
+
+    def getJobStatus(self, job_id):
+        return self._getJob(job_id).status
+
+    def isJobFinished(self, job_id):
+        return self._getJob(job_id).finished.is_set()
+
+    def getTaskStatus(self, job_id, task_name):
+        local_job = self._getJob(job_id)
+        with local_job.condition:
+            return next((run.state for run in local_job.runs if run.name == task_name), None)
+
+    def isTaskFinished(self, job_id, task_name):
+        return self.getTaskStatus(job_id, task_name) in _DONE_STATES + (_ABORTED,)
+
+    def waitForJob(self, job_id, timeout=60000):
+        """
+        Wait for a job to finish
+
+        :param job_id: The ID of the local job
+        :param timeout: The timeout in milliseconds
+        :return: The final status of the job
+        :raise TimeoutError: If the job is not finished within the timeout
+        """
+        return self._waitJob(job_id, timeout).status
+
+    def waitJobIsFinished(self, job_id, time_to_check=0.5):
+        self._waitJob(job_id, -1)
+
+    def cacheJobResults(self, job_id, timeout=60000):
+        """
+        Wait for a job and return the number of task results it cached (they are cached as the tasks finish)
+
+        :param job_id: The ID of the local job
+        :param timeout: The timeout in milliseconds
+        :return: The number of cached task results
+        """
+        return self._waitJob(job_id, timeout).cached_results
+
+    def getJobResult(self, job_id, timeout=60000):
+        local_job = self._waitJob(job_id, timeout)
+        return os.linesep.join(str(run.result) for run in local_job.runs if run.state in (_FINISHED, _FAULTY))
+
+    def getJobResultMap(self, job_id, timeout=60000):
+        return dict(self._waitJob(job_id, timeout).result_map)
+
+    def getTaskResult(self, job_id, task_name, timeout=60000):
+        return self._waitTask(job_id, task_name, timeout).result
+
+    def getJobPropagatedVariables(self, job_id):
+        local_job = self._getJob(job_id)
+        with local_job.condition:
+            return {run.name: dict(run.variables) for run in local_job.runs if run.state == _FINISHED}
+
+    def getJobOutput(self, job_id, timeout=-1):
+        return self.printJobOutput(job_id, timeout)
+
+    def printJobOutput(self, job_id, timeout=60000):
+        local_job = self._waitJob(job_id, timeout)
+        return os.linesep.join(run.output.strip(' \n') for run in local_job.runs if run.state in (_FINISHED, _FAULTY))
+
+    def printTaskOutput(self, job_id, task_name, timeout=60000):
+        return self._waitTask(job_id, task_name, timeout).output.strip(' \n')
+
+    def killJob(self, job_id):
+        """
+        Kill a job: its pending tasks are aborted, its running tasks finish but are ignored
+
+        :return: True if the job was not finished
+        """
+        local_job = self._getJob(job_id)
+        if local_job.finished.is_set():
+            return False
+        local_job.killed = True
+        return True
+
+
+def _taskChildren(runs):
+    """The tasks depending on each task, by task id."""
+    children = {}
+    for run in runs:
+        for dependency in run.task.getDependencies():
+            siblings = children.setdefault(id(dependency), [])
+            if run.task not in siblings:
+                siblings.append(run.task)
+    return children
+
+
+def _blockEnd(task, children):
+    """The end task of the block started by a task, the task itself if it does not start a block."""
+    if task.getFlowBlock() != ProactiveFlowBlock().start():
+        return task
+    pending, depths = [task], {id(task): 1}
+    while pending:
+        current = pending.pop(0)
+        for child in children.get(id(current), ()):
+            if id(child) in depths:
+                continue
+            depth = depths[id(current)]
+            if child.getFlowBlock() == ProactiveFlowBlock().start():
+                depth += 1
+            elif child.getFlowBlock() == ProactiveFlowBlock().end():
+                depth -= 1
+                if depth == 0:
+                    return child
+            depths[id(child)] = depth
+            pending.append(child)
+    raise ValueError("The block started by the task '{}' has no end task".format(task.getTaskName()))
+
+
+def _blockTasks(task, children):
+    """The tasks of the block started by a task, the task itself if it does not start a block."""
+    end = _blockEnd(task, children)
+    tasks, pending = {id(task): task}, [task]
+    while pending:
+        for child in children.get(id(pending.pop()), ()):
+            if id(child) not in tasks and _reaches(child, end, children):
+                tasks[id(child)] = child
+                pending.append(child)
+    return list(tasks.values())
+
+
+def _reaches(task, target, children):
+    pending, seen = [task], set()
+    while pending:
+        current = pending.pop()
+        if current is target:
+            return True
+        if id(current) not in seen:
+            seen.add(id(current))
+            pending.extend(children.get(id(current), ()))
+    return False
+
+
+def _dependents(runs, run):
+    return [other for other in runs if run in other.dependencies]
+
+
+def _ancestors(run):
+    """The run and its ancestors, the nearest first."""
+    ancestors, pending = [run], list(run.dependencies)
+    while pending:
+        current = pending.pop(0)
+        if current not in ancestors:
+            ancestors.append(current)
+            pending.extend(current.dependencies)
+    return ancestors
+
+
+def _reachable(runs, origin, accept):
+    """The runs reachable from origin through dependents, among the accepted ones (origin excluded)."""
+    reached, pending = [], [origin]
+    while pending:
+        current = pending.pop()
+        for dependent in _dependents(runs, current):
+            if dependent not in reached and accept(dependent):
+                reached.append(dependent)
+                pending.append(dependent)
+    return reached
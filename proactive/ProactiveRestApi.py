@@ -5,31 +5,55 @@ import json
 import ssl
 import warnings
 import contextlib
-import tempfile
+import logging
+import threading
 
+from urllib.parse import quote
 from urllib3.exceptions import InsecureRequestWarning
 from .ProactiveUtils import convert_palist_to_list
 
+logger = logging.getLogger('ProactiveRestApi')
+
 
 old_merge_environment_settings = requests.Session.merge_environment_settings
-@contextlib.contextmanager
-def no_ssl_verification():
-    opened_adapters = set()
-    def merge_environment_settings(self, url, proxies, stream, verify, cert):
+# The patch of requests is shared by all the threads: it is installed while at least one thread
+# is inside no_ssl_verification(), and only disables the verification for those threads
+_no_ssl_verification_lock = threading.Lock()
+_no_ssl_verification_depth = 0
+_no_ssl_verification_local = threading.local()
+
+
+def _merge_environment_settings(self, url, proxies, stream, verify, cert):
+    settings = old_merge_environment_settings(self, url, proxies, stream, verify, cert)
+    opened_adapters = getattr(_no_ssl_verification_local, 'opened_adapters', None)
+    if opened_adapters is not None:
         # Verification happens only once per connection so we need to close
         # all the opened adapters once we're done. Otherwise, the effects of
         # verify=False persist beyond the end of this context manager.
         opened_adapters.add(self.get_adapter(url))
-        settings = old_merge_environment_settings(self, url, proxies, stream, verify, cert)
         settings['verify'] = False
-        return settings
-    requests.Session.merge_environment_settings = merge_environment_settings
+    return settings
+
+
+@contextlib.contextmanager
+def no_ssl_verification():
+    global _no_ssl_verification_depth
+    outer_adapters = getattr(_no_ssl_verification_local, 'opened_adapters', None)
+    opened_adapters = set()
+    _no_ssl_verification_local.opened_adapters = opened_adapters
+    with _no_ssl_verification_lock:
+        _no_ssl_verification_depth += 1
+        requests.Session.merge_environment_settings = _merge_environment_settings
     try:
         with warnings.catch_warnings():
             warnings.simplefilter('ignore', InsecureRequestWarning)
             yield
     finally:
-        requests.Session.merge_environment_settings = old_merge_environment_settings
+        with _no_ssl_verification_lock:
+            _no_ssl_verification_depth -= 1
+            if _no_ssl_verification_depth == 0:
+                requests.Session.merge_environment_settings = old_merge_environment_settings
+        _no_ssl_verification_local.opened_adapters = outer_adapters
         for adapter in opened_adapters:
             try:
                 adapter.close()
@@ -45,6 +69,8 @@ class ProactiveRestApi:
         self.password = None
         self.session_id = None
         self.debug = False
+        self.topology_cache = None
+        self.catalog_cache = None
 
     def init(self, connectionInfo):
         base_url = connectionInfo.getUrl()
@@ -81,6 +107,21 @@ class ProactiveRestApi:
                 self.session_id = None
                 return False
 
+    def use_session(self, base_url, session_id):
+        """
+        Reuse an existing session (e.g. the one of a gateway in another process) instead of logging in
+
+        :param base_url: The REST URL (e.g. https://server:8443/rest)
+        :param session_id: The session ID
+        :return: True if the session is still valid
+        """
+        assert(base_url is not None)
+        self.base_url = base_url.rstrip('/')
+        self.username = None
+        self.password = None
+        self.session_id = session_id
+        return self.connected()
+
     def reconnect(self):
         self.disconnect()
         self.connect()
@@ -97,48 +138,41 @@ class ProactiveRestApi:
                     return True
                 else:
                     if self.debug: print("[INFO] Not connected!")
+                    if response.status_code in (200, 401):
+                        # The server rejected the session, it will not become valid again
+                        logger.debug('The session of {} is no longer valid, dropping it'.format(self.base_url))
+                        self.session_id = None
                     return False
         else:
             return False
 
-    def get_rm_model_hosts(self):
-        hosts = []
+    def fetch_rm_model(self, model):
+        values = []
         if self.connected():
-            api_url = self.base_url + "/rm/model/hosts"
+            api_url = self.base_url + "/rm/model/" + model
             with no_ssl_verification():
                 response = requests.get(api_url)
                 if self.debug: print(response.status_code, response.text)
                 if response.status_code == 200:
-                    hosts = convert_palist_to_list(response.text)
+                    values = convert_palist_to_list(response.text)
         else:
             if self.debug: print("[ERROR] You are not connected!")
-        return hosts
+        return values
 
-    def get_rm_model_nodesources(self):
-        nodesources = []
-        if self.connected():
-            api_url = self.base_url + "/rm/model/nodesources"
-            with no_ssl_verification():
-                response = requests.get(api_url)
-                if self.debug: print(response.status_code, response.text)
-                if response.status_code == 200:
-                    nodesources = convert_palist_to_list(response.text)
-        else:
-            if self.debug: print("[ERROR] You are not connected!")
-        return nodesources
+    def get_rm_model_hosts(self, refresh=False):
+        if self.topology_cache is not None:
+            return self.topology_cache.get_rm_model_hosts(refresh)
+        return self.fetch_rm_model("hosts")
 
-    def get_rm_model_tokens(self):
-        tokens = []
-        if self.connected():
-            api_url = self.base_url + "/rm/model/tokens"
-            with no_ssl_verification():
-                response = requests.get(api_url)
-                if self.debug: print(response.status_code, response.text)
-                if response.status_code == 200:
-                    tokens = convert_palist_to_list(response.text)
-        else:
-            if self.debug: print("[ERROR] You are not connected!")
-        return tokens
+    def get_rm_model_nodesources(self, refresh=False):
+        if self.topology_cache is not None:
+            return self.topology_cache.get_rm_model_nodesources(refresh)
+        return self.fetch_rm_model("nodesources")
+
+    def get_rm_model_tokens(self, refresh=False):
+        if self.topology_cache is not None:
+            return self.topology_cache.get_rm_model_tokens(refresh)
+        return self.fetch_rm_model("tokens")
 
     def get_job_log_full(self, job_id):
         log = None
@@ -168,6 +202,40 @@ class ProactiveRestApi:
             if self.debug: print("[ERROR] You are not connected!")
         return result
 
+    def get_scheduler_stats(self):
+        stats = None
+        if self.connected():
+            api_url = self.base_url + "/scheduler/stats"
+            api_url_headers = {"sessionid": self.session_id}
+            with no_ssl_verification():
+                response = requests.get(api_url, headers=api_url_headers)
+                if self.debug: print(response.status_code, response.text)
+                if response.status_code == 200:
+                    stats = json.loads(response.text)
+        else:
+            if self.debug: print("[ERROR] You are not connected!")
+        return stats
+
+    def submit_workflow_xml(self, workflow_xml, workflow_variables=None):
+        job_id = None
+        if self.connected():
+            # Variables are passed as matrix parameters of the submit path
+            matrix_parameters = ''.join(
+                ';{}={}'.format(quote(str(name), safe=''), quote(str(value), safe=''))
+                for name, value in (workflow_variables or {}).items()
+            )
+            api_url = self.base_url + "/scheduler/submit" + matrix_parameters
+            api_url_headers = {"sessionid": self.session_id}
+            api_url_files = {"file": ("workflow.xml", workflow_xml.encode('utf-8'), "application/xml")}
+            with no_ssl_verification():
+                response = requests.post(api_url, headers=api_url_headers, files=api_url_files)
+                if self.debug: print(response.status_code, response.text)
+                if response.status_code == 200:
+                    job_id = json.loads(response.text)['id']
+        else:
+            if self.debug: print("[ERROR] You are not connected!")
+        return job_id
+
     def get_propagated_variable_from_job_result(self, job_id, task_name, variable_name):
         job_result = self.get_job_result(job_id)
         if job_result is not None:
@@ -237,11 +305,13 @@ class ProactiveRestApi:
                 service_endpoint_url = service_endpoint['url']
         return service_endpoint_url
 
-    def get_object_from_catalog(self, bucket_name, object_name):
+    def get_object_from_catalog(self, bucket_name, object_name, use_cache=True):
         result = None
         assert bucket_name, "The bucket name should be a valid bucket name (not be None or empty)."
         assert object_name, "The object name should be a valid object name (not be None or empty)."
         if self.connected():
+            if use_cache and self.catalog_cache is not None:
+                return self.catalog_cache.get(bucket_name, object_name)
             api_url = self.base_url.replace(
                 "rest", 
                 "/catalog/buckets/{bucket_name}/resources/{object_name}/raw".format(bucket_name=bucket_name, object_name=object_name)
@@ -256,25 +326,107 @@ class ProactiveRestApi:
         else:
             if self.debug: print("[ERROR] You are not connected!")
         return result
-    
+
+    def _checkConnection(self, check_connection):
+        # The catalog cache checks the connection once per object, before calling the catalog requests
+        return self.connected() if check_connection else self.session_id is not None
+
+    def fetch_object_from_catalog(self, bucket_name, object_name, etag=None, check_connection=True):
+        """
+        Fetch the raw content of a catalog object, revalidating a known version with its ETag.
+
+        Returns a (status_code, content, etag) tuple. The content is None when the status is
+        304 (the known version is still the latest one) or an error, and the status is None
+        when not connected. With check_connection=False, the session is not checked first,
+        saving a request.
+        """
+        assert bucket_name, "The bucket name should be a valid bucket name (not be None or empty)."
+        assert object_name, "The object name should be a valid object name (not be None or empty)."
+        if not self._checkConnection(check_connection):
+            if self.debug: print("[ERROR] You are not connected!")
+            return None, None, etag
+        api_url = self.base_url.replace(
+            "rest",
+            "/catalog/buckets/{bucket_name}/resources/{object_name}/raw".format(bucket_name=bucket_name, object_name=object_name)
+        )
+        if self.debug: print("api_url: ", api_url)
+        api_url_headers = {"sessionid": self.session_id}
+        if etag:
+            api_url_headers["If-None-Match"] = etag
+        with no_ssl_verification():
+            response = requests.get(api_url, headers=api_url_headers)
+            if self.debug: print(response.status_code)
+            if response.status_code == 200:
+                return response.status_code, response.text, response.headers.get("ETag")
+            return response.status_code, None, etag
+
+    def list_objects_from_catalog(self, bucket_name):
+        objects = []
+        assert bucket_name, "The bucket name should be a valid bucket name (not be None or empty)."
+        if self.connected():
+            api_url = self.base_url.replace("rest", "/catalog/buckets/{bucket_name}/resources".format(bucket_name=bucket_name))
+            if self.debug: print("api_url: ", api_url)
+            api_url_headers = {"sessionid": self.session_id, "Accept": "application/json"}
+            with no_ssl_verification():
+                response = requests.get(api_url, headers=api_url_headers)
+                if self.debug: print(response.status_code, response.text)
+                if response.status_code == 200:
+                    objects = response.json()
+        else:
+            if self.debug: print("[ERROR] You are not connected!")
+        return objects
+
+    def get_object_metadata_from_catalog(self, bucket_name, object_name, check_connection=True):
+        metadata = None
+        assert bucket_name, "The bucket name should be a valid bucket name (not be None or empty)."
+        assert object_name, "The object name should be a valid object name (not be None or empty)."
+        if self._checkConnection(check_connection):
+            api_url = self.base_url.replace(
+                "rest",
+                "/catalog/buckets/{bucket_name}/resources/{object_name}".format(bucket_name=bucket_name, object_name=object_name)
+            )
+            if self.debug: print("api_url: ", api_url)
+            api_url_headers = {"sessionid": self.session_id, "Accept": "application/json"}
+            with no_ssl_verification():
+                response = requests.get(api_url, headers=api_url_headers)
+                if self.debug: print(response.status_code, response.text)
+                if response.status_code == 200:
+                    metadata = response.json()
+        else:
+            if self.debug: print("[ERROR] You are not connected!")
+        return metadata
+
     def download_object_from_catalog(self, bucket_name, object_name, file_path):
+        assert bucket_name, "The bucket name should be a valid bucket name (not be None or empty)."
+        assert object_name, "The object name should be a valid object name (not be None or empty)."
+        if not self.connected():
+            if self.debug: print("[ERROR] You are not connected!")
+            return None
+        api_url = self.base_url.replace(
+            "rest",
+            "/catalog/buckets/{bucket_name}/resources/{object_name}/raw".format(bucket_name=bucket_name, object_name=object_name)
+        )
+        if self.debug: print("api_url: ", api_url)
+        api_url_headers = {"sessionid": self.session_id}
+        # Written next to the target then renamed, so that a failed download never leaves a partial file
+        staging_path = file_path + '.tmp'
         try:
-            object_str = self.getProactiveRestApi().get_object_from_catalog(bucket_name, object_name)
-            # Create a temporary file that will be deleted automatically
-            with tempfile.NamedTemporaryFile() as temp_file:
-                # Write some data to the file
-                temp_file.write(object_str.encode('utf-8'))
-                # Get the absolute path of the temporary file
-                temp_file_path = os.path.abspath(temp_file.name)
-                # The file will be deleted when closed
-                self.logger.info('Temporary file created and will be deleted: {}'.format(temp_file_path))
-                # Copy the content to a new file
-                with open(file_path, 'wb') as local_file:
-                    temp_file.seek(0)
-                    local_file.write(temp_file.read())
-                self.logger.info('The object file created at: {}'.format(file_path))
-        except Exception as e:
-            self.logger.error("Error occurred while downloading the object from catalog", exc_info=True)
+            # Stream the response straight to the file, without buffering the object in memory
+            with no_ssl_verification():
+                with requests.get(api_url, headers=api_url_headers, stream=True) as response:
+                    if response.status_code != 200:
+                        logger.error('Failed to download {}/{} from the catalog (HTTP {})'.format(bucket_name, object_name, response.status_code))
+                        return None
+                    with open(staging_path, 'wb') as local_file:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            local_file.write(chunk)
+            os.replace(staging_path, file_path)
+            logger.info('The object file created at: {}'.format(file_path))
+            return file_path
+        except Exception:
+            logger.error("Error occurred while downloading the object from catalog", exc_info=True)
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
             return None
 
     def logout(self):
@@ -0,0 +1,297 @@
+import base64
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+from .model.ProactiveScriptLanguage import ProactiveScriptLanguage
+
+logger = logging.getLogger('ProactiveResultCache')
+
+# Replaces a cached task in a submitted job: prints the cached output, propagates the cached
+# variables and returns the cached result
+_RESTORE_SCRIPT = """
+import base64, pickle, sys
+sys.stdout.write({output!r})
+for name, value in pickle.loads(base64.b64decode({variables!r})).items():
+    variables.put(name, value)
+result = pickle.loads(base64.b64decode({result!r}))
+"""
+
+# The variables set by the scheduler for each run (PA_JOB_ID, PA_TASK_NAME...), never restored
+_SYSTEM_VARIABLES_PREFIX = 'PA_'
+
+
+def _describe(value):
+    """JSON fallback describing the model objects (scripts, fork environments) by their attributes."""
+    if not hasattr(value, '__dict__'):
+        return repr(value)
+    return dict({name: attribute for name, attribute in vars(value).items() if not name.startswith('_')},
+                __class__=type(value).__name__)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as content:
+        for chunk in iter(lambda: content.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _matching_files(folder, patterns):
+    """The files matching the patterns in a folder, as sorted paths relative to it."""
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(folder, pattern), recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.relpath(path, folder))
+    return sorted(paths)
+
+
+def _storable(value):
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return str(value)
+
+
+class ProactiveResultCache:
+    """
+    Opt-in memoization of task results, keyed by a hash of the task content
+
+    The key of a task hashes its language and script, its pre, post and selection scripts, its
+    fork environment, the job and task variables, the digests of its input files, and the keys
+    of the tasks it depends on. A task is therefore unchanged only if all the tasks before it
+    are unchanged too, and rerunning a pipeline only runs the changed subgraph.
+
+    The tasks with a flow script or in a flow block, the targets of a branch and the tasks after
+    them are never memoized, since the number of their runs is decided when the job runs.
+
+    The cache stores the result, the output, the propagated variables and the output files of each
+    task in a directory, so that they survive restarts. It is used by the local executor and by the
+    gateway (see submitJob(result_cache=...) and cacheJobResults()).
+
+    - cache_dir (str): The directory of the cached results
+    - max_entries (int): The maximum number of cached task results, the least recently used are evicted
+    """
+
+    def __init__(self, cache_dir=None, max_entries=1024):
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser('~'), '.cache', 'proactive', 'results')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def task_keys(self, job_model, input_folder='.'):
+        """
+        Compute the key of each memoizable task of a job
+
+        :param job_model: A valid job model
+        :param input_folder: The folder the input files of the tasks are read from
+        :return: An OrderedDict of keys by task name, without the tasks that cannot be memoized
+        """
+        tasks = job_model.getTasks()
+        job_variables = sorted((str(name), str(value)) for name, value in job_model.getVariables().items())
+        flow_targets = set()
+        for task in tasks:
+            flow_script = task.getFlowScript()
+            if flow_script is not None:
+                flow_targets.update((flow_script.getActionTarget(), flow_script.getActionTargetElse(),
+                                     flow_script.getActionTargetContinuation()))
+        digests = {}
+        keys = {}
+
+        def key_of(task):
+            if id(task) in keys:
+                return keys[id(task)]
+            # Marks the task while its dependencies are visited, a cycle makes it not memoizable
+            keys[id(task)] = None
+            dependency_keys = [key_of(dependency) for dependency in task.getDependencies()]
+            if task.getFlowScript() is not None or task.getFlowBlock() not in (None, 'none') \
+                    or task.getTaskName() in flow_targets or None in dependency_keys:
+                return None
+            input_digests = []
+            for relative_path in _matching_files(input_folder, task.getInputFiles()):
+                path = os.path.join(input_folder, relative_path)
+                if path not in digests:
+                    digests[path] = _file_digest(path)
+                input_digests.append((relative_path, digests[path]))
+            content = [
+                task.getScriptLanguage(), task.getTaskImplementation(), task.getTaskImplementationFromURL(),
+                getattr(task, 'default_python', None), job_variables,
+                sorted((str(name), str(value)) for name, value in task.getVariables().items()),
+                task.getPreScript(), task.getPostScript(), task.getSelectionScript(), task.getForkEnvironment(),
+                list(task.getInputFiles()), list(task.getOutputFiles()), input_digests, dependency_keys,
+            ]
+            keys[id(task)] = hashlib.sha256(json.dumps(content, sort_keys=True, default=_describe).encode('utf-8')).hexdigest()
+            return keys[id(task)]
+
+        return OrderedDict((task.getTaskName(), key_of(task)) for task in tasks if key_of(task) is not None)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """
+        Get a cached task result
+
+        :param key: The key of the task
+        :return: A dict with the result, output, variables and files (relative paths) of the task, or None
+        """
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'entry.pickle'), 'rb') as entry_file:
+                entry = pickle.load(entry_file)
+            os.utime(os.path.join(path, 'entry.pickle'))
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, result, output='', variables=None, output_folder=None, output_files=()):
+        """
+        Cache the result of a task
+
+        :param key: The key of the task
+        :param result: The result of the task (stored as a string if it cannot be pickled)
+        :param output: The output of the task
+        :param variables: The variables propagated by the task
+        :param output_folder: The folder where the task wrote its output files
+        :param output_files: The output file patterns of the task, relative to output_folder
+        """
+        entry = {
+            'result': _storable(result),
+            'output': output or '',
+            'variables': {name: _storable(value) for name, value in (variables or {}).items()},
+            'files': _matching_files(output_folder, output_files) if output_folder else [],
+        }
+        path = self._path(key)
+        staging = path + '.' + uuid.uuid4().hex
+        try:
+            os.makedirs(staging)
+            for relative_path in entry['files']:
+                destination = os.path.join(staging, 'files', relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(output_folder, relative_path), destination)
+            with open(os.path.join(staging, 'entry.pickle'), 'wb') as entry_file:
+                pickle.dump(entry, entry_file)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.replace(staging, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache the task result {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self._trim()
+
+    def _trim(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.cache_dir, name, 'entry.pickle')), name))
+            except OSError:
+                continue
+        entries.sort()
+        for _, name in entries[:max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def restore_files(self, key, entry, output_folder):
+        """Copy the cached output files of a task to the output folder, and return their paths."""
+        restored = []
+        for relative_path in entry['files']:
+            destination = os.path.join(output_folder, relative_path)
+            os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+            shutil.copy2(os.path.join(self._path(key), 'files', relative_path), destination)
+            restored.append(destination)
+        return restored
+
+    def clear(self):
+        """Remove all the cached results."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def memoize(self, job_model, input_folder='.', output_folder='.'):
+        """
+        Prepare a job for submission, skipping its unchanged tasks
+
+        The cached tasks are kept, so that the tasks after them still find their results, but
+        their script is replaced by one printing the cached output, propagating the cached variables
+        and returning the cached result. Their cached output files are restored to the output folder,
+        where a run would have put them.
+
+        :param job_model: A valid job model, left unchanged: the cached tasks are replaced in a clone of it,
+            made only if a task is cached (the tasks of the job are then frozen, see ProactiveJob.clone())
+        :param input_folder: The folder the input files of the tasks are read from
+        :param output_folder: The folder the output files of the tasks are copied to
+        :return: The job model to submit, the keys of its memoizable tasks by task name, and the
+            names of the cached tasks
+        """
+        keys = self.task_keys(job_model, input_folder)
+        memoized_job = job_model
+        cached = []
+        for task_name, key in keys.items():
+            entry = self.get(key)
+            if entry is None:
+                continue
+            self.restore_files(key, entry, output_folder)
+            if memoized_job is job_model:
+                memoized_job = job_model.clone()
+            task = memoized_job.getTaskForUpdate(task_name)
+            task.setScriptLanguage(ProactiveScriptLanguage().python())
+            task.setTaskImplementation(_RESTORE_SCRIPT.format(
+                output=entry['output'],
+                variables=base64.b64encode(pickle.dumps(entry['variables'])).decode('ascii'),
+                result=base64.b64encode(pickle.dumps(entry['result'])).decode('ascii')))
+            task.setPreScript(None)
+            task.setPostScript(None)
+            task.setForkEnvironment(None)
+            task.setSelectionScript(None)
+            task.clearInputFiles()
+            task.clearOutputFiles()
+            cached.append(task.getTaskName())
+        if cached:
+            logger.info(f"Reusing the cached results of {len(cached)} task(s): {', '.join(cached)}")
+        return memoized_job, keys, cached
+
+    def store_job_results(self, gateway, job_id, job_model, keys, output_folder=None, timeout=60000):
+        """
+        Cache the results of the tasks of a finished job
+
+        :param gateway: The gateway (or local executor) the job was submitted to
+        :param job_id: The ID of the job
+        :param job_model: The submitted job model
+        :param keys: The keys of the tasks to cache, by task name (see task_keys())
+        :param output_folder: The folder where the output files of the tasks were copied to
+        :param timeout: The timeout in milliseconds for waiting for each task
+        :return: The number of cached task results
+        """
+        if not keys:
+            return 0
+        # Without them, restoring the tasks would not give the tasks after them the same variables
+        propagated_variables = gateway.getJobPropagatedVariables(job_id)
+        if propagated_variables is None:
+            logger.warning(f"Failed to get the variables propagated by the tasks of the job {job_id}, its results are not cached")
+            return 0
+        stored = 0
+        for task in job_model.getTasks():
+            key = keys.get(task.getTaskName())
+            if key is None:
+                continue
+            result = gateway.getTaskResult(job_id, task.getTaskName(), timeout)
+            if gateway.getTaskStatus(job_id, task.getTaskName()) != 'Finished':
+                continue
+            output = gateway.printTaskOutput(job_id, task.getTaskName(), timeout)
+            variables = {name: value for name, value in propagated_variables.get(task.getTaskName(), {}).items()
+                         if not str(name).startswith(_SYSTEM_VARIABLES_PREFIX)}
+            self.put(key, result, output, variables, output_folder, task.getOutputFiles())
+            stored += 1
+        return stored
@@ -0,0 +1,151 @@
+import collections
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger('ProactiveSchedulerClientPool')
+
+
+def warm_up_py4j_connections(runtime_gateway, size):
+    """
+    Open ``size`` py4j connections ahead of time
+
+    py4j gives each concurrent call its own socket, taken from an idle deque or opened
+    on demand. Opening them upfront avoids a burst of connections (and of JVM threads)
+    when many Python threads start calling the JVM at once.
+
+    The idle deque and the connection factory are py4j internals: with a py4j version
+    which does not have them, this does nothing.
+
+    :param runtime_gateway: A py4j JavaGateway
+    :param size: The number of idle connections to keep ready
+    :return: The number of connections opened
+    """
+    gateway_client = getattr(runtime_gateway, '_gateway_client', None)
+    if not isinstance(getattr(gateway_client, 'deque', None), collections.deque) \
+            or not callable(getattr(gateway_client, '_create_connection', None)):
+        logger.debug("The py4j gateway client does not keep idle connections, skipping their warm up")
+        return 0
+    opened = 0
+    try:
+        while len(gateway_client.deque) < size:
+            gateway_client.deque.append(gateway_client._create_connection())
+            opened += 1
+    except Exception as e:
+        logger.warning(f"Failed to open the py4j connections ahead of time: {e}")
+    return opened
+
+
+class ProactiveSchedulerClientPool:
+    """
+    A pool of scheduler smart proxies, usable from many threads at once
+
+    Threads sharing a single smart proxy contend on its connection and its internal
+    locks. The pool logs in ``size`` proxies and lends an idle one to
+    each call. It exposes the methods of a smart proxy, so it can be used in place of one:
+    ``pool.getJobState(job_id)`` runs on the first idle proxy.
+
+    The session management calls (init, disconnect, reconnect, terminate) apply to all
+    the proxies. Submissions with data transfer run on the primary proxy, which keeps
+    track of the jobs it must transfer the outputs of. The waits for a job or a task poll
+    its state, lending a proxy for each check only: a long wait does not keep a proxy
+    from the other threads.
+
+    - proactive_factory (ProactiveFactory)
+    - size (int): The number of proxies
+    - poll_interval (float): Seconds between two checks of a wait
+    """
+
+    def __init__(self, proactive_factory, size=4, poll_interval=0.5):
+        if size < 1:
+            raise ValueError("The pool size must be at least 1")
+        self.size = size
+        self.poll_interval = poll_interval
+        self._clients = [proactive_factory.create_smart_proxy() for _ in range(size)]
+        self.primary = self._clients[0]
+        self._idle = queue.LifoQueue()
+        for client in self._clients:
+            self._idle.put(client)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """
+        Borrow a proxy for several calls
+
+        :param timeout: Seconds to wait for an idle proxy, None waits forever
+        :raise queue.Empty: If no proxy became idle within the timeout
+        """
+        client = self._idle.get(timeout=timeout)
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            with self.borrow() as client:
+                return getattr(client, name)(*args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def _all(self, name, *args):
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='scheduler-pool') as executor:
+            return list(executor.map(lambda client: getattr(client, name)(*args), self._clients))
+
+    def init(self, connection_info):
+        self._all('init', connection_info)
+        logger.debug(f"{self.size} scheduler proxies connected")
+
+    def disconnect(self):
+        self._all('disconnect')
+
+    def reconnect(self):
+        self._all('reconnect')
+
+    def terminate(self):
+        self._all('terminate')
+
+    def isConnected(self):
+        return all(self._all('isConnected'))
+
+    def _waitUntil(self, finished, timeout, what):
+        """Poll until finished(client) is true, the timeout being in milliseconds (None or negative waits forever)."""
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout / 1000.0
+        while True:
+            with self.borrow() as client:
+                if finished(client):
+                    return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError("{} is not finished after {} ms".format(what, timeout))
+            time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+
+    def waitForJob(self, job_id, timeout):
+        self._waitUntil(lambda client: client.isJobFinished(job_id), timeout, "The job " + str(job_id))
+        with self.borrow() as client:
+            return client.getJobResult(job_id)
+
+    def waitForTask(self, job_id, task_name, timeout):
+        self._waitUntil(lambda client: client.isTaskFinished(job_id, task_name), timeout,
+                        "The task {} of the job {}".format(task_name, job_id))
+        with self.borrow() as client:
+            return client.getTaskResult(job_id, task_name)
+
+    def getSession(self):
+        return self.primary.getSession()
+
+    def submit(self, job, *args):
+        if args:
+            # Data transfer: the outputs are pulled by the proxy that submitted the job
+            return self.primary.submit(job, *args)
+        with self.borrow() as client:
+            return client.submit(job)
+
+    def __len__(self):
+        return self.size
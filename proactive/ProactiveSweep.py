@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from py4j.protocol import Py4JError
+
+from .model.ProactiveJob import ProactiveJob
+from .model.ProactiveSweepRow import ProactiveSweepRow
+
+logger = logging.getLogger('ProactiveSweep')
+
+SWEEP_VARIABLE_SETS = 'SWEEP_VARIABLE_SETS'
+
+_SPLIT_TASK = 'sweep_split'
+_ROW_TASK = 'sweep_row'
+_END_TASK = 'sweep_end'
+
+# Loads the variable set of the current replica, the variables it sets are propagated to the next tasks
+_ROW_SCRIPT = """
+def index = (variables.get('PA_TASK_REPLICATION') ?: 0) as int
+def variableSets = new groovy.json.JsonSlurper().parseText(variables.get('""" + SWEEP_VARIABLE_SETS + """'))
+variableSets[index].each { name, value -> variables.put(name, value) }
+result = index
+"""
+
+
+class ProactiveSweep:
+    """
+    Submits one workflow template with many variable sets.
+
+    The template is parsed once. Each variable set is applied to a Java-side copy of
+    it, and up to ``max_in_flight`` copies are submitted concurrently.
+
+    When every variable set defines the same variables, the sweep can instead be packed
+    into a single job: a split task replicates the template once per variable set, and
+    the first task of each replica loads its variable set from the SWEEP_VARIABLE_SETS
+    job variable. Templates that already use control flow cannot be packed. As the replicas only
+    get their variable set at run time, the templates where the scheduler resolves a swept
+    variable from the job variables (a ${VARIABLE} reference in a job variable, in generic
+    information, in a task variable, in a selection script or in a fork environment, or a task
+    variable of the same name) cannot be packed either: each replica would see the first
+    variable set. Such sweeps are submitted one job per variable set.
+
+    - gateway (ProActiveGateway)
+    - template: A workflow XML file path, a (bucket_name, workflow_name) catalog tuple,
+      a ProactiveJob model or a Java job
+    - max_in_flight (int): The maximum number of concurrent submissions
+    """
+
+    def __init__(self, gateway, template, max_in_flight=8):
+        self.gateway = gateway
+        self.max_in_flight = max(1, max_in_flight)
+        self._parse = self._template_parser(template)
+        self._template = None
+
+    def _template_parser(self, template):
+        if isinstance(template, ProactiveJob):
+            return lambda: self.gateway.buildJob(template)
+        if isinstance(template, (tuple, list)) and len(template) == 2:
+            bucket_name, workflow_name = template
+            return lambda: self.gateway.getProactiveWorkflowCache().get_catalog_workflow(bucket_name, workflow_name)[0]
+        if isinstance(template, str):
+            if not os.path.isfile(template):
+                raise ValueError("The workflow file {} does not exist".format(template))
+            return lambda: self.gateway.getProactiveWorkflowCache().get_file_workflow(template)
+        if hasattr(template, 'getTasks'):
+            return lambda: template
+        raise ValueError("Unsupported sweep template: {!r}".format(template))
+
+    @property
+    def template(self):
+        if self._template is None:
+            self._template = self._parse()
+        return self._template
+
+    def _copy(self):
+        try:
+            return self.gateway.getProactiveFactory().clone_job(self.template)
+        except Py4JError as e:
+            logger.debug(f"Failed to clone the sweep template, parsing it again: {e}")
+            return self._parse()
+
+    @staticmethod
+    def is_homogeneous(variable_sets):
+        """Return True if all the variable sets define the same variables."""
+        names = None
+        for variables in variable_sets:
+            if names is None:
+                names = set(variables)
+            elif set(variables) != names:
+                return False
+        return True
+
+    def submit(self, variable_sets, pack=False, job_name=None, project_name=None, workflow_generic_info=None, workflow_tags=None):
+        """
+        Submit the template once per variable set
+
+        :param variable_sets: An iterable of dicts mapping variable names to values
+        :param pack: If True, submit a single job replicating the template (homogeneous variable sets only)
+        :param job_name: A job name, formatted with the row index and the variables (e.g. 'train_{index}_{lr}')
+        :param project_name: The project name of the jobs
+        :param workflow_generic_info: Generic information added to the jobs
+        :param workflow_tags: Tags added to the jobs
+        :return: A list of ProactiveSweepRow, in the order of the variable sets
+        """
+        variable_sets = [dict(variables or {}) for variables in variable_sets]
+        if not variable_sets:
+            return []
+        customization = dict(project_name=project_name, workflow_generic_info=workflow_generic_info, workflow_tags=workflow_tags)
+        if pack:
+            if not self.is_homogeneous(variable_sets):
+                logger.warning("The variable sets define different variables, submitting one job per variable set")
+            else:
+                try:
+                    return self._submit_packed(variable_sets, job_name, customization)
+                except ValueError as e:
+                    logger.warning(f"{e}, submitting one job per variable set")
+
+        def submit_row(row):
+            index, variables = row
+            try:
+                job = self._copy()
+                name = job_name.format(index=index, **variables) if job_name else None
+                self.gateway._customizeJob(job, variables, job_name=name, **customization)
+                return ProactiveSweepRow(index, variables, self.gateway.proactive_scheduler_client.submit(job).longValue())
+            except Exception as e:
+                logger.debug(f"Failed to submit the variable set {index}", exc_info=True)
+                return ProactiveSweepRow(index, variables, error=str(e) or type(e).__name__)
+
+        # Parse the template once, before the concurrent submissions clone it
+        self.template
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(variable_sets)), thread_name_prefix='sweep') as executor:
+            rows = list(executor.map(submit_row, enumerate(variable_sets)))
+        failures = sum(1 for row in rows if row.error is not None)
+        logger.info(f"Submitted {len(rows) - failures} job(s) of the sweep, {failures} failure(s)")
+        return rows
+
+    def _submit_packed(self, variable_sets, job_name, customization):
+        job = self._copy()
+        reference = self._resolved_reference(job, set(variable_sets[0]), customization.get('workflow_generic_info'))
+        if reference is not None:
+            raise ValueError("The template resolves the swept variables in {} when the job is submitted, "
+                             "the sweep cannot be packed".format(reference))
+        self._pack(job, len(variable_sets))
+        name = job_name.format(index='all', **variable_sets[0]) if job_name else None
+        # The first variable set gives the job variables their default values, replicas override them
+        defaults = dict(variable_sets[0])
+        defaults[SWEEP_VARIABLE_SETS] = json.dumps(variable_sets)
+        self.gateway._customizeJob(job, defaults, job_name=name, **customization)
+        try:
+            job_id = self.gateway.proactive_scheduler_client.submit(job).longValue()
+        except Exception as e:
+            logger.debug("Failed to submit the packed sweep", exc_info=True)
+            error = str(e) or type(e).__name__
+            return [ProactiveSweepRow(index, variables, replication=index, error=error) for index, variables in enumerate(variable_sets)]
+        logger.info(f"Submitted the sweep of {len(variable_sets)} variable set(s) as the job {job_id}")
+        return [ProactiveSweepRow(index, variables, job_id, index) for index, variables in enumerate(variable_sets)]
+
+    @staticmethod
+    def _resolved_reference(job, variable_names, workflow_generic_info=None):
+        """Return where a Java job references the given variables outside the task scripts, or None."""
+        if not variable_names:
+            return None
+        names = '|'.join(re.escape(name) for name in variable_names)
+        pattern = re.compile(r'\$(?:\{(?:' + names + r')\}|(?:' + names + r')\b)')
+
+        def references(text):
+            return text is not None and pattern.search(str(text)) is not None
+
+        for name, variable in (job.getVariables() or {}).items():
+            if name not in variable_names and references(variable.getValue()):
+                return "the job variable {}".format(name)
+        generic_information = dict(job.getGenericInformation() or {})
+        generic_information.update(workflow_generic_info or {})
+        for name, value in generic_information.items():
+            if references(value):
+                return "the job generic information {}".format(name)
+        for task in job.getTasks():
+            for name, variable in (task.getVariables() or {}).items():
+                if name in variable_names or references(variable.getValue()):
+                    return "the variable {} of the task {}".format(name, task.getName())
+            for name, value in (task.getGenericInformation() or {}).items():
+                if references(value):
+                    return "the generic information {} of the task {}".format(name, task.getName())
+            for selection_script in task.getSelectionScripts() or []:
+                if references(selection_script.getScript()) or any(references(parameter) for parameter in selection_script.getParameters() or []):
+                    return "a selection script of the task {}".format(task.getName())
+            fork_environment = task.getForkEnvironment()
+            if fork_environment is not None:
+                env_script = fork_environment.getEnvScript()
+                texts = [fork_environment.getJavaHome(), fork_environment.getWorkingDir(),
+                         None if env_script is None else env_script.getScript()]
+                texts.extend(fork_environment.getJVMArguments() or [])
+                texts.extend((fork_environment.getSystemEnvironment() or {}).values())
+                if any(references(text) for text in texts):
+                    return "the fork environment of the task {}".format(task.getName())
+        return None
+
+    def _pack(self, job, runs):
+        """Wrap the tasks of a Java job in a block replicated ``runs`` times."""
+        factory = self.gateway.getProactiveFactory()
+        FlowBlock = factory.get_flow_block()
+        tasks = list(job.getTasks())
+        names = set()
+        parents = set()
+        for task in tasks:
+            if task.getFlowScript() is not None or str(task.getFlowBlock().name()) != 'NONE':
+                raise ValueError("The task {} of the template uses control flow, the sweep cannot be packed".format(task.getName()))
+            names.add(task.getName())
+            for dependency in task.getDependencesList() or []:
+                parents.add(dependency.getName())
+        if names & {_SPLIT_TASK, _ROW_TASK, _END_TASK}:
+            raise ValueError("The template already has a task named {}".format(' or '.join(sorted(names & {_SPLIT_TASK, _ROW_TASK, _END_TASK}))))
+        roots = [task for task in tasks if not task.getDependencesList()]
+        leaves = [task for task in tasks if task.getName() not in parents]
+
+        split_task = self._create_groovy_task(factory, _SPLIT_TASK, 'result = true')
+        split_task.setFlowScript(factory.get_flow_script().createReplicateFlowScript('runs = {}'.format(runs), 'groovy'))
+        row_task = self._create_groovy_task(factory, _ROW_TASK, _ROW_SCRIPT)
+        row_task.addDependence(split_task)
+        row_task.setFlowBlock(FlowBlock.START)
+        for root in roots:
+            root.addDependence(row_task)
+        if len(leaves) == 1:
+            leaves[0].setFlowBlock(FlowBlock.END)
+        else:
+            end_task = self._create_groovy_task(factory, _END_TASK, 'result = true')
+            for leaf in leaves:
+                end_task.addDependence(leaf)
+            end_task.setFlowBlock(FlowBlock.END)
+            job.addTask(end_task)
+        job.addTask(split_task)
+        job.addTask(row_task)
+        return job
+
+    @staticmethod
+    def _create_groovy_task(factory, name, implementation):
+        task = factory.create_script_task()
+        task.setName(name)
+        task.setScript(factory.create_task_script(factory.create_simple_script(implementation, 'groovy')))
+        return task
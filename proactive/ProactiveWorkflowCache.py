@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from py4j.protocol import Py4JError
+
+logger = logging.getLogger('ProactiveWorkflowCache')
+
+
+class ProactiveWorkflowCache:
+    """
+    LRU cache of parsed workflow templates.
+
+    A template is the Java job parsed from a workflow XML. It is never submitted
+    itself: every lookup returns a Java-side deep copy, so submissions can apply
+    their own variables, generic information and names without a download, a
+    temporary file or an XML parse.
+
+    - Catalog workflows are keyed by bucket, name and catalog commit time. The
+      commit time is read from the (small) catalog metadata, at most every
+      ``revalidate_after`` seconds per workflow: a workflow committed again within
+      that delay is seen at the next revalidation, or right after invalidate().
+    - Workflow files are keyed by absolute path, modification time and size.
+
+    - gateway (ProActiveGateway)
+    - max_size (int): The maximum number of templates kept
+    - revalidate_after (float): Seconds during which a catalog revision is trusted
+      without asking the catalog again. 0 checks it on every lookup
+    """
+
+    def __init__(self, gateway, max_size=64, revalidate_after=5.0):
+        self.gateway = gateway
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._revisions = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._templates.get(key)
+            if entry is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def _put(self, key, entry, source):
+        with self._lock:
+            # Drop the templates of older revisions of the same workflow
+            for stale_key in [k for k in self._templates if k[:len(source)] == source]:
+                del self._templates[stale_key]
+            self._templates[key] = entry
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+
+    def _clone(self, key, template, parse):
+        try:
+            return self.gateway.getProactiveFactory().clone_job(template)
+        except Py4JError as e:
+            logger.warning(f"Failed to clone the cached workflow {key}, parsing it again: {e}")
+            return parse()
+
+    def _catalog_revision(self, bucket_name, workflow_name):
+        now = time.monotonic()
+        with self._lock:
+            known = self._revisions.get((bucket_name, workflow_name))
+        if known is not None and self.revalidate_after and now - known[0] < self.revalidate_after:
+            return known[1]
+        # Fetched outside the lock: a slow catalog must not block the lookups of other workflows
+        metadata = self.gateway.getProactiveRestApi().get_object_metadata_from_catalog(bucket_name, workflow_name)
+        if not metadata:
+            return None
+        revision = metadata.get('commit_time_raw') or metadata.get('commit_time')
+        with self._lock:
+            self._revisions[(bucket_name, workflow_name)] = (now, revision)
+        return revision
+
+    def get_catalog_workflow(self, bucket_name, workflow_name):
+        """
+        Get a parsed copy of a catalog workflow
+
+        :param bucket_name: The catalog bucket name
+        :param workflow_name: The workflow name
+        :return: A tuple (Java job ready to be customized, workflow XML content)
+        """
+        revision = self._catalog_revision(bucket_name, workflow_name)
+        key = ('catalog', bucket_name, workflow_name, revision)
+        entry = self._get(key) if revision is not None else None
+        if entry is not None:
+            template, xml_content = entry
+            return self._clone(key, template, lambda: self.gateway._parseWorkflowXml(xml_content)), xml_content
+
+        xml_content = self.gateway._getWorkflowXmlFromCatalog(bucket_name, workflow_name)
+        job = self.gateway._parseWorkflowXml(xml_content)
+        if revision is None:
+            # Unknown revision: nothing can tell when the template becomes stale
+            return job, xml_content
+        self._put(key, (self._clone(key, job, lambda: self.gateway._parseWorkflowXml(xml_content)), xml_content), key[:3])
+        logger.debug(f"Cached the workflow {bucket_name}/{workflow_name} at revision {revision}")
+        return job, xml_content
+
+    def get_file_workflow(self, workflow_xml_file_path):
+        """
+        Get a parsed copy of a workflow file
+
+        :param workflow_xml_file_path: The workflow XML file path
+        :return: A Java job ready to be customized
+        """
+        path = os.path.abspath(workflow_xml_file_path)
+        stat = os.stat(path)
+        key = ('file', path, stat.st_mtime_ns, stat.st_size)
+
+        def parse():
+            return self.gateway.getProactiveFactory().create_stax_job_factory().createJob(path)
+
+        entry = self._get(key)
+        if entry is not None:
+            return self._clone(key, entry, parse)
+        job = parse()
+        self._put(key, self._clone(key, job, parse), key[:2])
+        return job
+
+    def invalidate(self, bucket_name=None, workflow_name=None, workflow_xml_file_path=None):
+        """
+        Drop cached templates: the ones of a catalog workflow, of a bucket, of a file, or all of them
+        """
+        with self._lock:
+            if bucket_name is None and workflow_xml_file_path is None:
+                self._templates.clear()
+                self._revisions.clear()
+                return
+            path = os.path.abspath(workflow_xml_file_path) if workflow_xml_file_path else None
+            for key in list(self._templates):
+                if key[0] == 'catalog' and bucket_name == key[1] and workflow_name in (None, key[2]):
+                    del self._templates[key]
+                elif key[0] == 'file' and path == key[1]:
+                    del self._templates[key]
+            for revision_key in list(self._revisions):
+                if revision_key[0] == bucket_name and workflow_name in (None, revision_key[1]):
+                    del self._revisions[revision_key]
+
+    def __len__(self):
+        return len(self._templates)
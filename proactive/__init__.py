@@ -2,7 +2,20 @@ from .ProactiveGateway import *
 from .ProactiveRestApi import *
 from .ProactiveUtils import *
 from .ProactiveFactory import *
+from .ProactiveConverter import *
 from .ProactiveBuilder import *
+from .ProactiveJobIndex import *
+from .ProactiveWorkflowCache import *
+from .ProactiveCatalogCache import *
+from .ProactiveSweep import *
+from .ProactiveSchedulerClientPool import *
+from .ProactiveGatewayDescriptor import *
+from .ProactiveJobHandle import *
+from .ProactiveJobDag import *
+from .ProactiveLocalExecutor import *
+from .ProactiveResultCache import *
+from .ProactiveJobSerializer import *
+from .ProactiveJobBuildCache import *
 
 from .model.ProactiveScript import *
 from .model.ProactiveForkEnv import *
@@ -10,8 +23,13 @@ from .model.ProactiveSelectionScript import *
 from .model.ProactiveScriptLanguage import *
 from .model.ProactiveTask import *
 from .model.ProactiveJob import *
+from .model.ProactiveJobInfo import *
+from .model.ProactiveTaskInfo import *
+from .model.ProactiveSweepRow import *
 
 from .monitoring.ProactiveNodeMBeanClient import *
+from .monitoring.ProactiveMetricsStore import *
+from .monitoring.ProactiveTopologyCache import *
 # from .monitoring.ProActiveNodeMetricsMonitor import *
 
 import os
@@ -50,3 +68,6 @@ def getProActiveGateway():
     assert gateway.isConnected(), "Failed to connect to the ProActive server!"
     print("Connected")
     return gateway
+
+
+from .decorators import session, get_shared_gateway, close_shared_gateway
@@ -1,8 +1,126 @@
+import atexit
+import contextvars
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
 from proactive import getProActiveGateway, ProactiveScriptLanguage, ProactiveFlowBlock
+from .ProactiveJobHandle import ProactiveJobHandle, gather
+from .ProactiveJobDag import ProactiveJobDag
+from .ProactiveLocalExecutor import ProactiveLocalExecutor
 
-# Global list to store tasks defined by decorators
-registered_tasks = []
+# Tasks registered while a job is built, one list per job build. Each thread and each asyncio
+# task has its own context, so concurrent job builds do not see each other's tasks. The tasks
+# called outside of a job build are not registered
+_task_registry = contextvars.ContextVar('proactive_task_registry', default=None)
+
+# Gateways of the active session() blocks of this context, the innermost last. Like the task
+# registry, each thread and each asyncio task only sees the session() blocks it entered
+_session_gateways = contextvars.ContextVar('proactive_session_gateways', default=())
+
+# Gateways of the active session(share_with_threads=True) blocks, the innermost last, used by the
+# threads which did not enter a session() block themselves (e.g. the workers of a thread pool)
+_thread_session_gateways = []
+_thread_session_gateways_lock = threading.Lock()
+
+# Gateway shared by the jobs decorated with shared_session=True, closed at interpreter exit
+_shared_gateway = None
+_shared_gateway_lock = threading.Lock()
+
+# Local executor of the jobs decorated with local=True, stopped at interpreter exit
+_local_executor = None
+
+# Guards the compiled task graph caches of the decorated jobs
+_dag_cache_lock = threading.Lock()
+
+
+@contextmanager
+def session(gateway=None, share_with_threads=False):
+    """
+    Context manager making the decorated jobs called in its block reuse one connected gateway,
+    instead of launching a JVM and logging in for each call.
+
+    with session() as gateway:
+        for i in range(10):
+            my_job()
+
+    The session only applies to the thread (or asyncio task) entering the block. To let the
+    jobs run from other threads reuse its gateway too, e.g. from a thread pool, share it:
+
+    with session(share_with_threads=True), ThreadPoolExecutor() as executor:
+        list(executor.map(lambda i: my_job(), range(10)))
+
+    :param gateway: A connected gateway to reuse. If not provided, one is created with
+        getProActiveGateway() and closed at the end of the block.
+    :param share_with_threads: Also make the threads without a session() block of their own use it
+    """
+    owned = gateway is None
+    if owned:
+        gateway = getProActiveGateway()
+    token = _session_gateways.set(_session_gateways.get() + (gateway,))
+    if share_with_threads:
+        with _thread_session_gateways_lock:
+            _thread_session_gateways.append(gateway)
+    try:
+        yield gateway
+    finally:
+        if share_with_threads:
+            with _thread_session_gateways_lock:
+                _thread_session_gateways.remove(gateway)
+        _session_gateways.reset(token)
+        if owned:
+            gateway.close()
+
+
+def get_shared_gateway():
+    """
+    Get the gateway shared by the decorated jobs, connecting it on first use.
+    It stays connected until close_shared_gateway() or the interpreter exit.
+    """
+    global _shared_gateway
+    with _shared_gateway_lock:
+        if _shared_gateway is None:
+            _shared_gateway = getProActiveGateway()
+            atexit.register(close_shared_gateway)
+        return _shared_gateway
+
+
+def close_shared_gateway():
+    """Close the gateway shared by the decorated jobs, if any."""
+    global _shared_gateway
+    with _shared_gateway_lock:
+        gateway, _shared_gateway = _shared_gateway, None
+    if gateway is not None:
+        atexit.unregister(close_shared_gateway)
+        try:
+            gateway.close()
+        except Exception as e:
+            print(f"Error while closing the shared gateway: {e}")
+
+
+def _get_local_executor():
+    """Get the local executor of the decorated jobs, creating it on first use."""
+    global _local_executor
+    with _shared_gateway_lock:
+        if _local_executor is None:
+            _local_executor = ProactiveLocalExecutor()
+            atexit.register(_local_executor.close)
+        return _local_executor
+
+
+def _acquire_gateway(shared_session, local=False):
+    """Return the gateway a decorated job must use, and whether the job must close it."""
+    if local:
+        return (local if isinstance(local, ProactiveLocalExecutor) else _get_local_executor()), False
+    gateways = _session_gateways.get()
+    if gateways:
+        return gateways[-1], False
+    with _thread_session_gateways_lock:
+        if _thread_session_gateways:
+            return _thread_session_gateways[-1], False
+    if shared_session:
+        return get_shared_gateway(), False
+    return getProActiveGateway(), True
 
 class TaskDecorator:
     def __init__(self, language):
@@ -148,7 +266,9 @@ def task(name=None, depends_on=None, language='Python', runtime_env=None, virtua
                 'IsElseBranch': getattr(func, '_is_else_branch', False),
                 'IsContinuationTask': getattr(func, '_is_continuation_task', False),
             }
-            registered_tasks.append(task_def)
+            tasks = _task_registry.get()
+            if tasks is not None:
+                tasks.append(task_def)
             # Execute the function as normal
             return func(*args, **kwargs)
         return wrapper
@@ -177,218 +297,235 @@ task.jython = TaskDecorator(language=ProactiveScriptLanguage().jython())
 task.prescript = ScriptDecorator()
 task.postscript = ScriptDecorator()
 
-def job(name, print_job_output=True):
+def job(name, print_job_output=True, shared_session=False, wait=True, local=False, result_cache=None):
     """
     Decorator to define a ProActive job.
 
+    Inside a session() block, the job uses the gateway of the session. Otherwise, a gateway is
+    created and closed for each call, unless shared_session is set.
+
     :param name: Name of the job.
     :param print_job_output: Boolean to determine if job output should be printed.
+    :param shared_session: If True, reuse a gateway shared by all the calls and closed at interpreter exit.
+    :param wait: If False, return a ProactiveJobHandle right after the submission instead of the job ID,
+        to launch several jobs and await them together (see gather). Outside a session() block, the
+        shared gateway is used, since the handle needs a connected gateway.
+    :param local: If True, run the job on the client machine with a ProactiveLocalExecutor instead of
+        submitting it, to test or profile it offline. A ProactiveLocalExecutor may be given instead.
+    :param result_cache: A ProactiveResultCache, to reuse the results of the tasks unchanged since a previous
+        call instead of running them again. When wait is True, the call waits for the job to cache its results.
+        Otherwise, they are cached when the returned handle sees the job finished, so the handle must be awaited.
     """
     def decorator(func):
+        # Compiled task graphs of this job, by structure
+        dag_cache = OrderedDict()
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Initialize ProActive gateway
-            gateway = getProActiveGateway()
-
-            # Create a new job
-            job = gateway.createJob(job_name=name)
-
-            # Execute the decorated function to register tasks
-            func(*args, **kwargs)
-
-            # Dictionary to store task objects for dependency and loop setup
-            task_objects = {}
-
-            # Add registered tasks to the job
-            start_task = None
-            end_task = None
-            replicate_start_task = None
-            replicate_end_task = None
-            condition_task = None
-            if_task = None
-            else_task = None
-            continuation_task = None
-
-            for task_def in registered_tasks:
-                # Create the task according to the specified language
-                if task_def['Language'].lower() == 'python':
-                    task = gateway.createPythonTask(task_name=task_def['Name'])
-                else:
-                    task = gateway.createTask(language=task_def['Language'], task_name=task_def['Name'])
-
-                # Check if the task was created successfully
-                if task is None:
-                    print(f"Error: Failed to create task '{task_def['Name']}' with language '{task_def['Language']}'.")
-                    continue
-
-                # Execute the task function to get the script content
-                script_content = task_def['Func'](*task_def['Args'], **task_def['Kwargs'])
-
-                # Set the script implementation for the task
-                try:
-                    task.setTaskImplementation(script_content)
-                except AttributeError as e:
-                    print(f"Error: Failed to set implementation for task '{task_def['Name']}'. Task is None or the method failed.")
-                    print(f"Exception details: {e}")
-                    continue
-
-                 # Set the runtime environment if provided
-                # Parameters:
-                # - type (str): Specifies the type of container technology to use for running the task. 
-                # Options include "docker", "podman", "singularity", or any other value to indicate a non-containerized execution.
-                # - image (str): The container image to use for running the task. Ensure that the 'py4j' Python package is available in the specified image.
-                # - nvidia_gpu (bool): Whether to enable NVIDIA GPU support within the container. Automatically set to False if no NVIDIA GPUs are present.
-                # - mount_host_path (str): The host machine path to mount into the container, providing the container access to specific directories or files from the host.
-                # - mount_container_path (str): The path inside the container where the host's file system (or a part of it) specified by `mount_host_path` will be accessible.
-                # - rootless (bool): Enables or disables rootless mode for the container execution, applicable to all container types (default False).
-                # - isolation (bool): Enables or disables isolation mode specifically for Singularity containers (default False). This parameter is only applicable if 'type' is set to "singularity".
-                # - no_home (bool): When set to True, the user's home directory is not mounted inside the container if the home directory is not the current working directory. Only applicable to Singularity containers (default False).
-                # - host_network (bool): Configures the container to use the host's network stack directly, bypassing the default or custom network namespaces (default False).
-                # - verbose (bool): Enables verbose output for the container runtime environment setup process (default False).
-                if task_def['RuntimeEnv']:
-                    task.setRuntimeEnvironment(
-                        type=task_def['RuntimeEnv'].get('type'),
-                        image=task_def['RuntimeEnv'].get('image'),
-                        nvidia_gpu=task_def['RuntimeEnv'].get('nvidia_gpu'),
-                        mount_host_path=task_def['RuntimeEnv'].get('mount_host_path'),
-                        mount_container_path=task_def['RuntimeEnv'].get('mount_container_path'),
-                        rootless=task_def['RuntimeEnv'].get('rootless'),
-                        isolation=task_def['RuntimeEnv'].get('isolation'),
-                        no_home=task_def['RuntimeEnv'].get('no_home'),
-                        host_network=task_def['RuntimeEnv'].get('host_network'),
-                        verbose=str(task_def['RuntimeEnv'].get('verbose')).lower() if task_def['RuntimeEnv'].get('verbose') is not None else None
-                    )
-
-                # Set the virtual environment if provided
-                if task_def['VirtualEnv']:
-                    ve = task_def['VirtualEnv']
-                    if 'requirements' in ve:
-                        task.setVirtualEnv(
-                            requirements=ve.get('requirements', []),
-                            basepath=ve.get('basepath', "./"),
-                            name=ve.get('name', "venv"),
-                            verbosity=ve.get('verbosity', False),
-                            overwrite=ve.get('overwrite', False),
-                            install_requirements_if_exists=ve.get('install_requirements_if_exists', False)
-                        )
-                    if 'requirements_file' in ve:
-                        task.setVirtualEnvFromFile(
-                            requirements_file=ve.get('requirements_file'),
-                            basepath=ve.get('basepath', "./"),
-                            name=ve.get('name', "venv"),
-                            verbosity=ve.get('verbosity', False),
-                            overwrite=ve.get('overwrite', False),
-                            install_requirements_if_exists=ve.get('install_requirements_if_exists', False)
-                        )
-
-                # Set input files if provided
-                if task_def['InputFiles']:
-                    for file in task_def['InputFiles']:
-                        task.addInputFile(file)
-
-                # Set output files if provided
-                if task_def['OutputFiles']:
-                    for file in task_def['OutputFiles']:
-                        task.addOutputFile(file)
-
-                # Set pre-script if provided
-                if task_def['Prescript']:
-                    pre_script = gateway.createPreScript(getattr(ProactiveScriptLanguage(), task_def['Prescript'].language)())
-                    pre_script.setImplementation(task_def['Prescript']())
-                    task.setPreScript(pre_script)
-
-                # Set post-script if provided
-                if task_def['Postscript']:
-                    post_script = gateway.createPostScript(getattr(ProactiveScriptLanguage(), task_def['Postscript'].language)())
-                    post_script.setImplementation(task_def['Postscript']())
-                    task.setPostScript(post_script)
-
-                job.addTask(task)
-                task_objects[task_def['Name']] = task
-
-                # Set loop start and end blocks
-                if task_def.get('IsLoopStart'):
-                    start_task = task
-                    start_task.setFlowBlock(ProactiveFlowBlock().start())
-                if task_def.get('IsLoopEnd'):
-                    end_task = task
-                    end_task.setFlowBlock(ProactiveFlowBlock().end())
-                    if task_def['LoopCriteria']:
-                        loop_script = gateway.createLoopFlowScript(
-                            task_def['LoopCriteria'],
-                            start_task.getTaskName(),
-                            script_language=ProactiveScriptLanguage().python()
-                        )
-                        end_task.setFlowScript(loop_script)
-
-                # Set replicate start and end blocks
-                if task_def.get('IsReplicateStart'):
-                    replicate_start_task = task
-                    replicate_start_task.setFlowBlock(ProactiveFlowBlock().start())
-                    replicate_script = gateway.createReplicateFlowScript(
-                        task_def['ReplicateCriteria'],
-                        script_language=ProactiveScriptLanguage().python()
-                    )
-                    replicate_start_task.setFlowScript(replicate_script)
-
-                if task_def.get('IsReplicateEnd'):
-                    replicate_end_task = task
-                    replicate_end_task.setFlowBlock(ProactiveFlowBlock().end())
-
-                # Set condition, branch, and continuation tasks
-                if task_def.get('IsConditionTask'):
-                    condition_task = task
-                    # Set the branch script directly from the function's script content
-                    branch_script = script_content
-                elif task_def.get('IsIfBranch'):
-                    if_task = task
-                elif task_def.get('IsElseBranch'):
-                    else_task = task
-                elif task_def.get('IsContinuationTask'):
-                    continuation_task = task
-
-            # Add branch flow if all necessary tasks are present
-            if condition_task and if_task and else_task and continuation_task:
-                if not branch_script:
-                    raise ValueError("Branch script must be defined for the condition task to determine the flow.")
-
-                flow_script = gateway.createBranchFlowScript(
-                    branch_script,
-                    if_task.getTaskName(),
-                    else_task.getTaskName(),
-                    continuation_task.getTaskName(),
-                    script_language=ProactiveScriptLanguage().python()
-                )
-                condition_task.setFlowScript(flow_script)
-
-            # Set task dependencies
-            for task_def in registered_tasks:
-                if task_def['DependsOn']:
-                    current_task = task_objects.get(task_def['Name'])
-                    if current_task:
-                        for dependency_name in task_def['DependsOn']:
-                            dependency_task = task_objects.get(dependency_name)
-                            if dependency_task:
-                                current_task.addDependency(dependency_task)
-
-            # Submit the job and get the job ID
-            if any(task_def['InputFiles'] or task_def['OutputFiles'] for task_def in registered_tasks):
-                job_id = gateway.submitJobWithInputsAndOutputsPaths(job)
-            else:
-                job_id = gateway.submitJob(job)
-            print(f"Job submitted with ID: {job_id}")
-
-            # Print job output if requested
-            if print_job_output:
-                print("Getting job output...")
-                job_output = gateway.getJobOutput(job_id)
-                print(f"Job output:\n{job_output}")
-
-            # Clear the registered tasks list for the next job
-            registered_tasks.clear()
-
-            # Close the gateway connection
-            gateway.close()
-            print("Disconnected and finished.")
+            # Initialize ProActive gateway, or reuse the one of the session
+            gateway, owned_gateway = _acquire_gateway(shared_session or not wait, local)
+            # The tasks called by the decorated function are registered in a list of this job build only
+            tasks_token = _task_registry.set([])
+            try:
+                job_id = _run_job(gateway, name, print_job_output and wait, func, args, kwargs, dag_cache, result_cache)
+                if result_cache is not None and wait:
+                    gateway.cacheJobResults(job_id)
+                return job_id if wait else ProactiveJobHandle(gateway, job_id, name, cache_results=result_cache is not None)
+            finally:
+                _task_registry.reset(tasks_token)
+                if owned_gateway:
+                    # Close the gateway connection
+                    gateway.close()
+                    print("Disconnected and finished.")
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def _create_task(gateway, task_def):
+    """Create the task of a task definition, and return it with its script content."""
+    # Create the task according to the specified language
+    if task_def['Language'].lower() == 'python':
+        task = gateway.createPythonTask(task_name=task_def['Name'])
+    else:
+        task = gateway.createTask(language=task_def['Language'], task_name=task_def['Name'])
+
+    # Check if the task was created successfully
+    if task is None:
+        print(f"Error: Failed to create task '{task_def['Name']}' with language '{task_def['Language']}'.")
+        return None, None
+
+    # Execute the task function to get the script content
+    script_content = task_def['Func'](*task_def['Args'], **task_def['Kwargs'])
+
+    # Set the script implementation for the task
+    try:
+        task.setTaskImplementation(script_content)
+    except AttributeError as e:
+        print(f"Error: Failed to set implementation for task '{task_def['Name']}'. Task is None or the method failed.")
+        print(f"Exception details: {e}")
+        return None, None
+
+    # Set the runtime environment if provided
+    # Parameters:
+    # - type (str): Specifies the type of container technology to use for running the task. 
+    # Options include "docker", "podman", "singularity", or any other value to indicate a non-containerized execution.
+    # - image (str): The container image to use for running the task. Ensure that the 'py4j' Python package is available in the specified image.
+    # - nvidia_gpu (bool): Whether to enable NVIDIA GPU support within the container. Automatically set to False if no NVIDIA GPUs are present.
+    # - mount_host_path (str): The host machine path to mount into the container, providing the container access to specific directories or files from the host.
+    # - mount_container_path (str): The path inside the container where the host's file system (or a part of it) specified by `mount_host_path` will be accessible.
+    # - rootless (bool): Enables or disables rootless mode for the container execution, applicable to all container types (default False).
+    # - isolation (bool): Enables or disables isolation mode specifically for Singularity containers (default False). This parameter is only applicable if 'type' is set to "singularity".
+    # - no_home (bool): When set to True, the user's home directory is not mounted inside the container if the home directory is not the current working directory. Only applicable to Singularity containers (default False).
+    # - host_network (bool): Configures the container to use the host's network stack directly, bypassing the default or custom network namespaces (default False).
+    # - verbose (bool): Enables verbose output for the container runtime environment setup process (default False).
+    if task_def['RuntimeEnv']:
+        task.setRuntimeEnvironment(
+            type=task_def['RuntimeEnv'].get('type'),
+            image=task_def['RuntimeEnv'].get('image'),
+            nvidia_gpu=task_def['RuntimeEnv'].get('nvidia_gpu'),
+            mount_host_path=task_def['RuntimeEnv'].get('mount_host_path'),
+            mount_container_path=task_def['RuntimeEnv'].get('mount_container_path'),
+            rootless=task_def['RuntimeEnv'].get('rootless'),
+            isolation=task_def['RuntimeEnv'].get('isolation'),
+            no_home=task_def['RuntimeEnv'].get('no_home'),
+            host_network=task_def['RuntimeEnv'].get('host_network'),
+            verbose=str(task_def['RuntimeEnv'].get('verbose')).lower() if task_def['RuntimeEnv'].get('verbose') is not None else None
+        )
+
+    # Set the virtual environment if provided
+    if task_def['VirtualEnv']:
+        ve = task_def['VirtualEnv']
+        if 'requirements' in ve:
+            task.setVirtualEnv(
+                requirements=ve.get('requirements', []),
+                basepath=ve.get('basepath', "./"),
+                name=ve.get('name', "venv"),
+                verbosity=ve.get('verbosity', False),
+                overwrite=ve.get('overwrite', False),
+                install_requirements_if_exists=ve.get('install_requirements_if_exists', False)
+            )
+        if 'requirements_file' in ve:
+            task.setVirtualEnvFromFile(
+                requirements_file=ve.get('requirements_file'),
+                basepath=ve.get('basepath', "./"),
+                name=ve.get('name', "venv"),
+                verbosity=ve.get('verbosity', False),
+                overwrite=ve.get('overwrite', False),
+                install_requirements_if_exists=ve.get('install_requirements_if_exists', False)
+            )
+
+    # Set input files if provided
+    if task_def['InputFiles']:
+        for file in task_def['InputFiles']:
+            task.addInputFile(file)
+
+    # Set output files if provided
+    if task_def['OutputFiles']:
+        for file in task_def['OutputFiles']:
+            task.addOutputFile(file)
+
+    # Set pre-script if provided
+    if task_def['Prescript']:
+        pre_script = gateway.createPreScript(getattr(ProactiveScriptLanguage(), task_def['Prescript'].language)())
+        pre_script.setImplementation(task_def['Prescript']())
+        task.setPreScript(pre_script)
+
+    # Set post-script if provided
+    if task_def['Postscript']:
+        post_script = gateway.createPostScript(getattr(ProactiveScriptLanguage(), task_def['Postscript'].language)())
+        post_script.setImplementation(task_def['Postscript']())
+        task.setPostScript(post_script)
+
+    return task, script_content
+
+
+def _run_job(gateway, name, print_job_output, func, args, kwargs, dag_cache=None, result_cache=None):
+    # Create a new job
+    job = gateway.createJob(job_name=name)
+
+    # Execute the decorated function to register tasks
+    func(*args, **kwargs)
+
+    # Validate the registered tasks and order them so that dependencies come first
+    with _dag_cache_lock:
+        dag = ProactiveJobDag.compile(_task_registry.get(), dag_cache)
+
+    # Dictionaries to store task objects and script contents for dependency and flow setup
+    task_objects = {}
+    script_contents = {}
+
+    # Add the tasks to the job, with their dependencies
+    for task_def in dag.tasks:
+        task, script_content = _create_task(gateway, task_def)
+        if task is None:
+            continue
+        job.addTask(task)
+        task_objects[task_def['Name']] = task
+        script_contents[task_def['Name']] = script_content
+        for dependency_name in dag.dependencies[task_def['Name']]:
+            dependency_task = task_objects.get(dependency_name)
+            if dependency_task:
+                task.addDependency(dependency_task)
+
+    # Set loop start and end blocks
+    for start_name, end_name, loop_criteria in dag.loops:
+        start_task, end_task = task_objects.get(start_name), task_objects.get(end_name)
+        if start_task is None or end_task is None:
+            continue
+        start_task.setFlowBlock(ProactiveFlowBlock().start())
+        end_task.setFlowBlock(ProactiveFlowBlock().end())
+        if loop_criteria:
+            loop_script = gateway.createLoopFlowScript(
+                loop_criteria,
+                start_task.getTaskName(),
+                script_language=ProactiveScriptLanguage().python()
+            )
+            end_task.setFlowScript(loop_script)
+
+    # Set replicate start and end blocks
+    for start_name, end_name, replicate_criteria in dag.replicates:
+        start_task, end_task = task_objects.get(start_name), task_objects.get(end_name)
+        if start_task is None or end_task is None:
+            continue
+        start_task.setFlowBlock(ProactiveFlowBlock().start())
+        replicate_script = gateway.createReplicateFlowScript(
+            replicate_criteria,
+            script_language=ProactiveScriptLanguage().python()
+        )
+        start_task.setFlowScript(replicate_script)
+        end_task.setFlowBlock(ProactiveFlowBlock().end())
+
+    # Add the branch flows, the branch script being the script content of the condition task
+    for condition_name, if_name, else_name, continuation_name in dag.branches:
+        condition_task = task_objects.get(condition_name)
+        if_task, else_task, continuation_task = (task_objects.get(task_name) for task_name in (if_name, else_name, continuation_name))
+        if not (condition_task and if_task and else_task and continuation_task):
+            continue
+        branch_script = script_contents[condition_name]
+        if not branch_script:
+            raise ValueError("Branch script must be defined for the condition task to determine the flow.")
+
+        flow_script = gateway.createBranchFlowScript(
+            branch_script,
+            if_task.getTaskName(),
+            else_task.getTaskName(),
+            continuation_task.getTaskName(),
+            script_language=ProactiveScriptLanguage().python()
+        )
+        condition_task.setFlowScript(flow_script)
+
+    # Submit the job and get the job ID
+    submit_options = {} if result_cache is None else {'result_cache': result_cache}
+    if dag.has_data_transfer:
+        job_id = gateway.submitJobWithInputsAndOutputsPaths(job, **submit_options)
+    else:
+        job_id = gateway.submitJob(job, **submit_options)
+    print(f"Job submitted with ID: {job_id}")
+
+    # Print job output if requested
+    if print_job_output:
+        print("Getting job output...")
+        job_output = gateway.getJobOutput(job_id)
+        print(f"Job output:\n{job_output}")
+
+    return job_id
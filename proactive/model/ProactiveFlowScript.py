@@ -18,24 +18,28 @@ class ProactiveFlowScript(ProactiveScript):
         self.targetContinuation = None
 
     def setActionType(self, action_type):
+        self._fingerprint = None
         self.proactive_action_type = action_type
 
     def getActionType(self):
         return self.proactive_action_type
 
     def setActionTarget(self, target):
+        self._fingerprint = None
         self.target = target
 
     def getActionTarget(self):
         return self.target
 
     def setActionTargetElse(self, target):
+        self._fingerprint = None
         self.targetElse = target
 
     def getActionTargetElse(self):
         return self.targetElse
 
     def setActionTargetContinuation(self, target):
+        self._fingerprint = None
         self.targetContinuation = target
 
     def getActionTargetContinuation(self):
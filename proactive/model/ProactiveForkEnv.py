@@ -15,6 +15,7 @@ class ProactiveForkEnv(ProactiveScript):
         self.java_home = '/usr'
 
     def setJavaHome(self, java_home):
+        self._fingerprint = None
         self.java_home = java_home
 
     def getJavaHome(self):
@@ -1,3 +1,39 @@
+import hashlib
+import json
+
+from .ProactiveTask import _EMPTY_MAP, _OWN_CONTAINERS, _ModelDict, _ModelList, _ReadOnlyDict, _ReadOnlyList, \
+    _get_container, _shared, _writable_dict
+
+
+class _SharedTasks:
+    """The tasks a job shares with its clones, with the tasks depending on each one, indexed on first use."""
+
+    __slots__ = ('tasks', '_dependents')
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self._dependents = None
+
+    def dependents(self, task):
+        """Return the shared tasks depending on a shared task."""
+        # The shared tasks are frozen, so their dependencies never change
+        if self._dependents is None:
+            # A task with a single dependent (the most common case) is indexed without a list
+            dependents = {}
+            for dependent in self.tasks:
+                for dependency in dependent.getDependencies():
+                    known = dependents.get(dependency)
+                    if known is None:
+                        dependents[dependency] = dependent
+                    elif type(known) is list:
+                        known.append(dependent)
+                    else:
+                        dependents[dependency] = [known, dependent]
+            self._dependents = dependents
+        found = self._dependents.get(task)
+        if found is None:
+            return ()
+        return found if type(found) is list else (found,)
 
 
 class ProactiveJob:
@@ -8,13 +44,44 @@ class ProactiveJob:
       job_tasks (list)
       input_folder (string)
       output_folder (string)
+
+      The tasks are kept in insertion order in a dict, so that they are removed in constant
+      time, and indexed by name (see getTask()).
+
+      clone() returns a variant of the job sharing its tasks, variables and generic information
+      until they are modified (copy-on-write), so that many variants cost memory in proportion
+      to their differences. The shared tasks are frozen: their setters raise a TypeError, in the
+      job and in its variants. To modify a task of a job which shares it, get it with
+      getTaskForUpdate(): the task, and the tasks depending on it, are copied for this job only,
+      in a time proportional to the number of copied tasks.
+
+      getFingerprint() hashes the job content from the fingerprints the tasks keep between
+      changes, so that the job builder can reuse the Java job built for an unchanged model.
+
+      As the containers of the tasks, the task list and the variables and generic information
+      maps returned by the getters (and the attributes of the same name) can be modified in
+      place, unless they are shared with clones: they are then read-only, use the add, remove
+      and clear methods, or assign a whole attribute (job.variables = {...}).
     """
 
+    __slots__ = ('job_name', '_tasks', '_shared_tasks', '_replaced_tasks', '_owned_tasks', '_task_list',
+                 '_task_index', '_generic_information', '_variables', 'input_folder', 'output_folder')
+
     def __init__(self, job_name=''):
         self.job_name = job_name
-        self.job_tasks = []
-        self.generic_information = {}
-        self.variables = {}
+        # The tasks of the job, the shared ones standing for their copies in _replaced_tasks
+        self._tasks = {}
+        # The tasks shared with the template or the clones of the job, None if it shares none
+        self._shared_tasks = None
+        # The copies of the shared tasks updated by this job, by shared task
+        self._replaced_tasks = None
+        # The tasks this job does not share, with the shared task each one replaces (None for the
+        # tasks added to the job), None if it shares none
+        self._owned_tasks = None
+        self._task_list = None
+        self._task_index = None
+        self._generic_information = _EMPTY_MAP
+        self._variables = _EMPTY_MAP
         self.input_folder = None
         self.output_folder = None
 
@@ -24,50 +91,246 @@ class ProactiveJob:
     def __repr__(self):
         return self.getJobName()
 
+    def clone(self, job_name=None):
+        """
+        Return a variant of the job, sharing its content until it is modified
+
+        :param job_name: The name of the variant, the name of the job by default
+        :return: A job with the same tasks, variables, generic information and folders
+        """
+        if self._owned_tasks or type(self._tasks) is dict:
+            self._shareTasks()
+        self._variables = _shared(self._variables)
+        self._generic_information = _shared(self._generic_information)
+        job = object.__new__(type(self))
+        for name in ProactiveJob.__slots__:
+            setattr(job, name, getattr(self, name))
+        job._owned_tasks = {}
+        if job_name is not None:
+            job.job_name = job_name
+        return job
+
+    def _shareTasks(self):
+        tasks = self.getTasks()
+        for task in tasks:
+            task._freeze()
+        self._tasks = _ReadOnlyDict(dict.fromkeys(tasks))
+        self._shared_tasks = _SharedTasks(self._tasks)
+        self._task_list = _ReadOnlyList(tasks)
+        self._replaced_tasks = None
+        self._owned_tasks = {}
+        if self._task_index is None:
+            # Indexed once for all the variants
+            self._task_index = {task.getTaskName(): task for task in reversed(tasks)}
+
     def setJobName(self, job_name):
         self.job_name = job_name
 
     def getJobName(self):
         return self.job_name
 
+    def _writableTasks(self):
+        if type(self._tasks) is not dict:
+            self._tasks = dict(self._tasks)
+        self._task_list = None
+        self._task_index = None
+        return self._tasks
+
     def addTask(self, task):
-        self.job_tasks.append(task)
+        task_list = self._task_list
+        self._writableTasks()[task] = None
+        if type(task_list) is _ModelList:
+            # Still the list of the tasks of the job
+            list.append(task_list, task)
+            self._task_list = task_list
+        if self._owned_tasks is not None:
+            self._owned_tasks[task] = None
 
     def removeTask(self, task):
-        self.job_tasks.remove(task)
+        owned_tasks = self._owned_tasks or {}
+        # A copy of a shared task is kept as the task it replaces
+        key = owned_tasks.get(task) or task
+        if key not in self._tasks or (key is task and self._replaced_tasks and task in self._replaced_tasks):
+            raise ValueError("{} is not a task of {}".format(task, self))
+        del self._writableTasks()[key]
+        if key is not task:
+            del self._replaced_tasks[key]
+        owned_tasks.pop(task, None)
 
     def clearTasks(self):
-        self.job_tasks.clear()
+        self._tasks = {}
+        self._shared_tasks = None
+        self._replaced_tasks = None
+        self._owned_tasks = None
+        self._writableTasks()
 
     def getTasks(self):
-        return self.job_tasks
+        """
+        Return the tasks of the job, in insertion order
+
+        The list updates the job when modified in place, unless the job shares its tasks with
+        clones: it is then read-only.
+        """
+        if self._task_list is None:
+            if self._owned_tasks is None:
+                self._task_list = _ModelList(self._tasks, self, '_tasks')
+            elif self._replaced_tasks:
+                self._task_list = _ReadOnlyList(self._replaced_tasks.get(task, task) for task in self._tasks)
+            else:
+                self._task_list = _ReadOnlyList(self._tasks)
+        return self._task_list
+
+    def _checkWritable(self):
+        # Unlike their tasks, the jobs are never frozen
+        pass
+
+    def _containerChanged(self, name, container):
+        # A container returned by a getter was modified in place
+        if name == '_tasks':
+            # Unless the list is no longer the one of the job
+            if container is self._task_list:
+                self._tasks = dict.fromkeys(container)
+                self._task_index = None
+        elif type(getattr(self, name)) not in _OWN_CONTAINERS:
+            setattr(self, name, container)
+
+    @property
+    def job_tasks(self):
+        return self.getTasks()
+
+    @job_tasks.setter
+    def job_tasks(self, tasks):
+        tasks = list(tasks)
+        self.clearTasks()
+        for task in tasks:
+            self.addTask(task)
+
+    def getTask(self, task_name):
+        """
+        Return the task of the given name, or None
+
+        The name index is built on first use, and built again if a task was renamed since.
+        """
+        task = self._task_index.get(task_name) if self._task_index is not None else None
+        if task is not None and self._replaced_tasks:
+            # The index may be shared with the other variants of the job
+            task = self._replaced_tasks.get(task, task)
+        if task is None or task.getTaskName() != task_name:
+            self._task_index = {indexed.getTaskName(): indexed for indexed in reversed(self.getTasks())}
+            task = self._task_index.get(task_name)
+        return task
+
+    def hasTask(self, task_name):
+        return self.getTask(task_name) is not None
+
+    def getTaskForUpdate(self, task_name):
+        """
+        Return the task of the given name, copied first if the job shares it with other jobs
+
+        The tasks depending on a copied task are copied too, to depend on the copy. The other
+        jobs keep the original tasks.
+
+        :param task_name: The name of the task
+        :return: A task this job does not share, or None if there is no task of this name
+        """
+        task = self.getTask(task_name)
+        return None if task is None else self._ownTask(task)
+
+    def _ownTask(self, task):
+        if self._owned_tasks is None or task in self._owned_tasks:
+            return task
+        replaced_tasks = self._replaced_tasks or {}
+        # Copies the shared tasks after the task, and collects the copies made before which depend on them
+        copies = {}
+        repointed = []
+        pending = [task]
+        while pending:
+            shared = pending.pop()
+            if shared in copies:
+                continue
+            copies[shared] = shared.clone()
+            for dependent in self._shared_tasks.dependents(shared):
+                if dependent in replaced_tasks:
+                    repointed.append(replaced_tasks[dependent])
+                elif dependent in self._tasks:
+                    pending.append(dependent)
+        # The tasks added to the job may depend on the copied tasks too
+        repointed.extend(added for added, replaced in self._owned_tasks.items() if replaced is None)
+        for updated in list(copies.values()) + repointed:
+            updated.replaceDependencies(copies)
+        self._owned_tasks.update((copy, shared) for shared, copy in copies.items())
+        if self._replaced_tasks is None:
+            self._replaced_tasks = {}
+        self._replaced_tasks.update(copies)
+        self._task_list = None
+        return copies[task]
+
+    def getFingerprint(self):
+        """
+        Return a hash of what the job builder reads from the job
+
+        Only the changed tasks are hashed again (see ProactiveTask.getFingerprint()). The
+        dependencies are hashed by task name, as the builder resolves them.
+        """
+        content = [
+            self.job_name,
+            sorted((str(name), str(value)) for name, value in self._variables.items()),
+            sorted((str(name), str(value)) for name, value in self._generic_information.items()),
+        ]
+        for task in self.getTasks():
+            content.append(task.getFingerprint())
+            if task.hasDependencies():
+                content.append([dependency.getTaskName() for dependency in task.getDependencies()])
+        return hashlib.sha256(json.dumps(content, default=str).encode('utf-8')).hexdigest()
 
     def addVariable(self, key, value):
-        self.variables[key] = value
+        self._variables = _writable_dict(self._variables, self, '_variables')
+        dict.__setitem__(self._variables, key, value)
 
     def getVariables(self):
-        return self.variables
+        return _get_container(self, '_variables', _EMPTY_MAP)
+
+    @property
+    def variables(self):
+        return self.getVariables()
+
+    @variables.setter
+    def variables(self, variables):
+        self._variables = _ModelDict(variables, self, '_variables') if variables else _EMPTY_MAP
 
     def hasVariables(self):
-        return True if self.variables else False
+        return True if self._variables else False
 
     def removeVariable(self, key):
-        del self.variables[key]
+        variables = _writable_dict(self._variables, self, '_variables')
+        dict.__delitem__(variables, key)
+        self._variables = variables
 
     def clearVariables(self):
-        self.variables.clear()
+        self._variables = _EMPTY_MAP
 
     def addGenericInformation(self, key, value):
-        self.generic_information[key] = value
+        self._generic_information = _writable_dict(self._generic_information, self, '_generic_information')
+        dict.__setitem__(self._generic_information, key, value)
 
     def getGenericInformation(self):
-        return self.generic_information
+        return _get_container(self, '_generic_information', _EMPTY_MAP)
+
+    @property
+    def generic_information(self):
+        return self.getGenericInformation()
+
+    @generic_information.setter
+    def generic_information(self, generic_information):
+        self._generic_information = _ModelDict(generic_information, self, '_generic_information') if generic_information else _EMPTY_MAP
 
     def removeGenericInformation(self, key):
-        del self.generic_information[key]
+        generic_information = _writable_dict(self._generic_information, self, '_generic_information')
+        dict.__delitem__(generic_information, key)
+        self._generic_information = generic_information
 
     def clearGenericInformation(self):
-        self.generic_information.clear()
+        self._generic_information = _EMPTY_MAP
 
     def setInputFolder(self, input_folder):
         self.input_folder = input_folder
@@ -80,4 +343,3 @@ class ProactiveJob:
 
     def getOutputFolder(self):
         return self.output_folder
-
@@ -0,0 +1,151 @@
+from .ProactiveRecord import *
+
+
+class ProactiveJobInfo(ProactiveRecord):
+    """
+    Represents a read-only snapshot of the information of a scheduler job
+
+    job_id (string)
+    job_name (string)
+    owner (string)
+    status (string): e.g. 'RUNNING', 'FINISHED'
+    priority (string)
+    project_name (string)
+    bucket_name (string)
+    tenant (string)
+    parent_id (int)
+    submitted_time, start_time, finished_time, last_updated_time (int): Epoch milliseconds,
+        negative when not reached
+    total_tasks, pending_tasks, running_tasks, finished_tasks, failed_tasks, faulty_tasks,
+        in_error_tasks (int)
+    """
+
+    __slots__ = ()
+
+    FIELDS = (
+        'job_id', 'job_name', 'owner', 'status', 'priority', 'project_name', 'bucket_name', 'tenant', 'parent_id',
+        'submitted_time', 'start_time', 'finished_time', 'last_updated_time',
+        'total_tasks', 'pending_tasks', 'running_tasks', 'finished_tasks', 'failed_tasks', 'faulty_tasks',
+        'in_error_tasks',
+    )
+
+    @classmethod
+    def from_json(cls, data):
+        job_id = data['jobId']
+        parent_id = data.get('parentId')
+        return cls(
+            str(job_id['id']),
+            job_id.get('readableName'),
+            data.get('jobOwner'),
+            data.get('status'),
+            data.get('priority'),
+            data.get('projectName'),
+            data.get('bucketName'),
+            data.get('tenant'),
+            None if parent_id is None else int(parent_id),
+            data.get('submittedTime'),
+            data.get('startTime'),
+            data.get('finishedTime'),
+            data.get('lastUpdatedTime'),
+            data.get('totalNumberOfTasks'),
+            data.get('numberOfPendingTasks'),
+            data.get('numberOfRunningTasks'),
+            data.get('numberOfFinishedTasks'),
+            data.get('numberOfFailedTasks'),
+            data.get('numberOfFaultyTasks'),
+            data.get('numberOfInErrorTasks'),
+        )
+
+    @classmethod
+    def from_java(cls, job_info):
+        """Build a record from a Java org.ow2.proactive.scheduler.common.job.JobInfo."""
+        job_id = job_info.getJobId()
+        parent_id = job_info.getParentId()
+        return cls(
+            job_id.value(),
+            job_id.getReadableName(),
+            job_info.getJobOwner(),
+            job_info.getStatus().name(),
+            job_info.getPriority().name(),
+            job_info.getProjectName(),
+            job_info.getBucketName(),
+            job_info.getTenant(),
+            None if parent_id is None else int(parent_id),
+            job_info.getSubmittedTime(),
+            job_info.getStartTime(),
+            job_info.getFinishedTime(),
+            job_info.getLastUpdatedTime(),
+            job_info.getTotalNumberOfTasks(),
+            job_info.getNumberOfPendingTasks(),
+            job_info.getNumberOfRunningTasks(),
+            job_info.getNumberOfFinishedTasks(),
+            job_info.getNumberOfFailedTasks(),
+            job_info.getNumberOfFaultyTasks(),
+            job_info.getNumberOfInErrorTasks(),
+        )
+
+    def __repr__(self):
+        return "ProactiveJobInfo(job_id={}, job_name={!r}, status={})".format(self.job_id, self.job_name, self.status)
+
+    def getJobId(self):
+        return self.job_id
+
+    def getJobName(self):
+        return self.job_name
+
+    def getOwner(self):
+        return self.owner
+
+    def getStatus(self):
+        return self.status
+
+    def getPriority(self):
+        return self.priority
+
+    def getProjectName(self):
+        return self.project_name
+
+    def getBucketName(self):
+        return self.bucket_name
+
+    def getTenant(self):
+        return self.tenant
+
+    def getParentId(self):
+        return self.parent_id
+
+    def getSubmittedTime(self):
+        return self.submitted_time
+
+    def getStartTime(self):
+        return self.start_time
+
+    def getFinishedTime(self):
+        return self.finished_time
+
+    def getLastUpdatedTime(self):
+        return self.last_updated_time
+
+    def getTotalNumberOfTasks(self):
+        return self.total_tasks
+
+    def getNumberOfPendingTasks(self):
+        return self.pending_tasks
+
+    def getNumberOfRunningTasks(self):
+        return self.running_tasks
+
+    def getNumberOfFinishedTasks(self):
+        return self.finished_tasks
+
+    def getNumberOfFailedTasks(self):
+        return self.failed_tasks
+
+    def getNumberOfFaultyTasks(self):
+        return self.faulty_tasks
+
+    def getNumberOfInErrorTasks(self):
+        return self.in_error_tasks
+
+    def isFinished(self):
+        return self.status in ('FINISHED', 'CANCELED', 'FAILED', 'KILLED')
@@ -0,0 +1,79 @@
+import json
+import logging
+
+from py4j.protocol import Py4JNetworkError
+
+logger = logging.getLogger('ProactiveRecord')
+
+
+class ProactiveRecord:
+    """
+    Base of the read-only records converted from Java scheduler objects
+
+    Subclasses list their field names in FIELDS. Values are stored in a single tuple,
+    so that a record holds no reference to a Java object and costs one tuple of memory.
+    The records converted from Java objects define the from_json(data) and
+    from_java(java_object) class methods used by from_java_list().
+    """
+
+    __slots__ = ('_values',)
+
+    FIELDS = ()
+
+    # The record classes whose bulk conversion failed, converted field by field from then on
+    _bulk_unsupported = set()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._INDEX = {field: index for index, field in enumerate(cls.FIELDS)}
+
+    def __init__(self, *values, **kwargs):
+        if len(values) > len(self.FIELDS):
+            raise TypeError("{} takes at most {} values".format(type(self).__name__, len(self.FIELDS)))
+        values = list(values) + [None] * (len(self.FIELDS) - len(values))
+        for field, value in kwargs.items():
+            if field not in self._INDEX:
+                raise TypeError("Unknown {} field: {}".format(type(self).__name__, field))
+            values[self._INDEX[field]] = value
+        object.__setattr__(self, '_values', tuple(values))
+
+    def __getattr__(self, name):
+        index = type(self)._INDEX.get(name)
+        if index is None:
+            raise AttributeError(name)
+        return self._values[index]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is read-only".format(type(self).__name__))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values == other._values
+
+    def __hash__(self):
+        return hash(self._values)
+
+    def __reduce__(self):
+        return type(self), self._values
+
+    def to_dict(self):
+        return dict(zip(self.FIELDS, self._values))
+
+    @classmethod
+    def from_java_list(cls, java_objects, object_mapper=None):
+        """
+        Build the records of a list of Java objects.
+
+        With an object mapper (see ProactiveFactory.create_object_mapper), the whole list
+        is serialized to JSON on the Java side and transferred in a single call. Without
+        one, the records are built field by field. If the serialization fails, it is not
+        tried again for this record class.
+        """
+        if object_mapper is not None and cls not in ProactiveRecord._bulk_unsupported:
+            try:
+                return [cls.from_json(data) for data in json.loads(object_mapper.writeValueAsString(java_objects))]
+            except Py4JNetworkError:
+                raise
+            except Exception as e:
+                ProactiveRecord._bulk_unsupported.add(cls)
+                logger.warning(f"Bulk conversion to {cls.__name__} failed, converting field by field from now on: {e}")
+        return [cls.from_java(java_object) for java_object in java_objects]
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 
 
@@ -13,14 +15,27 @@ class ProactiveScript(object):
         self.script_language = script_language
         self.implementation = ''
         self.implementation_url = None
+        self._fingerprint = None
+
+    def getFingerprint(self):
+        """
+        Return a hash of the script attributes, kept until a setter changes the script
+        """
+        if self._fingerprint is None:
+            content = [type(self).__name__] + sorted(
+                (name, value) for name, value in vars(self).items() if not name.startswith('_'))
+            self._fingerprint = hashlib.sha256(json.dumps(content, default=str).encode('utf-8')).hexdigest()
+        return self._fingerprint
 
     def setScriptLanguage(self, script_language):
+        self._fingerprint = None
         self.script_language = script_language
 
     def getScriptLanguage(self):
         return self.script_language
 
     def setImplementation(self, implementation):
+        self._fingerprint = None
         self.implementation = implementation
         self.implementation_url = None
 
@@ -33,6 +48,7 @@ class ProactiveScript(object):
                 self.setImplementation(content_file.read())
 
     def setImplementationFromURL(self, implementation_url):
+        self._fingerprint = None
         self.implementation_url = implementation_url
         self.implementation = ''
 
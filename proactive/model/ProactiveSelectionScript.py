@@ -15,6 +15,7 @@ class ProactiveSelectionScript(ProactiveScript):
         self.is_dynamic = True
 
     def setIsDynamic(self, is_dynamic):
+        self._fingerprint = None
         self.is_dynamic = is_dynamic
 
     def isDynamic(self):
@@ -0,0 +1,41 @@
+from .ProactiveRecord import *
+
+
+class ProactiveSweepRow(ProactiveRecord):
+    """
+    Represents the submission of one variable set of a parametric sweep
+
+    index (int): Position of the variable set in the sweep
+    variables (dict): The variable set
+    job_id (int): ID of the submitted job, None if the submission failed
+    replication (int): Replication index of the variable set when the sweep was packed into one job, else None
+    error (string): The submission error, None if the submission succeeded
+    """
+
+    __slots__ = ()
+
+    FIELDS = ('index', 'variables', 'job_id', 'replication', 'error')
+
+    def __repr__(self):
+        return "ProactiveSweepRow(index={}, job_id={}, error={!r})".format(self.index, self.job_id, self.error)
+
+    def __hash__(self):
+        return hash((self.index, self.job_id, self.replication, self.error))
+
+    def getIndex(self):
+        return self.index
+
+    def getVariables(self):
+        return self.variables
+
+    def getJobId(self):
+        return self.job_id
+
+    def getReplication(self):
+        return self.replication
+
+    def getError(self):
+        return self.error
+
+    def isSubmitted(self):
+        return self.error is None
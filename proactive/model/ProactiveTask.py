@@ -1,7 +1,10 @@
+import hashlib
+import json
 import os
 import subprocess
 import cloudpickle
 import codecs
+import functools
 
 from tempfile import TemporaryDirectory
 
@@ -9,10 +12,189 @@ from .ProactiveScriptLanguage import *
 from .ProactiveSelectionScript import *
 from .ProactiveRuntimeEnv import *
 
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("This container is shared by the clones of a job or task model, and read-only: use the add, "
+                    "remove and clear methods of the model, or assign the whole attribute (e.g. task.variables = {...})")
+
+
+class _ReadOnlyList(list):
+    """The empty lists of the models, and the lists they share with their clones (see _SharedList)."""
+
+    __slots__ = ()
+
+    append = extend = insert = remove = pop = clear = sort = reverse = __setitem__ = __delitem__ = __iadd__ = \
+        __imul__ = _read_only
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+class _ReadOnlyDict(dict):
+    """The empty dicts of the models, and the dicts they share with their clones (see _SharedDict)."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class _SharedList(_ReadOnlyList):
+    """A list shared by a model and its clones, until one of them replaces it (copy-on-write)."""
+
+    __slots__ = ()
+
+
+class _SharedDict(_ReadOnlyDict):
+    """A dict shared by a model and its clones, until one of them replaces it (copy-on-write)."""
+
+    __slots__ = ()
+
+
+def _updating(method):
+    """Wrap a method of list or dict modifying the container, to tell the model owning it."""
+    @functools.wraps(method)
+    def update(self, *args, **kwargs):
+        model = self._model
+        if model is None:
+            return method(self, *args, **kwargs)
+        model._checkWritable()
+        result = method(self, *args, **kwargs)
+        model._containerChanged(self._name, self)
+        return result
+    return update
+
+
+class _ModelList(list):
+    """
+    A list owned by a model, returned by its getters
+
+    The model modifies it with the methods of list. Modified in place, it tells the model, which
+    raises a TypeError if it is frozen, and takes it as its own if it had none yet (the getters return such a copy of the empty and default
+    containers, so that reading a model allocates nothing).
+    """
+
+    __slots__ = ('_model', '_name')
+
+    def __init__(self, items=(), model=None, name=None):
+        list.__init__(self, items)
+        self._model = model
+        self._name = name
+
+    append = _updating(list.append)
+    extend = _updating(list.extend)
+    insert = _updating(list.insert)
+    remove = _updating(list.remove)
+    pop = _updating(list.pop)
+    clear = _updating(list.clear)
+    sort = _updating(list.sort)
+    reverse = _updating(list.reverse)
+    __setitem__ = _updating(list.__setitem__)
+    __delitem__ = _updating(list.__delitem__)
+    __iadd__ = _updating(list.__iadd__)
+    __imul__ = _updating(list.__imul__)
+
+    def __reduce__(self):
+        return type(self), (list(self), self._model, self._name)
+
+
+class _ModelDict(dict):
+    """A dict owned by a model, returned by its getters (see _ModelList)."""
+
+    __slots__ = ('_model', '_name')
+
+    def __init__(self, items=(), model=None, name=None):
+        dict.__init__(self, items)
+        self._model = model
+        self._name = name
+
+    __setitem__ = _updating(dict.__setitem__)
+    __delitem__ = _updating(dict.__delitem__)
+    clear = _updating(dict.clear)
+    pop = _updating(dict.pop)
+    popitem = _updating(dict.popitem)
+    setdefault = _updating(dict.setdefault)
+    update = _updating(dict.update)
+    __ior__ = _updating(dict.__ior__)
+
+    def __reduce__(self):
+        return type(self), (dict(self), self._model, self._name)
+
+
+_EMPTY_LIST = _ReadOnlyList()
+_EMPTY_MAP = _ReadOnlyDict()
+
+_OWN_CONTAINERS = (_ModelList, _ModelDict)
+_RETURNED_CONTAINERS = (_ModelList, _ModelDict, _SharedList, _SharedDict)
+
+
+def _writable_dict(value, model, name):
+    """The dict itself if the model owns it, or an owned copy of a missing or shared one (copy-on-write)."""
+    return value if type(value) is _ModelDict else _ModelDict(value or (), model, name)
+
+
+def _writable_list(value, model, name):
+    """The list itself if the model owns it, or an owned copy of a missing or shared one (copy-on-write)."""
+    return value if type(value) is _ModelList else _ModelList(value or (), model, name)
+
+
+def _shared(value):
+    """A read-only version of an owned container, to share it between a model and its clones."""
+    if type(value) is _ModelDict:
+        return _SharedDict(value)
+    if type(value) is _ModelList:
+        return _SharedList(value)
+    return value
+
+
+def _get_container(model, name, empty, frozen=False):
+    """
+    The container of a model as returned by its getters: its own one, the read-only one it shares
+    with its clones, or a copy of the empty or default one, which the model takes when it is modified
+    (the containers of a frozen model are returned as they are)
+    """
+    value = getattr(model, name)
+    if value is None:
+        value = empty
+    if frozen or type(value) in _RETURNED_CONTAINERS:
+        return value
+    if isinstance(value, dict):
+        return _ModelDict(value, model, name)
+    return _ModelList(value, model, name)
+
+
+# Above this number of dependencies, a task keeps them in a dict to remove them in constant time
+_INDEXED_DEPENDENCIES = 32
+
+# Read-only generic information shared by the Python tasks until they add their own, by Python command
+_PYTHON_COMMAND_INFORMATION = {}
+
+
 class ProactiveTask(object):
     """
     Represents a generic proactive task
 
+    Tasks are slot-based and allocate their variables, generic information, files and
+    dependencies on first use, so that jobs with many tasks stay compact. Dependencies are
+    kept in insertion order; a task with many dependencies indexes them, to remove them in
+    constant time.
+
+    The containers returned by the getters (and the attributes of the same name) can be
+    modified in place, as the ones of a new task, which are allocated when first modified.
+
+    clone() returns a copy sharing the scripts, the fork and selection environments and the
+    implementation of the task, and its containers until either task modifies them
+    (copy-on-write). The shared containers are read-only, and raise a TypeError when modified
+    in place: use the add, remove and clear methods, or assign a whole attribute
+    (task.variables = {...}). The shared scripts and environments must be replaced with the
+    setters, not modified in place. The tasks of a job shared with its clones (see
+    ProactiveJob.clone()) are frozen: their setters raise a TypeError.
+
+    getFingerprint() hashes the task content, so that the job builder can reuse the Java job
+    built for an unchanged model (see ProactiveJobBuildCache).
+
     script_language (ProactiveScriptLanguage)
     fork_environment (ProactiveForkEnv)
     task_name (string)
@@ -27,6 +209,11 @@ class ProactiveTask(object):
     flow_block (ProactiveFlowBlock)
     """
 
+    __slots__ = ('script_language', 'fork_environment', 'selection_script', 'task_name', 'task_implementation',
+                 'task_implementation_url', '_variables', '_generic_information', '_input_files', '_output_files',
+                 '_dependencies', 'description', 'pre_script', 'post_script', 'flow_script', 'flow_block',
+                 'precious_result', 'task_error_policy', 'default_python', '_fingerprint', '_frozen')
+
     def __init__(self, script_language=None, task_name=''):
         self.script_language = script_language
         self.fork_environment = None
@@ -34,11 +221,11 @@ class ProactiveTask(object):
         self.task_name = task_name
         self.task_implementation = ''
         self.task_implementation_url = None
-        self.variables = {}
-        self.generic_information = {}
-        self.input_files = []
-        self.output_files = []
-        self.dependencies = []
+        self._variables = None
+        self._generic_information = None
+        self._input_files = None
+        self._output_files = None
+        self._dependencies = None
         self.description = []
         self.pre_script = None
         self.post_script = None
@@ -47,6 +234,76 @@ class ProactiveTask(object):
         self.precious_result = False
         self.task_error_policy = 'continueJobExecution'  # Default behavior
         self.default_python = 'python3'
+        self._fingerprint = None
+        self._frozen = False
+
+    def clone(self, task_name=None):
+        """
+        Return a copy of the task, sharing its content until it is modified
+
+        :param task_name: The name of the copy, the name of the task by default
+        :return: A task of the same class, with the same dependencies
+        """
+        for name in ('_variables', '_generic_information', '_input_files', '_output_files', '_dependencies'):
+            setattr(self, name, _shared(getattr(self, name)))
+        task = object.__new__(type(self))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                setattr(task, name, getattr(self, name))
+        if hasattr(self, '__dict__'):
+            task.__dict__.update(self.__dict__)
+        task._frozen = False
+        if task_name is not None:
+            task.setTaskName(task_name)
+        return task
+
+    def _freeze(self):
+        # Called by the jobs sharing the task with their clones
+        self._frozen = True
+
+    def _containerChanged(self, name, container):
+        # A container returned by a getter was modified in place
+        self._changed()
+        current = getattr(self, name)
+        if name == '_dependencies' and isinstance(current, dict) and current is not container:
+            self._setDependencies(container)
+        elif current is not container and type(current) not in _OWN_CONTAINERS:
+            setattr(self, name, container)
+
+    def _checkWritable(self):
+        if self._frozen:
+            raise TypeError("The task {0} is shared by the clones of its job, "
+                            "get it with job.getTaskForUpdate('{0}') to modify it".format(self.getTaskName()))
+
+    def _changed(self):
+        self._checkWritable()
+        self._fingerprint = None
+
+    def getFingerprint(self):
+        """
+        Return a hash of what the job builder reads from the task, apart from its dependencies
+
+        The hash of the task attributes is computed on first use and kept until a setter, or an
+        in-place change of a container, changes the task, so that the unchanged tasks of a job are
+        not hashed again (the scripts keep theirs the same way). Attributes assigned directly are
+        not seen.
+        """
+        if self._fingerprint is None:
+            content = [
+                self.script_language, self.task_name, self.task_implementation, self.task_implementation_url,
+                self.precious_result, self.task_error_policy, self.flow_block, self.default_python,
+                sorted((str(name), str(value)) for name, value in self.getVariables().items()),
+                sorted((str(name), str(value)) for name, value in self.getGenericInformation().items()),
+                list(self.getInputFiles()), list(self.getOutputFiles()),
+            ]
+            self._fingerprint = hashlib.sha256(json.dumps(content, default=str).encode('utf-8')).hexdigest()
+        scripts = (self.fork_environment, self.selection_script, self.pre_script, self.post_script, self.flow_script)
+        if all(script is None for script in scripts):
+            return self._fingerprint
+        digest = hashlib.sha256(self._fingerprint.encode('ascii'))
+        for script in scripts:
+            digest.update(b'-' if script is None else script.getFingerprint().encode('ascii'))
+        return digest.hexdigest()
 
     def __str__(self):
         return self.getTaskName()
@@ -55,18 +312,21 @@ class ProactiveTask(object):
         return self.getTaskName()
 
     def setScriptLanguage(self, script_language):
+        self._changed()
         self.script_language = script_language
 
     def getScriptLanguage(self):
         return self.script_language
 
     def setPreciousResult(self, precious_result):
+        self._changed()
         self.precious_result = precious_result
 
     def getPreciousResult(self):
         return self.precious_result
 
     def setForkEnvironment(self, fork_environment):
+        self._changed()
         self.fork_environment = fork_environment
 
     def getForkEnvironment(self):
@@ -91,9 +351,11 @@ class ProactiveTask(object):
         - host_network (bool): Configures the container to use the host's network stack directly, bypassing the default or custom network namespaces (default False).
         - verbose (bool): Enables verbose output for the container runtime environment setup process (default False).
         """
+        self._changed()
         self.fork_environment = ProactiveRuntimeEnv().create(type, image, nvidia_gpu, mount_host_path, mount_container_path, rootless, isolation, no_home, host_network, verbose)
 
     def setSelectionScript(self, selection_script):
+        self._changed()
         self.selection_script = selection_script
 
     def getSelectionScript(self):
@@ -103,12 +365,14 @@ class ProactiveTask(object):
         return True if self.selection_script is not None else False
 
     def setTaskName(self, task_name):
+        self._changed()
         self.task_name = task_name
 
     def getTaskName(self):
         return self.task_name
 
     def setTaskImplementationFromURL(self, task_url):
+        self._changed()
         self.task_implementation_url = task_url
         self.task_implementation = ''
 
@@ -121,6 +385,7 @@ class ProactiveTask(object):
                 self.setTaskImplementation(content_file.read())
 
     def setTaskImplementation(self, task_implementation):
+        self._changed()
         self.task_implementation = "\n"
         self.task_implementation += task_implementation
         self.task_implementation_url = None
@@ -129,75 +394,202 @@ class ProactiveTask(object):
         return self.task_implementation
 
     def addVariable(self, key, value):
-        self.variables[key] = value
+        self._changed()
+        self._variables = _writable_dict(self._variables, self, '_variables')
+        dict.__setitem__(self._variables, key, value)
 
     def getVariables(self):
-        return self.variables
+        return _get_container(self, '_variables', _EMPTY_MAP, self._frozen)
 
     def hasVariables(self):
-        return True if self.variables else False
+        return True if self._variables else False
 
     def removeVariable(self, key):
-        del self.variables[key]
+        self._changed()
+        variables = _writable_dict(self._variables, self, '_variables')
+        dict.__delitem__(variables, key)
+        self._variables = variables
 
     def clearVariables(self):
-        self.variables.clear()
+        self._changed()
+        self._variables = None
+
+    @property
+    def variables(self):
+        return self.getVariables()
+
+    @variables.setter
+    def variables(self, variables):
+        self._changed()
+        self._variables = _ModelDict(variables, self, '_variables') if variables else None
 
     def addGenericInformation(self, key, value):
-        self.generic_information[key] = value
+        self._changed()
+        self._generic_information = _writable_dict(self._generic_information, self, '_generic_information')
+        dict.__setitem__(self._generic_information, key, value)
 
     def getGenericInformation(self):
-        return self.generic_information
+        return _get_container(self, '_generic_information', _EMPTY_MAP, self._frozen)
 
     def removeGenericInformation(self, key):
-        del self.generic_information[key]
+        self._changed()
+        generic_information = _writable_dict(self._generic_information, self, '_generic_information')
+        dict.__delitem__(generic_information, key)
+        self._generic_information = generic_information
 
     def clearGenericInformation(self):
-        self.generic_information.clear()
+        self._changed()
+        self._generic_information = None
+
+    @property
+    def generic_information(self):
+        return self.getGenericInformation()
+
+    @generic_information.setter
+    def generic_information(self, generic_information):
+        self._changed()
+        self._generic_information = _ModelDict(generic_information, self, '_generic_information') if generic_information else None
 
     def addInputFile(self, input_file):
-        self.input_files.append(input_file)
+        self._changed()
+        self._input_files = _writable_list(self._input_files, self, '_input_files')
+        list.append(self._input_files, input_file)
 
     def removeInputFile(self, input_file):
-        self.input_files.remove(input_file)
+        self._changed()
+        input_files = _writable_list(self._input_files, self, '_input_files')
+        list.remove(input_files, input_file)
+        self._input_files = input_files
 
     def clearInputFiles(self):
-        self.input_files.clear()
+        self._changed()
+        self._input_files = None
 
     def getInputFiles(self):
-        return self.input_files
+        return _get_container(self, '_input_files', _EMPTY_LIST, self._frozen)
+
+    @property
+    def input_files(self):
+        return self.getInputFiles()
+
+    @input_files.setter
+    def input_files(self, input_files):
+        self._changed()
+        self._input_files = _ModelList(input_files, self, '_input_files') if input_files else None
 
     def addOutputFile(self, output_file):
-        self.output_files.append(output_file)
+        self._changed()
+        self._output_files = _writable_list(self._output_files, self, '_output_files')
+        list.append(self._output_files, output_file)
 
     def removeOutputFile(self, output_file):
-        self.output_files.remove(output_file)
+        self._changed()
+        output_files = _writable_list(self._output_files, self, '_output_files')
+        list.remove(output_files, output_file)
+        self._output_files = output_files
 
     def clearOutputFiles(self):
-        self.output_files.clear()
+        self._changed()
+        self._output_files = None
 
     def getOutputFiles(self):
-        return self.output_files
+        return _get_container(self, '_output_files', _EMPTY_LIST, self._frozen)
+
+    @property
+    def output_files(self):
+        return self.getOutputFiles()
+
+    @output_files.setter
+    def output_files(self, output_files):
+        self._changed()
+        self._output_files = _ModelList(output_files, self, '_output_files') if output_files else None
+
+    def _writableDependencies(self):
+        if isinstance(self._dependencies, dict):
+            self._dependencies = _writable_dict(self._dependencies, self, '_dependencies')
+        else:
+            self._dependencies = _writable_list(self._dependencies, self, '_dependencies')
+        return self._dependencies
 
     def addDependency(self, task):
-        self.dependencies.append(task)
+        self._checkWritable()
+        dependencies = self._writableDependencies()
+        if isinstance(dependencies, dict):
+            dict.__setitem__(dependencies, task, None)
+        else:
+            list.append(dependencies, task)
+            if len(dependencies) > _INDEXED_DEPENDENCIES:
+                self._dependencies = _ModelDict(dict.fromkeys(dependencies), self, '_dependencies')
 
     def removeDependency(self, task):
-        self.dependencies.remove(task)
+        if self._dependencies is None or task not in self._dependencies:
+            raise ValueError("{} is not a dependency of {}".format(task, self))
+        self._checkWritable()
+        dependencies = self._writableDependencies()
+        if isinstance(dependencies, dict):
+            dict.__delitem__(dependencies, task)
+        else:
+            list.remove(dependencies, task)
+
+    def replaceDependencies(self, replacements):
+        """Replace the dependencies found in a dict by their replacement, at the same position."""
+        if self._dependencies is None:
+            return
+        if isinstance(self._dependencies, dict) and len(replacements) < len(self._dependencies):
+            found = any(replaced in self._dependencies for replaced in replacements)
+        else:
+            found = any(dependency in replacements for dependency in self._dependencies)
+        if not found:
+            return
+        dependencies = [replacements.get(dependency, dependency) for dependency in self._dependencies]
+        self._setDependencies(dependencies)
+
+    def _setDependencies(self, dependencies):
+        if len(dependencies) > _INDEXED_DEPENDENCIES:
+            self._dependencies = _ModelDict(dict.fromkeys(dependencies), self, '_dependencies')
+        elif type(dependencies) is _ModelList:
+            self._dependencies = dependencies
+        else:
+            self._dependencies = _ModelList(dependencies, self, '_dependencies')
 
     def clearDependencies(self):
-        self.dependencies.clear()
+        self._checkWritable()
+        self._dependencies = None
+
+    def hasDependencies(self):
+        return True if self._dependencies else False
 
     def getDependencies(self):
-        return self.dependencies
+        """Return the tasks this task depends on, in insertion order."""
+        dependencies = self._dependencies
+        if type(dependencies) is _ModelList or type(dependencies) is _SharedList:
+            return dependencies
+        if isinstance(dependencies, dict):
+            # Indexed, returned in a list, which updates the task when modified
+            if self._frozen or type(dependencies) is _SharedDict:
+                return _SharedList(dependencies)
+            return _ModelList(dependencies, self, '_dependencies')
+        return _get_container(self, '_dependencies', _EMPTY_LIST, self._frozen)
+
+    @property
+    def dependencies(self):
+        return self.getDependencies()
+
+    @dependencies.setter
+    def dependencies(self, dependencies):
+        self.clearDependencies()
+        for task in dependencies:
+            self.addDependency(task)
 
     def setDescription(self, description):
+        self._changed()
         self.description = description
 
     def getDescription(self):
         return self.description
 
     def setPreScript(self, pre_script):
+        self._changed()
         self.pre_script = pre_script
 
     def getPreScript(self):
@@ -207,6 +599,7 @@ class ProactiveTask(object):
         return True if self.pre_script is not None else False
 
     def setPostScript(self, post_script):
+        self._changed()
         self.post_script = post_script
 
     def getPostScript(self):
@@ -216,6 +609,7 @@ class ProactiveTask(object):
         return True if self.post_script is not None else False
 
     def setFlowScript(self, flow_script):
+        self._changed()
         self.flow_script = flow_script
 
     def getFlowScript(self):
@@ -225,6 +619,7 @@ class ProactiveTask(object):
         return True if self.flow_script is not None else False
 
     def setFlowBlock(self, flow_block):
+        self._changed()
         self.flow_block = flow_block
 
     def getFlowBlock(self):
@@ -234,6 +629,7 @@ class ProactiveTask(object):
         return True if self.flow_block is not None else False
         
     def setTaskErrorPolicy(self, task_error_policy):
+        self._changed()
         self.task_error_policy = task_error_policy
 
     def getTaskErrorPolicy(self):
@@ -321,6 +717,8 @@ class ProactivePythonTask(ProactiveTask):
     Represents a proactive python task
     """
 
+    __slots__ = ()
+
     def __init__(self, task_name='', default_python='python3'):
         """
         Initializes a ProactivePythonTask instance.
@@ -339,8 +737,15 @@ class ProactivePythonTask(ProactiveTask):
         Parameters:
         - default_python (str): The Python interpreter to use (default is 'python3').
         """
+        self._changed()
         self.default_python = default_python
-        self.addGenericInformation("PYTHON_COMMAND", default_python)
+        if self._generic_information is None:
+            shared = _PYTHON_COMMAND_INFORMATION.get(default_python)
+            if shared is None:
+                shared = _PYTHON_COMMAND_INFORMATION.setdefault(default_python, _ReadOnlyDict(PYTHON_COMMAND=default_python))
+            self._generic_information = shared
+        else:
+            self.addGenericInformation("PYTHON_COMMAND", default_python)
 
     def setVirtualEnv(self, requirements=[], basepath="./", name="venv", verbosity=False, overwrite=False, install_requirements_if_exists=False):
         """
@@ -0,0 +1,101 @@
+from .ProactiveRecord import *
+
+
+class ProactiveTaskInfo(ProactiveRecord):
+    """
+    Represents a read-only snapshot of the state of a scheduler task
+
+    task_id (string)
+    task_name (string)
+    job_id (string)
+    status (string): e.g. 'RUNNING', 'FINISHED'
+    start_time, finished_time (int): Epoch milliseconds, negative when not reached
+    execution_duration (int): Milliseconds
+    execution_host_name (string)
+    executions_left, executions_on_failure_left (int)
+    progress (int): Percentage
+    """
+
+    __slots__ = ()
+
+    FIELDS = (
+        'task_id', 'task_name', 'job_id', 'status', 'start_time', 'finished_time', 'execution_duration',
+        'execution_host_name', 'executions_left', 'executions_on_failure_left', 'progress',
+    )
+
+    @classmethod
+    def from_json(cls, data):
+        task_info = data['taskInfo']
+        task_id = task_info['taskId']
+        job_id = task_info.get('jobId') or task_id.get('jobId') or {}
+        return cls(
+            str(task_id['id']),
+            data.get('name') or task_id.get('readableName'),
+            None if job_id.get('id') is None else str(job_id['id']),
+            task_info.get('status') or task_info.get('taskStatus'),
+            task_info.get('startTime'),
+            task_info.get('finishedTime'),
+            task_info.get('executionDuration'),
+            task_info.get('executionHostName'),
+            task_info.get('numberOfExecutionLeft'),
+            task_info.get('numberOfExecutionOnFailureLeft'),
+            task_info.get('progress'),
+        )
+
+    @classmethod
+    def from_java(cls, task_state):
+        """Build a record from a Java org.ow2.proactive.scheduler.common.task.TaskState."""
+        task_info = task_state.getTaskInfo()
+        task_id = task_info.getTaskId()
+        return cls(
+            task_id.value(),
+            task_state.getName(),
+            task_info.getJobId().value(),
+            task_info.getStatus().name(),
+            task_info.getStartTime(),
+            task_info.getFinishedTime(),
+            task_info.getExecutionDuration(),
+            task_info.getExecutionHostName(),
+            task_info.getNumberOfExecutionLeft(),
+            task_info.getNumberOfExecutionOnFailureLeft(),
+            task_info.getProgress(),
+        )
+
+    def __repr__(self):
+        return "ProactiveTaskInfo(task_id={}, task_name={!r}, status={})".format(self.task_id, self.task_name, self.status)
+
+    def getTaskId(self):
+        return self.task_id
+
+    def getTaskName(self):
+        return self.task_name
+
+    def getJobId(self):
+        return self.job_id
+
+    def getStatus(self):
+        return self.status
+
+    def getStartTime(self):
+        return self.start_time
+
+    def getFinishedTime(self):
+        return self.finished_time
+
+    def getExecutionDuration(self):
+        return self.execution_duration
+
+    def getExecutionHostName(self):
+        return self.execution_host_name
+
+    def getNumberOfExecutionLeft(self):
+        return self.executions_left
+
+    def getNumberOfExecutionOnFailureLeft(self):
+        return self.executions_on_failure_left
+
+    def getProgress(self):
+        return self.progress
+
+    def isFinished(self):
+        return self.status in ('FINISHED', 'FAULTY', 'FAILED', 'ABORTED', 'SKIPPED', 'NOT_STARTED', 'NOT_RESTARTED')
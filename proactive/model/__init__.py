@@ -5,3 +5,7 @@ from .ProactiveSelectionScript import *
 from .ProactiveScriptLanguage import *
 from .ProactiveTask import *
 from .ProactiveJob import *
+from .ProactiveRecord import *
+from .ProactiveJobInfo import *
+from .ProactiveTaskInfo import *
+from .ProactiveSweepRow import *
@@ -14,7 +14,6 @@ Usage:
 import humanize
 import argparse
 import requests
-import time
 from datetime import datetime
 from proactive import getProActiveGateway
 from proactive.monitoring.ProactiveNodeMBeanClient import MBeanObjectNames
@@ -161,9 +160,11 @@ class ProActiveNodeMetricsMonitor:
             if metrics['system_cpu'] > self.thresholds['cpu_high']:
                 alerts.append(f"HIGH CPU USAGE: {self.format_percentage(metrics['system_cpu'])}")
             
-            memory_used_ratio = metrics['heap_used'] / metrics['heap_max']
-            if memory_used_ratio > self.thresholds['memory_high']:
-                alerts.append(f"HIGH MEMORY USAGE: {self.format_percentage(memory_used_ratio)}")
+            # heap_max is -1 when the JVM heap has no maximum
+            if metrics['heap_max'] > 0:
+                memory_used_ratio = metrics['heap_used'] / metrics['heap_max']
+                if memory_used_ratio > self.thresholds['memory_high']:
+                    alerts.append(f"HIGH MEMORY USAGE: {self.format_percentage(memory_used_ratio)}")
             
             if metrics['threadcount'] > self.thresholds['thread_high']:
                 alerts.append(f"HIGH THREAD COUNT: {metrics['threadcount']}")
@@ -209,15 +210,21 @@ def main():
         monitor = ProActiveNodeMetricsMonitor(gateway, debug=args.debug)
         
         if args.continuous:
+            from proactive.monitoring.ProactiveMetricsSampler import ProactiveMetricsSampler
+
             print(f"\nStarting continuous monitoring (interval: {args.interval}s)")
             print("Press Ctrl+C to stop monitoring")
+            sampler = ProactiveMetricsSampler(gateway, node_urls=[monitor.node_url], interval=args.interval,
+                                              debug=args.debug)
+            sampler.subscribe(lambda timestamp, snapshots: [monitor.print_metrics(metrics) for metrics in snapshots.values()])
+            sampler.start()
             try:
-                while True:
-                    metrics = monitor.get_metrics_snapshot()
-                    monitor.print_metrics(metrics)
-                    time.sleep(args.interval)
+                while sampler.is_alive():
+                    sampler.join(1.0)
             except KeyboardInterrupt:
                 print("\nMonitoring stopped by user")
+            finally:
+                sampler.stop()
         else:
             metrics = monitor.get_metrics_snapshot()
             monitor.print_metrics(metrics)
@@ -0,0 +1,255 @@
+import logging
+import operator
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+logger = logging.getLogger('ProactiveMetricsAlerts')
+
+_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+_OPPOSITES = {'>': operator.le, '>=': operator.lt, '<': operator.ge, '<=': operator.gt}
+
+
+class AlertRule:
+    """
+    Represents a windowed threshold condition on a sampled field
+
+    name (string)
+    field (string): A field of the sampler ring buffer, e.g. 'system_cpu'
+    op (string): One of '>', '>=', '<', '<='
+    threshold (float): The value the field must cross to fire
+    duration (float): Seconds the condition must hold on every sample before firing
+        (0 fires on a single sample)
+    clear_threshold (float): The value the field must cross back to resolve. Defaults
+        to the threshold; set it below (resp. above) for hysteresis
+    """
+
+    def __init__(self, name, field, threshold, op='>', duration=0.0, clear_threshold=None):
+        if op not in _OPERATORS:
+            raise ValueError("op must be one of {}".format(", ".join(_OPERATORS)))
+        self.name = name
+        self.field = field
+        self.op = op
+        self.threshold = threshold
+        self.duration = duration
+        self.clear_threshold = threshold if clear_threshold is None else clear_threshold
+
+    def __repr__(self):
+        return "AlertRule({} {} {} for {}s)".format(self.field, self.op, self.threshold, self.duration)
+
+
+class Alert:
+    """
+    Represents an alert state transition of a rule on a node
+    """
+
+    __slots__ = ('rule', 'node', 'state', 'value', 'threshold', 'timestamp')
+
+    FIRING = 'firing'
+    RESOLVED = 'resolved'
+
+    def __init__(self, rule, node, state, value, threshold, timestamp):
+        self.rule = rule
+        self.node = node
+        self.state = state
+        self.value = value
+        self.threshold = threshold
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return "Alert({} {} on {}: {})".format(self.rule, self.state, self.node, self.value)
+
+    def to_dict(self):
+        return {
+            'rule': self.rule,
+            'node': self.node,
+            'state': self.state,
+            'value': None if self.value is None or np.isnan(self.value) else float(self.value),
+            'threshold': self.threshold,
+            'timestamp': self.timestamp,
+        }
+
+
+class CallbackAlertSink:
+    """Forwards every alert to a callback"""
+
+    def __init__(self, callback: Callable[[Alert], None]):
+        self.callback = callback
+
+    def send(self, alerts: List[Alert]):
+        for alert in alerts:
+            self.callback(alert)
+
+
+class WebhookAlertSink:
+    """Posts the alerts of an evaluation as one JSON list to a webhook URL"""
+
+    def __init__(self, url, headers=None, timeout=5.0, verify=True):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.verify = verify
+
+    def send(self, alerts: List[Alert]):
+        response = requests.post(self.url, json=[alert.to_dict() for alert in alerts],
+                                 headers=self.headers, timeout=self.timeout, verify=self.verify)
+        response.raise_for_status()
+
+
+class ProactiveAlertEvaluator:
+    """
+    Evaluates alert rules over a ProactiveMetricsRingBuffer.
+
+    Each rule is checked for all nodes at once on the (ticks, nodes) window of its
+    field. Alerts are deduplicated per rule and node: sinks only receive state
+    transitions (and reminders every ``repeat_interval`` seconds, if set).
+
+    Args:
+        buffer (ProactiveMetricsRingBuffer): The buffer holding the sampled values
+        rules (list[AlertRule]): The rules to evaluate
+        sinks (list, optional): Objects with a send(alerts) method, or callables
+            receiving each alert
+        repeat_interval (float, optional): Re-send firing alerts after this many seconds
+        interval (float, optional): Seconds between two ticks of the buffer, to check that
+            the buffer spans the rule durations. Known from the sampler when attached
+
+    Raises:
+        ValueError: If a rule duration is longer than the time spanned by the buffer,
+            as the rule could never fire
+    """
+
+    def __init__(self, buffer, rules: Sequence[AlertRule], sinks=None, repeat_interval=None, interval=None):
+        self.buffer = buffer
+        self.rules = list(rules)
+        if interval:
+            self._check_durations(interval)
+        self.sinks = [sink if hasattr(sink, 'send') else CallbackAlertSink(sink) for sink in (sinks or [])]
+        self.repeat_interval = repeat_interval
+        self._firing: Dict[str, np.ndarray] = {}
+        self._notified_at: Dict[str, np.ndarray] = {}
+        # The node of each buffer column at the last evaluation, to reset the states of the reused columns
+        self._columns: List[Optional[str]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_thresholds(cls, buffer, thresholds, duration=0.0, sinks=None, repeat_interval=None):
+        """
+        Build the rules equivalent to the ProActiveNodeMetricsMonitor thresholds
+        (cpu_high, memory_high, thread_high).
+        """
+        rules = []
+        if 'cpu_high' in thresholds:
+            rules.append(AlertRule('cpu_high', 'system_cpu', thresholds['cpu_high'], duration=duration))
+        if 'memory_high' in thresholds:
+            rules.append(AlertRule('memory_high', 'heap_usage', thresholds['memory_high'], duration=duration))
+        if 'thread_high' in thresholds:
+            rules.append(AlertRule('thread_high', 'threadcount', thresholds['thread_high'], duration=duration))
+        return cls(buffer, rules, sinks, repeat_interval)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink if hasattr(sink, 'send') else CallbackAlertSink(sink))
+
+    def _check_durations(self, interval):
+        # The oldest tick kept is (capacity - 1) intervals old: a longer window is never covered
+        span = (self.buffer.capacity - 1) * interval
+        for rule in self.rules:
+            if rule.duration > span:
+                raise ValueError("The duration of the rule {} ({}s) is longer than the {}s spanned by {} ticks "
+                                 "every {}s, it would never fire".format(rule.name, rule.duration, span,
+                                                                        self.buffer.capacity, interval))
+
+    def attach(self, sampler) -> int:
+        """Evaluate the rules after every tick of a ProactiveMetricsSampler."""
+        self._check_durations(sampler.interval)
+        return sampler.subscribe(lambda timestamp, snapshots: self.evaluate(timestamp))
+
+    def _state(self, states, rule, node_count, fill):
+        state = states.get(rule.name)
+        if state is None or state.size < node_count:
+            grown = np.full(node_count, fill, dtype=type(fill))
+            if state is not None:
+                grown[:state.size] = state
+            states[rule.name] = state = grown
+        return state
+
+    def _evaluate_rule(self, rule, nodes, now):
+        timestamps, values = self.buffer.field_window(rule.field)
+        values = values[:, :len(nodes)]
+        if rule.duration:
+            # Start from the last tick at or before the window start, so that the
+            # condition is known to hold over the whole duration
+            first = np.searchsorted(timestamps, now - rule.duration, side='right') - 1
+            covered = first >= 0
+            values = values[max(first, 0):]
+        else:
+            values = values[-1:]
+            covered = values.shape[0] > 0
+        if covered:
+            with np.errstate(invalid='ignore'):
+                held = _OPERATORS[rule.op](values, rule.threshold).all(axis=0)
+        else:
+            held = np.zeros(len(nodes), dtype=bool)
+        latest = values[-1] if values.shape[0] else np.full(len(nodes), np.nan)
+        with np.errstate(invalid='ignore'):
+            cleared = _OPPOSITES[rule.op](latest, rule.clear_threshold)
+
+        firing = self._state(self._firing, rule, len(nodes), False)
+        notified_at = self._state(self._notified_at, rule, len(nodes), np.nan)
+        next_firing = np.where(firing, ~cleared, held)
+
+        fired = next_firing & ~firing
+        resolved = firing & ~next_firing
+        reminded = np.zeros(len(nodes), dtype=bool)
+        if self.repeat_interval:
+            reminded = next_firing & firing & (now - notified_at >= self.repeat_interval)
+
+        alerts = []
+        for index in np.flatnonzero(fired | reminded):
+            alerts.append(Alert(rule.name, nodes[index], Alert.FIRING, latest[index], rule.threshold, now))
+        for index in np.flatnonzero(resolved):
+            alerts.append(Alert(rule.name, nodes[index], Alert.RESOLVED, latest[index], rule.clear_threshold, now))
+        notified_at[fired | reminded] = now
+        notified_at[resolved] = np.nan
+        firing[:] = next_firing
+        return alerts
+
+    def evaluate(self, now: Optional[float] = None) -> List[Alert]:
+        """
+        Evaluate every rule and send the resulting alerts to the sinks.
+
+        Returns:
+            list[Alert]: The alerts produced by this evaluation
+        """
+        if now is None:
+            now = time.time()
+        nodes = self.buffer.nodes
+        alerts = []
+        with self._lock:
+            self._reset_changed_columns(nodes)
+            for rule in self.rules:
+                alerts.extend(self._evaluate_rule(rule, nodes, now))
+        if alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alerts)
+                except Exception as e:
+                    logger.error(f"Failed to send {len(alerts)} alert(s) to {sink}: {e}")
+        return alerts
+
+    def _reset_changed_columns(self, nodes):
+        changed = [index for index, node in enumerate(self._columns[:len(nodes)]) if nodes[index] != node]
+        if changed:
+            for states, fill in ((self._firing, False), (self._notified_at, np.nan)):
+                for state in states.values():
+                    state[[index for index in changed if index < state.size]] = fill
+        self._columns = list(nodes)
+
+    def get_firing(self) -> Dict[str, List[str]]:
+        """Get the nodes currently firing, per rule name."""
+        nodes = self.buffer.nodes
+        with self._lock:
+            return {name: [nodes[index] for index in np.flatnonzero(state) if index < len(nodes) and nodes[index] is not None]
+                    for name, state in self._firing.items()}
@@ -0,0 +1,247 @@
+"""
+ProActive Metrics Sampler
+
+Samples the metrics of many ProActive nodes in the background at a fixed rate and
+keeps the last samples of every node in a bounded ring buffer.
+
+- Ticks are scheduled on a fixed grid, so request latency does not make the
+  sampling interval drift.
+- A node whose previous request is still running is not requested again, and the
+  interval is stretched (up to ``max_interval``) while the REST endpoint is slow.
+- Subscribers receive every tick, so alerting and dashboards consume the samples
+  without issuing requests of their own.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from .ProActiveNodeMetricsMonitor import ProActiveNodeMetricsMonitor
+from .ProactiveMetricsStore import ProactiveMetricsRingBuffer
+
+logger = logging.getLogger('ProactiveMetricsSampler')
+
+# Numeric fields kept in the ring buffer for every node
+SAMPLE_FIELDS = (
+    'system_cpu',
+    'process_cpu',
+    'load_avg',
+    'free_memory',
+    'total_memory',
+    'heap_used',
+    'heap_max',
+    'heap_usage',
+    'threadcount',
+    'peakthreadcount',
+    'totalstartedthreadcount',
+)
+
+
+class ProactiveMetricsSampler:
+    """
+    Background sampler of node metrics.
+
+    Args:
+        gateway: A connected ProActive gateway instance
+        node_urls (list, optional): JMX URLs of the nodes to sample. If None, every node
+            known by the resource manager is sampled and the list is refreshed every
+            ``discovery_interval`` seconds
+        interval (float, optional): Sampling interval in seconds. Defaults to 5.0
+        capacity (int, optional): Number of ticks kept per node. Defaults to 720
+        max_workers (int, optional): Maximum number of concurrent node requests. Defaults to 8
+        max_interval (float, optional): Upper bound of the stretched interval when the
+            endpoint is slow. Defaults to 4 times ``interval``
+        discovery_interval (float, optional): Node discovery period in seconds. Defaults to 60.0
+        debug (bool, optional): Show the debug output of the node requests. Defaults to False
+    """
+
+    def __init__(self, gateway, node_urls=None, interval=5.0, capacity=720, max_workers=8,
+                 max_interval=None, discovery_interval=60.0, debug=False):
+        if interval <= 0:
+            raise ValueError("interval must be strictly positive")
+        self.gateway = gateway
+        self.interval = float(interval)
+        self.max_interval = float(max_interval) if max_interval else 4 * self.interval
+        self.discovery_interval = discovery_interval
+        self.debug = debug
+        self.buffer = ProactiveMetricsRingBuffer(SAMPLE_FIELDS, capacity)
+        self._static_node_urls = list(node_urls) if node_urls is not None else None
+        self._monitors: Dict[str, ProActiveNodeMetricsMonitor] = {}
+        self._latest_snapshots: Dict[str, dict] = {}
+        self._in_flight = {}
+        self._subscribers: Dict[int, Callable] = {}
+        self._subscriber_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='metrics-sampler')
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_discovery = None
+        self.current_interval = self.interval
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.skipped_requests = 0
+        self.failed_requests = 0
+
+    def subscribe(self, callback: Callable[[float, Dict[str, dict]], None]) -> int:
+        """
+        Register a callback called after every tick, on the sampler thread, with the
+        tick timestamp and a dict mapping each sampled node URL to its metrics snapshot.
+
+        Returns:
+            int: A subscription id to pass to unsubscribe()
+        """
+        with self._lock:
+            subscription_id = next(self._subscriber_ids)
+            self._subscribers[subscription_id] = callback
+            return subscription_id
+
+    def unsubscribe(self, subscription_id: int):
+        with self._lock:
+            self._subscribers.pop(subscription_id, None)
+
+    def get_node_urls(self) -> List[str]:
+        with self._lock:
+            return list(self._monitors)
+
+    def get_latest_snapshot(self, node_url: str) -> Optional[dict]:
+        """Get the last metrics snapshot received from a node, if any."""
+        with self._lock:
+            return self._latest_snapshots.get(node_url)
+
+    def get_latest_snapshots(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._latest_snapshots)
+
+    def start(self):
+        """Start sampling on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ProactiveMetricsSampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stop sampling, and wait for the sampler thread and the node requests in flight to finish.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds, without limit if None.
+                The requests still running after it are left to finish in the background
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        in_flight = list(self._in_flight.values())
+        if in_flight:
+            _, not_done = wait(in_flight, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if not_done:
+                logger.warning(f"{len(not_done)} node request(s) still running after the sampler stopped")
+                self._executor.shutdown(wait=False)
+                return
+        self._executor.shutdown(wait=True)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _discover_nodes(self):
+        if self._static_node_urls is not None:
+            node_urls = self._static_node_urls
+        else:
+            nodes = self.gateway.getProactiveMonitoringClient().list_proactive_jmx_urls()
+            node_urls = [node["proactiveJMXUrl"] for node in nodes]
+        with self._lock:
+            for node_url in node_urls:
+                if node_url not in self._monitors:
+                    self._monitors[node_url] = self._create_monitor(node_url)
+            removed = [node_url for node_url in self._monitors if node_url not in set(node_urls)]
+            for node_url in removed:
+                del self._monitors[node_url]
+                self._latest_snapshots.pop(node_url, None)
+        # The columns of the removed nodes are reused, so the buffer does not grow with node churn
+        self.buffer.remove_nodes(removed)
+        self.buffer.add_nodes(node_urls)
+        self._last_discovery = time.monotonic()
+
+    def _create_monitor(self, node_url):
+        return ProActiveNodeMetricsMonitor(self.gateway, node_url=node_url, debug=self.debug)
+
+    @staticmethod
+    def _to_sample(snapshot):
+        sample = {field: snapshot.get(field) for field in SAMPLE_FIELDS}
+        heap_max = snapshot.get('heap_max')
+        heap_used = snapshot.get('heap_used')
+        if heap_used is not None and heap_max is not None and heap_max > 0:
+            sample['heap_usage'] = heap_used / heap_max
+        return sample
+
+    def _sample(self, deadline):
+        """Run one tick: request idle nodes and collect what completes before the deadline."""
+        with self._lock:
+            monitors = dict(self._monitors)
+        for node_url, monitor in monitors.items():
+            if node_url in self._in_flight:
+                self.skipped_requests += 1
+            else:
+                self._in_flight[node_url] = self._executor.submit(monitor.get_metrics_snapshot)
+        wait(list(self._in_flight.values()), timeout=max(0.0, deadline - time.monotonic()))
+
+        snapshots = {}
+        for node_url, future in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            del self._in_flight[node_url]
+            if node_url not in monitors:
+                continue
+            try:
+                snapshots[node_url] = future.result()
+            except Exception as e:
+                self.failed_requests += 1
+                logger.warning(f"Failed to sample {node_url}: {e}")
+        return snapshots, len(self._in_flight)
+
+    def _publish(self, timestamp, snapshots):
+        self.buffer.append(timestamp, {node_url: self._to_sample(snapshot) for node_url, snapshot in snapshots.items()})
+        with self._lock:
+            self._latest_snapshots.update(snapshots)
+            subscribers = list(self._subscribers.values())
+        for callback in subscribers:
+            try:
+                callback(timestamp, snapshots)
+            except Exception:
+                logger.exception("Metrics subscriber failed")
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                if self._last_discovery is None or (
+                        self.discovery_interval and time.monotonic() - self._last_discovery >= self.discovery_interval):
+                    self._discover_nodes()
+                timestamp = time.time()
+                snapshots, still_running = self._sample(next_tick + self.current_interval)
+                self._publish(timestamp, snapshots)
+                self.ticks += 1
+                # Backpressure: stretch the interval while requests outlive a tick
+                if still_running:
+                    self.current_interval = min(self.current_interval * 2, self.max_interval)
+                else:
+                    self.current_interval = self.interval
+            except Exception:
+                logger.exception("Metrics sampling tick failed")
+            # Fixed-rate schedule: the next tick does not depend on this tick's duration
+            next_tick += self.current_interval
+            now = time.monotonic()
+            if now > next_tick:
+                missed = int((now - next_tick) // self.current_interval) + 1
+                self.missed_ticks += missed
+                next_tick += missed * self.current_interval
+            self._stop_event.wait(next_tick - now)
@@ -0,0 +1,424 @@
+import logging
+import threading
+import json
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger('ProactiveMetricsStore')
+
+
+class ProactiveMetricsSeries:
+    """
+    Append-only time series backed by growable NumPy arrays.
+
+    Timestamps are epoch seconds (float64) and are kept strictly increasing, so
+    range lookups are binary searches and aggregations run on array views.
+    """
+
+    __slots__ = ('_timestamps', '_values', '_size')
+
+    def __init__(self, initial_capacity: int = 1024):
+        capacity = max(1, int(initial_capacity))
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:self._size]
+
+    def last_timestamp(self) -> Optional[float]:
+        return float(self._timestamps[self._size - 1]) if self._size else None
+
+    def _reserve(self, extra: int):
+        required = self._size + extra
+        capacity = len(self._timestamps)
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        timestamps = np.empty(capacity, dtype=np.float64)
+        values = np.empty(capacity, dtype=np.float64)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        values[:self._size] = self._values[:self._size]
+        self._timestamps = timestamps
+        self._values = values
+
+    def append(self, timestamps, values) -> int:
+        """
+        Append samples, ignoring those that are not newer than the last stored one.
+
+        :return: The number of samples actually appended
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64).ravel()
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if timestamps.shape != values.shape:
+            raise ValueError("timestamps and values must have the same length")
+        if timestamps.size == 0:
+            return 0
+        if timestamps.size > 1 and np.any(np.diff(timestamps) <= 0):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+            keep = np.concatenate(([True], np.diff(timestamps) > 0))
+            timestamps, values = timestamps[keep], values[keep]
+        last = self.last_timestamp()
+        if last is not None:
+            first_new = np.searchsorted(timestamps, last, side='right')
+            timestamps, values = timestamps[first_new:], values[first_new:]
+        count = timestamps.size
+        if count:
+            self._reserve(count)
+            self._timestamps[self._size:self._size + count] = timestamps
+            self._values[self._size:self._size + count] = values
+            self._size += count
+        return count
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the (timestamps, values) views within [start, end]."""
+        timestamps = self.timestamps
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        hi = self._size if end is None else np.searchsorted(timestamps, end, side='right')
+        return timestamps[lo:hi], self._values[lo:hi]
+
+    def prune(self, before: float) -> int:
+        """Drop the samples older than the given timestamp."""
+        cut = int(np.searchsorted(self.timestamps, before, side='left'))
+        if cut:
+            remaining = self._size - cut
+            self._timestamps[:remaining] = self._timestamps[cut:self._size]
+            self._values[:remaining] = self._values[cut:self._size]
+            self._size = remaining
+        return cut
+
+
+class ProactiveMetricsStore:
+    """
+    In-memory store of node metric histories, keyed by node and metric name.
+
+    Each (node, metric) pair owns a ProactiveMetricsSeries. Appends are incremental,
+    aggregations (mean, percentiles, rolling windows, downsampling) are vectorized,
+    and the whole store can be persisted to a compressed ``.npz`` file.
+    """
+
+    _AGGREGATIONS = ('mean', 'min', 'max', 'sum', 'count', 'last')
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._initial_capacity = initial_capacity
+        self._series: Dict[Tuple[str, str], ProactiveMetricsSeries] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, key):
+        return key in self._series
+
+    def keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._series.keys())
+
+    def nodes(self) -> List[str]:
+        with self._lock:
+            return sorted({node for node, _ in self._series})
+
+    def metrics(self, node: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return sorted({metric for n, metric in self._series if node is None or n == node})
+
+    def _get_series(self, node: str, metric: str, create: bool = False) -> Optional[ProactiveMetricsSeries]:
+        series = self._series.get((node, metric))
+        if series is None and create:
+            series = ProactiveMetricsSeries(self._initial_capacity)
+            self._series[(node, metric)] = series
+        return series
+
+    def append(self, node: str, metric: str, timestamps, values) -> int:
+        """
+        Append samples to the (node, metric) series.
+
+        Samples not newer than the last stored timestamp are skipped, so overlapping
+        inputs (e.g. repeated history queries) can be appended as-is.
+
+        :return: The number of samples actually appended
+        """
+        with self._lock:
+            return self._get_series(node, metric, create=True).append(timestamps, values)
+
+    def ingest_history(self, node: str, metric: str, values, time_range_seconds: float, end_time: Optional[float] = None) -> int:
+        """
+        Append a history returned by ``/rm/node/mbeans/history``.
+
+        The endpoint returns evenly spaced values covering ``time_range_seconds`` and
+        ending now, without timestamps; they are reconstructed here.
+
+        :param values: The historical values, oldest first
+        :param time_range_seconds: The duration covered by the values
+        :param end_time: The timestamp of the last value. Defaults to now
+        :return: The number of samples actually appended
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return 0
+        if end_time is None:
+            end_time = time.time()
+        step = float(time_range_seconds) / values.size
+        timestamps = end_time - step * np.arange(values.size - 1, -1, -1, dtype=np.float64)
+        return self.append(node, metric, timestamps, values)
+
+    def last_timestamp(self, node: str, metric: str) -> Optional[float]:
+        with self._lock:
+            series = self._get_series(node, metric)
+            return series.last_timestamp() if series is not None else None
+
+    def series(self, node: str, metric: str, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a copy of the samples of a series within [start, end].
+
+        :return: A (timestamps, values) tuple of NumPy arrays
+        """
+        with self._lock:
+            series = self._get_series(node, metric)
+            if series is None:
+                return np.empty(0), np.empty(0)
+            timestamps, values = series.slice(start, end)
+            return timestamps.copy(), values.copy()
+
+    def mean(self, node: str, metric: str, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """Mean of the series over [start, end], ignoring NaN samples (NaN if empty)."""
+        _, values = self.series(node, metric, start, end)
+        finite = values[np.isfinite(values)]
+        return float(finite.mean()) if finite.size else float('nan')
+
+    def percentile(self, node: str, metric: str, q: Union[float, Sequence[float]], start: Optional[float] = None, end: Optional[float] = None):
+        """Percentile(s) in [0, 100] of the series over [start, end], ignoring NaN samples."""
+        _, values = self.series(node, metric, start, end)
+        finite = values[np.isfinite(values)]
+        if not finite.size:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float('nan')
+        result = np.percentile(finite, q)
+        return result if np.ndim(q) else float(result)
+
+    def rolling_mean(self, node: str, metric: str, window: float, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Time-based rolling mean: each output value is the mean of the samples within
+        the preceding ``window`` seconds (inclusive of the current one).
+
+        :return: A (timestamps, rolling means) tuple of NumPy arrays
+        """
+        timestamps, values = self.series(node, metric, start, end)
+        if not timestamps.size:
+            return timestamps, values
+        finite = np.isfinite(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(finite, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(finite)))
+        first = np.searchsorted(timestamps, timestamps - window, side='right')
+        last = np.arange(1, timestamps.size + 1)
+        window_counts = counts[last] - counts[first]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (sums[last] - sums[first]) / window_counts
+        means[window_counts == 0] = np.nan
+        return timestamps, means
+
+    def downsample(self, node: str, metric: str, interval: float, agg: str = 'mean', start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aggregate the series into fixed-width time buckets.
+
+        :param interval: Bucket width in seconds
+        :param agg: One of 'mean', 'min', 'max', 'sum', 'count' or 'last'
+        :return: A (bucket start timestamps, aggregated values) tuple of NumPy arrays
+        """
+        if agg not in self._AGGREGATIONS:
+            raise ValueError("agg must be one of {}".format(", ".join(self._AGGREGATIONS)))
+        if interval <= 0:
+            raise ValueError("interval must be strictly positive")
+        timestamps, values = self.series(node, metric, start, end)
+        finite = np.isfinite(values)
+        timestamps, values = timestamps[finite], values[finite]
+        if not timestamps.size:
+            return timestamps, values
+        buckets = np.floor(timestamps / interval).astype(np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(buckets) != 0)))
+        bucket_timestamps = buckets[starts].astype(np.float64) * interval
+        if agg == 'mean':
+            result = np.add.reduceat(values, starts) / np.diff(np.append(starts, values.size))
+        elif agg == 'sum':
+            result = np.add.reduceat(values, starts)
+        elif agg == 'min':
+            result = np.minimum.reduceat(values, starts)
+        elif agg == 'max':
+            result = np.maximum.reduceat(values, starts)
+        elif agg == 'count':
+            result = np.diff(np.append(starts, values.size)).astype(np.float64)
+        else:
+            result = values[np.append(starts[1:], values.size) - 1]
+        return bucket_timestamps, result
+
+    def prune(self, before: float) -> int:
+        """
+        Drop every sample older than the given timestamp.
+
+        :return: The number of dropped samples
+        """
+        with self._lock:
+            return sum(series.prune(before) for series in self._series.values())
+
+    def save(self, path: str):
+        """Persist the store to a compressed NumPy ``.npz`` file."""
+        with self._lock:
+            keys = list(self._series.keys())
+            arrays = {'keys': np.array(json.dumps(keys))}
+            for index, key in enumerate(keys):
+                series = self._series[key]
+                arrays['t{}'.format(index)] = series.timestamps
+                arrays['v{}'.format(index)] = series.values
+        np.savez_compressed(path, **arrays)
+        logger.debug(f"Saved {len(keys)} metric series to {path}")
+
+    @classmethod
+    def load(cls, path: str, initial_capacity: int = 1024) -> 'ProactiveMetricsStore':
+        """Load a store previously persisted with save()."""
+        store = cls(initial_capacity)
+        with np.load(path, allow_pickle=False) as data:
+            keys = json.loads(str(data['keys']))
+            for index, (node, metric) in enumerate(keys):
+                store.append(node, metric, data['t{}'.format(index)], data['v{}'.format(index)])
+        logger.debug(f"Loaded {len(keys)} metric series from {path}")
+        return store
+
+
+class ProactiveMetricsRingBuffer:
+    """
+    Fixed-size buffer of the last ``capacity`` sampling ticks for many nodes.
+
+    Samples live in a single (capacity, nodes, fields) float64 array sharing one
+    timestamp per tick, so memory is bounded and cross-node checks are vectorized.
+    Missing samples are NaN.
+
+    The node axis holds one column per registered node. The column of a removed node
+    is cleared and reused by the next added node, so the buffer stays bounded by the
+    largest number of nodes registered at once, whatever the node churn.
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int = 720):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.fields = tuple(fields)
+        self.capacity = int(capacity)
+        self._field_index = {field: index for index, field in enumerate(self.fields)}
+        self._node_index: Dict[str, int] = {}
+        self._columns: List[Optional[str]] = []
+        self._free_columns: List[int] = []
+        self._timestamps = np.full(self.capacity, np.nan)
+        self._values = np.full((self.capacity, 0, len(self.fields)), np.nan)
+        self._count = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def nodes(self) -> List[Optional[str]]:
+        """The node of each column of the node axis, None for the free columns."""
+        with self._lock:
+            return list(self._columns)
+
+    def field_index(self, field: str) -> int:
+        return self._field_index[field]
+
+    def add_nodes(self, nodes: Sequence[str]):
+        """Register nodes, in the free columns first, then growing the node dimension of the buffer."""
+        with self._lock:
+            new_nodes = [node for node in dict.fromkeys(nodes) if node not in self._node_index]
+            if not new_nodes:
+                return
+            self._free_columns.sort(reverse=True)
+            grown = 0
+            for node in new_nodes:
+                if self._free_columns:
+                    column = self._free_columns.pop()
+                    self._columns[column] = node
+                else:
+                    column = len(self._columns)
+                    self._columns.append(node)
+                    grown += 1
+                self._node_index[node] = column
+            if grown:
+                padding = np.full((self.capacity, grown, len(self.fields)), np.nan)
+                self._values = np.concatenate((self._values, padding), axis=1)
+
+    def remove_nodes(self, nodes: Sequence[str]):
+        """Unregister nodes: their samples are dropped and their columns freed for the next nodes."""
+        with self._lock:
+            for node in dict.fromkeys(nodes):
+                column = self._node_index.pop(node, None)
+                if column is None:
+                    continue
+                self._values[:, column] = np.nan
+                self._columns[column] = None
+                self._free_columns.append(column)
+
+    def append(self, timestamp: float, samples: Dict[str, Dict[str, float]]):
+        """
+        Write one tick. Nodes absent from ``samples`` and fields absent from a node
+        sample are recorded as NaN.
+        """
+        with self._lock:
+            self.add_nodes(list(samples))
+            row = self._count % self.capacity
+            self._timestamps[row] = timestamp
+            self._values[row] = np.nan
+            for node, sample in samples.items():
+                node_row = self._values[row, self._node_index[node]]
+                for field, index in self._field_index.items():
+                    value = sample.get(field)
+                    if value is not None:
+                        node_row[index] = value
+            self._count += 1
+
+    def _chronological_rows(self) -> np.ndarray:
+        size = len(self)
+        start = self._count - size
+        return np.arange(start, self._count) % self.capacity
+
+    def window(self, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the ticks newer than or equal to ``since`` (all ticks if None), oldest first.
+
+        :return: A (timestamps, values) tuple where values has shape (ticks, nodes, fields)
+        """
+        with self._lock:
+            rows = self._chronological_rows()
+            timestamps = self._timestamps[rows]
+            if since is not None:
+                rows = rows[timestamps >= since]
+                timestamps = self._timestamps[rows]
+            return timestamps, self._values[rows]
+
+    def field_window(self, field: str, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Same as window() for a single field: values has shape (ticks, nodes)."""
+        timestamps, values = self.window(since)
+        return timestamps, values[:, :, self._field_index[field]]
+
+    def node_series(self, node: str, field: str, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the (timestamps, values) history of a node field, oldest first."""
+        with self._lock:
+            node_index = self._node_index[node]
+        timestamps, values = self.field_window(field, since)
+        return timestamps, values[:, node_index]
+
+    def latest(self, node: str) -> Dict[str, float]:
+        """Get the fields recorded for a node at the last tick (empty if none)."""
+        with self._lock:
+            if not self._count or node not in self._node_index:
+                return {}
+            row = self._values[(self._count - 1) % self.capacity, self._node_index[node]]
+            return {field: float(row[index]) for field, index in self._field_index.items() if not np.isnan(row[index])}
@@ -1,6 +1,8 @@
 import requests
 import logging
 import json
+import time
+import numpy as np
 from typing import List, Dict, Any, Optional, Union
 from enum import Enum
 
@@ -34,6 +36,25 @@ class TimeRange(Enum):
     MONTH_1 = 'M'    # 1 month
     YEAR_1 = 'y'     # 1 year
 
+    @property
+    def seconds(self) -> int:
+        """Duration covered by this time range, in seconds"""
+        return _TIME_RANGE_SECONDS[self.value]
+
+    @classmethod
+    def covering(cls, seconds: float) -> 'TimeRange':
+        """Smallest time range covering the given duration (YEAR_1 at most)"""
+        for time_range in cls:
+            if time_range.seconds >= seconds:
+                return time_range
+        return cls.YEAR_1
+
+_TIME_RANGE_SECONDS = {
+    'a': 60, 'n': 300, 'm': 600, 't': 1800,
+    'h': 3600, 'j': 7200, 'k': 14400, 'H': 28800,
+    'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000,
+}
+
 class JMXProtocol(Enum):
     """Supported JMX connection protocols"""
     RMI = "rmi"  # For direct RMI connections
@@ -65,15 +86,16 @@ class MemoryMetric(Enum):
 class ProactiveNodeMBeanClient:
     """Client for accessing node monitoring information through JMX MBeans."""
 
-    def __init__(self, gateway, node_url: str = "service:jmx:ro:///jndi/pamr://4097/rmnode"):
+    def __init__(self, gateway, node_url: str = "service:jmx:ro:///jndi/pamr://4097/rmnode", topology_cache=None):
         """Initialize the Node MBean client."""
         self.gateway = gateway
         self.node_url = node_url
+        self.topology_cache = topology_cache
         self._base_url = f"{gateway.getBaseURL()}/rest"
 
-    def _make_request(self, endpoint: str, params: Optional[dict] = None) -> dict:
+    def _make_request(self, endpoint: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> dict:
         """Make authenticated request to ProActive REST API."""
-        headers = {"sessionid": self.gateway.getSession()}
+        headers = {"sessionid": self.gateway.getSession(), **(headers or {})}
         url = f"{self._base_url}{endpoint}"
         
         logger.debug(f"Making request to {url} with params {params}")
@@ -103,18 +125,22 @@ class ProactiveNodeMBeanClient:
             
         return self._make_request(endpoint, params)
 
-    def _parse_historical_data(self, response: dict, mbean_name: str, key_format: str) -> List[float]:
-        """Parse historical data from response."""
+    def _parse_historical_array(self, response: dict, mbean_name: str, key_format: str) -> np.ndarray:
+        """Parse historical data from response into a float array."""
         try:
             if mbean_name in response:
                 data = json.loads(response[mbean_name])
                 if key_format in data:
-                    return [float(value) for value in data[key_format]]
+                    return np.asarray(data[key_format], dtype=np.float64)
         except json.JSONDecodeError:
             logger.error(f"Failed to parse historical data for {mbean_name}")
         except Exception as e:
             logger.error(f"Error parsing historical data: {e}")
-        return []
+        return np.empty(0)
+
+    def _parse_historical_data(self, response: dict, mbean_name: str, key_format: str) -> List[float]:
+        """Parse historical data from response."""
+        return self._parse_historical_array(response, mbean_name, key_format).tolist()
 
     def get_cpu_metrics(self, 
                        metric: CPUMetric = CPUMetric.COMBINED,
@@ -186,38 +212,89 @@ class ProactiveNodeMBeanClient:
             logger.error(f"Error getting memory metric {metric.value}: {e}")
             return [] if historical else 0.0
     
-    def list_proactive_jmx_urls(self) -> List[Dict[str, str]]:
+    def collect_history(self,
+                        store,
+                        cpu_metrics: List[CPUMetric] = (CPUMetric.COMBINED,),
+                        memory_metrics: List[MemoryMetric] = (MemoryMetric.USED_PERCENT,),
+                        max_range: TimeRange = TimeRange.MONTH_1) -> int:
+        """
+        Append the node history to a ProactiveMetricsStore, fetching only what is missing.
+
+        For each metric, the smallest time range covering the samples newer than the last
+        stored one is requested (``max_range`` for a metric not yet stored), and the
+        overlap with already stored samples is dropped on append.
+
+        Series are keyed by this client's node URL and by the history data source name
+        (e.g. ``CombinedCpuUsage``, ``UsedPercentMem``). CPU values are stored as
+        percentages, like get_cpu_metrics returns them.
+
+        Returns:
+            int: The number of samples appended to the store.
+        """
+        requests_spec = [
+            (MBeanObjectNames.CPU_USAGE, metric.value, f"{metric.value}CpuUsage", 100.0) for metric in cpu_metrics
+        ] + [
+            (MBeanObjectNames.MEMORY_USAGE, metric.value, f"{metric.value}Mem", 1.0) for metric in memory_metrics
+        ]
+        appended = 0
+        for mbean_name, attribute, key, scale in requests_spec:
+            last = store.last_timestamp(self.node_url, key)
+            now = time.time()
+            span = max_range.seconds if last is None else min(now - last, max_range.seconds)
+            time_range = TimeRange.covering(span)
+            try:
+                response = self._get_metrics(
+                    metrics=[mbean_name],
+                    attributes=[attribute],
+                    historical=True,
+                    time_range=time_range
+                )
+            except Exception as e:
+                logger.error(f"Error collecting history of {key} on {self.node_url}: {e}")
+                continue
+            values = self._parse_historical_array(response, mbean_name, key) * scale
+            appended += store.ingest_history(self.node_url, key, values, time_range.seconds, end_time=now)
+        logger.debug(f"Appended {appended} historical samples of {self.node_url} to the metrics store")
+        return appended
+
+    def get_rm_state_delta(self, client_counter: int = -1) -> dict:
+        """
+        Get the resource manager events newer than a client counter.
+
+        This method calls the REST API endpoint {{PROACTIVE_URL}}/rest/rm/monitoring
+        with the clientCounter header. A counter of -1 returns the whole state.
+
+        Returns:
+            dict: The RM state delta, with nodesEvents, nodeSource and latestCounter
+        """
+        return self._make_request("/rm/monitoring", headers={"clientCounter": str(client_counter)})
+
+    def list_proactive_jmx_urls(self, refresh: bool = False) -> List[Dict[str, str]]:
         """
         List all available ProActive JMX URLs along with nodeSource and hostName.
         
         This method fetches all the JMX URLs of nodes from the REST API endpoint:
         {{PROACTIVE_URL}}/rest/rm/monitoring
+
+        When the client has a topology cache, the nodes are served from it and only
+        refreshed once its TTL has expired (or if refresh is True).
         
         Returns:
             List[Dict[str, str]]: A list of dictionaries with unique proactiveJMXUrl, nodeSource, and hostName.
         """
         try:
-            endpoint = "/rm/monitoring"
-            response = self._make_request(endpoint)
+            if self.topology_cache is not None:
+                return self.topology_cache.list_proactive_jmx_urls(refresh)
+
+            response = self.get_rm_state_delta()
             
             # Extract proactiveJMXUrl, nodeSource, and hostName from the response
-            nodes_info = [
-                {
-                    "proactiveJMXUrl": node.get("proactiveJMXUrl"),
-                    "nodeSource": node.get("nodeSource"),
-                    "hostName": node.get("hostName"),
-                }
+            unique_nodes_info = {
+                (node["proactiveJMXUrl"], node["nodeSource"], node["hostName"]): None
                 for node in response.get("nodesEvents", [])
                 if "proactiveJMXUrl" in node and "nodeSource" in node and "hostName" in node
-            ]
-            
-            # Remove duplicates by creating a set of tuples and converting back to a list of dicts
-            unique_nodes_info = list({
-                (info["proactiveJMXUrl"], info["nodeSource"], info["hostName"])
-                for info in nodes_info
-            })
+            }
             
-            # Convert the set of tuples back to a list of dictionaries
             result = [
                 {
                     "proactiveJMXUrl": item[0],
@@ -0,0 +1,184 @@
+"""
+ProActive Topology Cache
+
+Keeps the resource manager topology in memory so that node and node source lookups
+do not refetch the whole /rm/monitoring event list on every call.
+
+- Lookups within ``ttl`` seconds of the last refresh are served from memory.
+- After the TTL, only the node events newer than the last known RM event counter
+  are requested (``clientCounter`` header) and applied to the cached nodes.
+- A full refresh happens on first use, after invalidate(), when the server counter
+  goes backwards (server restart) and every ``full_refresh_interval`` seconds.
+- The /rm/model endpoints (hosts, node sources, tokens) are memoized with the same TTL.
+- Empty results (no node, empty model, or a failed model request, which returns an
+  empty list) are only kept ``negative_ttl`` seconds, and exceptions are not cached.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('ProactiveTopologyCache')
+
+NODE_REMOVED = "NODE_REMOVED"
+
+
+class ProactiveTopologyCache:
+    """
+    TTL cache of the resource manager topology.
+
+    Args:
+        monitoring_client (ProactiveNodeMBeanClient): The client used to query /rm/monitoring
+        rest_api (ProactiveRestApi, optional): The client used to query the /rm/model endpoints
+        ttl (float, optional): Seconds during which lookups are served without any request.
+            Defaults to 30.0
+        full_refresh_interval (float, optional): Seconds after which the incremental refresh
+            is replaced by a full one. Defaults to 600.0
+        negative_ttl (float, optional): Seconds during which empty results are served
+            without any request. Defaults to 5.0
+    """
+
+    def __init__(self, monitoring_client, rest_api=None, ttl=30.0, full_refresh_interval=600.0, negative_ttl=5.0):
+        self.monitoring_client = monitoring_client
+        self.rest_api = rest_api
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        self.negative_ttl = negative_ttl
+        self._lock = threading.RLock()
+        self._nodes: Dict[str, dict] = {}
+        self._counter = None
+        self._refreshed_at = None
+        self._full_refreshed_at = None
+        self._jmx_urls = None
+        self._models = {}
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+
+    def invalidate(self, what=None):
+        """
+        Drop cached data so that the next lookup fetches it again.
+
+        Args:
+            what (str, optional): 'nodes' or the name of an RM model ('hosts',
+                'nodesources', 'tokens'). Everything is invalidated if None
+        """
+        with self._lock:
+            if what is None or what == 'nodes':
+                self._nodes = {}
+                self._counter = None
+                self._refreshed_at = None
+                self._jmx_urls = None
+            if what is None:
+                self._models.clear()
+            else:
+                self._models.pop(what, None)
+
+    def _expired(self, refreshed_at, now, empty=False):
+        ttl = self.negative_ttl if empty else self.ttl
+        return refreshed_at is None or ttl is None or now - refreshed_at >= ttl
+
+    def _refresh_nodes(self, now):
+        full = self._counter is None or (
+            self.full_refresh_interval is not None and now - self._full_refreshed_at >= self.full_refresh_interval)
+        client_counter = -1 if full else self._counter
+        delta = self.monitoring_client.get_rm_state_delta(client_counter)
+        latest_counter = delta.get("latestCounter")
+        if not full and latest_counter is not None and latest_counter < self._counter:
+            # The server counter went backwards: the resource manager was restarted
+            logger.debug("RM event counter went backwards, reloading the whole topology")
+            full = True
+            delta = self.monitoring_client.get_rm_state_delta(-1)
+            latest_counter = delta.get("latestCounter")
+
+        nodes = {} if full else self._nodes
+        for event in delta.get("nodesEvents", []):
+            node_url = event.get("nodeUrl")
+            if node_url is None:
+                continue
+            if event.get("eventType") == NODE_REMOVED:
+                nodes.pop(node_url, None)
+            else:
+                nodes[node_url] = event
+        events = len(delta.get("nodesEvents", []))
+
+        self._nodes = nodes
+        self._counter = latest_counter if latest_counter is not None else -1
+        self._refreshed_at = now
+        if events or full:
+            self._jmx_urls = None
+        if full:
+            self._full_refreshed_at = now
+            self.full_refreshes += 1
+        else:
+            self.incremental_refreshes += 1
+        logger.debug(f"{'Full' if full else 'Incremental'} topology refresh: {events} event(s), "
+                     f"{len(nodes)} node(s), counter {self._counter}")
+
+    def get_nodes(self, refresh=False) -> Dict[str, dict]:
+        """
+        Get the last RM event of every node, keyed by node URL.
+
+        Args:
+            refresh (bool, optional): Refresh the nodes even if the TTL has not expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            if refresh or self._expired(self._refreshed_at, now, not self._nodes):
+                self._refresh_nodes(now)
+            return dict(self._nodes)
+
+    def list_proactive_jmx_urls(self, refresh=False) -> List[Dict[str, str]]:
+        """
+        List the unique ProActive JMX URLs along with nodeSource and hostName.
+
+        Returns:
+            List[Dict[str, str]]: A list of dictionaries with proactiveJMXUrl, nodeSource and hostName
+        """
+        now = time.monotonic()
+        with self._lock:
+            if refresh or self._expired(self._refreshed_at, now, not self._nodes):
+                self._refresh_nodes(now)
+            if self._jmx_urls is None:
+                unique = {}
+                for node in self._nodes.values():
+                    if "proactiveJMXUrl" in node and "nodeSource" in node and "hostName" in node:
+                        key = (node["proactiveJMXUrl"], node["nodeSource"], node["hostName"])
+                        unique.setdefault(key, None)
+                self._jmx_urls = [
+                    {"proactiveJMXUrl": jmx_url, "nodeSource": node_source, "hostName": host_name}
+                    for jmx_url, node_source, host_name in unique
+                ]
+            return [dict(info) for info in self._jmx_urls]
+
+    def list_node_sources(self, refresh=False) -> List[str]:
+        """List the names of the node sources having at least one node."""
+        return sorted({info["nodeSource"] for info in self.list_proactive_jmx_urls(refresh)})
+
+    def _get_model(self, name, refresh=False):
+        if self.rest_api is None:
+            raise RuntimeError("No REST API client was given to the topology cache")
+        now = time.monotonic()
+        with self._lock:
+            cached = self._models.get(name)
+            if not refresh and cached is not None and not self._expired(cached[0], now, not cached[1]):
+                return list(cached[1])
+        # Fetched outside the lock: a slow model endpoint must not block node lookups
+        values = self.rest_api.fetch_rm_model(name)
+        with self._lock:
+            self._models[name] = (now, values)
+        return list(values)
+
+    def get_rm_model_hosts(self, refresh=False) -> List[str]:
+        return self._get_model('hosts', refresh)
+
+    def get_rm_model_nodesources(self, refresh=False) -> List[str]:
+        return self._get_model('nodesources', refresh)
+
+    def get_rm_model_tokens(self, refresh=False) -> List[str]:
+        return self._get_model('tokens', refresh)
+
+    def get_counter(self) -> Optional[int]:
+        """Get the RM event counter the cached nodes are up to date with."""
+        with self._lock:
+            return self._counter
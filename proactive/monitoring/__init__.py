@@ -1,2 +1,4 @@
 from .ProactiveNodeMBeanClient import *
+from .ProactiveMetricsStore import *
+from .ProactiveTopologyCache import *
 # from .ProActiveNodeMetricsMonitor import *
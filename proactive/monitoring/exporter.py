@@ -0,0 +1,216 @@
+"""
+ProActive Prometheus Exporter
+
+Serves ProActive node and scheduler metrics in the Prometheus text exposition format.
+
+Node metrics come from a background ProactiveMetricsSampler and scheduler job counts
+from a periodic /scheduler/stats poll. A scrape only renders what is already cached:
+it never triggers requests to the nodes or to the server.
+
+Usage:
+    python -m proactive.monitoring.exporter [--host HOST] [--port PORT] [--interval SECONDS]
+                                            [--scheduler-interval SECONDS] [--debug]
+"""
+
+import argparse
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from proactive import getProActiveGateway
+from proactive.monitoring.ProactiveMetricsSampler import ProactiveMetricsSampler
+
+logger = logging.getLogger('ProactiveMetricsExporter')
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (sample field, metric name, type, help)
+NODE_METRICS = (
+    ('system_cpu', 'proactive_node_system_cpu_load', 'gauge', 'System CPU load of the node host (0-1).'),
+    ('process_cpu', 'proactive_node_process_cpu_load', 'gauge', 'CPU load of the node JVM process (0-1).'),
+    ('load_avg', 'proactive_node_load_average', 'gauge', 'System load average of the node host.'),
+    ('total_memory', 'proactive_node_memory_total_bytes', 'gauge', 'Total physical memory of the node host.'),
+    ('free_memory', 'proactive_node_memory_free_bytes', 'gauge', 'Free physical memory of the node host.'),
+    ('heap_used', 'proactive_node_heap_used_bytes', 'gauge', 'Heap memory used by the node JVM.'),
+    ('heap_max', 'proactive_node_heap_max_bytes', 'gauge', 'Maximum heap memory of the node JVM.'),
+    ('threadcount', 'proactive_node_threads', 'gauge', 'Live threads of the node JVM.'),
+    ('peakthreadcount', 'proactive_node_threads_peak', 'gauge', 'Peak live threads of the node JVM.'),
+    ('totalstartedthreadcount', 'proactive_node_threads_started_total', 'counter', 'Threads started by the node JVM.'),
+)
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    return ",".join('{}="{}"'.format(key, _escape_label_value(value)) for key, value in labels.items())
+
+
+def _job_state_from_stat(key):
+    """Turn a scheduler statistic name such as 'RunningJobsCount' into 'running'."""
+    match = re.fullmatch(r'([A-Za-z]+)JobsCount', key)
+    if not match or match.group(1) == 'Total':
+        return None
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', match.group(1)).lower()
+
+
+class ProactiveMetricsExporter:
+    """
+    Prometheus exporter fed by cached samples.
+
+    Args:
+        gateway: A connected ProActive gateway instance
+        sampler (ProactiveMetricsSampler): A started sampler providing the node metrics
+        scheduler_interval (float, optional): Period of the scheduler statistics and node
+            topology refresh, in seconds. Defaults to 15.0
+    """
+
+    def __init__(self, gateway, sampler, scheduler_interval=15.0):
+        self.gateway = gateway
+        self.sampler = sampler
+        self.scheduler_interval = scheduler_interval
+        self._scheduler_stats = {}
+        self._node_labels = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def _refresh(self):
+        try:
+            stats = self.gateway.getProactiveRestApi().get_scheduler_stats()
+            if stats is not None:
+                with self._lock:
+                    self._scheduler_stats = stats
+        except Exception as e:
+            logger.warning(f"Failed to refresh the scheduler statistics: {e}")
+        try:
+            nodes = self.gateway.getProactiveMonitoringClient().list_proactive_jmx_urls()
+            with self._lock:
+                self._node_labels = {
+                    node["proactiveJMXUrl"]: {"node_source": node["nodeSource"], "host": node["hostName"]} for node in nodes
+                }
+        except Exception as e:
+            logger.warning(f"Failed to refresh the node topology: {e}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._refresh()
+            self._stop_event.wait(self.scheduler_interval)
+
+    def render(self):
+        """Render the cached metrics in the Prometheus text exposition format."""
+        snapshots = self.sampler.get_latest_snapshots()
+        with self._lock:
+            scheduler_stats = dict(self._scheduler_stats)
+            node_labels = dict(self._node_labels)
+
+        lines = []
+        for field, name, metric_type, help_text in NODE_METRICS:
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+            for node_url, snapshot in sorted(snapshots.items()):
+                value = snapshot.get(field)
+                if value is None or (field == 'heap_max' and value < 0):
+                    continue
+                labels = {"node": node_url, **node_labels.get(node_url, {})}
+                lines.append("{}{{{}}} {}".format(name, _format_labels(labels), float(value)))
+
+        lines.append("# HELP proactive_scheduler_jobs Jobs known by the scheduler, per state.")
+        lines.append("# TYPE proactive_scheduler_jobs gauge")
+        for key, value in sorted(scheduler_stats.items()):
+            state = _job_state_from_stat(key)
+            if state is None:
+                continue
+            try:
+                lines.append('proactive_scheduler_jobs{{state="{}"}} {}'.format(state, float(value)))
+            except (TypeError, ValueError):
+                continue
+
+        lines.append("# HELP proactive_exporter_sampler_ticks_total Sampling ticks run by the exporter.")
+        lines.append("# TYPE proactive_exporter_sampler_ticks_total counter")
+        lines.append("proactive_exporter_sampler_ticks_total {}".format(self.sampler.ticks))
+        lines.append("# HELP proactive_exporter_sampler_failed_requests_total Node requests that failed.")
+        lines.append("# TYPE proactive_exporter_sampler_failed_requests_total counter")
+        lines.append("proactive_exporter_sampler_failed_requests_total {}".format(self.sampler.failed_requests))
+        lines.append("# HELP proactive_exporter_sampler_interval_seconds Current sampling interval.")
+        lines.append("# TYPE proactive_exporter_sampler_interval_seconds gauge")
+        lines.append("proactive_exporter_sampler_interval_seconds {}".format(self.sampler.current_interval))
+        return "\n".join(lines) + "\n"
+
+    def _make_handler(self):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return MetricsHandler
+
+    def start(self, host='0.0.0.0', port=9464):
+        """Start the refresh thread and serve /metrics on a background thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ProactiveMetricsExporter', daemon=True)
+        self._thread.start()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        threading.Thread(target=self._server.serve_forever, name='ProactiveMetricsExporterHTTP', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export ProActive metrics to Prometheus')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=9464, help='Port to listen on (default: 9464)')
+    parser.add_argument('--interval', type=float, default=15.0,
+                        help='Interval between node samplings in seconds (default: 15.0)')
+    parser.add_argument('--scheduler-interval', type=float, default=15.0,
+                        help='Interval between scheduler statistics refreshes in seconds (default: 15.0)')
+    parser.add_argument('--debug', action='store_true', help='Show debug output')
+    args = parser.parse_args()
+
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    print("Initializing ProActive gateway...")
+    gateway = getProActiveGateway()
+    sampler = ProactiveMetricsSampler(gateway, interval=args.interval, debug=args.debug)
+    exporter = ProactiveMetricsExporter(gateway, sampler, scheduler_interval=args.scheduler_interval)
+    try:
+        sampler.start()
+        exporter.start(args.host, args.port)
+        print(f"Serving metrics on http://{args.host}:{args.port}/metrics")
+        print("Press Ctrl+C to stop")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nExporter stopped by user")
+    finally:
+        exporter.stop()
+        sampler.stop()
+        gateway.close()
+        print("\nDisconnected and finished.")
+
+
+if __name__ == "__main__":
+    main()
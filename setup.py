@@ -43,8 +43,12 @@ setup(
         'python-dotenv',
         'wheel',
         'setuptools',
-        'humanize'
+        'humanize',
+        'numpy'
     ],
+    extras_require={
+        'msgpack': ['msgpack']
+    },
     package_dir={'proactive': 'proactive'},
     package_data={'proactive': ['java/lib/*.jar', 'java/log4j.properties', 'logging.conf', '../VERSION']},
     python_requires='>=3.6',
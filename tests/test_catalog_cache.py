@@ -0,0 +1,237 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from proactive.ProactiveBuilder import ProactiveTaskBuilder
+from proactive.ProactiveCatalogCache import ProactiveCatalogCache
+from proactive.ProactiveRestApi import ProactiveRestApi
+
+
+class FakeRestApi:
+    """Serves catalog objects from a dict of (content, etag, commit time), recording the requests."""
+
+    def __init__(self):
+        self.base_url = 'http://server:8080/rest'
+        self.objects = {}
+        self.requests = []
+
+    def fetch_object_from_catalog(self, bucket_name, object_name, etag=None, check_connection=True):
+        assert not check_connection, "The cache checks no connection"
+        self.requests.append(('fetch', object_name, etag))
+        content, current_etag, _ = self.objects.get((bucket_name, object_name), (None, None, None))
+        if content is None:
+            return 404, None, etag
+        if etag is not None and etag == current_etag:
+            return 304, None, etag
+        return 200, content, current_etag
+
+    def get_object_metadata_from_catalog(self, bucket_name, object_name, check_connection=True):
+        assert not check_connection, "The cache checks no connection"
+        self.requests.append(('metadata', object_name))
+        _, _, commit_time = self.objects.get((bucket_name, object_name), (None, None, None))
+        return None if commit_time is None else {'name': object_name, 'commit_time_raw': commit_time}
+
+    def list_objects_from_catalog(self, bucket_name):
+        return [{'name': name, 'kind': 'Script/task', 'commit_time_raw': commit_time}
+                for (bucket, name), (_, _, commit_time) in sorted(self.objects.items()) if bucket == bucket_name]
+
+
+class CatalogCacheTestSuite(unittest.TestCase):
+    """Catalog object cache test cases."""
+
+    def setUp(self):
+        self.rest_api = FakeRestApi()
+        self.rest_api.objects[('scripts', 'with_etag')] = ('print(1)', '"v1"', None)
+        self.rest_api.objects[('scripts', 'with_commit')] = ('print(2)', None, '100')
+        self.cache = ProactiveCatalogCache(self.rest_api, revalidate_after=0)
+
+    def test_objects_are_revalidated_with_their_etag(self):
+        self.assertEqual(self.cache.get('scripts', 'with_etag'), 'print(1)')
+        self.assertEqual(self.cache.get('scripts', 'with_etag'), 'print(1)')
+        self.assertEqual(self.rest_api.requests, [('fetch', 'with_etag', None), ('fetch', 'with_etag', '"v1"')])
+        self.rest_api.objects[('scripts', 'with_etag')] = ('print(10)', '"v2"', None)
+        self.assertEqual(self.cache.get('scripts', 'with_etag'), 'print(10)')
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.revalidations), (2, 1, 2))
+
+    def test_objects_are_revalidated_with_their_commit_time(self):
+        self.assertEqual(self.cache.get('scripts', 'with_commit'), 'print(2)')
+        self.rest_api.requests.clear()
+        self.assertEqual(self.cache.get('scripts', 'with_commit'), 'print(2)')
+        self.assertEqual(self.rest_api.requests, [('metadata', 'with_commit')])
+        self.rest_api.objects[('scripts', 'with_commit')] = ('print(20)', None, '200')
+        self.assertEqual(self.cache.get('scripts', 'with_commit'), 'print(20)')
+
+    def test_validated_objects_are_trusted_for_a_while(self):
+        cache = ProactiveCatalogCache(self.rest_api)
+        self.assertGreater(cache.revalidate_after, 0)
+        cache.get('scripts', 'with_etag')
+        cache.get('scripts', 'with_etag')
+        self.assertEqual(len(self.rest_api.requests), 1)
+
+    def test_missing_objects(self):
+        self.assertIsNone(self.cache.get('scripts', 'missing'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_size_bounded_eviction(self):
+        cache = ProactiveCatalogCache(self.rest_api, max_size=16)
+        for index in range(4):
+            self.rest_api.objects[('big', 'object_{}'.format(index))] = ('x' * 6, '"{}"'.format(index), None)
+            cache.get('big', 'object_{}'.format(index))
+        self.assertEqual((len(cache), cache.size), (2, 12))
+        self.rest_api.objects[('big', 'huge')] = ('x' * 17, '"huge"', None)
+        self.assertEqual(cache.get('big', 'huge'), 'x' * 17)
+        self.assertEqual(len(cache), 2)
+
+    def test_disk_directory_survives_restarts(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.cache.cache_dir = cache_dir
+            self.cache.get('scripts', 'with_etag')
+            restarted = ProactiveCatalogCache(self.rest_api, cache_dir=cache_dir)
+            self.rest_api.requests.clear()
+            self.assertEqual(restarted.get('scripts', 'with_etag'), 'print(1)')
+            self.assertEqual(self.rest_api.requests, [('fetch', 'with_etag', '"v1"')])
+            small = ProactiveCatalogCache(self.rest_api, cache_dir=cache_dir, max_size=8)
+            small.get('scripts', 'with_commit')
+            self.assertEqual(len([name for name in os.listdir(cache_dir) if name.endswith('.data')]), 1)
+
+    def test_prefetch_bucket(self):
+        self.assertEqual(self.cache.prefetch_bucket('scripts', kind='Script'), 2)
+        self.assertEqual(self.cache.prefetch_bucket('scripts'), 1)
+        self.assertEqual(self.cache.prefetch_bucket('scripts', kind='Workflow'), 0)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_get_url(self):
+        url = 'http://server:8080/catalog/buckets/scripts/resources/with_etag/raw'
+        self.assertEqual(self.cache.get_url(url), 'print(1)')
+        self.assertIsNone(self.cache.get_url('http://other:8080/catalog/buckets/scripts/resources/with_etag/raw'))
+        self.assertIsNone(self.cache.get_url('http://server:8080/scripts/with_etag'))
+
+    def test_invalidate(self):
+        self.cache.get('scripts', 'with_etag')
+        self.cache.get('scripts', 'with_commit')
+        self.cache.invalidate('scripts', 'with_etag')
+        self.assertEqual(len(self.cache), 1)
+        self.cache.invalidate()
+        self.assertEqual((len(self.cache), self.cache.size), (0, 0))
+
+    def test_invalidate_drops_the_disk_entries(self):
+        self.rest_api.objects[('other', 'object')] = ('print(3)', '"v3"', None)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.cache.cache_dir = cache_dir
+            for key in (('scripts', 'with_etag'), ('scripts', 'with_commit'), ('other', 'object')):
+                self.cache.get(*key)
+            self.cache.invalidate('scripts', 'with_etag')
+            self.rest_api.requests.clear()
+            self.cache.get('scripts', 'with_etag')
+            self.assertEqual(self.rest_api.requests, [('fetch', 'with_etag', None)])
+            self.cache.invalidate('scripts')
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            self.cache.invalidate()
+            self.assertEqual(os.listdir(cache_dir), [])
+
+
+class CatalogRestApiTestSuite(unittest.TestCase):
+    """Connection guards of the catalog REST calls."""
+
+    def setUp(self):
+        self.rest_api = ProactiveRestApi()
+        self.rest_api.base_url = 'http://server:8080/rest'
+        self.rest_api.session_id = 'session'
+        self.rest_api.catalog_cache = mock.Mock()
+
+    def test_get_object_checks_its_arguments_and_the_connection_first(self):
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=False):
+            self.assertRaises(AssertionError, self.rest_api.get_object_from_catalog, '', 'object')
+            self.assertRaises(AssertionError, self.rest_api.get_object_from_catalog, 'bucket', None)
+            self.assertIsNone(self.rest_api.get_object_from_catalog('bucket', 'object'))
+        self.rest_api.catalog_cache.get.assert_not_called()
+        self.rest_api.catalog_cache.get.return_value = 'content'
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=True):
+            self.assertEqual(self.rest_api.get_object_from_catalog('bucket', 'object'), 'content')
+        self.rest_api.catalog_cache.get.assert_called_once_with('bucket', 'object')
+
+    def test_fetch_object_checks_the_connection(self):
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=False), \
+                mock.patch('proactive.ProactiveRestApi.requests.get') as get:
+            self.assertEqual(self.rest_api.fetch_object_from_catalog('bucket', 'object', etag='"v1"'),
+                             (None, None, '"v1"'))
+        get.assert_not_called()
+        response = mock.Mock(status_code=304)
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=True), \
+                mock.patch('proactive.ProactiveRestApi.requests.get', return_value=response) as get:
+            self.assertEqual(self.rest_api.fetch_object_from_catalog('bucket', 'object', etag='"v1"'),
+                             (304, None, '"v1"'))
+        self.assertEqual(get.call_args[1]['headers'], {'sessionid': 'session', 'If-None-Match': '"v1"'})
+        with mock.patch.object(ProactiveRestApi, 'connected') as connected, \
+                mock.patch('proactive.ProactiveRestApi.requests.get', return_value=response) as get:
+            self.assertEqual(self.rest_api.fetch_object_from_catalog('bucket', 'object', etag='"v1"',
+                                                                     check_connection=False), (304, None, '"v1"'))
+        connected.assert_not_called()
+        self.assertEqual(get.call_count, 1)
+
+    @staticmethod
+    def download_response(status_code, chunks):
+        response = mock.MagicMock(status_code=status_code)
+        response.__enter__.return_value = response
+        response.iter_content.return_value = chunks
+        return response
+
+    def test_download_object_checks_the_connection(self):
+        with tempfile.TemporaryDirectory() as folder, \
+                mock.patch.object(ProactiveRestApi, 'connected', return_value=False), \
+                mock.patch('proactive.ProactiveRestApi.requests.get') as get:
+            self.assertIsNone(self.rest_api.download_object_from_catalog('bucket', 'object', os.path.join(folder, 'f')))
+            self.assertEqual(os.listdir(folder), [])
+        get.assert_not_called()
+
+    def test_download_object_writes_complete_files_only(self):
+        def interrupted():
+            yield b'abc'
+            raise ConnectionError('connection reset')
+
+        with tempfile.TemporaryDirectory() as folder, \
+                mock.patch.object(ProactiveRestApi, 'connected', return_value=True):
+            path = os.path.join(folder, 'object.txt')
+            with mock.patch('proactive.ProactiveRestApi.requests.get',
+                            return_value=self.download_response(200, [b'abc', b'def'])):
+                self.assertEqual(self.rest_api.download_object_from_catalog('bucket', 'object', path), path)
+            with open(path, 'rb') as downloaded:
+                self.assertEqual(downloaded.read(), b'abcdef')
+            with mock.patch('proactive.ProactiveRestApi.requests.get',
+                            return_value=self.download_response(200, interrupted())):
+                self.assertIsNone(self.rest_api.download_object_from_catalog('bucket', 'object', path))
+            with mock.patch('proactive.ProactiveRestApi.requests.get',
+                            return_value=self.download_response(404, [])):
+                self.assertIsNone(self.rest_api.download_object_from_catalog('bucket', 'other', 'missing.txt'))
+            self.assertEqual(os.listdir(folder), ['object.txt'])
+            with open(path, 'rb') as downloaded:
+                self.assertEqual(downloaded.read(), b'abcdef')
+
+
+class CatalogScriptBuildTestSuite(unittest.TestCase):
+    """Catalog script references of the built tasks."""
+
+    def setUp(self):
+        self.rest_api = FakeRestApi()
+        self.rest_api.objects[('scripts', 'fork_env')] = ('// fork', '"v1"', None)
+        self.cache = ProactiveCatalogCache(self.rest_api, revalidate_after=0)
+        jvm = SimpleNamespace(java=SimpleNamespace(net=SimpleNamespace(URL=lambda url: ('URL', url))))
+        factory = SimpleNamespace(catalog_cache=self.cache, getRuntimeGateway=lambda: SimpleNamespace(jvm=jvm))
+        self.builder = ProactiveTaskBuilder(factory)
+        self.url = 'http://server:8080/catalog/buckets/scripts/resources/fork_env/raw'
+
+    def test_catalog_scripts_are_referenced_by_url(self):
+        self.assertEqual(self.builder.__create_url_implementation__(self.url), ('URL', self.url))
+        self.assertEqual(self.rest_api.requests, [])
+
+    def test_catalog_scripts_are_inlined_on_demand(self):
+        self.cache.inline_scripts = True
+        self.assertEqual(self.builder.__create_url_implementation__(self.url), '// fork')
+        other_url = 'http://other:8080/catalog/buckets/scripts/resources/fork_env/raw'
+        self.assertEqual(self.builder.__create_url_implementation__(other_url), ('URL', other_url))
+
+
+if __name__ == '__main__':
+    unittest.main()
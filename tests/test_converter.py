@@ -0,0 +1,220 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from proactive.ProactiveConverter import ProactiveConverter
+from proactive.ProactiveGateway import ProActiveGateway
+
+VARIABLES_TYPES = {('map', 'org.ow2.proactive.scheduler.common.job.JobVariable'),
+                   ('map', 'org.ow2.proactive.scheduler.common.task.TaskVariable')}
+
+
+class JavaMap(dict):
+    """Mimics a java.util.LinkedHashMap."""
+
+    def put(self, key, value):
+        self[key] = value
+
+    def putAll(self, other):
+        self.update(other)
+
+
+class JavaVariable:
+    """Mimics a JobVariable or a TaskVariable."""
+
+    def __init__(self, name=None, value=None, model=None, description=None):
+        self.name, self.value, self.model, self.description = name, value, model, description
+
+    def setName(self, name):
+        self.name = name
+
+    def setValue(self, value):
+        self.value = value
+
+
+class ObjectReader:
+    """Mimics a Jackson ObjectReader updating a map of variables, merging into its values."""
+
+    def __init__(self, object_mapper, value_to_update):
+        self.object_mapper = object_mapper
+        self.value_to_update = value_to_update
+
+    def forType(self, java_type):
+        assert java_type in VARIABLES_TYPES
+        return self
+
+    def readValue(self, content):
+        self.object_mapper.calls.append(('readValue', content))
+        for key, fields in json.loads(content).items():
+            variable = self.value_to_update.get(key)
+            if variable is None or not self.object_mapper.mergeable:
+                self.value_to_update[key] = JavaVariable(**fields)
+            else:
+                for field, value in fields.items():
+                    setattr(variable, field, value)
+        return self.value_to_update
+
+
+class ObjectMapper:
+    """Mimics the Jackson ObjectMapper calls of the converter, recording them."""
+
+    def __init__(self, calls=None, mergeable=False):
+        self.calls = [] if calls is None else calls
+        self.mergeable = mergeable
+
+    def readValue(self, content, java_type):
+        self.calls.append(('readValue', content))
+        if java_type == 'java.util.LinkedHashMap':
+            return JavaMap(json.loads(content))
+        if java_type == 'java.util.LinkedHashSet':
+            return list(dict.fromkeys(json.loads(content)))
+        assert java_type in VARIABLES_TYPES
+        return JavaMap({key: JavaVariable(**fields) for key, fields in json.loads(content).items()})
+
+    def getTypeFactory(self):
+        return SimpleNamespace(constructMapType=lambda map_class, key_class, value_class: ('map', value_class))
+
+    def copy(self):
+        return ObjectMapper(self.calls)
+
+    def setDefaultMergeable(self, mergeable):
+        self.mergeable = mergeable
+        return self
+
+    def readerForUpdating(self, value_to_update):
+        return ObjectReader(self, value_to_update)
+
+
+class FakeFactory:
+
+    def __init__(self, object_mapper):
+        self.object_mapper = object_mapper
+        self.runtime_gateway = SimpleNamespace(jvm=SimpleNamespace(java=SimpleNamespace(
+            util=SimpleNamespace(LinkedHashMap=JavaMap), lang=SimpleNamespace(Class=SimpleNamespace(forName=str)))))
+        self.converter = None
+
+    def getRuntimeGateway(self):
+        return self.runtime_gateway
+
+    def create_object_mapper(self):
+        return self.object_mapper
+
+    def create_job_variable(self):
+        return JavaVariable()
+
+    def create_task_variable(self):
+        return JavaVariable()
+
+    def get_converter(self):
+        if self.converter is None:
+            self.converter = ProactiveConverter(self)
+        return self.converter
+
+
+class JavaJob:
+
+    def __init__(self, variables=None):
+        self.variables = JavaMap(variables or {})
+        self.generic_information = JavaMap()
+        self.tags = None
+        self.name = None
+
+    def getVariables(self):
+        return self.variables
+
+    def setVariables(self, variables):
+        self.variables = variables
+
+    def getGenericInformation(self):
+        return self.generic_information
+
+    def setGenericInformation(self, generic_information):
+        self.generic_information = generic_information
+
+    def setWorkflowTags(self, tags):
+        self.tags = tags
+
+    def setName(self, name):
+        self.name = name
+
+
+class ConverterTestSuite(unittest.TestCase):
+    """Python to Java collection converter test cases."""
+
+    def setUp(self):
+        self.object_mapper = ObjectMapper()
+        self.converter = ProactiveConverter(FakeFactory(self.object_mapper))
+
+    def test_collections_are_converted_in_one_call(self):
+        variables = {'V_{}'.format(index): index for index in range(300)}
+        java_map = self.converter.to_java_map(variables)
+        self.assertEqual(java_map['V_12'], '12')
+        self.assertEqual(self.converter.to_java_set(['a', 'b', 'a']), ['a', 'b'])
+        job_variables = self.converter.to_job_variables({'SIZE': 10, 'EMPTY': None})
+        self.assertEqual((job_variables['SIZE'].name, job_variables['SIZE'].value), ('SIZE', '10'))
+        self.assertIsNone(job_variables['EMPTY'].value)
+        self.assertEqual(len(self.object_mapper.calls), 3)
+
+    def test_merge_keeps_the_variable_attributes(self):
+        size = JavaVariable('SIZE', '10', model='PA:Integer', description='Number of items')
+        job = JavaJob({'SIZE': size, 'MODE': JavaVariable('MODE', 'fast')})
+        self.converter.merge_job_variables(job, {'SIZE': 20, 'SEED': '7'})
+        self.assertEqual(list(job.getVariables()), ['SIZE', 'MODE', 'SEED'])
+        self.assertIs(job.getVariables()['SIZE'], size)
+        self.assertEqual((size.value, size.model, size.description), ('20', 'PA:Integer', 'Number of items'))
+        self.assertEqual((job.getVariables()['SEED'].name, job.getVariables()['SEED'].value), ('SEED', '7'))
+        self.assertEqual(job.getVariables()['MODE'].value, 'fast')
+        self.assertEqual(len(self.object_mapper.calls), 1)
+        self.converter.merge_task_variables(job, {'MODE': 'slow'})
+        self.assertEqual(job.getVariables()['MODE'].value, 'slow')
+
+    def test_merge_without_jackson(self):
+        converter = ProactiveConverter(FakeFactory(None))
+        size = JavaVariable('SIZE', '10', model='PA:Integer')
+        job = JavaJob({'SIZE': size})
+        converter.merge_job_variables(job, {'SIZE': 20, 'SEED': 7})
+        self.assertIs(job.getVariables()['SIZE'], size)
+        self.assertEqual((size.value, size.model), ('20', 'PA:Integer'))
+        self.assertEqual((job.getVariables()['SEED'].name, job.getVariables()['SEED'].value), ('SEED', '7'))
+
+    def test_merge_generic_information(self):
+        job = JavaJob()
+        job.generic_information['PRIORITY'] = 'low'
+        self.converter.merge_generic_information(job, {'PRIORITY': 'high', 'TEAM': 'data'})
+        self.assertEqual(job.getGenericInformation(), {'PRIORITY': 'high', 'TEAM': 'data'})
+        self.converter.merge_generic_information(job, {})
+        self.assertEqual(len(self.object_mapper.calls), 1)
+
+
+class SubmitConversionTestSuite(unittest.TestCase):
+    """Submission paths using the converter."""
+
+    def setUp(self):
+        self.object_mapper = ObjectMapper()
+        self.submissions = []
+        self.gateway = ProActiveGateway.__new__(ProActiveGateway)
+        self.gateway.base_url = 'http://server:8080'
+        self.gateway.proactive_factory = FakeFactory(self.object_mapper)
+        self.gateway.logger = SimpleNamespace(debug=lambda message: None, info=lambda message: None)
+        self.gateway.proactive_scheduler_client = SimpleNamespace(
+            submitFromCatalog=lambda *args: self.submissions.append(args) or SimpleNamespace(longValue=lambda: 1))
+
+    def test_submit_from_catalog_converts_each_map_once(self):
+        self.assertEqual(self.gateway.submitWorkflowFromCatalog('bucket', 'workflow', {'SIZE': 3}, {'TEAM': 'data'}), 1)
+        self.assertEqual(self.submissions, [('http://server:8080/catalog', 'bucket', 'workflow', {'SIZE': '3'},
+                                             {'TEAM': 'data'})])
+        self.assertEqual(len(self.object_mapper.calls), 2)
+
+    def test_customize_job(self):
+        size = JavaVariable('SIZE', '10', model='PA:Integer')
+        job = JavaJob({'SIZE': size})
+        self.gateway._customizeJob(job, {'SIZE': '20', 'SEED': '1'}, {'TEAM': 'data'}, job_name='renamed',
+                                   workflow_tags=['nightly'])
+        self.assertEqual((size.value, size.model), ('20', 'PA:Integer'))
+        self.assertEqual(sorted(job.getVariables()), ['SEED', 'SIZE'])
+        self.assertEqual((job.getGenericInformation(), job.tags, job.name), ({'TEAM': 'data'}, ['nightly'], 'renamed'))
+        self.assertEqual(len(self.object_mapper.calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+import io
+import threading
+import unittest
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from unittest import mock
+
+from proactive import decorators
+from proactive.ProactiveJobDag import ProactiveJobDag
+from proactive.decorators import job, task, loop, session, get_shared_gateway, close_shared_gateway
+
+
+def task_def(name, depends_on=None, **flags):
+    definition = {'Name': name, 'DependsOn': depends_on, 'InputFiles': None, 'OutputFiles': None}
+    definition.update(flags)
+    return definition
+
+
+class FakeTask:
+    def __init__(self, name):
+        self.name = name
+        self.implementation = None
+        self.dependencies = []
+        self.flow_block = None
+        self.flow_script = None
+
+    def getTaskName(self):
+        return self.name
+
+    def setTaskImplementation(self, implementation):
+        self.implementation = implementation
+
+    def addDependency(self, task):
+        self.dependencies.append(task.name)
+
+    def setFlowBlock(self, flow_block):
+        self.flow_block = flow_block
+
+    def setFlowScript(self, flow_script):
+        self.flow_script = flow_script
+
+
+class FakeJob:
+    def __init__(self, name):
+        self.name = name
+        self.tasks = []
+
+    def addTask(self, task):
+        self.tasks.append(task)
+
+
+class FakeGateway:
+    def __init__(self):
+        self.jobs = []
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def createJob(self, job_name):
+        return FakeJob(job_name)
+
+    def createPythonTask(self, task_name):
+        return FakeTask(task_name)
+
+    def createLoopFlowScript(self, criteria, target, script_language=None):
+        return ('loop', criteria, target)
+
+    def submitJob(self, job):
+        self.jobs.append(job)
+        return len(self.jobs)
+
+
+class JobDagTestSuite(unittest.TestCase):
+    """Decorator job compilation test cases."""
+
+    def test_topological_order_keeps_registration_order(self):
+        dag = ProactiveJobDag.compile([
+            task_def('report', ['train', 'load']),
+            task_def('load'),
+            task_def('train', ['load']),
+            task_def('other'),
+        ])
+        self.assertEqual([definition['Name'] for definition in dag.tasks], ['load', 'train', 'report', 'other'])
+        self.assertEqual(dag.dependencies['report'], ('train', 'load'))
+
+    def test_invalid_graphs(self):
+        with self.assertRaisesRegex(ValueError, "unknown task 'missing'"):
+            ProactiveJobDag.compile([task_def('a', ['missing'])])
+        with self.assertRaisesRegex(ValueError, 'cycle between: a, b'):
+            ProactiveJobDag.compile([task_def('a', ['b']), task_def('b', ['a']), task_def('c')])
+        with self.assertRaisesRegex(ValueError, 'used twice'):
+            ProactiveJobDag.compile([task_def('a'), task_def('a')])
+        with self.assertRaisesRegex(ValueError, 'no loop end'):
+            ProactiveJobDag.compile([task_def('a', IsLoopStart=True)])
+
+    def test_many_blocks(self):
+        dag = ProactiveJobDag.compile([
+            task_def('outer_start', IsLoopStart=True),
+            task_def('inner_start', ['outer_start'], IsLoopStart=True),
+            task_def('inner_end', ['inner_start'], IsLoopEnd=True, LoopCriteria='loop = False'),
+            task_def('outer_end', ['inner_end'], IsLoopEnd=True, LoopCriteria='loop = True'),
+            task_def('condition_1', ['outer_end'], IsConditionTask=True),
+            task_def('if_1', ['condition_1'], IsIfBranch=True),
+            task_def('else_1', ['condition_1'], IsElseBranch=True),
+            task_def('continuation_1', ['condition_1'], IsContinuationTask=True),
+            task_def('condition_2', ['continuation_1'], IsConditionTask=True),
+            task_def('if_2', IsIfBranch=True),
+            task_def('else_2', IsElseBranch=True),
+            task_def('continuation_2', IsContinuationTask=True),
+        ])
+        self.assertEqual(dag.loops, (('inner_start', 'inner_end', 'loop = False'), ('outer_start', 'outer_end', 'loop = True')))
+        self.assertEqual(dag.branches, (('condition_1', 'if_1', 'else_1', 'continuation_1'),
+                                        ('condition_2', 'if_2', 'else_2', 'continuation_2')))
+
+    def test_cache_by_structure(self):
+        cache = OrderedDict()
+        first = ProactiveJobDag.compile([task_def('b', ['a']), task_def('a')], cache)
+        second_defs = [task_def('b', ['a'], Args=(2,)), task_def('a', Args=(2,))]
+        second = ProactiveJobDag.compile(second_defs, cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(second.order, first.order)
+        self.assertIs(second.tasks[0], second_defs[1])
+
+
+class JobDecoratorTestSuite(unittest.TestCase):
+    """Decorator job build test cases."""
+
+    def test_build_in_topological_order(self):
+        @task(name='train', depends_on=['load'])
+        def train():
+            return 'print("train")'
+
+        @task(name='load')
+        @loop.start()
+        def load():
+            return 'print("load")'
+
+        @task(name='check', depends_on=['train'])
+        @loop.end('loop = False')
+        def check():
+            return 'print("check")'
+
+        @job('pipeline', print_job_output=False)
+        def pipeline():
+            train()
+            load()
+            check()
+
+        gateway = FakeGateway()
+        with session(gateway), redirect_stdout(io.StringIO()):
+            self.assertEqual(pipeline(), 1)
+            self.assertEqual(pipeline(), 2)
+        tasks = {fake_task.name: fake_task for fake_task in gateway.jobs[0].tasks}
+        self.assertEqual([fake_task.name for fake_task in gateway.jobs[0].tasks], ['load', 'train', 'check'])
+        self.assertEqual(tasks['train'].dependencies, ['load'])
+        self.assertEqual((tasks['load'].flow_block, tasks['check'].flow_block), ('start', 'end'))
+        self.assertEqual(tasks['check'].flow_script, ('loop', 'loop = False', 'load'))
+
+    def test_unknown_dependency_fails_the_build(self):
+        @task(name='orphan', depends_on=['missing'])
+        def orphan():
+            return ''
+
+        @job('broken', print_job_output=False)
+        def broken():
+            orphan()
+
+        gateway = FakeGateway()
+        with session(gateway):
+            self.assertRaises(ValueError, broken)
+        self.assertEqual(gateway.jobs, [])
+    def test_concurrent_builds_keep_their_own_tasks(self):
+        @task(name='extract')
+        def extract():
+            return 'print("extract")'
+
+        @task(name='report', depends_on=['extract'])
+        def report():
+            return 'print("report")'
+
+        @task(name='load')
+        def load():
+            return 'print("load")'
+
+        # Both builds register their first task before either registers its second one
+        barrier = threading.Barrier(2)
+
+        @job('interleaved', print_job_output=False)
+        def interleaved(first, second):
+            first()
+            barrier.wait(5)
+            second()
+
+        def build(gateway, first, second):
+            with session(gateway), redirect_stdout(io.StringIO()):
+                interleaved(first, second)
+
+        gateways = [FakeGateway(), FakeGateway()]
+        threads = [threading.Thread(target=build, args=(gateways[0], extract, report)),
+                   threading.Thread(target=build, args=(gateways[1], load, extract))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+        self.assertEqual([fake_task.name for fake_task in gateways[0].jobs[0].tasks], ['extract', 'report'])
+        self.assertEqual(gateways[0].jobs[0].tasks[1].dependencies, ['extract'])
+        self.assertEqual([fake_task.name for fake_task in gateways[1].jobs[0].tasks], ['load', 'extract'])
+
+    def test_tasks_called_outside_a_build_are_not_registered(self):
+        @task(name='standalone')
+        def standalone():
+            return 'print("standalone")'
+
+        self.assertEqual(standalone(), 'print("standalone")')
+        self.assertIsNone(decorators._task_registry.get())
+
+
+class SessionTestSuite(unittest.TestCase):
+    """Decorator gateway session test cases."""
+
+    @staticmethod
+    def gateway_in_thread():
+        gateways = []
+        thread = threading.Thread(target=lambda: gateways.append(decorators._acquire_gateway(False)))
+        thread.start()
+        thread.join()
+        return gateways[0]
+
+    def test_nested_sessions(self):
+        outer, inner, created = FakeGateway(), FakeGateway(), FakeGateway()
+        with mock.patch('proactive.decorators.getProActiveGateway', return_value=created):
+            with session(outer):
+                self.assertEqual(decorators._acquire_gateway(False), (outer, False))
+                with session() as gateway:
+                    self.assertIs(gateway, created)
+                    self.assertEqual(decorators._acquire_gateway(True), (created, False))
+                self.assertTrue(created.closed)
+                with session(inner):
+                    self.assertEqual(decorators._acquire_gateway(False), (inner, False))
+                self.assertEqual(decorators._acquire_gateway(False), (outer, False))
+            self.assertFalse(outer.closed or inner.closed)
+            self.assertEqual(decorators._acquire_gateway(False), (created, True))
+
+    def test_sessions_are_shared_with_threads_on_demand(self):
+        gateway, created = FakeGateway(), FakeGateway()
+        with mock.patch('proactive.decorators.getProActiveGateway', return_value=created):
+            with session(gateway):
+                self.assertEqual(self.gateway_in_thread(), (created, True))
+            with session(gateway, share_with_threads=True):
+                self.assertEqual(self.gateway_in_thread(), (gateway, False))
+            self.assertEqual(self.gateway_in_thread(), (created, True))
+
+    def test_shared_gateway(self):
+        gateways = [FakeGateway(), FakeGateway()]
+        with mock.patch('proactive.decorators.getProActiveGateway', side_effect=gateways), \
+                mock.patch('proactive.decorators.atexit') as atexit:
+            self.assertIs(get_shared_gateway(), gateways[0])
+            self.assertIs(get_shared_gateway(), gateways[0])
+            self.assertEqual(decorators._acquire_gateway(True), (gateways[0], False))
+            close_shared_gateway()
+            self.assertTrue(gateways[0].closed)
+            close_shared_gateway()
+            self.assertIs(get_shared_gateway(), gateways[1])
+            close_shared_gateway()
+        self.assertEqual(atexit.register.call_count, 2)
+        self.assertEqual(atexit.unregister.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
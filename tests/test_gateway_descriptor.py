@@ -0,0 +1,54 @@
+import pickle
+import unittest
+from unittest import mock
+
+from proactive.ProactiveGatewayDescriptor import ProactiveGatewayDescriptor
+from proactive.ProactiveRestApi import ProactiveRestApi
+
+
+class GatewayDescriptorTestSuite(unittest.TestCase):
+    """Gateway descriptor test cases."""
+
+    def test_pickle_round_trip(self):
+        descriptor = pickle.loads(pickle.dumps(ProactiveGatewayDescriptor('https://server:8443', 'session', True)))
+        self.assertEqual((descriptor.getBaseURL(), descriptor.getSession(), descriptor.debug), ('https://server:8443', 'session', True))
+
+    def test_connect_reuses_the_session_once_per_process(self):
+        descriptor = ProactiveGatewayDescriptor('https://server:8443', 'valid-session')
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=True) as connected, \
+                mock.patch.object(ProactiveRestApi, 'connect') as login:
+            rest_api = descriptor.connect()
+            self.assertIs(descriptor.connect(), rest_api)
+        self.assertEqual((rest_api.base_url, rest_api.session_id), ('https://server:8443/rest', 'valid-session'))
+        self.assertEqual(connected.call_count, 1)
+        login.assert_not_called()
+
+    def test_connect_normalizes_the_url(self):
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=True) as connected:
+            rest_api = ProactiveGatewayDescriptor('https://server:8443/', 'url-session').connect()
+            self.assertIs(ProactiveGatewayDescriptor('https://server:8443/rest/', 'url-session').connect(), rest_api)
+        self.assertEqual(rest_api.base_url, 'https://server:8443/rest')
+        self.assertEqual(connected.call_count, 1)
+
+    def test_rejected_sessions_are_dropped(self):
+        descriptor = ProactiveGatewayDescriptor('https://server:8443', 'revoked-session')
+        valid = mock.Mock(status_code=200, text='true')
+        with mock.patch('proactive.ProactiveRestApi.requests.get', return_value=valid):
+            rest_api = descriptor.connect()
+            self.assertTrue(rest_api.connected())
+        with mock.patch('proactive.ProactiveRestApi.requests.get', return_value=mock.Mock(status_code=401)) as get:
+            self.assertFalse(rest_api.connected())
+            self.assertIsNone(rest_api.session_id)
+            self.assertRaises(ConnectionError, descriptor.connect)
+        self.assertEqual(get.call_count, 2)
+        with mock.patch('proactive.ProactiveRestApi.requests.get', return_value=valid):
+            self.assertIsNot(descriptor.connect(), rest_api)
+
+    def test_connect_with_an_expired_session(self):
+        descriptor = ProactiveGatewayDescriptor('https://server:8443', 'expired-session')
+        with mock.patch.object(ProactiveRestApi, 'connected', return_value=False):
+            self.assertRaises(ConnectionError, descriptor.connect)
+
+
+if __name__ == '__main__':
+    unittest.main()
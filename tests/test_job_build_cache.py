@@ -0,0 +1,121 @@
+import unittest
+from unittest import mock
+
+from proactive import ProactiveGateway
+from proactive.ProactiveBuilder import ProactiveJobBuilder
+from proactive.ProactiveJobBuildCache import ProactiveJobBuildCache
+from proactive.model.ProactiveForkEnv import ProactiveForkEnv
+from proactive.model.ProactiveJob import ProactiveJob
+from proactive.model.ProactiveTask import ProactivePythonTask
+
+
+class FakeJavaJob:
+
+    def __init__(self, name, copy_of=None):
+        self.name = name
+        self.copy_of = copy_of
+
+
+class FakeFactory:
+
+    def __init__(self):
+        self.clones = 0
+        self.job_build_cache = None
+
+    def clone_job(self, job):
+        self.clones += 1
+        return FakeJavaJob(job.name, job)
+
+
+class JobBuildCacheTestSuite(unittest.TestCase):
+    """Job fingerprint and build cache test cases."""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.cache = ProactiveJobBuildCache(self.factory, max_size=2)
+        self.builds = 0
+
+    def build_function(self, job_model):
+        def build():
+            self.builds += 1
+            return FakeJavaJob(job_model.getJobName())
+        return build
+
+    @staticmethod
+    def build_model(name='job'):
+        job = ProactiveJob(name)
+        job.addVariable('SIZE', '10')
+        first, second = ProactivePythonTask('first'), ProactivePythonTask('second')
+        first.setTaskImplementation('result = 1')
+        fork_environment = ProactiveForkEnv('groovy')
+        fork_environment.setImplementation('// docker')
+        second.setForkEnvironment(fork_environment)
+        second.addDependency(first)
+        job.addTask(first)
+        job.addTask(second)
+        return job
+
+    def test_fingerprint_follows_the_setters(self):
+        job = self.build_model()
+        fingerprint = job.getFingerprint()
+        self.assertEqual(self.build_model().getFingerprint(), fingerprint)
+        self.assertEqual(job.clone().getFingerprint(), fingerprint)
+        changes = [
+            lambda: job.addVariable('SIZE', '20'),
+            lambda: job.getTaskForUpdate('first').addVariable('SEED', '1'),
+            lambda: job.getTaskForUpdate('second').getForkEnvironment().setJavaHome('/opt/java'),
+            lambda: job.getTaskForUpdate('first').setTaskName('renamed'),
+            lambda: job.getTaskForUpdate('second').removeDependency(job.getTask('renamed')),
+        ]
+        seen = {fingerprint}
+        for change in changes:
+            change()
+            self.assertNotIn(job.getFingerprint(), seen)
+            seen.add(job.getFingerprint())
+
+    def test_unchanged_models_are_built_once(self):
+        job = self.build_model()
+        built = self.cache.get_job(job, self.build_function(job))
+        self.assertIsNone(built.copy_of)
+        again = self.cache.get_job(self.build_model(), self.build_function(job))
+        self.assertEqual((self.builds, self.cache.hits), (1, 1))
+        self.assertIsNotNone(again.copy_of)
+        job.getTask('first').setTaskImplementation('result = 2')
+        self.cache.get_job(job, self.build_function(job))
+        self.assertEqual(self.builds, 2)
+
+    def test_least_recently_used_jobs_are_evicted(self):
+        models = [self.build_model('job_' + str(index)) for index in range(3)]
+        for model in models:
+            self.cache.get_job(model, self.build_function(model))
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get_job(models[0], self.build_function(models[0]))
+        self.assertEqual(self.builds, 4)
+
+    def test_url_scripts_are_not_cached(self):
+        job = self.build_model()
+        job.getTask('first').setTaskImplementationFromURL('http://server/catalog/buckets/b/resources/r/raw')
+        self.cache.get_job(job, self.build_function(job))
+        self.cache.get_job(job, self.build_function(job))
+        self.assertEqual((self.builds, len(self.cache)), (2, 0))
+
+    def test_builder_uses_the_factory_cache(self):
+        self.factory.job_build_cache = self.cache
+        job = self.build_model()
+        self.cache.get_job(job, self.build_function(job))
+        java_job = ProactiveJobBuilder(self.factory, self.build_model()).create().getProactiveJob()
+        self.assertEqual((java_job.name, self.builds), ('job', 1))
+
+    def test_gateway_cache_is_opt_in(self):
+        with mock.patch.object(ProactiveGateway, 'JavaGateway'):
+            gateway = ProactiveGateway.ProActiveGateway('http://localhost:8080')
+            cached_gateway = ProactiveGateway.ProActiveGateway('http://localhost:8080', job_build_cache_size=8)
+        self.assertIsNone(gateway.getProactiveJobBuildCache())
+        self.assertIsNone(gateway.proactive_factory.job_build_cache)
+        build_cache = cached_gateway.getProactiveJobBuildCache()
+        self.assertIs(cached_gateway.proactive_factory.job_build_cache, build_cache)
+        self.assertEqual(build_cache.max_size, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from proactive.ProactiveJobHandle import ProactiveJobHandle, gather
+
+
+class FakeGateway:
+    """Jobs finish after a given number of status checks."""
+
+    def __init__(self, checks_before_finished):
+        self.checks_before_finished = checks_before_finished
+        self.checks = {}
+        self.killed = []
+        self.cached = []
+
+    def isJobFinished(self, job_id):
+        self.checks[job_id] = self.checks.get(job_id, 0) + 1
+        return self.checks[job_id] > self.checks_before_finished.get(job_id, 0)
+
+    def getJobResultMap(self, job_id):
+        return {'task': int(job_id) * 10}
+
+    def killJob(self, job_id):
+        self.killed.append(job_id)
+        return True
+
+    def cacheJobResults(self, job_id, timeout=60000):
+        self.cached.append(job_id)
+        return 1
+
+
+class JobHandleTestSuite(unittest.TestCase):
+    """Job handle test cases."""
+
+    def test_gather_results_in_order(self):
+        gateway = FakeGateway({'1': 3, '2': 0, '3': 1})
+        handles = [ProactiveJobHandle(gateway, job_id, poll_interval=0) for job_id in (1, 2, 3)]
+        self.assertEqual(gather(handles, poll_interval=0), [{'task': 10}, {'task': 20}, {'task': 30}])
+        # Finished jobs are not checked again
+        self.assertEqual(gateway.checks, {'1': 4, '2': 1, '3': 2})
+
+    def test_timeout(self):
+        gateway = FakeGateway({'1': 1000})
+        handle = ProactiveJobHandle(gateway, 1, poll_interval=0.01)
+        self.assertFalse(handle.wait(timeout=0.05))
+        self.assertRaises(TimeoutError, handle.result, timeout=0.01)
+        self.assertRaises(TimeoutError, gather, handle, timeout=0.05, poll_interval=0.01)
+
+    def test_cancel_only_unfinished_jobs(self):
+        gateway = FakeGateway({'1': 1000})
+        self.assertTrue(ProactiveJobHandle(gateway, 1).cancel())
+        self.assertFalse(ProactiveJobHandle(gateway, 2).cancel())
+        self.assertEqual(gateway.killed, [1])
+
+    def test_results_are_cached_once_the_job_is_finished(self):
+        gateway = FakeGateway({'1': 2})
+        handle = ProactiveJobHandle(gateway, 1, poll_interval=0, cache_results=True)
+        self.assertFalse(handle.done())
+        self.assertEqual(gateway.cached, [])
+        self.assertEqual(handle.result(), {'task': 10})
+        self.assertTrue(handle.done())
+        self.assertEqual(gateway.cached, [1])
+        ProactiveJobHandle(gateway, 2).wait()
+        self.assertEqual(gateway.cached, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
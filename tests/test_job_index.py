@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+
+from py4j.protocol import Py4JError
+
+from proactive.ProactiveJobIndex import ProactiveJobIndex
+from proactive.model.ProactiveJobInfo import ProactiveJobInfo
+
+
+class FakeGateway:
+    """Serves iterJobs from a dict of ProactiveJobInfo records, and getJobRecord from their Java form."""
+
+    def __init__(self, sort_by_update=True):
+        self.jobs = {}
+        self.job_info_calls = []
+        self.walked = 0
+        self.sort_by_update = sort_by_update
+
+    def put(self, job_id, status='PENDING', updated=0, **fields):
+        fields.setdefault('job_name', 'job_{}'.format(job_id))
+        fields.setdefault('submitted_time', job_id * 1000)
+        self.jobs[job_id] = ProactiveJobInfo(str(job_id), status=status, last_updated_time=updated, **fields)
+
+    def iterJobs(self, page_size=500, descending=False, pending=False, running=True, finished=False, sort_by='ID',
+                 **filters):
+        if sort_by == 'ID':
+            key = lambda job_id: job_id
+        elif sort_by == 'LAST_UPDATED_TIME' and self.sort_by_update:
+            key = lambda job_id: (self.jobs[job_id].last_updated_time, job_id)
+        else:
+            raise Py4JError("{} does not exist in the JVM".format(sort_by))
+        for job_id in sorted(self.jobs, key=key, reverse=descending):
+            job = self.jobs[job_id]
+            if (job.status == 'PENDING' and pending) or (job.status == 'RUNNING' and running) or \
+                    (job.isFinished() and finished):
+                self.walked += 1
+                yield job
+
+    def getJobRecord(self, job_id):
+        self.job_info_calls.append(job_id)
+        return ProactiveJobInfo.from_java(JavaJobInfo(self.jobs[job_id]))
+
+
+class JavaJobInfo:
+    """Mimics the getters of a Java JobInfo."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def __getattr__(self, name):
+        getters = {
+            'getJobOwner': 'owner', 'getProjectName': 'project_name', 'getBucketName': 'bucket_name',
+            'getTenant': 'tenant', 'getParentId': 'parent_id', 'getSubmittedTime': 'submitted_time',
+            'getStartTime': 'start_time', 'getFinishedTime': 'finished_time',
+            'getLastUpdatedTime': 'last_updated_time', 'getTotalNumberOfTasks': 'total_tasks',
+            'getNumberOfPendingTasks': 'pending_tasks', 'getNumberOfRunningTasks': 'running_tasks',
+            'getNumberOfFinishedTasks': 'finished_tasks', 'getNumberOfFailedTasks': 'failed_tasks',
+            'getNumberOfFaultyTasks': 'faulty_tasks', 'getNumberOfInErrorTasks': 'in_error_tasks',
+        }
+        return lambda: getattr(self.job, getters[name])
+
+    def getJobId(self):
+        job = self.job
+        return type('JobId', (), {'value': lambda _: job.job_id, 'getReadableName': lambda _: job.job_name})()
+
+    def getStatus(self):
+        return type('Status', (), {'name': lambda _: self.job.status})()
+
+    def getPriority(self):
+        return type('Priority', (), {'name': lambda _: 'NORMAL'})()
+
+
+class JobIndexTestSuite(unittest.TestCase):
+    """Job index test cases."""
+
+    def setUp(self):
+        self.gateway = FakeGateway()
+        self.gateway.put(1, 'FINISHED', owner='alice', project_name='etl')
+        self.gateway.put(2, 'RUNNING', owner='bob', project_name='etl')
+        self.gateway.put(3, 'PENDING', owner='alice', project_name='ml', job_name='train_a', parent_id=2)
+
+    def test_sync_transfers_only_changes(self):
+        job_index = ProactiveJobIndex(self.gateway)
+        self.assertEqual(job_index.sync(), {'new': 3, 'updated': 0, 'removed': 0})
+        for job_id in range(5, 105):
+            self.gateway.put(job_id, 'FINISHED', updated=job_id)
+        self.assertEqual(job_index.sync(), {'new': 100, 'updated': 0, 'removed': 0})
+        self.gateway.walked = 0
+        self.assertEqual(job_index.sync(), {'new': 0, 'updated': 0, 'removed': 0})
+        # The walk stops after the most recent update already indexed
+        self.assertEqual(self.gateway.walked, 2)
+
+        self.gateway.put(2, 'FINISHED', updated=200, owner='bob', project_name='etl')
+        self.gateway.put(3, 'RUNNING', updated=201, owner='alice', project_name='ml', job_name='train_a', parent_id=2)
+        self.gateway.put(4, 'PENDING', updated=202, owner='carol')
+        self.gateway.walked = 0
+        self.assertEqual(job_index.sync(), {'new': 1, 'updated': 2, 'removed': 0})
+        self.assertEqual(self.gateway.walked, 5)
+        self.assertEqual(self.gateway.job_info_calls, [])
+        self.assertEqual(job_index.get(2).status, 'FINISHED')
+        self.assertEqual(job_index.get(3).status, 'RUNNING')
+        self.gateway.walked = 0
+        self.assertEqual(job_index.sync(), {'new': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(self.gateway.walked, 2)
+
+    def test_sync_walks_the_active_jobs_without_update_time_sort(self):
+        self.gateway.sort_by_update = False
+        job_index = ProactiveJobIndex(self.gateway)
+        self.assertEqual(job_index.sync(), {'new': 3, 'updated': 0, 'removed': 0})
+        self.assertEqual(job_index.sync(), {'new': 0, 'updated': 0, 'removed': 0})
+
+        self.gateway.put(2, 'FINISHED', updated=5, owner='bob', project_name='etl')
+        self.gateway.put(3, 'RUNNING', updated=5, owner='alice', project_name='ml', job_name='train_a', parent_id=2)
+        self.gateway.put(4, 'PENDING', owner='carol')
+        self.assertEqual(job_index.sync(), {'new': 1, 'updated': 2, 'removed': 0})
+        self.assertEqual(self.gateway.job_info_calls, [2])
+        self.assertEqual(job_index.get(2).status, 'FINISHED')
+        self.assertEqual(job_index.get(3).status, 'RUNNING')
+
+    def test_bulk_load_keeps_the_ordered_indexes_sorted(self):
+        job_index = ProactiveJobIndex(self.gateway)
+        job_index.sync()
+        for job_id in range(200, 0, -1):
+            self.gateway.put(job_id, 'FINISHED', updated=1, job_name='job_{:03d}'.format(200 - job_id),
+                             submitted_time=job_id % 7)
+        self.assertEqual(job_index.sync(), {'new': 197, 'updated': 3, 'removed': 0})
+        self.assertEqual(job_index._names, sorted(job_index._names))
+        self.assertEqual(len(job_index._submitted), 200)
+        self.assertEqual([job.job_id for job in job_index.query(name_prefix='job_19')],
+                         [str(job_id) for job_id in range(1, 11)])
+        self.assertEqual(len(job_index.query(submitted_after=6)), 28)
+
+    def test_queries(self):
+        job_index = ProactiveJobIndex(self.gateway)
+        job_index.sync()
+        ids = lambda jobs: [int(job.job_id) for job in jobs]
+        self.assertEqual(ids(job_index.query(owner='alice')), [1, 3])
+        self.assertEqual(ids(job_index.query(owner='alice', status=['PENDING', 'RUNNING'])), [3])
+        self.assertEqual(ids(job_index.query(project_name='etl', descending=True)), [2, 1])
+        self.assertEqual(ids(job_index.query(name_prefix='train')), [3])
+        self.assertEqual(ids(job_index.query(name_prefix='job_')), [1, 2])
+        self.assertEqual(ids(job_index.query(parent_id=2)), [3])
+        self.assertEqual(ids(job_index.query(submitted_after=2000, submitted_before=3000)), [2])
+        self.assertEqual(ids(job_index.query(limit=2)), [1, 2])
+        self.assertEqual(job_index.query(owner='nobody'), [])
+
+    def test_sqlite_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'jobs.db')
+            job_index = ProactiveJobIndex(self.gateway, path=path)
+            job_index.sync()
+            job_index.close()
+
+            reloaded = ProactiveJobIndex(self.gateway, path=path)
+            self.assertEqual(len(reloaded), 3)
+            self.assertEqual(reloaded.get(3).parent_id, 2)
+            self.assertEqual(reloaded.sync(), {'new': 0, 'updated': 0, 'removed': 0})
+            reloaded.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import threading
+import unittest
+
+from proactive.ProactiveGateway import ProActiveGateway
+from proactive.model.ProactiveJobInfo import ProactiveJobInfo
+
+
+class JavaEnum:
+
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class JavaJobId:
+
+    def __init__(self, job_id, name):
+        self.job_id = job_id
+        self.readable_name = name
+
+    def value(self):
+        return str(self.job_id)
+
+    def getReadableName(self):
+        return self.readable_name
+
+
+class JavaJobInfo:
+    """Mimics the getters of org.ow2.proactive.scheduler.common.job.JobInfo."""
+
+    def __init__(self, job_id, status='FINISHED'):
+        self.job_id = job_id
+        self.status = status
+
+    def getJobId(self):
+        return JavaJobId(self.job_id, 'job_{}'.format(self.job_id))
+
+    def getStatus(self):
+        return JavaEnum(self.status)
+
+    def getPriority(self):
+        return JavaEnum('NORMAL')
+
+    def getParentId(self):
+        return None
+
+    def getJobOwner(self):
+        return 'alice'
+
+    def getTotalNumberOfTasks(self):
+        return 2
+
+    def __getattr__(self, name):
+        if name.startswith('get'):
+            return lambda: None
+        raise AttributeError(name)
+
+
+class JavaPage:
+
+    def __init__(self, job_infos):
+        self.job_infos = job_infos
+
+    def getList(self):
+        return self.job_infos
+
+
+class FakeSchedulerClient:
+    """Serves getJobs pages of a list of job IDs sorted by ID."""
+
+    def __init__(self, job_ids):
+        self.job_ids = list(job_ids)
+        self.requests = []
+        self.threads = []
+
+    def getJobs(self, offset, limit, job_filter_criteria, sort_parameters):
+        self.requests.append((offset, limit))
+        self.threads.append(threading.current_thread())
+        job_ids = sorted(self.job_ids, reverse=sort_parameters == 'DESC')
+        return JavaPage([JavaJobInfo(job_id) for job_id in job_ids[offset:offset + limit]])
+
+
+class JobIteratorTestSuite(unittest.TestCase):
+    """Paged job iterator test cases."""
+
+    def build_gateway(self, job_ids):
+        gateway = ProActiveGateway.__new__(ProActiveGateway)
+        gateway.proactive_scheduler_client = FakeSchedulerClient(job_ids)
+        gateway._buildJobFilterCriteria = lambda **filters: filters
+        gateway._buildJobSortParameters = lambda descending=False, sort_by='ID': 'DESC' if descending else 'ASC'
+        gateway._getObjectMapper = lambda: None
+        return gateway
+
+    @staticmethod
+    def ids(jobs):
+        return [int(job.getJobId()) for job in jobs]
+
+    def test_walks_all_the_pages(self):
+        gateway = self.build_gateway(range(1, 8))
+        jobs = list(gateway.iterJobs(page_size=3, prefetch=False))
+        self.assertEqual(self.ids(jobs), list(range(1, 8)))
+        self.assertEqual(gateway.proactive_scheduler_client.requests, [(0, 3), (3, 3), (6, 3)])
+        self.assertIsInstance(jobs[0], ProactiveJobInfo)
+        self.assertEqual((jobs[0].job_name, jobs[0].owner, jobs[0].status, jobs[0].priority, jobs[0].total_tasks),
+                         ('job_1', 'alice', 'FINISHED', 'NORMAL', 2))
+
+    def test_stops_after_an_empty_page(self):
+        gateway = self.build_gateway(range(1, 7))
+        self.assertEqual(self.ids(gateway.iterJobs(page_size=3, prefetch=False)), list(range(1, 7)))
+        self.assertEqual(gateway.proactive_scheduler_client.requests, [(0, 3), (3, 3), (6, 3)])
+        empty = self.build_gateway([])
+        self.assertEqual(list(empty.iterJobs(page_size=3)), [])
+        self.assertEqual(empty.proactive_scheduler_client.requests, [(0, 3)])
+
+    def test_limit_and_order(self):
+        gateway = self.build_gateway(range(1, 8))
+        self.assertEqual(self.ids(gateway.iterJobs(page_size=3, limit=4, descending=True, prefetch=False)), [7, 6, 5, 4])
+        self.assertEqual(gateway.proactive_scheduler_client.requests, [(0, 3), (3, 3)])
+
+    def test_shifted_pages_do_not_repeat_jobs(self):
+        gateway = self.build_gateway(range(1, 7))
+        iterator = gateway.iterJobs(page_size=3, prefetch=False)
+        self.assertEqual(self.ids(next(iterator) for _ in range(3)), [1, 2, 3])
+        # A job of the consumed page is removed: the next page starts one job later
+        gateway.proactive_scheduler_client.job_ids.remove(2)
+        self.assertEqual(self.ids(iterator), [5, 6])
+
+    def test_prefetches_the_next_page_in_the_background(self):
+        gateway = self.build_gateway(range(1, 8))
+        client = gateway.proactive_scheduler_client
+        iterator = gateway.iterJobs(page_size=3)
+        self.assertEqual(int(next(iterator).job_id), 1)
+        self.assertEqual(self.ids(iterator), list(range(2, 8)))
+        self.assertEqual(client.requests, [(0, 3), (3, 3), (6, 3)])
+        self.assertIs(client.threads[0], threading.current_thread())
+        self.assertTrue(all(thread is not threading.current_thread() for thread in client.threads[1:]))
+
+    def test_invalid_page_size(self):
+        gateway = self.build_gateway(range(1, 3))
+        self.assertRaises(ValueError, next, gateway.iterJobs(page_size=0))
+
+
+class JobInfoTestSuite(unittest.TestCase):
+    """Job information record test cases."""
+
+    def test_fields_and_getters(self):
+        job_info = ProactiveJobInfo('12', 'etl', status='RUNNING', parent_id=3, in_error_tasks=1)
+        self.assertEqual((job_info.getJobId(), job_info.getJobName(), job_info.getStatus(), job_info.getParentId()),
+                         ('12', 'etl', 'RUNNING', 3))
+        self.assertEqual(job_info.getNumberOfInErrorTasks(), 1)
+        self.assertIsNone(job_info.getOwner())
+        self.assertFalse(job_info.isFinished())
+        self.assertTrue(ProactiveJobInfo('13', status='KILLED').isFinished())
+        self.assertEqual(repr(job_info), "ProactiveJobInfo(job_id=12, job_name='etl', status=RUNNING)")
+        self.assertEqual(job_info.to_dict()['parent_id'], 3)
+
+    def test_records_are_read_only_values(self):
+        job_info = ProactiveJobInfo('12', 'etl')
+        with self.assertRaises(AttributeError):
+            job_info.status = 'FINISHED'
+        self.assertRaises(TypeError, ProactiveJobInfo, '12', unknown=1)
+        self.assertEqual(job_info, ProactiveJobInfo('12', 'etl'))
+        self.assertEqual(len({job_info, ProactiveJobInfo('12', 'etl')}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
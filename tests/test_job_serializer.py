@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from proactive.ProactiveJobSerializer import ProactiveJobSerializer
+from proactive.model.ProactiveFlowScript import ProactiveFlowScript
+from proactive.model.ProactiveForkEnv import ProactiveForkEnv
+from proactive.model.ProactiveJob import ProactiveJob
+from proactive.model.ProactiveScript import ProactivePreScript
+from proactive.model.ProactiveSelectionScript import ProactiveSelectionScript
+from proactive.model.ProactiveTask import ProactiveTask, ProactivePythonTask
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JobSerializerTestSuite(unittest.TestCase):
+    """Job model serialization test cases."""
+
+    def setUp(self):
+        self.serializer = ProactiveJobSerializer()
+
+    @staticmethod
+    def build_job():
+        job = ProactiveJob('pipeline')
+        job.addVariable('SIZE', '10')
+        job.addGenericInformation('PRIORITY', 'high')
+        job.setInputFolder('/data/in')
+        split = ProactivePythonTask('split', default_python='python3.11')
+        split.setTaskImplementation('result = 0')
+        split.addVariable('CHUNKS', '4')
+        flow_script = ProactiveFlowScript('javascript')
+        flow_script.setImplementation('runs = 4')
+        flow_script.setActionType('replicate')
+        split.setFlowScript(flow_script)
+        process = ProactiveTask('bash', 'process')
+        process.setTaskImplementation('echo $variables_PA_TASK_REPLICATION')
+        process.addInputFile('*.csv')
+        process.addOutputFile('out/**')
+        process.setFlowBlock('start')
+        process.setPreciousResult(True)
+        fork_environment = ProactiveForkEnv('groovy')
+        fork_environment.setImplementation('forkEnvironment.setDockerWindowsToLinux(false)')
+        fork_environment.setJavaHome('/opt/java')
+        process.setForkEnvironment(fork_environment)
+        selection_script = ProactiveSelectionScript('groovy')
+        selection_script.setImplementationFromURL('http://catalog/check_gpu.groovy')
+        selection_script.setIsDynamic(False)
+        process.setSelectionScript(selection_script)
+        pre_script = ProactivePreScript('bash')
+        pre_script.setImplementation('mkdir -p out')
+        process.setPreScript(pre_script)
+        process.addDependency(split)
+        merge = ProactivePythonTask('merge')
+        merge.setTaskImplementation('result = len(results)')
+        merge.clearGenericInformation()
+        merge.addDependency(process)
+        merge.addDependency(split)
+        for task in (split, process, merge):
+            job.addTask(task)
+        return job
+
+    def assertSameJob(self, loaded, job):
+        self.assertEqual(self.serializer.to_dict(loaded), self.serializer.to_dict(job))
+        split, process, merge = loaded.getTasks()
+        self.assertIsInstance(split, ProactivePythonTask)
+        self.assertEqual(split.getGenericInformation(), {'PYTHON_COMMAND': 'python3.11'})
+        self.assertEqual(split.getTaskImplementation(), job.getTask('split').getTaskImplementation())
+        self.assertEqual(process.getForkEnvironment().getJavaHome(), '/opt/java')
+        self.assertFalse(process.getSelectionScript().isDynamic())
+        self.assertEqual(process.getSelectionScript().getImplementationFromURL(), 'http://catalog/check_gpu.groovy')
+        self.assertTrue(split.getFlowScript().isReplicateFlowScript())
+        self.assertEqual(merge.getDependencies(), [process, split])
+        self.assertEqual(merge.getGenericInformation(), {})
+
+    def test_json_round_trip(self):
+        job = self.build_job()
+        serialized_job = self.serializer.dumps(job)
+        self.assertNotIn('task_error_policy', serialized_job)
+        self.assertSameJob(self.serializer.loads(serialized_job), job)
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        job = self.build_job()
+        serialized_job = self.serializer.dumps(job, format='msgpack')
+        self.assertIsInstance(serialized_job, bytes)
+        self.assertSameJob(self.serializer.loads(serialized_job), job)
+
+    def test_save_and_load(self):
+        job = self.build_job()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'pipeline.json')
+            self.serializer.save(job, path)
+            self.assertEqual(os.listdir(folder), ['pipeline.json'])
+            self.assertSameJob(self.serializer.load(path), job)
+
+    def test_invalid_input(self):
+        data = self.serializer.to_dict(self.build_job())
+        data['version'] = ProactiveJobSerializer.SCHEMA_VERSION + 1
+        self.assertRaises(ValueError, self.serializer.from_dict, data)
+        self.assertRaises(ValueError, self.serializer.loads, '{"name": "job"}')
+        self.assertRaises(ValueError, self.serializer.dumps, self.build_job(), 'xml')
+        job = ProactiveJob('job')
+        task = ProactiveTask('bash', 'task')
+        task.addDependency(ProactiveTask('bash', 'missing'))
+        job.addTask(task)
+        self.assertRaises(ValueError, self.serializer.to_dict, job)
+
+
+if __name__ == '__main__':
+    unittest.main()
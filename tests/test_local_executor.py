@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from proactive.ProactiveLocalExecutor import ProactiveLocalExecutor
+from proactive.decorators import job, task
+
+
+class LocalExecutorTestSuite(unittest.TestCase):
+    """Local executor test cases."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ProactiveLocalExecutor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def python_task(self, name, implementation, *dependencies):
+        task = self.executor.createPythonTask(name)
+        task.setTaskImplementation(implementation)
+        for dependency in dependencies:
+            task.addDependency(dependency)
+        return task
+
+    def run_job(self, *tasks, **variables):
+        job = self.executor.createJob('local_job')
+        for name, value in variables.items():
+            job.addVariable(name, value)
+        for task in tasks:
+            job.addTask(task)
+        job_id = self.executor.submitJob(job)
+        self.assertEqual(self.executor.waitForJob(job_id, timeout=60000), 'Finished')
+        return job_id
+
+    def test_dependencies_variables_and_results(self):
+        load = self.python_task('load', 'variables.put("rows", int(variables.get("SIZE")) * 2)\nresult = 1')
+        train = self.python_task('train', 'print("training on", variables.get("rows"))\nresult = results[0].value() + 1', load)
+        report = self.python_task('report', 'resultMap.put("score", results[0].value() * 10)', train)
+        job_id = self.run_job(report, train, load, SIZE='21')
+        self.assertEqual(self.executor.getTaskResult(job_id, 'train'), 2)
+        self.assertEqual(self.executor.getJobResultMap(job_id), {'score': 20})
+        self.assertEqual(self.executor.printTaskOutput(job_id, 'train'), 'training on 42')
+        self.assertIn('training on 42', self.executor.getJobOutput(job_id))
+
+    def test_replicate_and_merge(self):
+        split = self.python_task('split', 'result = 0')
+        split.setFlowScript(self.executor.createReplicateFlowScript('runs = 3'))
+        process = self.python_task('process', 'result = variables.get("PA_TASK_REPLICATION")', split)
+        merge = self.python_task('merge', 'result = sorted(r.value() for r in results)', process)
+        job_id = self.run_job(split, process, merge)
+        self.assertEqual(self.executor.getTaskResult(job_id, 'merge'), [0, 1, 2])
+        self.assertEqual(self.executor.getTaskResult(job_id, 'process*2'), 2)
+
+    def test_loop(self):
+        start = self.python_task('start', 'result = variables.get("PA_TASK_ITERATION")')
+        start.setFlowBlock(self.executor.getProactiveFlowBlockType().start())
+        end = self.python_task('end', 'variables.put("total", int(variables.get("total", 0)) + results[0].value())', start)
+        end.setFlowBlock(self.executor.getProactiveFlowBlockType().end())
+        end.setFlowScript(self.executor.createLoopFlowScript('loop = variables.get("PA_TASK_ITERATION") < 2', 'start'))
+        after = self.python_task('after', 'result = variables.get("total")', end)
+        job_id = self.run_job(start, end, after)
+        self.assertEqual(self.executor.getTaskResult(job_id, 'after'), 0 + 1 + 2)
+        self.assertEqual(self.executor.getTaskStatus(job_id, 'end#2'), 'Finished')
+
+    def test_branch(self):
+        condition = self.python_task('condition', 'branch = "else" if variables.get("MODE") == "slow" else "if"')
+        fast = self.python_task('fast', 'result = "fast"')
+        slow = self.python_task('slow', 'result = "slow"')
+        after = self.python_task('after', 'result = [r.value() for r in results]')
+        condition.setFlowScript(self.executor.createBranchFlowScript(
+            condition.getTaskImplementation(), 'fast', 'slow', 'after', script_language='cpython'))
+        job_id = self.run_job(condition, fast, slow, after, MODE='slow')
+        self.assertEqual(self.executor.getTaskStatus(job_id, 'fast'), 'Skipped')
+        self.assertEqual(self.executor.getTaskResult(job_id, 'after'), ['slow'])
+
+    def test_input_and_output_files(self):
+        with tempfile.TemporaryDirectory() as input_folder, tempfile.TemporaryDirectory() as output_folder:
+            with open(os.path.join(input_folder, 'data.txt'), 'w') as data:
+                data.write('hello')
+            task = self.executor.createTask(self.executor.getProactiveScriptLanguage().bash(), 'copy')
+            task.setTaskImplementation('tr a-z A-Z < data.txt > upper.txt; echo $variables_PA_TASK_NAME')
+            task.addInputFile('*.txt')
+            task.addOutputFile('upper.txt')
+            job = self.executor.createJob('files')
+            job.addTask(task)
+            job_id = self.executor.submitJobWithInputsAndOutputsPaths(job, input_folder, output_folder)
+            self.assertEqual(self.executor.printJobOutput(job_id), 'copy')
+            with open(os.path.join(output_folder, 'upper.txt')) as upper:
+                self.assertEqual(upper.read(), 'HELLO')
+
+    def test_faulty_task(self):
+        failing = self.python_task('failing', 'raise RuntimeError("boom")')
+        failing.setTaskErrorPolicy('cancelJob')
+        never = self.python_task('never', 'result = 1', failing)
+        job = self.executor.createJob('failing')
+        job.addTask(failing)
+        job.addTask(never)
+        job_id = self.executor.submitJob(job)
+        self.assertEqual(self.executor.waitForJob(job_id), 'Canceled')
+        self.assertEqual(self.executor.getTaskStatus(job_id, 'failing'), 'Faulty')
+        self.assertEqual(self.executor.getTaskStatus(job_id, 'never'), 'Aborted')
+        self.assertIn('RuntimeError: boom', self.executor.printTaskOutput(job_id, 'failing'))
+
+    def test_decorated_job(self):
+        @task(name='hello')
+        def hello():
+            return 'result = "hello"'
+
+        @task(name='world', depends_on=['hello'])
+        def world():
+            return 'result = results[0].value() + " world"'
+
+        @job('local_pipeline', print_job_output=False, wait=False, local=self.executor)
+        def pipeline():
+            hello()
+            world()
+
+        handle = pipeline()
+        self.assertTrue(handle.wait(timeout=60))
+        self.assertEqual(self.executor.getTaskResult(handle.getJobId(), 'world'), 'hello world')
+
+
+if __name__ == '__main__':
+    unittest.main()
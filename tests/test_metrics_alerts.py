@@ -0,0 +1,67 @@
+import unittest
+from types import SimpleNamespace
+
+from proactive.monitoring.ProactiveMetricsStore import ProactiveMetricsRingBuffer
+from proactive.monitoring.ProactiveMetricsAlerts import AlertRule, Alert, ProactiveAlertEvaluator
+
+
+class MetricsAlertsTestSuite(unittest.TestCase):
+    """Alert evaluator test cases."""
+
+    def setUp(self):
+        self.buffer = ProactiveMetricsRingBuffer(('system_cpu',), capacity=10)
+        self.received = []
+        rule = AlertRule('cpu_high', 'system_cpu', 0.8, duration=20, clear_threshold=0.6)
+        self.evaluator = ProactiveAlertEvaluator(self.buffer, [rule], sinks=[self.received.append])
+
+    def tick(self, timestamp, **cpu_by_node):
+        self.buffer.append(timestamp, {node: {'system_cpu': cpu} for node, cpu in cpu_by_node.items()})
+        return self.evaluator.evaluate(timestamp)
+
+    def test_fires_only_after_duration(self):
+        self.assertEqual(self.tick(0, a=0.9, b=0.1), [])
+        self.assertEqual(self.tick(10, a=0.9, b=0.9), [])
+        alerts = self.tick(20, a=0.9, b=0.9)
+        self.assertEqual([(alert.node, alert.state) for alert in alerts], [('a', Alert.FIRING)])
+        alerts = self.tick(30, a=0.9, b=0.9)
+        self.assertEqual([(alert.node, alert.state) for alert in alerts], [('b', Alert.FIRING)])
+        self.assertEqual(len(self.received), 2)
+
+    def test_hysteresis_and_dedup(self):
+        for timestamp in (0, 10, 20):
+            self.tick(timestamp, a=0.9)
+        self.assertEqual(self.evaluator.get_firing(), {'cpu_high': ['a']})
+        self.assertEqual(self.tick(30, a=0.7), [])
+        self.assertEqual(self.tick(40, a=0.95), [])
+        alerts = self.tick(50, a=0.5)
+        self.assertEqual([(alert.node, alert.state) for alert in alerts], [('a', Alert.RESOLVED)])
+        self.assertEqual(self.evaluator.get_firing(), {'cpu_high': []})
+
+    def test_missing_samples_do_not_fire(self):
+        self.tick(0, a=0.9)
+        self.tick(10, b=0.1)
+        self.assertEqual(self.tick(20, a=0.9), [])
+
+    def test_durations_longer_than_the_buffer_span_are_refused(self):
+        rule = AlertRule('cpu_high', 'system_cpu', 0.8, duration=100)
+        self.assertRaises(ValueError, ProactiveAlertEvaluator, self.buffer, [rule], interval=10)
+        ProactiveAlertEvaluator(self.buffer, [rule], interval=20)
+        sampler = SimpleNamespace(interval=5.0, subscribe=lambda callback: 1)
+        self.assertRaises(ValueError, ProactiveAlertEvaluator(self.buffer, [rule]).attach, sampler)
+        self.assertEqual(self.evaluator.attach(sampler), 1)
+
+    def test_reused_columns_reset_the_alert_states(self):
+        buffer = ProactiveMetricsRingBuffer(('cpu',), capacity=4)
+        evaluator = ProactiveAlertEvaluator(buffer, [AlertRule('cpu_high', 'cpu', 0.8, clear_threshold=0.6)])
+        buffer.append(0, {'old': {'cpu': 0.9}})
+        evaluator.evaluate(0)
+        self.assertEqual(evaluator.get_firing(), {'cpu_high': ['old']})
+        buffer.remove_nodes(['old'])
+        buffer.add_nodes(['new'])
+        buffer.append(1, {'new': {'cpu': 0.7}})
+        self.assertEqual(evaluator.evaluate(1), [])
+        self.assertEqual(evaluator.get_firing(), {'cpu_high': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
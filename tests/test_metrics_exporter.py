@@ -0,0 +1,93 @@
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from proactive.monitoring.exporter import CONTENT_TYPE, ProactiveMetricsExporter
+
+
+class FakeSampler:
+
+    ticks = 3
+    failed_requests = 1
+    current_interval = 15.0
+
+    def get_latest_snapshots(self):
+        return {
+            'service:jmx:rmi:///node_b': {'system_cpu': 0.25, 'heap_max': -1, 'threadcount': 12},
+            'service:jmx:rmi:///node_a': {'system_cpu': 0.5, 'heap_max': 1024, 'totalstartedthreadcount': 40},
+        }
+
+
+class FakeRestApi:
+
+    def get_scheduler_stats(self):
+        return {'RunningJobsCount': '2', 'PendingJobsCount': '5', 'TotalJobsCount': '7', 'StalledJobsCount': 'n/a'}
+
+
+class FakeMonitoringClient:
+
+    def list_proactive_jmx_urls(self):
+        return [{'proactiveJMXUrl': 'service:jmx:rmi:///node_a', 'nodeSource': 'Local "nodes"', 'hostName': 'host\\1'}]
+
+
+class FakeGateway:
+
+    def getProactiveRestApi(self):
+        return FakeRestApi()
+
+    def getProactiveMonitoringClient(self):
+        return FakeMonitoringClient()
+
+
+class MetricsExporterTestSuite(unittest.TestCase):
+    """Prometheus exporter test cases."""
+
+    def setUp(self):
+        self.exporter = ProactiveMetricsExporter(FakeGateway(), FakeSampler())
+
+    def test_render_the_text_format(self):
+        self.exporter._refresh()
+        lines = self.exporter.render().splitlines()
+        self.assertEqual(lines[:4], [
+            '# HELP proactive_node_system_cpu_load System CPU load of the node host (0-1).',
+            '# TYPE proactive_node_system_cpu_load gauge',
+            'proactive_node_system_cpu_load{node="service:jmx:rmi:///node_a",node_source="Local \\"nodes\\"",'
+            'host="host\\\\1"} 0.5',
+            'proactive_node_system_cpu_load{node="service:jmx:rmi:///node_b"} 0.25',
+        ])
+        self.assertIn('# TYPE proactive_node_threads_started_total counter', lines)
+        self.assertEqual([line for line in lines if line.startswith('proactive_node_heap_max_bytes')],
+                         ['proactive_node_heap_max_bytes{node="service:jmx:rmi:///node_a",node_source="Local \\"nodes\\"",'
+                          'host="host\\\\1"} 1024.0'])
+        self.assertEqual([line for line in lines if line.startswith('proactive_scheduler_jobs')],
+                         ['proactive_scheduler_jobs{state="pending"} 5.0',
+                          'proactive_scheduler_jobs{state="running"} 2.0'])
+        self.assertEqual(lines[-7:], [
+            'proactive_exporter_sampler_ticks_total 3',
+            '# HELP proactive_exporter_sampler_failed_requests_total Node requests that failed.',
+            '# TYPE proactive_exporter_sampler_failed_requests_total counter',
+            'proactive_exporter_sampler_failed_requests_total 1',
+            '# HELP proactive_exporter_sampler_interval_seconds Current sampling interval.',
+            '# TYPE proactive_exporter_sampler_interval_seconds gauge',
+            'proactive_exporter_sampler_interval_seconds 15.0',
+        ])
+        for line in lines:
+            self.assertTrue(line.startswith('# HELP ') or line.startswith('# TYPE ') or line.startswith('proactive_'))
+
+    def test_serve_metrics(self):
+        self.exporter.start('127.0.0.1', 0)
+        try:
+            url = 'http://127.0.0.1:{}'.format(self.exporter._server.server_address[1])
+            with urlopen(url + '/metrics', timeout=5) as response:
+                self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+                self.assertEqual(response.read().decode('utf-8'), self.exporter.render())
+            with self.assertRaises(HTTPError) as context:
+                urlopen(url + '/other', timeout=5)
+            self.assertEqual(context.exception.code, 404)
+            context.exception.close()
+        finally:
+            self.exporter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import threading
+import unittest
+
+import numpy as np
+
+from proactive.monitoring.ProactiveMetricsSampler import ProactiveMetricsSampler
+from proactive.monitoring.ProactiveMetricsStore import ProactiveMetricsRingBuffer
+
+
+class FakeMonitor:
+
+    def __init__(self, node_url, release=None):
+        self.node_url = node_url
+        self.release = release
+        self.finished = False
+
+    def get_metrics_snapshot(self):
+        if self.release is not None:
+            self.release.wait(5)
+        self.finished = True
+        return {'system_cpu': 0.5, 'heap_used': 50, 'heap_max': 200}
+
+
+class FakeMonitoringClient:
+
+    def __init__(self):
+        self.node_urls = []
+
+    def list_proactive_jmx_urls(self):
+        return [{'proactiveJMXUrl': node_url} for node_url in self.node_urls]
+
+
+class FakeGateway:
+
+    def __init__(self):
+        self.monitoring_client = FakeMonitoringClient()
+
+    def getProactiveMonitoringClient(self):
+        return self.monitoring_client
+
+
+class FakeSampler(ProactiveMetricsSampler):
+
+    release = None
+
+    def _create_monitor(self, node_url):
+        return FakeMonitor(node_url, self.release)
+
+
+class RingBufferTestSuite(unittest.TestCase):
+    """Metrics ring buffer test cases."""
+
+    def test_keeps_the_last_ticks(self):
+        buffer = ProactiveMetricsRingBuffer(('cpu', 'load'), capacity=3)
+        for tick in range(5):
+            buffer.append(float(tick), {'a': {'cpu': tick}, 'b': {'load': tick * 10}})
+        timestamps, values = buffer.field_window('cpu')
+        np.testing.assert_array_equal(timestamps, [2, 3, 4])
+        np.testing.assert_array_equal(values[:, 0], [2, 3, 4])
+        self.assertTrue(np.isnan(values[:, 1]).all())
+        self.assertEqual(buffer.latest('b'), {'load': 40.0})
+        np.testing.assert_array_equal(buffer.window(since=3)[0], [3, 4])
+
+    def test_removed_node_columns_are_reused(self):
+        buffer = ProactiveMetricsRingBuffer(('cpu',), capacity=4)
+        for generation in range(100):
+            nodes = ['node_{}_{}'.format(generation, index) for index in range(3)]
+            buffer.remove_nodes([node for node in buffer.nodes if node is not None])
+            buffer.add_nodes(nodes)
+            buffer.append(float(generation), {node: {'cpu': generation} for node in nodes})
+        self.assertEqual(buffer.window()[1].shape, (4, 3, 1))
+        self.assertEqual(buffer.nodes, ['node_99_0', 'node_99_1', 'node_99_2'])
+        _, values = buffer.node_series('node_99_1', 'cpu')
+        np.testing.assert_array_equal(values, [np.nan, np.nan, np.nan, 99])
+
+
+class MetricsSamplerTestSuite(unittest.TestCase):
+    """Metrics sampler test cases."""
+
+    def test_samples_the_nodes_and_notifies_subscribers(self):
+        sampler = FakeSampler(FakeGateway(), node_urls=['a', 'b'], interval=0.01)
+        ticked = threading.Event()
+        received = []
+        sampler.subscribe(lambda timestamp, snapshots: (received.append(snapshots), ticked.set()))
+        sampler.start()
+        try:
+            self.assertTrue(ticked.wait(5))
+        finally:
+            sampler.stop()
+        self.assertFalse(sampler.is_alive())
+        self.assertEqual(sorted(received[0]), ['a', 'b'])
+        self.assertEqual(sampler.buffer.latest('a')['heap_usage'], 0.25)
+        self.assertEqual(sampler.get_latest_snapshot('b')['system_cpu'], 0.5)
+
+    def test_discovery_follows_the_node_churn(self):
+        gateway = FakeGateway()
+        sampler = FakeSampler(gateway, interval=1)
+        for generation in range(50):
+            gateway.monitoring_client.node_urls = ['node_{}_{}'.format(generation, index) for index in range(2)]
+            sampler._discover_nodes()
+        self.assertEqual(sampler.get_node_urls(), ['node_49_0', 'node_49_1'])
+        self.assertEqual(sampler.buffer.nodes, ['node_49_0', 'node_49_1'])
+        sampler.stop()
+
+    def test_stop_waits_for_the_requests_in_flight(self):
+        sampler = FakeSampler(FakeGateway(), node_urls=['a'], interval=0.01)
+        sampler.release = threading.Event()
+        sampler._discover_nodes()
+        monitor = sampler._monitors['a']
+        sampler._sample(deadline=0)
+        self.assertIn('a', sampler._in_flight)
+        threading.Timer(0.05, sampler.release.set).start()
+        sampler.stop()
+        self.assertTrue(monitor.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
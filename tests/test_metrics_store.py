@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from proactive.monitoring.ProactiveMetricsStore import ProactiveMetricsStore
+from proactive.monitoring.ProactiveNodeMBeanClient import TimeRange
+
+
+class MetricsStoreTestSuite(unittest.TestCase):
+    """Metrics store test cases."""
+
+    node = "service:jmx:ro:///jndi/pamr://4097/rmnode"
+
+    def test_append_skips_overlapping_samples(self):
+        store = ProactiveMetricsStore(initial_capacity=2)
+        self.assertEqual(store.append(self.node, "cpu", [1, 2, 3], [10, 20, 30]), 3)
+        self.assertEqual(store.append(self.node, "cpu", [2, 3, 4, 5], [0, 0, 40, 50]), 2)
+        timestamps, values = store.series(self.node, "cpu")
+        np.testing.assert_array_equal(timestamps, [1, 2, 3, 4, 5])
+        np.testing.assert_array_equal(values, [10, 20, 30, 40, 50])
+
+    def test_ingest_history_reconstructs_timestamps(self):
+        store = ProactiveMetricsStore()
+        store.ingest_history(self.node, "cpu", [1, 2, 3, 4, 5, 6], TimeRange.MINUTE_1.seconds, end_time=1000.0)
+        timestamps, _ = store.series(self.node, "cpu")
+        np.testing.assert_allclose(timestamps, [950, 960, 970, 980, 990, 1000])
+        appended = store.ingest_history(self.node, "cpu", [5, 6, 7], 30, end_time=1010.0)
+        self.assertEqual(appended, 1)
+        self.assertEqual(store.last_timestamp(self.node, "cpu"), 1010.0)
+
+    def test_aggregations(self):
+        store = ProactiveMetricsStore()
+        store.append(self.node, "cpu", np.arange(10), [0, 1, 2, 3, np.nan, 5, 6, 7, 8, 9])
+        self.assertAlmostEqual(store.mean(self.node, "cpu", start=0, end=3), 1.5)
+        self.assertAlmostEqual(store.percentile(self.node, "cpu", 50, start=5), 7.0)
+        _, rolling = store.rolling_mean(self.node, "cpu", window=1.5)
+        np.testing.assert_allclose(rolling[:4], [0, 0.5, 1.5, 2.5])
+        self.assertEqual(rolling[4], 3.0)
+        buckets, means = store.downsample(self.node, "cpu", interval=5)
+        np.testing.assert_array_equal(buckets, [0, 5])
+        np.testing.assert_allclose(means, [1.5, 7])
+        _, maxima = store.downsample(self.node, "cpu", interval=5, agg='max')
+        np.testing.assert_array_equal(maxima, [3, 9])
+
+    def test_save_and_load(self):
+        store = ProactiveMetricsStore()
+        store.append(self.node, "cpu", [1, 2], [0.5, 0.25])
+        store.append("other", "mem", [3], [42])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics.npz")
+            store.save(path)
+            loaded = ProactiveMetricsStore.load(path)
+        self.assertEqual(loaded.keys(), store.keys())
+        np.testing.assert_array_equal(loaded.series(self.node, "cpu")[1], [0.5, 0.25])
+        self.assertEqual(loaded.prune(2), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
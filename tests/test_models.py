@@ -0,0 +1,219 @@
+import copy
+import pickle
+import unittest
+
+from proactive.model.ProactiveJob import ProactiveJob
+from proactive.model.ProactiveTask import ProactiveTask, ProactivePythonTask
+
+
+class TaskModelTestSuite(unittest.TestCase):
+    """Compact task and job model test cases."""
+
+    def test_containers_are_allocated_on_first_use(self):
+        task = ProactiveTask('bash', 'task')
+        self.assertEqual((task.getVariables(), task.getInputFiles(), task.getDependencies()), ({}, [], []))
+        self.assertFalse(hasattr(task, '__dict__'))
+        self.assertIsNone(task._variables)
+        self.assertEqual(task.getDescription(), [])
+        self.assertRaises(KeyError, task.removeVariable, 'missing')
+        task.addVariable('name', 'value')
+        task.getInputFiles().append('data.csv')
+        self.assertEqual((task.variables, task.input_files), ({'name': 'value'}, ['data.csv']))
+        task.clearVariables()
+        self.assertFalse(task.hasVariables())
+
+    def test_containers_are_modified_in_place(self):
+        job = ProactiveJob('job')
+        first, second = ProactiveTask('bash', 'first'), ProactiveTask('bash', 'second')
+        second.addVariable('name', 'value')
+        job.addTask(first)
+        fingerprint = second.getFingerprint()
+        variables = second.getVariables()
+        variables['other'] = 'value'
+        self.assertNotEqual(second.getFingerprint(), fingerprint)
+        second.generic_information['NODE'] = 'gpu'
+        second.getOutputFiles().append('out/**')
+        second.dependencies.append(first)
+        job.getVariables()['SIZE'] = '1'
+        job.job_tasks.append(second)
+        self.assertEqual(second.getVariables(), {'name': 'value', 'other': 'value'})
+        self.assertEqual((second.getGenericInformation(), second.getOutputFiles()), ({'NODE': 'gpu'}, ['out/**']))
+        self.assertEqual((second.getDependencies(), job.getVariables()), ([first], {'SIZE': '1'}))
+        self.assertIs(job.getTask('second'), second)
+        job.getTasks().remove(first)
+        self.assertEqual(job.getTasks(), [second])
+        self.assertIsNone(job.getTask('first'))
+        merge = ProactiveTask('bash', 'merge')
+        tasks = [ProactiveTask('bash', 'task_' + str(index)) for index in range(40)]
+        merge.dependencies = tasks
+        merge.getDependencies().remove(tasks[0])
+        self.assertEqual(merge.getDependencies(), tasks[1:])
+
+    def test_shared_containers_are_read_only(self):
+        job = ProactiveJob('job')
+        task = ProactiveTask('bash', 'task')
+        task.addVariable('name', 'value')
+        task.addInputFile('data.csv')
+        job.addTask(task)
+        job.addVariable('SIZE', '1')
+        copied = task.clone()
+        variant = job.clone()
+        for container in (task.getVariables(), copied.getVariables(), job.getVariables(), variant.getVariables()):
+            self.assertRaises(TypeError, container.__setitem__, 'key', 'value')
+        for container in (copied.getInputFiles(), job.getTasks(), variant.getTasks()):
+            self.assertRaises(TypeError, container.append, 'value')
+        copied.addVariable('key', 'value')
+        self.assertEqual((task.getVariables(), copied.getVariables()), ({'name': 'value'}, {'name': 'value', 'key': 'value'}))
+
+    def test_attributes_replace_the_containers(self):
+        job = ProactiveJob('job')
+        first, second = ProactiveTask('bash', 'first'), ProactiveTask('bash', 'second')
+        fingerprint = second.getFingerprint()
+        second.variables = {'name': 'value'}
+        second.input_files = ['data.csv']
+        second.dependencies = [first]
+        self.assertNotEqual(second.getFingerprint(), fingerprint)
+        second.addVariable('other', 'value')
+        self.assertEqual((second.getVariables(), second.getInputFiles()), ({'name': 'value', 'other': 'value'}, ['data.csv']))
+        self.assertEqual(second.getDependencies(), [first])
+        job.job_tasks = [first, second]
+        job.variables = {'SIZE': '1'}
+        job.addVariable('SEED', '2')
+        self.assertEqual(job.getTasks(), [first, second])
+        self.assertIs(job.getTask('second'), second)
+        self.assertEqual(job.getVariables(), {'SIZE': '1', 'SEED': '2'})
+
+    def test_python_tasks_share_their_default_generic_information(self):
+        first, second = ProactivePythonTask('first'), ProactivePythonTask('second')
+        self.assertIs(first._generic_information, second._generic_information)
+        first.addGenericInformation('NODE', 'gpu')
+        second.getGenericInformation()['NODE'] = 'cpu'
+        self.assertEqual(ProactivePythonTask('third').getGenericInformation(), {'PYTHON_COMMAND': 'python3'})
+        second.removeGenericInformation('NODE')
+        self.assertEqual(first.getGenericInformation(), {'PYTHON_COMMAND': 'python3', 'NODE': 'gpu'})
+        self.assertEqual(second.getGenericInformation(), {'PYTHON_COMMAND': 'python3'})
+
+    def test_dependencies_keep_their_order(self):
+        merge = ProactiveTask('bash', 'merge')
+        tasks = [ProactiveTask('bash', 'task_' + str(index)) for index in range(100)]
+        for task in tasks:
+            merge.addDependency(task)
+        for task in tasks[::2]:
+            merge.removeDependency(task)
+        self.assertEqual(merge.getDependencies(), tasks[1::2])
+        self.assertRaises(ValueError, merge.removeDependency, tasks[0])
+
+    def test_job_tasks_by_name(self):
+        job = ProactiveJob('job')
+        tasks = [ProactivePythonTask('task_' + str(index)) for index in range(5)]
+        for task in tasks:
+            job.addTask(task)
+        self.assertIs(job.getTask('task_3'), tasks[3])
+        job.removeTask(tasks[3])
+        self.assertIsNone(job.getTask('task_3'))
+        tasks[4].setTaskName('renamed')
+        self.assertIs(job.getTask('renamed'), tasks[4])
+        self.assertEqual(job.getTasks(), [tasks[0], tasks[1], tasks[2], tasks[4]])
+
+    def test_copy_and_pickle(self):
+        job = ProactiveJob('job')
+        first, second = ProactivePythonTask('first'), ProactivePythonTask('second')
+        second.addDependency(first)
+        job.addTask(first)
+        job.addTask(second)
+        for copied in (copy.deepcopy(job), pickle.loads(pickle.dumps(job))):
+            copied_first, copied_second = copied.getTasks()
+            self.assertEqual(copied_second.getDependencies(), [copied_first])
+            self.assertIs(copied.getTask('second'), copied_second)
+
+    def test_clones_share_the_template_until_modified(self):
+        template = ProactiveJob('template')
+        template.addVariable('SIZE', '1')
+        first, second = ProactivePythonTask('first'), ProactivePythonTask('second')
+        first.setTaskImplementation('result = 1')
+        implementation = first.getTaskImplementation()
+        second.addDependency(first)
+        template.addTask(first)
+        template.addTask(second)
+        variant = template.clone('variant')
+        variant.addVariable('SIZE', '2')
+        self.assertEqual((template.getVariables(), variant.getVariables()), ({'SIZE': '1'}, {'SIZE': '2'}))
+        self.assertRaises(TypeError, template.getVariables().__setitem__, 'SIZE', '3')
+        self.assertEqual(variant.getTasks(), [first, second])
+        updated = variant.getTaskForUpdate('first')
+        self.assertIsNot(updated, first)
+        self.assertIs(variant.getTaskForUpdate('first'), updated)
+        updated.setTaskImplementation('result = 2')
+        updated.addVariable('NAME', 'value')
+        updated_second = variant.getTask('second')
+        self.assertIsNot(updated_second, second)
+        self.assertEqual(updated_second.getDependencies(), [updated])
+        self.assertEqual((first.getTaskImplementation(), first.getVariables()), (implementation, {}))
+        self.assertEqual(second.getDependencies(), [first])
+        self.assertEqual(template.getTasks(), [first, second])
+        self.assertEqual(variant.getJobName(), 'variant')
+
+    def test_template_stays_editable(self):
+        template = ProactiveJob('template')
+        task = ProactivePythonTask('task')
+        template.addTask(task)
+        variant = template.clone()
+        template.addTask(ProactivePythonTask('added'))
+        self.assertIsNot(template.getTaskForUpdate('task'), task)
+        self.assertEqual([t.getTaskName() for t in template.getTasks()], ['task', 'added'])
+        self.assertEqual(variant.getTasks(), [task])
+        self.assertEqual(variant.clone().getTaskForUpdate('task').getTaskName(), 'task')
+
+    def test_shared_tasks_are_frozen(self):
+        template = ProactiveJob('template')
+        first, second = ProactivePythonTask('first'), ProactivePythonTask('second')
+        second.addDependency(first)
+        first.addVariable('SEED', '1')
+        variables = first.getVariables()
+        template.addTask(first)
+        template.addTask(second)
+        variant = template.clone()
+        self.assertRaises(TypeError, first.setTaskImplementation, 'result = 2')
+        self.assertRaises(TypeError, variables.__setitem__, 'SEED', '2')
+        self.assertRaises(TypeError, second.getDependencies().append, second)
+        self.assertRaises(TypeError, variant.getTask('first').addVariable, 'NAME', 'value')
+        self.assertRaises(TypeError, second.removeDependency, first)
+        self.assertRaises(TypeError, second.clearDependencies)
+        variant.getTaskForUpdate('first').addVariable('NAME', 'value')
+        template.getTaskForUpdate('second').clearDependencies()
+        self.assertEqual((first.getVariables(), second.getDependencies()), ({'SEED': '1'}, [first]))
+
+    def test_updates_copy_the_dependents_only(self):
+        template = ProactiveJob('template')
+        split, merge = ProactivePythonTask('split'), ProactivePythonTask('merge')
+        template.addTask(split)
+        for index in range(10):
+            task = ProactivePythonTask('task_' + str(index))
+            task.addDependency(split)
+            merge.addDependency(task)
+            template.addTask(task)
+        template.addTask(merge)
+        variant, other = template.clone(), template.clone()
+        updated = variant.getTaskForUpdate('task_3')
+        copied = [task for task in variant.getTasks() if task not in template.getTasks()]
+        self.assertEqual(copied, [updated, variant.getTask('merge')])
+        extra = ProactivePythonTask('extra')
+        extra.addDependency(variant.getTask('task_5'))
+        variant.addTask(extra)
+        updated_5 = variant.getTaskForUpdate('task_5')
+        self.assertEqual(extra.getDependencies(), [updated_5])
+        self.assertEqual(variant.getTask('merge').getDependencies()[3:6], [updated, variant.getTask('task_4'), updated_5])
+        variant.removeTask(updated)
+        self.assertRaises(ValueError, variant.removeTask, template.getTask('task_5'))
+        self.assertEqual(len(variant.getTasks()), 12)
+        self.assertEqual(merge.getDependencies()[3].getTaskName(), 'task_3')
+        # The dependents are indexed once for the template and all its clones
+        other.getTaskForUpdate('split')
+        self.assertIs(other._shared_tasks, variant._shared_tasks)
+        self.assertEqual(len(variant._shared_tasks.dependents(template.getTask('split'))), 10)
+        self.assertEqual(len([task for task in other.getTasks() if task not in template.getTasks()]), 12)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from py4j.protocol import Py4JError, Py4JNetworkError
+
+from proactive.ProactiveFactory import ProactiveFactory
+from proactive.ProactiveGateway import ProActiveGateway
+from proactive.model.ProactiveJobInfo import ProactiveJobInfo
+from proactive.model.ProactiveRecord import ProactiveRecord
+from proactive.model.ProactiveTaskInfo import ProactiveTaskInfo
+
+JOB_INFO_JSON = {
+    'jobId': {'id': 12, 'readableName': 'etl'}, 'jobOwner': 'alice', 'status': 'RUNNING', 'priority': 'HIGH',
+    'projectName': 'data', 'bucketName': None, 'tenant': 'lab', 'parentId': 3, 'submittedTime': 1000,
+    'startTime': 2000, 'finishedTime': -1, 'lastUpdatedTime': 2500, 'totalNumberOfTasks': 4,
+    'numberOfPendingTasks': 1, 'numberOfRunningTasks': 2, 'numberOfFinishedTasks': 1, 'numberOfFailedTasks': 0,
+    'numberOfFaultyTasks': 0, 'numberOfInErrorTasks': 0,
+}
+
+TASK_STATE_JSON = {
+    'name': 'split',
+    'taskInfo': {'taskId': {'id': 120001, 'readableName': 'split'}, 'jobId': {'id': 12}, 'taskStatus': 'FINISHED',
+                 'startTime': 2000, 'finishedTime': 2400, 'executionDuration': 400, 'executionHostName': 'node_1',
+                 'numberOfExecutionLeft': 1, 'numberOfExecutionOnFailureLeft': 2, 'progress': 100},
+}
+
+
+class JavaObject:
+    """Mimics a Java object: getters, value() and name() from a dict."""
+
+    def __init__(self, **values):
+        self.values = values
+
+    def __getattr__(self, name):
+        value = self.values[name]
+        return lambda: value
+
+
+def java_job_info():
+    return JavaObject(
+        getJobId=JavaObject(value='12', getReadableName='etl'), getJobOwner='alice',
+        getStatus=JavaObject(name='RUNNING'), getPriority=JavaObject(name='HIGH'), getProjectName='data',
+        getBucketName=None, getTenant='lab', getParentId=3, getSubmittedTime=1000, getStartTime=2000,
+        getFinishedTime=-1, getLastUpdatedTime=2500, getTotalNumberOfTasks=4, getNumberOfPendingTasks=1,
+        getNumberOfRunningTasks=2, getNumberOfFinishedTasks=1, getNumberOfFailedTasks=0, getNumberOfFaultyTasks=0,
+        getNumberOfInErrorTasks=0,
+    )
+
+
+def java_task_state():
+    task_info = JavaObject(
+        getTaskId=JavaObject(value='120001'), getJobId=JavaObject(value='12'), getStatus=JavaObject(name='FINISHED'),
+        getStartTime=2000, getFinishedTime=2400, getExecutionDuration=400, getExecutionHostName='node_1',
+        getNumberOfExecutionLeft=1, getNumberOfExecutionOnFailureLeft=2, getProgress=100,
+    )
+    return JavaObject(getName='split', getTaskInfo=task_info)
+
+
+class FakeObjectMapper:
+
+    def __init__(self, data=None, error=None):
+        self.data = data
+        self.error = error
+        self.calls = 0
+
+    def writeValueAsString(self, java_objects):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return json.dumps(self.data)
+
+
+class MissingJavaPackage:
+
+    def __getattr__(self, name):
+        raise Py4JError("{} does not exist in the JVM".format(name))
+
+
+class RecordTestSuite(unittest.TestCase):
+    """Read-only record conversion test cases."""
+
+    def setUp(self):
+        ProactiveRecord._bulk_unsupported.clear()
+        self.addCleanup(ProactiveRecord._bulk_unsupported.clear)
+
+    def test_java_and_json_forms_give_the_same_records(self):
+        job_info = ProactiveJobInfo.from_java(java_job_info())
+        self.assertEqual(ProactiveJobInfo.from_json(JOB_INFO_JSON), job_info)
+        self.assertEqual((job_info.job_id, job_info.job_name, job_info.priority, job_info.parent_id),
+                         ('12', 'etl', 'HIGH', 3))
+        task_info = ProactiveTaskInfo.from_java(java_task_state())
+        self.assertEqual(ProactiveTaskInfo.from_json(TASK_STATE_JSON), task_info)
+        self.assertEqual((task_info.task_id, task_info.job_id, task_info.status, task_info.progress),
+                         ('120001', '12', 'FINISHED', 100))
+
+    def test_from_java_list_converts_in_a_single_call(self):
+        object_mapper = FakeObjectMapper([JOB_INFO_JSON, dict(JOB_INFO_JSON, jobId={'id': 13})])
+        records = ProactiveJobInfo.from_java_list(['java list'], object_mapper)
+        self.assertEqual([record.job_id for record in records], ['12', '13'])
+        self.assertEqual(object_mapper.calls, 1)
+        self.assertEqual(ProactiveJobInfo.from_java_list([java_job_info()]), [records[0]])
+
+    def test_failed_bulk_conversion_is_not_tried_again(self):
+        object_mapper = FakeObjectMapper(error=Py4JError('cannot serialize'))
+        with self.assertLogs('ProactiveRecord', 'WARNING') as logs:
+            for _ in range(3):
+                records = ProactiveJobInfo.from_java_list([java_job_info()], object_mapper)
+                self.assertEqual(records, [ProactiveJobInfo.from_json(JOB_INFO_JSON)])
+        self.assertEqual((object_mapper.calls, len(logs.output)), (1, 1))
+        # Other record classes keep the bulk path
+        ProactiveTaskInfo.from_java_list([], FakeObjectMapper([TASK_STATE_JSON]))
+        self.assertEqual(ProactiveRecord._bulk_unsupported, {ProactiveJobInfo})
+
+    def test_network_errors_are_raised(self):
+        object_mapper = FakeObjectMapper(error=Py4JNetworkError('connection lost'))
+        self.assertRaises(Py4JNetworkError, ProactiveJobInfo.from_java_list, [java_job_info()], object_mapper)
+        self.assertEqual(ProactiveRecord._bulk_unsupported, set())
+
+    def test_create_object_mapper(self):
+        calls = []
+        object_mapper = SimpleNamespace(configure=lambda *args: calls.append(('configure',) + args),
+                                        setVisibility=lambda *args: calls.append(('setVisibility',) + args))
+        jackson = SimpleNamespace(
+            databind=SimpleNamespace(ObjectMapper=lambda: object_mapper,
+                                     SerializationFeature=SimpleNamespace(FAIL_ON_EMPTY_BEANS='FAIL_ON_EMPTY_BEANS')),
+            annotation=SimpleNamespace(PropertyAccessor=SimpleNamespace(FIELD='FIELD'),
+                                       **{'JsonAutoDetect$Visibility': SimpleNamespace(ANY='ANY')}),
+        )
+        factory = ProactiveFactory(SimpleNamespace(jvm=SimpleNamespace(com=SimpleNamespace(
+            fasterxml=SimpleNamespace(jackson=jackson)))))
+        self.assertIs(factory.create_object_mapper(), object_mapper)
+        self.assertEqual(calls, [('configure', 'FAIL_ON_EMPTY_BEANS', False), ('setVisibility', 'FIELD', 'ANY')])
+        self.assertIsNone(ProactiveFactory(SimpleNamespace(jvm=MissingJavaPackage())).create_object_mapper())
+
+    def test_get_all_jobs_as_records(self):
+        requests = []
+        page = SimpleNamespace(getList=lambda: ['java list'])
+        gateway = ProActiveGateway.__new__(ProActiveGateway)
+        gateway.proactive_scheduler_client = SimpleNamespace(
+            getJobs=lambda *args: requests.append(args) or page)
+        gateway._buildJobFilterCriteria = lambda *args: 'criteria'
+        gateway._getObjectMapper = lambda: FakeObjectMapper([JOB_INFO_JSON])
+        self.assertEqual(gateway.getAllJobs(max_number_of_jobs=10, as_records=True),
+                         [ProactiveJobInfo.from_json(JOB_INFO_JSON)])
+        self.assertEqual(gateway.getAllJobs(), ['java list'])
+        self.assertEqual(requests, [(0, 10, 'criteria', None), (0, 1000, 'criteria', None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from proactive.ProactiveLocalExecutor import ProactiveLocalExecutor
+from proactive.ProactiveResultCache import ProactiveResultCache
+from proactive.model.ProactiveJob import ProactiveJob
+from proactive.model.ProactiveTask import ProactivePythonTask
+
+
+def python_task(name, implementation, *dependencies):
+    task = ProactivePythonTask(name)
+    task.setTaskImplementation(implementation)
+    for dependency in dependencies:
+        task.addDependency(dependency)
+    return task
+
+
+def pipeline(counter_path, train_implementation='result = results[0].value() * 2'):
+    """load -> train -> report, each task counting its runs in a file."""
+    count = 'open({!r}, "a").write("{{}} ".format(variables.get("PA_TASK_NAME")))\n'.format(counter_path)
+    load = python_task('load', count + 'open("data.txt", "w").write("rows")\nresult = 21')
+    load.addOutputFile('data.txt')
+    train = python_task('train', count + train_implementation, load)
+    report = python_task('report', count + 'result = "score: {}".format(results[0].value())', train)
+    job = ProactiveJob('pipeline')
+    for task in (load, train, report):
+        job.addTask(task)
+    return job
+
+
+class VariablesMap(dict):
+    """The variables of a task, as bound in its script by the scheduler."""
+
+    def put(self, key, value):
+        self[key] = value
+
+
+class FakeGateway:
+    """A finished job, whose task results are read as a gateway reads them."""
+
+    def __init__(self, results, variables, statuses=None):
+        self.results = results
+        self.variables = variables
+        self.statuses = statuses or {}
+
+    def getJobPropagatedVariables(self, job_id):
+        return self.variables
+
+    def getTaskResult(self, job_id, task_name, timeout=60000):
+        return self.results[task_name]
+
+    def getTaskStatus(self, job_id, task_name):
+        return self.statuses.get(task_name, 'Finished')
+
+    def printTaskOutput(self, job_id, task_name, timeout=60000):
+        return task_name + ' output'
+
+
+class ResultCacheTestSuite(unittest.TestCase):
+    """Task result memoization test cases."""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = ProactiveResultCache(os.path.join(self.folder.name, 'cache'))
+        self.counter_path = os.path.join(self.folder.name, 'runs.txt')
+
+    def test_keys_follow_the_changes_downstream(self):
+        keys = self.cache.task_keys(pipeline(self.counter_path), self.folder.name)
+        self.assertEqual(list(keys), ['load', 'train', 'report'])
+        self.assertEqual(keys, self.cache.task_keys(pipeline(self.counter_path), self.folder.name))
+        changed = self.cache.task_keys(pipeline(self.counter_path, 'result = 0'), self.folder.name)
+        self.assertEqual(changed['load'], keys['load'])
+        self.assertNotEqual(changed['train'], keys['train'])
+        self.assertNotEqual(changed['report'], keys['report'])
+
+    def test_keys_of_input_files_and_flow_tasks(self):
+        job = pipeline(self.counter_path)
+        job.getTasks()[0].addInputFile('*.csv')
+        with open(os.path.join(self.folder.name, 'input.csv'), 'w') as input_file:
+            input_file.write('1')
+        before = self.cache.task_keys(job, self.folder.name)
+        with open(os.path.join(self.folder.name, 'input.csv'), 'w') as input_file:
+            input_file.write('2')
+        self.assertNotEqual(self.cache.task_keys(job, self.folder.name)['load'], before['load'])
+        job.getTasks()[1].setFlowBlock('start')
+        self.assertEqual(list(self.cache.task_keys(job, self.folder.name)), ['load'])
+
+    def test_memoize_replaces_the_cached_tasks(self):
+        job = pipeline(self.counter_path)
+        keys = self.cache.task_keys(job, self.folder.name)
+        self.cache.put(keys['load'], 21, 'loaded\n', {'ROWS': '21'})
+        memoized_job, memoized_keys, cached = self.cache.memoize(job, self.folder.name, self.folder.name)
+        self.assertEqual((memoized_keys, cached), (keys, ['load']))
+        self.assertIn('result = 21', job.getTasks()[0].getTaskImplementation())
+        bindings = {'variables': VariablesMap(PA_TASK_NAME='load')}
+        exec(memoized_job.getTasks()[0].getTaskImplementation(), bindings)
+        self.assertEqual(bindings['result'], 21)
+        self.assertEqual(bindings['variables'], {'PA_TASK_NAME': 'load', 'ROWS': '21'})
+        self.assertEqual(memoized_job.getTasks()[1].getTaskImplementation(), job.getTasks()[1].getTaskImplementation())
+
+    def test_store_job_results_with_their_variables(self):
+        job = pipeline(self.counter_path)
+        keys = self.cache.task_keys(job, self.folder.name)
+        variables = {'load': {'ROWS': '21', 'PA_JOB_ID': '7'}, 'train': {'ROWS': '21', 'MODEL': 'linear'}}
+        gateway = FakeGateway({'load': 21, 'train': 42, 'report': None}, variables, {'report': 'Faulty'})
+        self.assertEqual(self.cache.store_job_results(gateway, 7, job, keys), 2)
+        self.assertEqual(self.cache.get(keys['load']), {'result': 21, 'output': 'load output',
+                                                        'variables': {'ROWS': '21'}, 'files': []})
+        self.assertEqual(self.cache.get(keys['train'])['variables'], {'ROWS': '21', 'MODEL': 'linear'})
+        self.assertIsNone(self.cache.get(keys['report']))
+        # Without the propagated variables, restoring the tasks would change what the next tasks see
+        self.cache.clear()
+        self.assertEqual(self.cache.store_job_results(FakeGateway({}, None), 8, job, keys), 0)
+        self.assertIsNone(self.cache.get(keys['load']))
+
+    def test_local_rerun_only_runs_the_changed_tasks(self):
+        output_folder = os.path.join(self.folder.name, 'output')
+        with ProactiveLocalExecutor(max_workers=2) as executor:
+            job_id = executor.submitJobWithInputsAndOutputsPaths(pipeline(self.counter_path), self.folder.name, output_folder, result_cache=self.cache)
+            self.assertEqual(executor.cacheJobResults(job_id), 3)
+            os.remove(os.path.join(output_folder, 'data.txt'))
+
+            job_id = executor.submitJobWithInputsAndOutputsPaths(pipeline(self.counter_path, 'result = results[0].value() * 3'),
+                                                                 self.folder.name, output_folder, result_cache=self.cache)
+            self.assertEqual(executor.getTaskResult(job_id, 'report'), 'score: 63')
+            self.assertEqual(executor.cacheJobResults(job_id), 2)
+        with open(self.counter_path) as counter:
+            self.assertEqual(counter.read().split(), ['load', 'train', 'report', 'train', 'report'])
+        # The output files of the cached task are restored
+        self.assertTrue(os.path.isfile(os.path.join(output_folder, 'data.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
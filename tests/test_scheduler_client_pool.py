@@ -0,0 +1,103 @@
+import collections
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from proactive.ProactiveSchedulerClientPool import ProactiveSchedulerClientPool, warm_up_py4j_connections
+
+
+class FakeSmartProxy:
+    """Serves one call at a time, like a proxy shared by many threads."""
+
+    def __init__(self, barrier):
+        self.barrier = barrier
+        self.lock = threading.Lock()
+        self.connection_info = None
+        self.calls = []
+
+    def init(self, connection_info):
+        self.connection_info = connection_info
+
+    def isConnected(self):
+        return self.connection_info is not None
+
+    def getJobState(self, job_id):
+        with self.lock:
+            # Only passes when as many calls are running at once on the other proxies
+            self.barrier.wait(5)
+            self.calls.append(('getJobState', job_id))
+            return job_id
+
+    def submit(self, job, *args):
+        self.calls.append(('submit', job) + args)
+        return job
+
+    def isJobFinished(self, job_id):
+        self.calls.append(('isJobFinished', job_id))
+        return len(self.calls) > 2
+
+    def getJobResult(self, job_id):
+        return 'result of ' + job_id
+
+
+class FakeFactory:
+    def __init__(self, concurrent_calls):
+        self.barrier = threading.Barrier(concurrent_calls)
+        self.proxies = []
+
+    def create_smart_proxy(self):
+        self.proxies.append(FakeSmartProxy(self.barrier))
+        return self.proxies[-1]
+
+
+class SchedulerClientPoolTestSuite(unittest.TestCase):
+    """Scheduler client pool test cases."""
+
+    def setUp(self):
+        self.factory = FakeFactory(concurrent_calls=4)
+        self.pool = ProactiveSchedulerClientPool(self.factory, size=4)
+
+    def test_init_connects_all_proxies(self):
+        self.pool.init('connection-info')
+        self.assertTrue(self.pool.isConnected())
+        self.assertEqual([proxy.connection_info for proxy in self.factory.proxies], ['connection-info'] * 4)
+
+    def test_calls_run_concurrently_on_idle_proxies(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.pool.getJobState, range(8)))
+        self.assertEqual(results, list(range(8)))
+        self.assertFalse(self.factory.barrier.broken)
+        self.assertEqual(sum(len(proxy.calls) for proxy in self.factory.proxies), 8)
+
+    def test_is_connected_checks_all_proxies(self):
+        self.pool.init('connection-info')
+        self.factory.proxies[2].connection_info = None
+        self.assertFalse(self.pool.isConnected())
+
+    def test_waits_only_borrow_a_proxy_for_each_check(self):
+        pool = ProactiveSchedulerClientPool(self.factory, size=1, poll_interval=0)
+        proxy = self.factory.proxies[-1]
+        self.assertEqual(pool.waitForJob('1', 1000), 'result of 1')
+        self.assertEqual(proxy.calls, [('isJobFinished', '1')] * 3)
+        proxy.isJobFinished = lambda job_id: False
+        pool.poll_interval = 0.01
+        self.assertRaises(TimeoutError, pool.waitForJob, '2', 50)
+        with pool.borrow(timeout=0):
+            pass
+
+    def test_data_transfer_submissions_use_the_primary_proxy(self):
+        self.pool.submit('job', 'input', 'output', False, True)
+        self.assertEqual(self.factory.proxies[0].calls, [('submit', 'job', 'input', 'output', False, True)])
+
+    def test_warm_up_py4j_connections(self):
+        gateway_client = SimpleNamespace(deque=collections.deque(['idle']), _create_connection=object)
+        self.assertEqual(warm_up_py4j_connections(SimpleNamespace(_gateway_client=gateway_client), 3), 2)
+        self.assertEqual(len(gateway_client.deque), 3)
+        self.assertEqual(warm_up_py4j_connections(SimpleNamespace(_gateway_client=gateway_client), 3), 0)
+        for runtime_gateway in (SimpleNamespace(), SimpleNamespace(_gateway_client=SimpleNamespace(deque=[]))):
+            self.assertEqual(warm_up_py4j_connections(runtime_gateway, 3), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+import copy
+import json
+import unittest
+
+from proactive.ProactiveSweep import ProactiveSweep, SWEEP_VARIABLE_SETS
+
+
+class FakeEnum:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class FakeFlowBlock:
+    NONE = FakeEnum('NONE')
+    START = FakeEnum('START')
+    END = FakeEnum('END')
+
+
+class FakeVariable:
+    def __init__(self, value):
+        self.value = value
+
+    def getValue(self):
+        return self.value
+
+
+class FakeSelectionScript:
+    def __init__(self, script, parameters=None):
+        self.script = script
+        self.parameters = parameters
+
+    def getScript(self):
+        return self.script
+
+    def getParameters(self):
+        return self.parameters
+
+
+class FakeTask:
+    def __init__(self, name=None):
+        self.name = name
+        self.dependencies = []
+        self.flow_script = None
+        self.flow_block = FakeFlowBlock.NONE
+        self.script = None
+        self.variables = {}
+        self.generic_information = {}
+        self.selection_scripts = []
+
+    def getName(self):
+        return self.name
+
+    def setName(self, name):
+        self.name = name
+
+    def getDependencesList(self):
+        return self.dependencies or None
+
+    def addDependence(self, task):
+        self.dependencies.append(task)
+
+    def getFlowScript(self):
+        return self.flow_script
+
+    def setFlowScript(self, flow_script):
+        self.flow_script = flow_script
+
+    def getFlowBlock(self):
+        return self.flow_block
+
+    def setFlowBlock(self, flow_block):
+        self.flow_block = flow_block
+
+    def setScript(self, script):
+        self.script = script
+
+    def getVariables(self):
+        return {name: FakeVariable(value) for name, value in self.variables.items()}
+
+    def getGenericInformation(self):
+        return self.generic_information
+
+    def getSelectionScripts(self):
+        return self.selection_scripts
+
+    def getForkEnvironment(self):
+        return None
+
+
+class FakeJob:
+    def __init__(self, *tasks):
+        self.tasks = list(tasks)
+        self.name = 'template'
+        self.variables = {}
+
+    def getTasks(self):
+        return self.tasks
+
+    def addTask(self, task):
+        self.tasks.append(task)
+
+    def getVariables(self):
+        return {name: FakeVariable(value) for name, value in self.variables.items()}
+
+    def getGenericInformation(self):
+        return {}
+
+
+class FakeFlowScript:
+    @staticmethod
+    def createReplicateFlowScript(implementation, language):
+        return ('replicate', implementation, language)
+
+
+class FakeFactory:
+    def clone_job(self, job):
+        return copy.deepcopy(job)
+
+    def get_flow_block(self):
+        return FakeFlowBlock
+
+    def get_flow_script(self):
+        return FakeFlowScript
+
+    def create_script_task(self):
+        return FakeTask()
+
+    def create_task_script(self, simple_script):
+        return simple_script
+
+    def create_simple_script(self, implementation, language):
+        return implementation, language
+
+
+class FakeJobId:
+    def __init__(self, value):
+        self.value = value
+
+    def longValue(self):
+        return self.value
+
+
+class FakeSchedulerClient:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, job):
+        if job.variables.get('fail'):
+            raise RuntimeError('Submission refused')
+        self.submitted.append(job)
+        return FakeJobId(len(self.submitted))
+
+
+class FakeGateway:
+    def __init__(self):
+        self.proactive_scheduler_client = FakeSchedulerClient()
+        self.factory = FakeFactory()
+
+    def getProactiveFactory(self):
+        return self.factory
+
+    def _customizeJob(self, job, workflow_variables=None, workflow_generic_info=None, job_name=None, job_description=None, project_name=None, bucket_name=None, label=None, workflow_tags=None):
+        job.variables.update(workflow_variables or {})
+        if job_name:
+            job.name = job_name
+
+
+class SweepTestSuite(unittest.TestCase):
+    """Parametric sweep test cases."""
+
+    def setUp(self):
+        self.gateway = FakeGateway()
+        first, second = FakeTask('prepare'), FakeTask('train')
+        second.addDependence(first)
+        self.template = FakeJob(first, second)
+
+    def test_one_job_per_variable_set(self):
+        variable_sets = [{'lr': '0.1'}, {'lr': '0.2', 'fail': True}, {'lr': '0.3'}]
+        rows = ProactiveSweep(self.gateway, self.template, max_in_flight=2).submit(variable_sets, job_name='train_{index}')
+        self.assertEqual([row.index for row in rows], [0, 1, 2])
+        self.assertEqual([row.isSubmitted() for row in rows], [True, False, True])
+        self.assertEqual(rows[1].error, 'Submission refused')
+        submitted = self.gateway.proactive_scheduler_client.submitted
+        self.assertEqual(sorted(job.name for job in submitted), ['train_0', 'train_2'])
+        self.assertEqual(self.template.variables, {})
+
+    def test_pack_homogeneous_variable_sets(self):
+        variable_sets = [{'lr': '0.1'}, {'lr': '0.2'}, {'lr': '0.3'}]
+        rows = ProactiveSweep(self.gateway, self.template).submit(variable_sets, pack=True)
+        submitted = self.gateway.proactive_scheduler_client.submitted
+        self.assertEqual(len(submitted), 1)
+        self.assertEqual([(row.job_id, row.replication) for row in rows], [(1, 0), (1, 1), (1, 2)])
+
+        tasks = {task.name: task for task in submitted[0].tasks}
+        self.assertEqual(tasks['sweep_split'].flow_script, ('replicate', 'runs = 3', 'groovy'))
+        self.assertIs(tasks['sweep_row'].flow_block, FakeFlowBlock.START)
+        self.assertIs(tasks['train'].flow_block, FakeFlowBlock.END)
+        self.assertEqual([task.name for task in tasks['prepare'].dependencies], ['sweep_row'])
+        self.assertEqual(json.loads(submitted[0].variables[SWEEP_VARIABLE_SETS]), variable_sets)
+
+    def test_pack_falls_back_on_heterogeneous_variable_sets(self):
+        rows = ProactiveSweep(self.gateway, self.template).submit([{'lr': '0.1'}, {'epochs': '5'}], pack=True)
+        self.assertEqual(len(self.gateway.proactive_scheduler_client.submitted), 2)
+        self.assertEqual([row.replication for row in rows], [None, None])
+
+    def test_pack_falls_back_on_variables_resolved_at_submission(self):
+        sweep = ProactiveSweep(self.gateway, self.template)
+        self.template.variables['OUTPUT'] = 'runs/$lr'
+        self.assertEqual(sweep._resolved_reference(self.template, {'lr'}), "the job variable OUTPUT")
+        self.assertIsNone(sweep._resolved_reference(self.template, {'lrate'}))
+        del self.template.variables['OUTPUT']
+        self.template.tasks[0].variables['lr'] = '0.5'
+        self.assertEqual(sweep._resolved_reference(self.template, {'lr'}), "the variable lr of the task prepare")
+        self.template.tasks[0].variables.clear()
+        self.template.tasks[1].selection_scripts.append(FakeSelectionScript('selected = true', ['${lr}']))
+        rows = sweep.submit([{'lr': '0.1'}, {'lr': '0.2'}], pack=True)
+        self.assertEqual(len(self.gateway.proactive_scheduler_client.submitted), 2)
+        self.assertEqual([row.replication for row in rows], [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
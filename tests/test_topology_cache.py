@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+from proactive.monitoring.ProactiveNodeMBeanClient import ProactiveNodeMBeanClient
+from proactive.monitoring.ProactiveTopologyCache import ProactiveTopologyCache
+
+
+def node_event(node_url, node_source='Default', event_type='NODE_ADDED'):
+    return {'nodeUrl': node_url, 'proactiveJMXUrl': 'jmx:' + node_url, 'nodeSource': node_source,
+            'hostName': 'host', 'eventType': event_type}
+
+
+class FakeMonitoringClient:
+
+    def __init__(self):
+        self.events = []
+        self.requests = []
+
+    def get_rm_state_delta(self, client_counter=-1):
+        self.requests.append(client_counter)
+        start = 0 if client_counter < 0 else client_counter + 1
+        return {'nodesEvents': self.events[start:], 'latestCounter': len(self.events) - 1}
+
+
+class FakeRestApi:
+
+    def __init__(self):
+        self.models = {}
+        self.requests = 0
+
+    def fetch_rm_model(self, model):
+        self.requests += 1
+        return list(self.models.get(model, []))
+
+
+class FakeGateway:
+
+    def getBaseURL(self):
+        return 'http://server:8080'
+
+    def getSession(self):
+        return 'session'
+
+
+class TopologyCacheTestSuite(unittest.TestCase):
+    """Topology cache test cases."""
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('proactive.monitoring.ProactiveTopologyCache.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.monitoring_client = FakeMonitoringClient()
+        self.rest_api = FakeRestApi()
+        self.cache = ProactiveTopologyCache(self.monitoring_client, self.rest_api, ttl=30, negative_ttl=5)
+
+    def test_nodes_are_served_from_memory_then_refreshed_incrementally(self):
+        self.monitoring_client.events = [node_event('a'), node_event('b', 'Cloud')]
+        self.assertEqual(sorted(self.cache.get_nodes()), ['a', 'b'])
+        self.monitoring_client.events.append(node_event('a', event_type='NODE_REMOVED'))
+        self.now += 10
+        self.assertEqual(self.cache.list_node_sources(), ['Cloud', 'Default'])
+        self.now += 30
+        self.assertEqual(self.cache.list_proactive_jmx_urls(),
+                         [{'proactiveJMXUrl': 'jmx:b', 'nodeSource': 'Cloud', 'hostName': 'host'}])
+        self.assertEqual(self.monitoring_client.requests, [-1, 1])
+        self.assertEqual((self.cache.full_refreshes, self.cache.incremental_refreshes, self.cache.get_counter()),
+                         (1, 1, 2))
+
+    def test_counter_going_backwards_reloads_the_topology(self):
+        self.monitoring_client.events = [node_event('a'), node_event('b')]
+        self.cache.get_nodes()
+        self.monitoring_client.events = [node_event('c')]
+        self.assertEqual(list(self.cache.get_nodes(refresh=True)), ['c'])
+        self.assertEqual(self.monitoring_client.requests, [-1, 1, -1])
+        self.cache.invalidate('nodes')
+        self.cache.get_nodes()
+        self.assertEqual(self.monitoring_client.requests[-1], -1)
+
+    def test_empty_topology_is_only_kept_for_the_negative_ttl(self):
+        self.assertEqual(self.cache.get_nodes(), {})
+        self.now += 1
+        self.cache.get_nodes()
+        self.assertEqual(len(self.monitoring_client.requests), 1)
+        self.monitoring_client.events = [node_event('a')]
+        self.now += 5
+        self.assertEqual(list(self.cache.get_nodes()), ['a'])
+
+    def test_failed_refreshes_are_not_cached(self):
+        self.monitoring_client.get_rm_state_delta = mock.Mock(side_effect=ConnectionError('down'))
+        self.assertRaises(ConnectionError, self.cache.get_nodes)
+        self.assertRaises(ConnectionError, self.cache.get_nodes)
+        self.assertEqual(self.monitoring_client.get_rm_state_delta.call_count, 2)
+
+    def test_models_are_memoized_except_the_empty_ones(self):
+        self.rest_api.models['hosts'] = ['host_1']
+        self.assertEqual(self.cache.get_rm_model_hosts(), ['host_1'])
+        self.assertEqual(self.cache.get_rm_model_hosts(), ['host_1'])
+        self.assertEqual(self.rest_api.requests, 1)
+        self.assertEqual(self.cache.get_rm_model_tokens(), [])
+        self.now += 1
+        self.cache.get_rm_model_tokens()
+        self.assertEqual(self.rest_api.requests, 2)
+        self.rest_api.models['tokens'] = ['gpu']
+        self.now += 5
+        self.assertEqual(self.cache.get_rm_model_tokens(), ['gpu'])
+        self.assertEqual(self.cache.get_rm_model_hosts(), ['host_1'])
+        self.assertEqual(self.rest_api.requests, 3)
+        self.cache.invalidate('hosts')
+        self.cache.get_rm_model_hosts()
+        self.assertEqual(self.rest_api.requests, 4)
+
+    def test_get_rm_state_delta_sends_the_client_counter(self):
+        client = ProactiveNodeMBeanClient(FakeGateway())
+        response = mock.Mock()
+        response.json.return_value = {'nodesEvents': [], 'latestCounter': 7}
+        with mock.patch('proactive.monitoring.ProactiveNodeMBeanClient.requests.get', return_value=response) as get:
+            self.assertEqual(client.get_rm_state_delta(3), {'nodesEvents': [], 'latestCounter': 7})
+        self.assertEqual(get.call_args[0][0], 'http://server:8080/rest/rm/monitoring')
+        self.assertEqual(get.call_args[1]['headers'], {'sessionid': 'session', 'clientCounter': '3'})
+        response.raise_for_status.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
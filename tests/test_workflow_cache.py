@@ -0,0 +1,234 @@
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from py4j.protocol import Py4JError, Py4JJavaError
+
+from proactive.ProactiveFactory import ProactiveFactory
+from proactive.ProactiveGateway import ProActiveGateway
+from proactive.ProactiveWorkflowCache import ProactiveWorkflowCache
+
+
+class FakeJavaJob:
+
+    def __init__(self, source, copy_of=None):
+        self.source = source
+        self.copy_of = copy_of
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name.startswith('set'):
+            return lambda value: self.calls.append((name, value))
+        raise AttributeError(name)
+
+
+class FakeFactory:
+
+    def __init__(self):
+        self.clones = 0
+        self.parsed_files = []
+        self.fail_clone = False
+
+    def clone_job(self, job):
+        if self.fail_clone:
+            raise Py4JError('not serializable')
+        self.clones += 1
+        return FakeJavaJob(job.source, job)
+
+    def create_stax_job_factory(self):
+        return SimpleNamespace(createJob=lambda path: self.parsed_files.append(path) or FakeJavaJob(path))
+
+    def get_converter(self):
+        return SimpleNamespace()
+
+
+class FakeRestApi:
+
+    def __init__(self):
+        self.revisions = {}
+        self.metadata_requests = 0
+
+    def get_object_metadata_from_catalog(self, bucket_name, workflow_name):
+        self.metadata_requests += 1
+        revision = self.revisions.get((bucket_name, workflow_name))
+        return None if revision is None else {'commit_time_raw': revision}
+
+
+class FakeGateway:
+
+    def __init__(self):
+        self.factory = FakeFactory()
+        self.rest_api = FakeRestApi()
+        self.downloads = 0
+        self.parses = 0
+
+    def getProactiveFactory(self):
+        return self.factory
+
+    def getProactiveRestApi(self):
+        return self.rest_api
+
+    def _getWorkflowXmlFromCatalog(self, bucket_name, workflow_name):
+        self.downloads += 1
+        return '<job name="{}"/>'.format(workflow_name)
+
+    def _parseWorkflowXml(self, xml_content):
+        self.parses += 1
+        return FakeJavaJob(xml_content)
+
+
+class WorkflowCacheTestSuite(unittest.TestCase):
+    """Parsed workflow cache test cases."""
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('proactive.ProactiveWorkflowCache.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gateway = FakeGateway()
+        self.gateway.rest_api.revisions[('bucket', 'etl')] = '1'
+        self.cache = ProactiveWorkflowCache(self.gateway, revalidate_after=5)
+
+    def test_catalog_workflows_are_parsed_once_per_revision(self):
+        job, xml_content = self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual(xml_content, '<job name="etl"/>')
+        self.assertIsNone(job.copy_of)
+        first, _ = self.cache.get_catalog_workflow('bucket', 'etl')
+        second, _ = self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertIsNot(first, second)
+        self.assertIs(first.copy_of, second.copy_of)
+        self.assertEqual((self.gateway.downloads, self.gateway.parses, self.cache.hits), (1, 1, 2))
+
+        self.gateway.rest_api.revisions[('bucket', 'etl')] = '2'
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual(self.gateway.parses, 1)
+        self.now += 5
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual((self.gateway.parses, len(self.cache)), (2, 1))
+
+    def test_revisions_are_revalidated_after_the_delay(self):
+        for _ in range(10):
+            self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual(self.gateway.rest_api.metadata_requests, 1)
+        self.now += 5
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual(self.gateway.rest_api.metadata_requests, 2)
+        always = ProactiveWorkflowCache(self.gateway, revalidate_after=0)
+        always.get_catalog_workflow('bucket', 'etl')
+        always.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual(self.gateway.rest_api.metadata_requests, 4)
+
+    def test_workflows_without_revision_are_not_cached(self):
+        self.cache.get_catalog_workflow('bucket', 'unknown')
+        self.cache.get_catalog_workflow('bucket', 'unknown')
+        self.assertEqual((self.gateway.parses, len(self.cache)), (2, 0))
+
+    def test_invalidate(self):
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        self.cache.invalidate('bucket', 'etl')
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual((self.gateway.parses, self.gateway.rest_api.metadata_requests), (2, 2))
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_failed_clones_parse_the_workflow_again(self):
+        self.gateway.factory.fail_clone = True
+        self.cache.get_catalog_workflow('bucket', 'etl')
+        job, _ = self.cache.get_catalog_workflow('bucket', 'etl')
+        self.assertEqual((self.gateway.parses, job.copy_of), (3, None))
+
+    def test_file_workflows_follow_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'etl.xml')
+            with open(path, 'w') as workflow_file:
+                workflow_file.write('<job/>')
+            self.cache.get_file_workflow(path)
+            self.cache.get_file_workflow(os.path.relpath(path))
+            self.assertEqual(self.gateway.factory.parsed_files, [path])
+            with open(path, 'w') as workflow_file:
+                workflow_file.write('<job name="changed"/>')
+            self.cache.get_file_workflow(path)
+            self.assertEqual((len(self.gateway.factory.parsed_files), len(self.cache)), (2, 1))
+            self.cache.invalidate(workflow_xml_file_path=path)
+            self.assertEqual(len(self.cache), 0)
+
+    def test_concurrent_lookups(self):
+        for index in range(8):
+            self.gateway.rest_api.revisions[('bucket', 'workflow_{}'.format(index))] = '1'
+        cache = ProactiveWorkflowCache(self.gateway, max_size=4, revalidate_after=0)
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def lookup(index):
+            barrier.wait()
+            try:
+                for round in range(50):
+                    job, _ = cache.get_catalog_workflow('bucket', 'workflow_{}'.format((index + round) % 8))
+                    self.assertIsNotNone(job)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache), 4)
+        self.assertEqual(cache.hits + cache.misses, 400)
+
+
+class JobCustomizationTestSuite(unittest.TestCase):
+    """Java job copy and customization test cases."""
+
+    def test_clone_job(self):
+        clones = []
+        serialization_utils = SimpleNamespace(clone=lambda job: clones.append(job) or FakeJavaJob('copy', job))
+        jvm = SimpleNamespace(org=SimpleNamespace(apache=SimpleNamespace(commons=SimpleNamespace(
+            lang3=SimpleNamespace(SerializationUtils=serialization_utils)))))
+        job = FakeJavaJob('template')
+        copy = ProactiveFactory(SimpleNamespace(jvm=jvm)).clone_job(job)
+        self.assertEqual((copy.copy_of, clones), (job, [job]))
+
+    def test_customize_job(self):
+        gateway = ProActiveGateway.__new__(ProActiveGateway)
+        gateway.proactive_factory = FakeFactory()
+        gateway.logger = SimpleNamespace(debug=lambda message: None)
+        job = FakeJavaJob('template')
+        gateway._customizeJob(job, job_name='etl_1', job_description='Nightly run', project_name='data',
+                              bucket_name='bucket', label='batch')
+        self.assertEqual(job.calls, [('setName', 'etl_1'), ('setDescription', 'Nightly run'),
+                                     ('setProjectName', 'data'), ('setBucketName', 'bucket'), ('setLabel', 'batch')])
+        other = FakeJavaJob('template')
+        gateway._customizeJob(other)
+        self.assertEqual(other.calls, [])
+
+    def test_parse_workflow_xml(self):
+        parsed = []
+
+        def create_job(source, *args):
+            if not isinstance(source, str):
+                raise stream_error
+            with open(source) as workflow_file:
+                parsed.append(workflow_file.read())
+            return 'parsed job'
+
+        jvm = SimpleNamespace(java=SimpleNamespace(io=SimpleNamespace(ByteArrayInputStream=bytes)))
+        gateway = ProActiveGateway.__new__(ProActiveGateway)
+        gateway.runtime_gateway = SimpleNamespace(jvm=jvm)
+        gateway.proactive_factory = SimpleNamespace(
+            create_stax_job_factory=lambda: SimpleNamespace(createJob=create_job))
+        gateway.logger = SimpleNamespace(debug=lambda message: None, info=lambda message: None)
+        stream_error = Py4JError('Method createJob does not exist')
+        self.assertEqual(gateway._parseWorkflowXml('<job/>'), 'parsed job')
+        self.assertEqual(parsed, ['<job/>'])
+        stream_error = Py4JJavaError('JobCreationException', SimpleNamespace(_target_id='o1'))
+        self.assertRaises(Py4JJavaError, gateway._parseWorkflowXml, '<invalid')
+        self.assertEqual(parsed, ['<job/>'])
+
+
+if __name__ == '__main__':
+    unittest.main()